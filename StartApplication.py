@@ -24,6 +24,8 @@ from modules.UIComponents import UIComponents
 from modules.DataImporter import DataImporter
 from modules.MetadataManager import MetadataManager
 from modules.ConfigWindow import ConfigWindow
+from modules.ResourceMonitor import MESSUNGEN
+from modules.DataQuality import hat_auffaelligkeiten
 
 class StartApplication:
     """
@@ -50,6 +52,7 @@ class StartApplication:
             show_platzhalter(self): Zeigt ein Platzhalterbild an
             create_widgets(self): Erstellt UI-Widgets
             csv_import(self): Importiert CSV-Dateien
+            zeige_import_fortschritt(self, file_path, zeilen, anteil): Zeigt den Import-Fortschritt an
             aktualisiere_zeitreihen_checkboxen(self): Aktualisiert Zeitreihen-Checkboxen
             open_config(self): Öffnet das Konfigurationsfenster
             end_session(self): Beendet die Anwendungssitzung
@@ -83,7 +86,39 @@ class StartApplication:
                 "color_scheme": "spectrum",
                 "delimiter": "\\t",
                 "columns": ["DATE", "TIME", "OPEN", "HIGH", "LOW", "CLOSE", "TICKVOL", "VOL", "SPREAD"],
-                "date_format": "%Y.%m.%d %H:%M:%S"
+                "date_format": "%Y.%m.%d %H:%M:%S",
+                "import_chunk_size": 250000,
+                "merge_policy": "newest",
+                "tick_columns": ["DATE", "TIME", "BID", "ASK", "LAST", "VOLUME", "FLAGS"],
+                "tick_date_format": "%Y.%m.%d %H:%M:%S.%f",
+                "tick_intervals": ["M1"],
+                "tick_price": "bid",
+                "indicators": [],
+                "pixel_budget": 2000,
+                "load_workers": 8,
+                "prefetch_steps": 2,
+                "prefetch_cache_mb": 256,
+                "chart_server_port": 8050,
+                "replay_speed": 60,
+                "replay_fps": 20,
+                "profile_bucket_size": 0,
+                "annotation_windows": 150,
+                "annotation_max_per_window": 3,
+                "comparison_window": 288,
+                "export_dir": "exports",
+                "export_format": "parquet",
+                "slow_operation_ms": 250,
+                "status_snapshot_path": "status/resources.json",
+                "sql_memory_limit": "2GB",
+                "cache_layout": {
+                    "compression": "zstd",
+                    "compression_level": 3,
+                    "row_group_size": 131072,
+                    "sort_by_daytime": True,
+                    "use_dictionary": True,
+                    "write_statistics": True,
+                    "write_index": False
+                }
             }
             with open(self.config_path, 'w') as config_file:
                 json.dump(default_config, config_file, indent=4)
@@ -142,16 +177,62 @@ class StartApplication:
         # Funktion zum Importieren von CSV-Dateien
         file_paths = filedialog.askopenfilenames(filetypes=[("CSV files", "*.csv")])
         for file_path in file_paths:
-            df, symbol, interval, start_date, end_date = self.data_importer.import_csv(file_path)
-            if df is not None:
+            if self.data_importer.ist_tick_export(os.path.basename(file_path)):
+                self.tick_import(file_path)
+                continue
+            with MESSUNGEN.messe('import', os.path.basename(file_path)):
+                rows, symbol, interval, start_date, end_date = self.data_importer.import_csv_streaming(
+                    file_path, progress_callback=lambda nr, zeilen, anteil, fp=file_path: self.zeige_import_fortschritt(fp, zeilen, anteil))
+            self.master.title("Zeitreihen-Visualisierungs-App")
+            if rows is not None:
                 self.metadata_manager.update_metadata(symbol, interval, start_date, end_date, file_path)
                 self.ui_components.update_date_range(start_date=start_date, end_date=end_date)
                 print(f"Daten importiert für {symbol} {interval}")
+                if self.data_importer.letzter_merge is not None:
+                    merge = self.data_importer.letzter_merge
+                    messagebox.showinfo("Exporte zusammengeführt",
+                                        f"{os.path.basename(file_path)} wurde mit dem vorhandenen Cache für {symbol} {interval} zusammengeführt.\n"
+                                        f"Überlappende Zeitstempel: {merge['overlap']}\n"
+                                        f"Davon mit abweichenden Kursen: {merge['conflicts']} (Strategie '{merge['policy']}')\n"
+                                        f"Zeitraum: {start_date:%Y-%m-%d %H:%M} - {end_date:%Y-%m-%d %H:%M} ({rows} Zeilen)")
+                qualitaet = self.data_importer.letzte_qualitaet
+                if qualitaet is not None and hat_auffaelligkeiten(qualitaet):
+                    messagebox.showwarning("Datenqualität",
+                                           f"{os.path.basename(file_path)} ({symbol} {interval}) enthält Auffälligkeiten:\n"
+                                           f"Doppelte Zeitstempel: {qualitaet['duplicates']}, Rücksprünge: {qualitaet['out_of_order']}\n"
+                                           f"Nicht lesbare Werte: {qualitaet['coerced']}, Inkonsistente Bars: {qualitaet['inconsistent']}\n"
+                                           f"Lücken im Handelstag: {qualitaet['gaps']} ({qualitaet['missing_bars']} fehlende Bars)\n"
+                                           f"Details unter „Übersicht“ → „Datenqualität“.")
                 self.aktualisiere_zeitreihen_checkboxen()
 
         if file_paths:
             print(f"{len(file_paths)} Datei(en) erfolgreich importiert.")
 
+    def tick_import(self, file_path):
+        # Import eines Tick-Exports: die Ticks werden zu Bars der konfigurierten Intervalle zusammengefasst
+        with MESSUNGEN.messe('import', os.path.basename(file_path)):
+            ergebnisse = self.data_importer.import_ticks_streaming(
+                file_path, progress_callback=lambda nr, ticks, anteil, fp=file_path: self.zeige_import_fortschritt(fp, ticks, anteil, "Ticks"))
+        self.master.title("Zeitreihen-Visualisierungs-App")
+        for rows, symbol, interval, start_date, end_date in ergebnisse:
+            self.metadata_manager.update_metadata(symbol, interval, start_date, end_date, file_path)
+            self.ui_components.update_date_range(start_date=start_date, end_date=end_date)
+            print(f"Daten importiert für {symbol} {interval}")
+        statistik = self.data_importer.letzter_tick_import
+        if statistik is not None:
+            bars = ", ".join(f"{interval}: {anzahl}" for interval, anzahl in statistik['bars'].items())
+            messagebox.showinfo("Tick-Import",
+                                f"{statistik['file']}: {statistik['ticks']} Ticks in {statistik['seconds']}s "
+                                f"({statistik['ticks_per_second']} Ticks/s)\n"
+                                f"Erzeugte Bars: {bars}\nVerworfene Ticks: {statistik['discarded']}")
+        if ergebnisse:
+            self.aktualisiere_zeitreihen_checkboxen()
+
+    def zeige_import_fortschritt(self, file_path, zeilen, anteil, einheit="Zeilen"):
+        # Anzeige des Import-Fortschritts im Fenstertitel, die GUI bleibt dabei bedienbar
+        self.master.title(f"Zeitreihen-Visualisierungs-App - Import {os.path.basename(file_path)}: {anteil:.0%} ({zeilen} {einheit})")
+        self.master.update()
+
     def aktualisiere_zeitreihen_checkboxen(self):
         # Aktualisieren der Zeitreihen-Checkboxen nach dem Import
         intervalle = self.metadata_manager.metadata['available_intervals']
@@ -159,7 +240,8 @@ class StartApplication:
 
     def open_config(self):
         # Öffnen des Konfigurationsfensters
-        ConfigWindow(self.master, self.aktualisiere_zeitreihen_checkboxen, self.config_path, self.color_schemes_path)
+        ConfigWindow(self.master, self.aktualisiere_zeitreihen_checkboxen, self.config_path, self.color_schemes_path,
+                     self.ui_components.monitor)
 
     def end_session(self):
         # Beenden der Anwendungssitzung
@@ -0,0 +1,176 @@
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from modules.SafeFileIO import atomarer_zielpfad, datei_sperre
+
+# Gespeicherte Spalten; 'ende' ist bei Zeitpunkt-Ereignissen gleich 'start', 'preis' ist optional (NaN)
+ANNOTATION_SPALTEN = ['symbol', 'start', 'ende', 'art', 'text', 'preis']
+
+# Ereignisarten (andere Werte aus CSV-Dateien werden übernommen und wie 'note' dargestellt)
+ARTEN = ['buy', 'sell', 'news', 'note']
+
+# Spaltennamen in CSV-Dateien (ohne Groß-/Kleinschreibung und spitze Klammern) -> gespeicherte Spalte
+CSV_SPALTEN = {
+    'symbol': 'symbol', 'time': 'start', 'zeit': 'start', 'datetime': 'start', 'daytime': 'start', 'start': 'start',
+    'end': 'ende', 'ende': 'ende', 'type': 'art', 'typ': 'art', 'art': 'art', 'side': 'art',
+    'text': 'text', 'note': 'text', 'notiz': 'text', 'title': 'text', 'comment': 'text', 'kommentar': 'text',
+    'price': 'preis', 'preis': 'preis', 'volume': 'volumen', 'volumen': 'volumen', 'date': 'datum', 'datum': 'datum',
+}
+
+
+def normiere_art(werte):
+    # Vereinheitlicht Ereignisarten (z.B. 'Buy', 'BUY LIMIT' -> 'buy'; leer -> 'note')
+    werte = werte.fillna('note').astype(str).str.strip().str.lower()
+    for art in ('buy', 'sell'):
+        werte = werte.mask(werte.str.startswith(art), art)
+    return werte.replace('', 'note')
+
+
+def lese_annotation_csv(file_path, symbol=None, art='note'):
+    # Liest eine CSV-Datei mit Ereignissen (Trades, Nachrichten, Notizen) in das gespeicherte Format.
+    # Erkannt werden u.a. die Spalten time/datetime (oder date + time), symbol, type, text, price, volume, end;
+    # Datumsangaben im MetaTrader-Format (2024.10.01 09:30:00) werden wie ISO-Datumsangaben gelesen.
+    # symbol und art gelten für Dateien ohne die entsprechende Spalte
+    df = pd.read_csv(file_path, sep=None, engine='python', dtype=str)
+    df.columns = [CSV_SPALTEN.get(spalte.strip().strip('<>').lower(), spalte) for spalte in df.columns]
+    if 'datum' in df.columns:
+        df['start'] = df['datum'] + ' ' + df['start'] if 'start' in df.columns else df['datum']
+    if 'start' not in df.columns:
+        raise ValueError("Die Datei enthält keine Zeitspalte (time, datetime oder date)")
+    if 'symbol' not in df.columns:
+        if not symbol:
+            raise ValueError("Die Datei enthält keine Spalte 'symbol' und es wurde kein Symbol angegeben")
+        df['symbol'] = symbol
+
+    ergebnis = pd.DataFrame({'symbol': df['symbol'].astype(str).str.strip()})
+    ergebnis['start'] = pd.to_datetime(df['start'].str.replace('.', '-', n=2, regex=False), errors='coerce')
+    ergebnis['ende'] = (pd.to_datetime(df['ende'].str.replace('.', '-', n=2, regex=False), errors='coerce')
+                        if 'ende' in df.columns else pd.NaT)
+    ergebnis['ende'] = ergebnis['ende'].fillna(ergebnis['start'])
+    ergebnis['art'] = normiere_art(df['art']) if 'art' in df.columns else art
+    text = df['text'].fillna('') if 'text' in df.columns else pd.Series('', index=df.index)
+    if 'volumen' in df.columns:
+        text = (ergebnis['art'] + ' ' + df['volumen'].fillna('') + ' ' + text).str.strip()
+    ergebnis['text'] = text
+    ergebnis['preis'] = pd.to_numeric(df['preis'], errors='coerce') if 'preis' in df.columns else np.nan
+    ungueltig = ergebnis['start'].isna() | (ergebnis['symbol'] == '')
+    if ungueltig.any():
+        print(f"{int(ungueltig.sum())} Ereignisse ohne gültigen Zeitpunkt/Symbol übersprungen")
+    return ergebnis[~ungueltig][ANNOTATION_SPALTEN]
+
+
+class AnnotationStore:
+    """
+        Ereignisse (Trades, Nachrichten, Notizen) je Symbol mit Zeitindex, gespeichert neben dem Katalog.
+
+        Alle Ereignisse liegen in einer Parquet-Datei (Standard: config/annotations.parquet), sortiert
+        nach Symbol und Startzeitpunkt. Im Speicher wird je Symbol ein sortierter Index gehalten: die
+        Ereignisse eines sichtbaren Bereichs [von, bis] werden per Binärsuche bestimmt (O(log n + k)).
+        Ereignisse mit Dauer (start < ende) werden über die längste Dauer des Symbols mitgefunden, auch
+        wenn sie vor 'von' beginnen. Schreibt eine andere Instanz die Datei, wird der Index beim
+        nächsten Zugriff neu geladen.
+
+        Methoden:
+            importiere_csv(file_path, symbol, art): Übernimmt die Ereignisse einer CSV-Datei (Duplikate werden verworfen).
+            fuege_hinzu(symbol, zeitpunkt, text, art, preis, ende): Fügt ein einzelnes Ereignis hinzu (z.B. eine Notiz).
+            im_bereich(symbol, von, bis, arten): Ereignisse, die den Bereich berühren.
+            ausduennen(ereignisse, von, bis, fenster, max_je_fenster): Begrenzung der Dichte für die Darstellung.
+        """
+
+    def __init__(self, path='config/annotations.parquet'):
+        # Initialisierung mit dem Pfad der Ereignisdatei; der Index wird beim ersten Zugriff geladen
+        self.path = path
+        self.stand = None
+        self.index = {}
+
+    def lade_index(self):
+        # Index je Symbol: (sortierte Startzeitpunkte in ns, Ereignisse, längste Dauer in ns)
+        try:
+            stand = os.stat(self.path).st_mtime_ns
+        except OSError:
+            stand = None
+        if stand == self.stand:
+            return self.index
+        self.index = {}
+        if stand is not None:
+            with datei_sperre(self.path, exklusiv=False):
+                alle = pq.read_table(self.path).to_pandas()
+            for symbol, ereignisse in alle.groupby('symbol', sort=False):
+                ereignisse = ereignisse.sort_values('start', kind='stable').reset_index(drop=True)
+                starts = ereignisse['start'].to_numpy().astype('datetime64[ns]').view('int64')
+                dauer = (ereignisse['ende'] - ereignisse['start']).max()
+                self.index[symbol] = (starts, ereignisse, int(dauer.value) if pd.notna(dauer) else 0)
+        self.stand = stand
+        return self.index
+
+    def symbole(self):
+        # Symbole mit Ereignissen
+        return sorted(self.lade_index())
+
+    def anzahl(self, symbol=None):
+        # Anzahl gespeicherter Ereignisse (eines Symbols oder insgesamt)
+        index = self.lade_index()
+        return sum(len(index[s][0]) for s in ([symbol] if symbol else index) if s in index)
+
+    def im_bereich(self, symbol, von, bis, arten=None):
+        # Ereignisse eines Symbols, die [von, bis] berühren (Binärsuche im sortierten Index)
+        eintrag = self.lade_index().get(symbol)
+        if eintrag is None:
+            return pd.DataFrame(columns=ANNOTATION_SPALTEN)
+        starts, ereignisse, dauer = eintrag
+        von_ns, bis_ns = pd.Timestamp(von).value, pd.Timestamp(bis).value
+        links = int(np.searchsorted(starts, von_ns - dauer, side='left'))
+        rechts = int(np.searchsorted(starts, bis_ns, side='right'))
+        treffer = ereignisse.iloc[links:rechts]
+        if dauer:
+            treffer = treffer[treffer['ende'] >= pd.Timestamp(von)]
+        if arten:
+            treffer = treffer[treffer['art'].isin(arten)]
+        return treffer
+
+    def importiere_csv(self, file_path, symbol=None, art='note'):
+        # Übernimmt die Ereignisse einer CSV-Datei; Rückgabe: Anzahl neuer Ereignisse
+        return self.speichere(lese_annotation_csv(file_path, symbol, art))
+
+    def fuege_hinzu(self, symbol, zeitpunkt, text, art='note', preis=None, ende=None):
+        # Fügt ein einzelnes Ereignis hinzu (z.B. eine manuelle Notiz)
+        start = pd.Timestamp(zeitpunkt)
+        neu = pd.DataFrame({'symbol': [symbol], 'start': [start], 'ende': [pd.Timestamp(ende) if ende else start],
+                            'art': [art], 'text': [text], 'preis': [np.nan if preis is None else float(preis)]})
+        return self.speichere(neu)
+
+    def speichere(self, neu):
+        # Read-Modify-Write unter exklusiver Sperre; Duplikate (gleiche Werte in allen Spalten) werden verworfen
+        verzeichnis = os.path.dirname(self.path)
+        if verzeichnis and not os.path.exists(verzeichnis):
+            os.makedirs(verzeichnis, exist_ok=True)
+        with datei_sperre(self.path, exklusiv=True):
+            alt = pq.read_table(self.path).to_pandas() if os.path.exists(self.path) else None
+            alle = pd.concat([alt, neu], ignore_index=True) if alt is not None else neu
+            alle = alle.astype({'start': 'datetime64[ns]', 'ende': 'datetime64[ns]', 'preis': 'float64'})
+            alle = alle.drop_duplicates(ANNOTATION_SPALTEN).sort_values(['symbol', 'start'], kind='stable')
+            with atomarer_zielpfad(self.path) as temp_path:
+                pq.write_table(pa.Table.from_pandas(alle[ANNOTATION_SPALTEN], preserve_index=False), temp_path)
+        anzahl_neu = len(alle) - (len(alt) if alt is not None else 0)
+        print(f"{anzahl_neu} neue Ereignisse gespeichert ({len(alle)} insgesamt)")
+        return anzahl_neu
+
+    @staticmethod
+    def ausduennen(ereignisse, von, bis, fenster=150, max_je_fenster=3):
+        # Teilt [von, bis] in 'fenster' gleich breite Zeitfenster. Je Fenster und Art bleiben höchstens
+        # 'max_je_fenster' Ereignisse einzeln erhalten; die übrigen werden zu einem Cluster zusammengefasst.
+        # Rückgabe: (einzelne Ereignisse, Cluster mit daytime (Fenstermitte), art, anzahl, preis (Mittelwert))
+        if ereignisse.empty:
+            return ereignisse, pd.DataFrame(columns=['daytime', 'art', 'anzahl', 'preis'])
+        von_ns, bis_ns = pd.Timestamp(von).value, pd.Timestamp(bis).value
+        breite = max((bis_ns - von_ns) / fenster, 1.0)
+        starts = ereignisse['start'].to_numpy().astype('datetime64[ns]').view('int64')
+        nummer = np.clip(((starts - von_ns) / breite).astype('int64'), 0, fenster - 1)
+        rang = ereignisse.assign(fenster=nummer).groupby(['fenster', 'art'], sort=False).cumcount().to_numpy()
+        einzeln = ereignisse[rang < max_je_fenster]
+        rest = ereignisse.assign(fenster=nummer)[rang >= max_je_fenster]
+        cluster = rest.groupby(['fenster', 'art'], sort=True).agg(anzahl=('start', 'size'), preis=('preis', 'mean')).reset_index()
+        cluster['daytime'] = pd.to_datetime(von_ns + ((cluster['fenster'] + 0.5) * breite).astype('int64'))
+        return einzeln, cluster[['daytime', 'art', 'anzahl', 'preis']]
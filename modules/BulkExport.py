@@ -0,0 +1,196 @@
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from modules.MetadataManager import interval_sort_key
+from modules.ParquetCache import CACHE_DIR, serien_pfad, serien_sperre
+from modules.SafeFileIO import atomarer_zielpfad
+from modules.TimeSeriesStore import zeitraum
+
+# Zielformate und Dateiendungen
+EXPORT_FORMATE = {'parquet': 'parquet', 'csv': 'csv', 'arrow': 'arrow'}
+
+# Format der Zeitstempel in CSV-Exporten
+CSV_ZEITFORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def export_dateiname(symbol, interval, start, end, format):
+    # Dateiname eines Exports, z.B. DE40_M1_2024-03-01_2024-03-31.csv
+    teile = [symbol, interval, str(start or 'anfang'), str(end or 'ende')]
+    return '_'.join(teil.replace(' ', 'T').replace(':', '') for teil in teile) + '.' + EXPORT_FORMATE[format]
+
+
+def row_groups_im_bereich(parquet_file, von, bis):
+    # Row-Groups, deren daytime-Statistik [von, bis] berührt (ohne Statistik: alle)
+    spalte = parquet_file.schema_arrow.get_field_index('daytime')
+    gruppen = []
+    for i in range(parquet_file.metadata.num_row_groups):
+        statistik = parquet_file.metadata.row_group(i).column(spalte).statistics
+        if statistik is not None and statistik.has_min_max:
+            if statistik.max < von or statistik.min > bis:
+                continue
+        gruppen.append(i)
+    return gruppen
+
+
+class ExportZiel:
+    """
+        Schreibt Arrow-Tabellen blockweise in eine Parquet-, CSV- oder Arrow-IPC-Datei.
+
+        Der erste Block legt das Schema fest; in CSV-Dateien werden Zeitstempel als Text
+        (CSV_ZEITFORMAT) geschrieben. Die Datei entsteht unter einem temporären Namen und wird
+        erst nach dem letzten Block an ihren Zielort verschoben (atomarer_zielpfad).
+
+        Methoden:
+            schreibe(tabelle): Hängt einen Block an.
+            schliesse(): Schließt die Datei.
+        """
+
+    def __init__(self, temp_path, format):
+        # Initialisierung mit temporärem Pfad und Zielformat; der Writer entsteht mit dem ersten Block
+        if format not in EXPORT_FORMATE:
+            raise ValueError(f"Unbekanntes Format '{format}' (erlaubt: {', '.join(EXPORT_FORMATE)})")
+        self.temp_path = temp_path
+        self.format = format
+        self.writer = None
+
+    def schreibe(self, tabelle):
+        # Block schreiben
+        if self.format == 'csv':
+            tabelle = pa.table({name: pc.strftime(pc.cast(spalte, pa.timestamp('s', spalte.type.tz), safe=False), format=CSV_ZEITFORMAT) if pa.types.is_timestamp(spalte.type) else spalte
+                                for name, spalte in zip(tabelle.column_names, tabelle.columns)})
+        if self.writer is None:
+            if self.format == 'parquet':
+                self.writer = pq.ParquetWriter(self.temp_path, tabelle.schema, compression='zstd')
+            elif self.format == 'csv':
+                self.writer = pa_csv.CSVWriter(self.temp_path, tabelle.schema)
+            else:
+                self.writer = pa.ipc.new_file(self.temp_path, tabelle.schema)
+        self.writer.write_table(tabelle)
+
+    def schliesse(self):
+        # Datei schließen (ohne Block entsteht keine Datei)
+        if self.writer is not None:
+            self.writer.close()
+
+
+class BulkExport:
+    """
+        Export von Ausschnitten des Parquet-Caches (Symbol, Intervalle, Zeitraum, Spalten) nach
+        Parquet, CSV oder Arrow (IPC-Datei, z.B. für pyarrow.ipc.open_file oder Polars).
+
+        Jede Zeitreihe wird Row-Group für Row-Group gelesen und direkt in das Zielformat geschrieben;
+        Row-Groups außerhalb des Zeitraums werden anhand ihrer Statistiken übersprungen, die Ränder
+        werden vektorisiert gefiltert. Der Speicherbedarf hängt damit nur von der Row-Group-Größe ab.
+        Mehrere Zeitreihen werden parallel exportiert (Dekodieren und Kodieren geben die GIL frei).
+        Während eines Exports hält jede Zeitreihe eine gemeinsame Sperre, ein gleichzeitiger Import
+        ersetzt die Datei nicht während des Lesens.
+
+        Methoden:
+            exportiere(symbol, intervals, start, end, columns, format, ziel_dir): Exportiert mehrere Intervalle.
+            exportiere_serie(symbol, interval, ...): Exportiert eine Zeitreihe.
+        """
+
+    def __init__(self, cache_dir=CACHE_DIR, workers=4):
+        # Initialisierung mit Cache-Verzeichnis und Anzahl paralleler Exporte
+        self.cache_dir = cache_dir
+        self.data_dir = os.path.join(cache_dir, 'data')
+        self.meta_dir = os.path.join(cache_dir, 'meta')
+        self.workers = max(1, int(workers))
+
+    def exportiere(self, symbol, intervals, start=None, end=None, columns=None, format='parquet', ziel_dir='exports',
+                   progress_callback=None):
+        # Exportiert alle Intervalle eines Symbols; Rückgabe: Liste der Ergebnisse je Zeitreihe und Gesamtergebnis.
+        # progress_callback(interval, zeilen) wird nach jeder Row-Group aufgerufen (aus den Export-Threads)
+        intervals = sorted(intervals, key=interval_sort_key)
+        if not os.path.exists(ziel_dir):
+            os.makedirs(ziel_dir, exist_ok=True)
+        beginn = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(len(intervals), self.workers) or 1) as executor:
+            ergebnisse = list(executor.map(
+                lambda interval: self.exportiere_serie(symbol, interval, start, end, columns, format, ziel_dir,
+                                                       progress_callback), intervals))
+        dauer = time.perf_counter() - beginn
+        zeilen = sum(ergebnis['zeilen'] for ergebnis in ergebnisse)
+        gesamt = {'zeilen': zeilen, 'sekunden': dauer, 'zeilen_pro_sekunde': zeilen / dauer if dauer > 0 else 0.0,
+                  'bytes': sum(ergebnis['bytes'] for ergebnis in ergebnisse)}
+        print(f"Export {symbol} {intervals}: {zeilen} Zeilen in {dauer:.2f}s ({gesamt['zeilen_pro_sekunde']:,.0f} Zeilen/s)")
+        return ergebnisse, gesamt
+
+    def exportiere_serie(self, symbol, interval, start=None, end=None, columns=None, format='parquet', ziel_dir='exports',
+                         progress_callback=None):
+        # Exportiert eine Zeitreihe; Rückgabe: Dictionary mit Pfad, Zeilen, Bytes und Dauer (Pfad None ohne Daten)
+        quelle = serien_pfad(symbol, interval, self.data_dir)
+        if not os.path.exists(quelle):
+            raise FileNotFoundError(f"Keine Daten für {symbol}_{interval} im Cache")
+        von, bis, _ = zeitraum(start, end)
+        ziel = os.path.join(ziel_dir, export_dateiname(symbol, interval, start, end, format))
+        beginn = time.perf_counter()
+        zeilen = 0
+
+        with serien_sperre(symbol, interval, meta_dir=self.meta_dir):
+            parquet_file = pq.ParquetFile(quelle)
+            spalten = None
+            if columns:
+                spalten = ['daytime'] + [spalte for spalte in columns if spalte != 'daytime']
+                fehlend = [spalte for spalte in spalten if spalte not in parquet_file.schema_arrow.names]
+                if fehlend:
+                    raise ValueError(f"Spalten nicht vorhanden in {symbol}_{interval}: {', '.join(fehlend)}")
+            try:
+                with atomarer_zielpfad(ziel) as temp_path:
+                    export_ziel = ExportZiel(temp_path, format)
+                    try:
+                        for gruppe in row_groups_im_bereich(parquet_file, von, bis):
+                            tabelle = parquet_file.read_row_group(gruppe, columns=spalten)
+                            zeit = tabelle.column('daytime')
+                            maske = pc.and_(pc.greater_equal(zeit, pa.scalar(von, zeit.type)),
+                                            pc.less_equal(zeit, pa.scalar(bis, zeit.type)))
+                            tabelle = tabelle.filter(maske)
+                            if tabelle.num_rows == 0:
+                                continue
+                            export_ziel.schreibe(tabelle)
+                            zeilen += tabelle.num_rows
+                            if progress_callback is not None:
+                                progress_callback(interval, zeilen)
+                    finally:
+                        export_ziel.schliesse()
+                    if zeilen == 0:
+                        # Ohne Daten im Bereich entsteht keine (leere) Zieldatei
+                        raise LookupError
+            except LookupError:
+                print(f"Export {symbol}_{interval}: keine Daten im Bereich")
+                return {'symbol': symbol, 'interval': interval, 'pfad': None, 'zeilen': 0, 'bytes': 0,
+                        'sekunden': time.perf_counter() - beginn, 'zeilen_pro_sekunde': 0.0}
+        dauer = time.perf_counter() - beginn
+        ergebnis = {'symbol': symbol, 'interval': interval, 'pfad': ziel, 'zeilen': zeilen,
+                    'bytes': os.path.getsize(ziel), 'sekunden': dauer,
+                    'zeilen_pro_sekunde': zeilen / dauer if dauer > 0 else 0.0}
+        print(f"Export {symbol}_{interval} -> {ziel}: {zeilen} Zeilen ({ergebnis['zeilen_pro_sekunde']:,.0f} Zeilen/s)")
+        return ergebnis
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export von Ausschnitten des Zeitreihen-Caches")
+    parser.add_argument('symbol')
+    parser.add_argument('intervals', help="Kommagetrennt, z.B. M1,M5")
+    parser.add_argument('--start', help="Tag (2024-03-01) oder Zeitpunkt (2024-03-01 09:00)")
+    parser.add_argument('--end', help="Tag (inklusive) oder Zeitpunkt")
+    parser.add_argument('--columns', help="Kommagetrennt, z.B. OPEN,HIGH,LOW,CLOSE,TICKVOL (daytime ist immer enthalten)")
+    parser.add_argument('--format', default='parquet', choices=sorted(EXPORT_FORMATE))
+    parser.add_argument('--output', default='exports', help="Zielverzeichnis")
+    parser.add_argument('--workers', type=int, default=4, help="Anzahl parallel exportierter Zeitreihen")
+    parser.add_argument('--cache', default=CACHE_DIR, help="Cache-Verzeichnis")
+    args = parser.parse_args()
+
+    cli_export = BulkExport(args.cache, args.workers)
+    cli_ergebnisse, cli_gesamt = cli_export.exportiere(args.symbol, args.intervals.split(','), args.start, args.end,
+                                                       args.columns.split(',') if args.columns else None, args.format,
+                                                       args.output)
+    for cli_ergebnis in cli_ergebnisse:
+        print(f"{cli_ergebnis['pfad'] or cli_ergebnis['interval'] + ': keine Daten im Bereich'}")
+    print(f"Gesamt: {cli_gesamt['zeilen']} Zeilen, {cli_gesamt['bytes'] / 1024 ** 2:.1f} MB in {cli_gesamt['sekunden']:.2f}s "
+          f"({cli_gesamt['zeilen_pro_sekunde']:,.0f} Zeilen/s)")
@@ -0,0 +1,168 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from modules.DayIndex import DayIndex
+from modules.ParquetCache import lade_serien_meta, lese_zeilenbereich, serien_pfad
+
+# Standard-Layout des Parquet-Caches (Eintrag "cache_layout" in config.json)
+STANDARD_LAYOUT = {
+    "compression": "zstd",
+    "compression_level": 3,
+    "row_group_size": 131072,
+    "sort_by_daytime": True,
+    "use_dictionary": True,
+    "write_statistics": True,
+    "write_index": False
+}
+
+# Verfügbare Codecs für die Auswahl im Konfigurationsfenster
+CODECS = ["zstd", "snappy", "lz4", "gzip", "brotli", "none"]
+
+# Layouts, die im Benchmark-Modus miteinander verglichen werden
+BENCHMARK_LAYOUTS = {
+    "snappy_128k": {"compression": "snappy", "compression_level": None, "row_group_size": 131072},
+    "zstd3_128k": {"compression": "zstd", "compression_level": 3, "row_group_size": 131072},
+    "zstd9_128k": {"compression": "zstd", "compression_level": 9, "row_group_size": 131072},
+    "zstd3_16k": {"compression": "zstd", "compression_level": 3, "row_group_size": 16384},
+    "zstd3_1m": {"compression": "zstd", "compression_level": 3, "row_group_size": 1048576},
+    "none_128k": {"compression": "none", "compression_level": None, "row_group_size": 131072},
+}
+
+
+def lade_layout(config):
+    # Layout aus der Konfiguration, fehlende Einträge werden mit Standardwerten ergänzt
+    layout = dict(STANDARD_LAYOUT)
+    layout.update(config.get('cache_layout', {}) if config else {})
+    return layout
+
+
+def writer_optionen(layout):
+    # Optionen für pyarrow.parquet.ParquetWriter aus einem Layout
+    codec = layout.get('compression') or 'none'
+    optionen = {
+        "compression": codec,
+        "use_dictionary": bool(layout.get('use_dictionary', True)),
+        "write_statistics": bool(layout.get('write_statistics', True)),
+    }
+    if codec in ('zstd', 'gzip', 'brotli') and layout.get('compression_level') is not None:
+        optionen["compression_level"] = int(layout['compression_level'])
+    return optionen
+
+
+class RowGroupWriter:
+    """
+        Schreibt Tabellen blockweise in eine Parquet-Datei, wobei Row-Groups unabhängig von der
+        Größe der einzelnen Blöcke genau 'row_group_size' Zeilen enthalten (bis auf die letzte).
+        Es werden höchstens eine Row-Group plus ein Block im Speicher gehalten.
+        """
+
+    def __init__(self, path, schema, layout):
+        # Initialisierung des Writers mit den Optionen des Layouts
+        self.writer = pq.ParquetWriter(path, schema, **writer_optionen(layout))
+        self.schema = self.writer.schema
+        self.row_group_size = int(layout.get('row_group_size') or STANDARD_LAYOUT['row_group_size'])
+        self.puffer = []
+        self.gepuffert = 0
+
+    def write_table(self, table):
+        # Puffert den Block und schreibt alle vollständigen Row-Groups
+        self.puffer.append(table.cast(self.schema))
+        self.gepuffert += table.num_rows
+        if self.gepuffert >= self.row_group_size:
+            gesamt = pa.concat_tables(self.puffer)
+            vollstaendig = (gesamt.num_rows // self.row_group_size) * self.row_group_size
+            self.writer.write_table(gesamt.slice(0, vollstaendig), row_group_size=self.row_group_size)
+            rest = gesamt.slice(vollstaendig)
+            self.puffer = [rest] if rest.num_rows else []
+            self.gepuffert = rest.num_rows
+
+    def close(self):
+        # Schreibt den Rest und schließt die Datei
+        if self.gepuffert:
+            self.writer.write_table(pa.concat_tables(self.puffer), row_group_size=self.row_group_size)
+        self.puffer = []
+        self.gepuffert = 0
+        self.writer.close()
+
+
+def schreibe_parquet(table, path, layout):
+    # Schreibt eine vollständige Tabelle mit dem angegebenen Layout
+    optionen = writer_optionen(layout)
+    pq.write_table(table, path, row_group_size=int(layout.get('row_group_size') or STANDARD_LAYOUT['row_group_size']),
+                   **optionen)
+
+
+def sortiere_parquet(path, layout):
+    # Sortiert eine Parquet-Datei stabil nach 'daytime' und schreibt sie mit dem Layout neu.
+    # Hinweis: die Datei wird dafür vollständig geladen; sortierte Exporte (Normalfall) sind nicht betroffen.
+    table = pq.read_table(path)
+    table = table.take(pc.sort_indices(table, sort_keys=[('daytime', 'ascending')]))
+    schreibe_parquet(table, path, layout)
+    return table['daytime'].to_numpy()
+
+
+def benchmark_layouts(symbol, interval, layouts=None, wiederholungen=5):
+    # Schreibt eine Zeitreihe mit mehreren Layouts und misst Dateigröße und Leselatenz typischer Chart-Fenster.
+    # Rückgabe: Liste von Dictionaries (layout, groesse_mb, schreiben_s, fenster -> Millisekunden)
+    layouts = layouts or BENCHMARK_LAYOUTS
+    meta = lade_serien_meta(symbol, interval)
+    index = DayIndex.from_meta(meta)
+    if index is None:
+        raise FileNotFoundError(f"Kein Tagesindex für {symbol}_{interval} vorhanden")
+    tage = index.handelstage()
+    fenster = {
+        "1 Tag": (tage[len(tage) // 2], tage[len(tage) // 2]),
+        "5 Tage": (tage[max(len(tage) // 2 - 4, 0)], tage[len(tage) // 2]),
+        "1 Monat": (tage[max(len(tage) // 2 - 21, 0)], tage[len(tage) // 2]),
+        "Gesamt": (tage[0], tage[-1]),
+    }
+    table = pq.read_table(serien_pfad(symbol, interval))
+    ergebnisse = []
+    temp_dir = tempfile.mkdtemp(prefix='zeitreihen_benchmark_')
+    try:
+        for name, layout_aenderung in layouts.items():
+            layout = dict(STANDARD_LAYOUT)
+            layout.update(layout_aenderung)
+            path = os.path.join(temp_dir, f"{name}.parquet")
+            start = time.perf_counter()
+            schreibe_parquet(table, path, layout)
+            ergebnis = {"layout": name, "groesse_mb": round(os.path.getsize(path) / 1024 ** 2, 2),
+                        "schreiben_s": round(time.perf_counter() - start, 3)}
+            for fenster_name, (von, bis) in fenster.items():
+                erste, letzte = index.zeilenbereich(von, bis)
+                messungen = []
+                for _ in range(wiederholungen):
+                    start = time.perf_counter()
+                    lese_zeilenbereich(path, erste, letzte, columns=['daytime', 'CLOSE'])
+                    messungen.append(time.perf_counter() - start)
+                ergebnis[fenster_name] = round(float(np.median(messungen)) * 1000, 2)
+            ergebnisse.append(ergebnis)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return ergebnisse
+
+
+def formatiere_benchmark(ergebnisse):
+    # Tabellarische Textausgabe der Benchmark-Ergebnisse
+    if not ergebnisse:
+        return ""
+    spalten = list(ergebnisse[0].keys())
+    zeilen = [" | ".join(f"{spalte:>12}" for spalte in spalten)]
+    for ergebnis in ergebnisse:
+        zeilen.append(" | ".join(f"{str(ergebnis[spalte]):>12}" for spalte in spalten))
+    return "\n".join(zeilen)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark verschiedener Parquet-Layouts für eine Zeitreihe")
+    parser.add_argument('serie', help="Zeitreihe im Format SYMBOL_INTERVALL, z.B. DE40_M1")
+    args = parser.parse_args()
+    benchmark_symbol, benchmark_interval = args.serie.rsplit('_', 1)
+    print("Lesezeiten in Millisekunden (Median)")
+    print(formatiere_benchmark(benchmark_layouts(benchmark_symbol, benchmark_interval)))
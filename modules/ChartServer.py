@@ -0,0 +1,390 @@
+import argparse
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+import pandas as pd
+from modules.ParquetCache import CACHE_DIR
+from modules.ReplayEngine import ReplayEngine, frame_als_json
+from modules.TimeSeriesStore import TimeSeriesStore
+
+# Die HTML-Seite lädt beim Zoomen nur den sichtbaren Bereich in passender Auflösung nach
+SEITE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Zeitreihen-Chart-Server</title>
+<script src="/plotly.js"></script>
+<style>html, body {margin: 0; height: 100%;} #chart {width: 100%; height: 100%;}</style>
+</head>
+<body>
+<div id="chart"></div>
+<script>
+const parameter = new URLSearchParams(window.location.search);
+const symbol = parameter.get('symbol');
+const intervalle = (parameter.get('intervals') || '').split(',').filter(Boolean);
+const chart = document.getElementById('chart');
+let farben = {};
+let anfrage = 0;
+
+async function lade(von, bis) {
+    const nummer = ++anfrage;
+    const punkte = Math.max(200, Math.round(chart.clientWidth));
+    const antworten = await Promise.all(intervalle.map(interval => {
+        const url = `/api/range?symbol=${symbol}&interval=${interval}&points=${punkte}` +
+            (von ? `&start=${encodeURIComponent(von)}&end=${encodeURIComponent(bis)}` : '');
+        return fetch(url).then(r => r.json());
+    }));
+    if (nummer !== anfrage) { return; }  // veraltete Antwort verwerfen
+    const traces = [];
+    antworten.forEach(daten => {
+        const farbe = farben[daten.interval] || null;
+        if (daten.high) {
+            traces.push({x: daten.x, y: daten.high, mode: 'lines', line: {width: 0}, showlegend: false,
+                         hoverinfo: 'skip', legendgroup: daten.interval});
+            traces.push({x: daten.x, y: daten.low, mode: 'lines', line: {width: 0}, fill: 'tonexty',
+                         fillcolor: farbe ? farbe + '33' : undefined, showlegend: false, hoverinfo: 'skip',
+                         legendgroup: daten.interval});
+        }
+        const quelle = daten.source || daten.interval;
+        const name = daten.factor > 1 || quelle !== daten.interval
+            ? `${daten.interval} (${quelle !== daten.interval ? quelle + ' ' : ''}x${daten.factor})` : daten.interval;
+        traces.push({x: daten.x, y: daten.close, mode: 'lines', name: name, line: {color: farbe},
+                     legendgroup: daten.interval});
+    });
+    const layout = {title: `Charting: ${symbol} ${intervalle.join(', ')}`, xaxis: {title: 'Datum'},
+                    yaxis: {title: 'Schlusskurs'}, legend: {title: {text: 'Intervalle'}},
+                    hovermode: 'x unified', template: 'plotly_white', uirevision: 'zoom'};
+    if (von) { layout.xaxis.range = [von, bis]; }
+    Plotly.react(chart, traces, layout);
+}
+
+let zeitgeber = null;
+function beiZoom(ereignis) {
+    clearTimeout(zeitgeber);
+    zeitgeber = setTimeout(() => {
+        if (ereignis['xaxis.autorange']) { lade(null, null); }
+        else if (ereignis['xaxis.range[0]']) { lade(ereignis['xaxis.range[0]'], ereignis['xaxis.range[1]']); }
+    }, 150);
+}
+
+fetch(`/api/colors`).then(r => r.json()).then(f => { farben = f; return lade(null, null); })
+    .then(() => chart.on('plotly_relayout', beiZoom));
+</script>
+</body>
+</html>
+"""
+
+# Replay-Seite: ein einziger Chart, der per Server-Sent Events fortlaufend erweitert wird
+REPLAY_SEITE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Zeitreihen-Replay</title>
+<script src="/plotly.js"></script>
+<style>
+html, body {margin: 0; height: 100%; font-family: Arial, sans-serif;}
+#steuerung {padding: 6px 10px; display: flex; gap: 10px; align-items: center;}
+#chart {width: 100%; height: calc(100% - 40px);}
+</style>
+</head>
+<body>
+<div id="steuerung">
+<button id="pause">Pause</button>
+<label>Geschwindigkeit <select id="speed"></select></label>
+<span id="status"></span>
+</div>
+<div id="chart"></div>
+<script>
+const chart = document.getElementById('chart');
+const statusAnzeige = document.getElementById('status');
+const pauseKnopf = document.getElementById('pause');
+const auswahl = document.getElementById('speed');
+let spuren = {};
+let puffer = {};
+let geplant = false;
+let zeit = '';
+let bars = 0;
+let pausiert = false;
+
+[1, 2, 5, 10, 30, 60, 120, 300, 600, 1000].forEach(f => auswahl.add(new Option(`${f}x`, f)));
+auswahl.onchange = () => fetch(`/api/replay/control?action=speed&speed=${auswahl.value}`);
+// Der Knopf folgt dem Zustand des Servers (ein anderer Tab kann das Replay ebenfalls steuern)
+function zeigePause(status) {
+    pausiert = status.paused;
+    pauseKnopf.textContent = pausiert ? 'Weiter' : 'Pause';
+}
+pauseKnopf.onclick = () => fetch('/api/replay/control?action=status').then(r => r.json())
+    .then(status => fetch(`/api/replay/control?action=${status.paused ? 'resume' : 'pause'}`))
+    .then(r => r.json()).then(zeigePause);
+
+// Eingehende Bars werden gepuffert und höchstens einmal je Bildschirm-Frame gezeichnet
+function zeichne() {
+    geplant = false;
+    const indizes = [], x = [], y = [];
+    Object.entries(puffer).forEach(([interval, daten]) => {
+        indizes.push(spuren[interval]); x.push(daten.x); y.push(daten.close);
+    });
+    puffer = {};
+    if (indizes.length) { Plotly.extendTraces(chart, {x: x, y: y}, indizes); }
+    statusAnzeige.textContent = `${zeit}  |  ${bars} Bars`;
+}
+
+const quelle = new EventSource('/api/replay/stream');
+quelle.addEventListener('init', ereignis => {
+    const info = JSON.parse(ereignis.data);
+    auswahl.value = info.speed;
+    zeigePause(info);
+    spuren = {}; puffer = {}; bars = 0;
+    info.intervals.forEach((interval, i) => { spuren[interval] = i; });
+    const traces = info.intervals.map(interval => ({x: [], y: [], mode: 'lines', name: interval,
+                                                    line: {color: info.colors[interval] || null}}));
+    Plotly.newPlot(chart, traces, {title: `Replay: ${info.symbol} ${info.start} - ${info.end}`,
+                                   xaxis: {title: 'Datum'}, yaxis: {title: 'Schlusskurs'},
+                                   hovermode: 'x unified', template: 'plotly_white', uirevision: 'replay'});
+});
+quelle.onmessage = ereignis => {
+    const frame = JSON.parse(ereignis.data);
+    Object.entries(frame.bars).forEach(([interval, daten]) => {
+        const ziel = puffer[interval] || (puffer[interval] = {x: [], close: []});
+        ziel.x.push(...daten.x); ziel.close.push(...daten.close);
+        bars += daten.x.length;
+    });
+    zeit = frame.zeit || zeit;
+    if (frame.ende) { quelle.close(); zeit += frame.fehler ? `  (Abbruch: ${frame.fehler})` : '  (Ende)'; }
+    if (!geplant) { geplant = true; requestAnimationFrame(zeichne); }
+};
+</script>
+</body>
+</html>
+"""
+
+
+def als_liste(werte):
+    # JSON-taugliche Liste; NaN wird zu null
+    werte = np.asarray(werte, dtype='float64')
+    return [None if np.isnan(wert) else float(wert) for wert in werte]
+
+
+class ChartServer:
+    """
+        Optionaler lokaler HTTP-Server (nur localhost) für Charts mit zoomabhängigem Nachladen.
+
+        Statt einer statischen HTML-Datei mit allen Daten liefert der Server eine Plotly-Seite aus,
+        die beim Zoomen nur den sichtbaren Bereich in passender Auflösung aus dem Parquet-Cache
+        anfordert, über den TimeSeriesStore (Tagesindex, Planer, Pyramide und In-Memory-Cache wie
+        beim Desktop-Chart). Ein einzelner Chart kann so die gesamte Historie abdecken und zeigt
+        beim Hineinzoomen trotzdem alle Details.
+
+        Endpunkte:
+            /                    Chart-Seite (Parameter: symbol, intervals)
+            /plotly.js           Plotly-Bibliothek aus dem installierten plotly-Paket
+            /api/colors          Farben des aktiven Farbschemas
+            /api/range           Daten eines Intervalls (Parameter: symbol, interval, start, end, points)
+            /replay              Replay-Seite des laufenden Replays
+            /api/replay/stream   Frames des Replays als Server-Sent Events
+            /api/replay/control  Steuerung (Parameter: action = pause, resume, speed, stop, status; speed)
+            /api/status          Speicher- und Cache-Nutzung der Anwendung als JSON (falls status_funktion gesetzt)
+
+        Methoden:
+            start(): Startet den Server in einem Hintergrund-Thread.
+            stop(): Beendet den Server.
+            url(symbol, intervals): Liefert die Adresse der Chart-Seite.
+            lade_bereich(symbol, interval, start, end, punkte): Liefert die Daten für einen Zeitbereich.
+            starte_replay(symbol, intervals, start, end, geschwindigkeit, fps): Startet ein Replay (ersetzt ein laufendes).
+        """
+
+    def __init__(self, port=8050, cache_dir=CACHE_DIR, config_path='config/config.json',
+                 color_schemes_path='resources/color_schemes.json', status_funktion=None, store=None):
+        # Initialisierung; gebunden wird ausschließlich an 127.0.0.1.
+        # status_funktion liefert die Momentaufnahme für /api/status (z.B. ResourceMonitor.snapshot),
+        # store ist der TimeSeriesStore der Anwendung (gemeinsamer In-Memory-Cache mit dem Desktop-Chart)
+        self.port = port
+        self.cache_dir = cache_dir
+        self.config_path = config_path
+        self.color_schemes_path = color_schemes_path
+        self.store = store or TimeSeriesStore(cache_dir)
+        self.httpd = None
+        self.thread = None
+        self.replay = None
+        self.status_funktion = status_funktion
+        self._plotly_js = None
+
+    def url(self, symbol, intervals):
+        # Adresse der Chart-Seite für ein Symbol und seine Intervalle
+        return f"http://127.0.0.1:{self.port}/?symbol={symbol}&intervals={','.join(intervals)}"
+
+    def replay_url(self):
+        # Adresse der Replay-Seite
+        return f"http://127.0.0.1:{self.port}/replay"
+
+    def starte_replay(self, symbol, intervals, start, end, geschwindigkeit=60, fps=20):
+        # Startet ein Replay; ein laufendes Replay wird beendet (verbundene Seiten trennen sich)
+        if self.replay is not None:
+            self.replay.stop()
+        self.replay = ReplayEngine(symbol, intervals, start, end, geschwindigkeit, fps, self.cache_dir).start()
+        return self.replay
+
+    def steuere_replay(self, aktion, geschwindigkeit=None):
+        # Pause, Fortsetzen, Geschwindigkeit oder Stopp des laufenden Replays ('status' ändert nichts)
+        if self.replay is None:
+            raise ValueError("Es läuft kein Replay")
+        if aktion == 'pause':
+            self.replay.pause()
+        elif aktion == 'resume':
+            self.replay.fortsetzen()
+        elif aktion == 'speed':
+            self.replay.setze_geschwindigkeit(geschwindigkeit)
+        elif aktion == 'stop':
+            self.replay.stop()
+        elif aktion == 'status':
+            pass
+        else:
+            raise ValueError(f"Unbekannte Aktion '{aktion}'")
+        return self.replay.status()
+
+    def start(self):
+        # Startet den Server in einem Daemon-Thread (mehrfacher Aufruf ist unschädlich)
+        if self.httpd is not None:
+            return self
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', self.port), self.erstelle_handler())
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        print(f"Chart-Server läuft auf http://127.0.0.1:{self.port}/")
+        return self
+
+    def stop(self):
+        # Beendet den Server
+        if self.replay is not None:
+            self.replay.stop()
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+            print("Chart-Server beendet")
+
+    def plotly_js(self):
+        # Plotly-Bibliothek aus dem installierten Paket (einmalig geladen)
+        if self._plotly_js is None:
+            from plotly.offline import get_plotlyjs
+            self._plotly_js = get_plotlyjs().encode('utf-8')
+        return self._plotly_js
+
+    def farben(self):
+        # Farben des in der Konfiguration gewählten Farbschemas
+        try:
+            with open(self.config_path, 'r') as f:
+                schema = json.load(f).get('color_scheme', 'spectrum')
+            with open(self.color_schemes_path, 'r', encoding='utf-8') as f:
+                return json.load(f)['schemes'][schema]['colors']
+        except (FileNotFoundError, KeyError, json.JSONDecodeError):
+            return {}
+
+    def lade_bereich(self, symbol, interval, start=None, end=None, punkte=2000):
+        # Liefert die Daten eines Intervalls für [start, end] in der Auflösung, die zu 'punkte' passt.
+        # Gelesen wird über den TimeSeriesStore: derselbe Planer und In-Memory-Cache wie beim Desktop-Chart
+        antwort = {'interval': interval, 'factor': 1, 'x': [], 'close': []}
+        df, plan = self.store.lade(symbol, interval, start, end, budget=punkte)
+        if df is None:
+            return antwort
+        faktor = plan['faktor'] if plan is not None else 1
+
+        antwort['factor'] = faktor
+        # Quelle: der Planer kann statt der Pyramide ein gröberes gespeichertes Intervall wählen
+        antwort['source'] = plan['quelle'] if plan is not None else interval
+        antwort['x'] = pd.to_datetime(df['daytime']).dt.strftime('%Y-%m-%d %H:%M:%S').tolist()
+        antwort['close'] = als_liste(df['CLOSE'])
+        # Das Band aus Hoch/Tief nur bei verdichteten Daten (wie im Desktop-Chart)
+        if faktor > 1:
+            antwort['high'] = als_liste(df['HIGH'])
+            antwort['low'] = als_liste(df['LOW'])
+        return antwort
+
+    def erstelle_handler(self):
+        # Request-Handler mit Zugriff auf diese Server-Instanz
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                parameter = {key: werte[0] for key, werte in parse_qs(url.query).items()}
+                try:
+                    if url.path == '/':
+                        self.sende(200, 'text/html; charset=utf-8', SEITE.encode('utf-8'))
+                    elif url.path == '/plotly.js':
+                        self.sende(200, 'application/javascript', server.plotly_js())
+                    elif url.path == '/api/colors':
+                        self.sende_json(200, server.farben())
+                    elif url.path == '/api/range':
+                        daten = server.lade_bereich(parameter['symbol'], parameter['interval'],
+                                                    parameter.get('start'), parameter.get('end'),
+                                                    int(parameter.get('points', 2000)))
+                        self.sende_json(200, daten)
+                    elif url.path == '/replay':
+                        self.sende(200, 'text/html; charset=utf-8', REPLAY_SEITE.encode('utf-8'))
+                    elif url.path == '/api/replay/control':
+                        self.sende_json(200, server.steuere_replay(parameter['action'], parameter.get('speed')))
+                    elif url.path == '/api/replay/stream':
+                        self.streame_replay()
+                    elif url.path == '/api/status' and server.status_funktion is not None:
+                        self.sende_json(200, server.status_funktion())
+                    else:
+                        self.sende_json(404, {'error': 'Nicht gefunden'})
+                except (KeyError, ValueError, FileNotFoundError) as e:
+                    self.sende_json(400, {'error': str(e)})
+
+            def streame_replay(self):
+                # Server-Sent Events: zuerst die Beschreibung des Replays, dann je Frame ein Ereignis
+                replay = server.replay
+                if replay is None:
+                    raise ValueError("Es läuft kein Replay")
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Cache-Control', 'no-cache')
+                self.end_headers()
+                abonnement = replay.abonniere()
+                try:
+                    info = {**replay.status(), 'colors': server.farben()}
+                    self.wfile.write(f"event: init\ndata: {json.dumps(info)}\n\n".encode('utf-8'))
+                    self.wfile.flush()
+                    while replay is server.replay:
+                        frame = abonnement.hole(timeout=10.0)
+                        # Ohne Frame ein Kommentar, damit getrennte Verbindungen erkannt werden
+                        nachricht = ": \n\n" if frame is None else f"data: {json.dumps(frame_als_json(frame))}\n\n"
+                        self.wfile.write(nachricht.encode('utf-8'))
+                        self.wfile.flush()
+                        if frame is not None and frame.get('ende'):
+                            break
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    replay.kuendige(abonnement)
+
+            def sende_json(self, status, daten):
+                self.sende(status, 'application/json', json.dumps(daten).encode('utf-8'))
+
+            def sende(self, status, content_type, inhalt):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(inhalt)))
+                self.end_headers()
+                self.wfile.write(inhalt)
+
+            def log_message(self, format, *args):
+                # Keine Ausgabe je Anfrage
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lokaler Chart-Server mit zoomabhängigem Nachladen")
+    parser.add_argument('--port', type=int, default=8050)
+    args = parser.parse_args()
+    chart_server = ChartServer(port=args.port).start()
+    try:
+        chart_server.thread.join()
+    except KeyboardInterrupt:
+        chart_server.stop()
@@ -2,6 +2,7 @@ import os
 import tkinter as tk
 from tkinter import ttk, colorchooser, messagebox, scrolledtext
 import json
+from modules.SafeFileIO import aktualisiere_json
 
 
 class ColorSchemeEditor:
@@ -139,8 +140,13 @@ class ColorSchemeEditor:
             unit, color = self.color_tree.item(item)['values']
             self.data['schemes'][schema]['colors'][unit] = color
 
-        with open(self.color_file, 'w', encoding='utf-8') as file:
-            json.dump(self.data, file, indent=2, ensure_ascii=False)
+        # Nur das bearbeitete Schema wird in den aktuellen Dateistand übernommen (Read-Modify-Write unter Sperre)
+        def uebernehme_schema(aktuell):
+            aktuell = aktuell or {'schemes': {}}
+            aktuell.setdefault('schemes', {})[schema] = self.data['schemes'][schema]
+            return aktuell
+
+        self.data = aktualisiere_json(self.color_file, uebernehme_schema, indent=2, ensure_ascii=False)
         messagebox.showinfo("Gespeichert", "Änderungen wurden erfolgreich gespeichert.")
 
     def center_window(self):
@@ -0,0 +1,139 @@
+import math
+import os
+import tkinter as tk
+import webbrowser
+from tkinter import messagebox, ttk
+from modules.PlotChartLine import PlotChartLine
+from modules.SymbolComparison import korrelations_heatmap, vergleichs_chart
+
+# Linienfarbe im Dashboard
+DASHBOARD_FARBE = '#1f77b4'
+
+
+class ComparisonWindow:
+    """
+        Fenster für den Vergleich mehrerer Symbole (Korrelation, Spread, Performance).
+
+        Die ausgewählten Symbole werden auf dem gewählten Intervall im aktuellen Datumsbereich (ohne
+        Datumsbereich: gesamte Historie) verglichen; das erste ausgewählte Symbol ist die Referenz für
+        rollierende Korrelation und Spread. Die Ergebnisse werden als interaktive Charts im Browser
+        geöffnet. Ausgerichtete Daten und Ergebnisse bleiben je Parametersatz im Speicher, sodass ein
+        geändertes Fenster oder eine erneute Anzeige ohne erneutes Laden berechnet wird.
+
+        Attribute:
+            master (tk.Tk): Das Hauptfenster der Anwendung.
+            date_range (dict): Datumsbereich mit 'start' und 'end' (oder None).
+            plot_dir (str): Verzeichnis, in dem die Charts gespeichert werden.
+
+        Methoden:
+            create_widgets(): Erstellt Symbolauswahl, Parameter und Buttons.
+            zeige(kennzahl): Berechnet die Kennzahl und öffnet den Chart im Browser.
+            zeige_dashboard(): Öffnet die Charts der Symbole als Raster mit gemeinsamer Zeitachse.
+        """
+
+    def __init__(self, master, vergleich, symbole, intervalle, date_range, plot_dir, fenster=288):
+        # Initialisierung des Vergleichsfensters
+        self.master = master
+        self.vergleich = vergleich
+        self.symbole = symbole
+        self.intervalle = intervalle
+        self.date_range = date_range
+        self.plot_dir = os.path.join(plot_dir, 'comparison')
+        self.symbol_liste = None
+        self.interval_var = tk.StringVar(value=intervalle[0] if intervalle else "")
+        self.fenster_var = tk.StringVar(value=str(fenster))
+        self.status_label = None
+        self.window = tk.Toplevel(master)
+        self.window.title("Symbolvergleich")
+        self.window.geometry("560x420")
+        self.create_widgets()
+
+    def create_widgets(self):
+        # Symbolauswahl (Mehrfachauswahl), Intervall, Fenstergröße und Buttons
+        rahmen = tk.Frame(self.window)
+        rahmen.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        ttk.Label(rahmen, text="Symbole (erstes = Referenz):").pack(anchor="w")
+        self.symbol_liste = tk.Listbox(rahmen, selectmode=tk.EXTENDED, exportselection=False, height=10)
+        for symbol in self.symbole:
+            self.symbol_liste.insert(tk.END, symbol)
+        self.symbol_liste.selection_set(0, tk.END)
+        self.symbol_liste.pack(fill=tk.BOTH, expand=True)
+
+        parameter = tk.Frame(self.window)
+        parameter.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Label(parameter, text="Intervall:").pack(side=tk.LEFT)
+        ttk.Combobox(parameter, textvariable=self.interval_var, values=self.intervalle, width=6,
+                     state="readonly").pack(side=tk.LEFT, padx=5)
+        ttk.Label(parameter, text="Fenster (Bars):").pack(side=tk.LEFT, padx=(15, 0))
+        ttk.Entry(parameter, textvariable=self.fenster_var, width=8).pack(side=tk.LEFT, padx=5)
+        bereich = self.date_range if self.date_range.get('start') else None
+        ttk.Label(parameter, text=f"Bereich: {bereich['start']} - {bereich['end']}" if bereich else "Bereich: gesamt").pack(side=tk.LEFT, padx=15)
+
+        self.status_label = tk.Label(self.window, text="", font=("Arial", 9), anchor="w")
+        self.status_label.pack(fill=tk.X, padx=10)
+
+        button_style = {"font": ("Arial", 10), "relief": tk.RAISED, "borderwidth": 2, "cursor": "hand2", "width": 20}
+        button_frame = tk.Frame(self.window)
+        button_frame.pack(fill=tk.X, padx=10, pady=5)
+        tk.Button(button_frame, text="Korrelationsmatrix", command=lambda: self.zeige('matrix'), bg="lightgreen", **button_style).grid(row=0, column=0, padx=5, pady=2)
+        tk.Button(button_frame, text="Rollierende Korrelation", command=lambda: self.zeige('korrelation'), bg="lightyellow", **button_style).grid(row=0, column=1, padx=5, pady=2)
+        tk.Button(button_frame, text="Spread", command=lambda: self.zeige('spread'), bg="lightcyan", **button_style).grid(row=1, column=0, padx=5, pady=2)
+        tk.Button(button_frame, text="Performance", command=lambda: self.zeige('performance'), bg="lavender", **button_style).grid(row=1, column=1, padx=5, pady=2)
+        tk.Button(button_frame, text="Dashboard", command=self.zeige_dashboard, bg="lightpink", **button_style).grid(row=0, column=2, padx=5, pady=2)
+        tk.Button(button_frame, text="Schließen", command=self.window.destroy, bg="red", fg="white", **button_style).grid(row=1, column=2, padx=5, pady=2)
+
+    def zeige(self, kennzahl):
+        # Berechnet die Kennzahl für die Auswahl und öffnet den Chart im Browser
+        symbole = [self.symbol_liste.get(i) for i in self.symbol_liste.curselection()]
+        interval = self.interval_var.get()
+        try:
+            fenster = int(self.fenster_var.get())
+        except ValueError:
+            messagebox.showerror("Fehler", "Die Fenstergröße muss eine ganze Zahl sein.", parent=self.window)
+            return
+        start, end = self.date_range.get('start'), self.date_range.get('end')
+        try:
+            # Die Matrix über den gesamten Bereich; das Fenster gilt für die rollierenden Kennzahlen
+            ergebnis = self.vergleich.berechne(kennzahl, symbole, interval, start, end,
+                                               None if kennzahl == 'matrix' else fenster)
+        except (ValueError, FileNotFoundError) as e:
+            messagebox.showerror("Fehler", str(e), parent=self.window)
+            return
+
+        bereich = f"{start} - {end}" if start else "gesamt"
+        if kennzahl == 'matrix':
+            fig = korrelations_heatmap(ergebnis, f"Korrelation der Log-Renditen ({interval}, {bereich})")
+        elif kennzahl == 'korrelation':
+            fig = vergleichs_chart(ergebnis, f"Rollierende Korrelation mit {symbole[0]} ({interval}, {fenster} Bars)", "Korrelation")
+        elif kennzahl == 'spread':
+            fig = vergleichs_chart(ergebnis, f"Spread gegenüber {symbole[0]} ({interval}, Z-Score über {fenster} Bars)", "Log-Spread")
+        else:
+            fig = vergleichs_chart(ergebnis, f"Normierte Performance ({interval}, {bereich})", "Performance (Start = 100)")
+
+        if not os.path.exists(self.plot_dir):
+            os.makedirs(self.plot_dir)
+        pfad = os.path.join(self.plot_dir, f"{kennzahl}_{interval}.html")
+        fig.write_html(pfad)
+        webbrowser.open(pfad)
+        self.status_label.config(text=f"{len(symbole)} Symbole, berechnet in {self.vergleich.letzte_dauer * 1000:.0f} ms"
+                                      + (" (aus dem Cache)" if self.vergleich.aus_cache else ""))
+
+    def zeige_dashboard(self):
+        # Ein Chart je ausgewähltem Symbol im Raster (Auflösung im Punktebudget wie im Hauptchart)
+        symbole = [self.symbol_liste.get(i) for i in self.symbol_liste.curselection()]
+        interval = self.interval_var.get()
+        if not symbole:
+            messagebox.showinfo("Info", "Bitte wählen Sie mindestens ein Symbol aus.", parent=self.window)
+            return
+        start, end = self.date_range.get('start'), self.date_range.get('end')
+        daten = {symbol: self.vergleich.store.query(symbol, interval, start, end) for symbol in symbole}
+        daten = {symbol: df for symbol, df in daten.items() if df is not None and not df.empty}
+        panels = [(f"{symbol} {interval}", [(daten[symbol], interval, DASHBOARD_FARBE)]) for symbol in symbole if symbol in daten]
+        if not panels:
+            messagebox.showinfo("Info", f"Keine {interval}-Daten im gewählten Bereich.", parent=self.window)
+            return
+        bereich = {'start': start or "", 'end': end or ""}
+        pfad, _ = PlotChartLine(self.plot_dir).create_dashboard(panels, math.ceil(math.sqrt(len(panels))), interval, bereich)
+        webbrowser.open(pfad)
+        fehlend = [symbol for symbol in symbole if symbol not in daten]
+        self.status_label.config(text=f"Dashboard mit {len(panels)} Charts" + (f" (ohne Daten: {', '.join(fehlend)})" if fehlend else ""))
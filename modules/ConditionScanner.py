@@ -0,0 +1,175 @@
+import glob
+import hashlib
+import os
+import re
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from modules.MetadataManager import interval_sort_key, intervall_sekunden
+from modules.ParquetCache import CACHE_DIR, lade_serien_meta, serien_fingerprint
+from modules.SafeFileIO import atomarer_zielpfad
+from modules.TimeSeriesStore import TimeSeriesStore
+
+# Bezeichner in Ausdrücken: <Intervall>_<Spalte>[_prev], z.B. M5_green, M1_HIGH, M1_HIGH_prev
+BEZEICHNER = re.compile(r'\b([MS]\d+)_([A-Za-z]+)(_prev)?\b')
+
+# Abgeleitete Spalten (aus OPEN und CLOSE, wie 'direction' beim Import)
+ABGELEITETE_SPALTEN = {
+    'green': lambda df: (df['CLOSE'] >= df['OPEN']).to_numpy(),
+    'red': lambda df: (df['CLOSE'] < df['OPEN']).to_numpy(),
+}
+
+BEISPIEL_AUSDRUCK = "M5_green & M15_green & M30_green & (M1_HIGH > M1_HIGH_prev)"
+
+
+def bezeichner_des_ausdrucks(ausdruck):
+    # Verwendete Intervalle und Spalten eines Ausdrucks: {Intervall: {(Spalte, prev), ...}}
+    verwendet = {}
+    for interval, spalte, prev in BEZEICHNER.findall(ausdruck):
+        verwendet.setdefault(interval, set()).add((spalte, bool(prev)))
+    if not verwendet:
+        raise ValueError("Der Ausdruck enthält keine Spalten (Format <Intervall>_<Spalte>, z.B. M5_green)")
+    return verwendet
+
+
+class ConditionScanner:
+    """
+        Sucht Zeitpunkte, an denen eine Bedingung über mehrere Intervalle gleichzeitig erfüllt ist.
+
+        Ausdrücke verwenden Spalten der Form <Intervall>_<Spalte>, z.B.
+        "M5_green & M15_green & M30_green & (M1_HIGH > M1_HIGH_prev)". Neben den gespeicherten
+        Spalten (OPEN, HIGH, LOW, CLOSE, TICKVOL, ...) gibt es 'green' und 'red' (Richtung des Bars);
+        das Suffix '_prev' liefert den Wert des vorherigen Bars desselben Intervalls.
+
+        Alle Intervalle werden vektorisiert per As-of-Join (np.searchsorted) auf die Zeitachse des
+        feinsten Intervalls (bzw. 'basis') ausgerichtet: zu jedem Bar der Basis gilt der letzte Bar
+        eines anderen Intervalls, der bis zum Ende des Basis-Bars abgeschlossen ist. Es gibt damit
+        keinen Blick in die Zukunft, ein M30-Bar zählt erst ab seinem Schlusszeitpunkt.
+        Der Ausdruck wird mit DataFrame.eval ausgewertet. Treffer werden je Ausdruck und Datenstand
+        (Fingerabdrücke der beteiligten Zeitreihen) unter cache/scans/ gespeichert.
+
+        Methoden:
+            scan(symbol, ausdruck, start, end, basis): Liefert die Treffer (daytime, CLOSE der Basis).
+            ausgerichtet(symbol, verwendet, start, end, basis): Ausgerichtete Spalten aller Intervalle.
+        """
+
+    def __init__(self, store=None, cache_dir=CACHE_DIR):
+        # Initialisierung mit dem gemeinsamen Lesepfad und dem Verzeichnis der gespeicherten Treffer
+        self.cache_dir = cache_dir
+        self.store = store or TimeSeriesStore(cache_dir)
+        self.meta_dir = os.path.join(cache_dir, 'meta')
+        self.scan_dir = os.path.join(cache_dir, 'scans')
+        self.letzte_dauer = None
+        self.aus_cache = False
+
+    def scan(self, symbol, ausdruck, start=None, end=None, basis=None):
+        # Treffer des Ausdrucks als DataFrame (daytime, CLOSE des Basis-Intervalls), aufsteigend sortiert
+        beginn = time.perf_counter()
+        verwendet = bezeichner_des_ausdrucks(ausdruck)
+        basis = basis or min(verwendet, key=interval_sort_key)
+        pfad = self.cache_pfad(symbol, ausdruck, start, end, basis, sorted(set(verwendet) | {basis}, key=interval_sort_key))
+        self.aus_cache = os.path.exists(pfad)
+        if self.aus_cache:
+            treffer = pd.read_parquet(pfad)
+        else:
+            daten = self.ausgerichtet(symbol, verwendet, start, end, basis)
+            engine = 'python' if any(daten[spalte].dtype == object for spalte in daten.columns) else None
+            ergebnis = daten.eval(' '.join(ausdruck.split()), engine=engine)
+            if not isinstance(ergebnis, pd.Series) or ergebnis.dtype != bool:
+                raise ValueError("Der Ausdruck muss eine Bedingung (True/False je Zeitpunkt) ergeben")
+            treffer = daten.loc[ergebnis.to_numpy(), ['daytime', f'{basis}_CLOSE']].rename(
+                columns={f'{basis}_CLOSE': 'CLOSE'}).reset_index(drop=True)
+            self.speichere(pfad, treffer, ausdruck)
+        self.letzte_dauer = time.perf_counter() - beginn
+        print(f"Scan {symbol} '{ausdruck}': {len(treffer)} Treffer in {self.letzte_dauer:.2f}s"
+              + (" (aus dem Cache)" if self.aus_cache else ""))
+        return treffer
+
+    def ausgerichtet(self, symbol, verwendet, start, end, basis):
+        # DataFrame auf der Zeitachse der Basis mit allen verwendeten Spalten (Name <Intervall>_<Spalte>[_prev])
+        verwendet = {interval: set(spalten) for interval, spalten in verwendet.items()}
+        verwendet.setdefault(basis, set()).add(('CLOSE', False))
+        basis_df = self.lade(symbol, basis, {spalte for spalte, _ in verwendet[basis]}, start, end)
+        basis_zeit = basis_df['daytime'].to_numpy()
+        basis_ende = basis_zeit + np.timedelta64(intervall_sekunden(basis), 's')
+        ergebnis = {'daytime': basis_zeit}
+
+        for interval in sorted(verwendet, key=interval_sort_key):
+            spalten = verwendet[interval]
+            df = basis_df if interval == basis else self.lade(symbol, interval, {spalte for spalte, _ in spalten}, start, end)
+            # As-of-Join: letzter Bar des Intervalls, der bis zum Ende des Basis-Bars abgeschlossen ist
+            schluss = df['daytime'].to_numpy() + np.timedelta64(intervall_sekunden(interval), 's')
+            position = np.searchsorted(schluss, basis_ende, side='right') - 1
+            vorhanden = position >= 0
+            position = np.where(vorhanden, position, 0)
+            for spalte, prev in sorted(spalten):
+                werte = ABGELEITETE_SPALTEN[spalte](df) if spalte in ABGELEITETE_SPALTEN else df[spalte].to_numpy()
+                if prev:
+                    werte = self.vorheriger(werte)
+                ergebnis[f"{interval}_{spalte}" + ("_prev" if prev else "")] = self.ausrichten(werte, position, vorhanden)
+        return pd.DataFrame(ergebnis)
+
+    @staticmethod
+    def vorheriger(werte):
+        # Werte um einen Bar verschoben (Wert des vorherigen Bars); der erste Bar hat keinen Vorgänger
+        if werte.dtype == bool:
+            leer = np.zeros(1, dtype=bool)
+        elif werte.dtype == object:
+            leer = np.array([None], dtype=object)
+        else:
+            werte = werte.astype('float64')
+            leer = np.full(1, np.nan)
+        return np.concatenate([leer, werte[:-1]])
+
+    @staticmethod
+    def ausrichten(werte, position, vorhanden):
+        # Werte an den As-of-Positionen; ohne abgeschlossenen Bar False (Bedingungen) bzw. NaN
+        if len(werte) == 0:
+            return np.zeros(len(position), dtype=bool) if werte.dtype == bool else np.full(len(position), np.nan)
+        ausgerichtet = werte[position]
+        if werte.dtype == bool:
+            return ausgerichtet & vorhanden
+        if werte.dtype == object:
+            return np.where(vorhanden, ausgerichtet, None)
+        return np.where(vorhanden, ausgerichtet.astype('float64'), np.nan)
+
+    def lade(self, symbol, interval, spalten, start, end):
+        # Rohdaten eines Intervalls mit den benötigten Spalten (über den gemeinsamen Lesepfad)
+        benoetigt = {'daytime'}
+        for spalte in spalten:
+            benoetigt |= {'OPEN', 'CLOSE'} if spalte in ABGELEITETE_SPALTEN else {spalte}
+        df = self.store.query(symbol, interval, start, end, columns=sorted(benoetigt), resolution='raw')
+        if df is None:
+            raise FileNotFoundError(f"Keine Daten für {symbol}_{interval} im gewählten Bereich")
+        return df
+
+    def version(self, symbol, intervals):
+        # Datenstand der beteiligten Zeitreihen (Fingerabdruck und Revision)
+        teile = []
+        for interval in intervals:
+            meta = lade_serien_meta(symbol, interval, self.meta_dir)
+            if meta is None:
+                raise FileNotFoundError(f"Keine Metadaten für {symbol}_{interval} vorhanden")
+            teile.append(f"{interval}:{serien_fingerprint(meta)}:{meta.get('revision', 0)}")
+        return "|".join(teile)
+
+    def cache_pfad(self, symbol, ausdruck, start, end, basis, intervals):
+        # Pfad der gespeicherten Treffer für Ausdruck, Bereich und Datenstand
+        basis_text = f"{symbol}|{' '.join(ausdruck.split())}|{start}|{end}|{basis}|{self.version(symbol, intervals)}"
+        return os.path.join(self.scan_dir, f"{symbol}_{hashlib.md5(basis_text.encode()).hexdigest()[:16]}.parquet")
+
+    def speichere(self, pfad, treffer, ausdruck):
+        # Speichert die Treffer (der Ausdruck steht in den Schema-Metadaten)
+        if not os.path.exists(self.scan_dir):
+            os.makedirs(self.scan_dir, exist_ok=True)
+        tabelle = pa.Table.from_pandas(treffer, preserve_index=False)
+        tabelle = tabelle.replace_schema_metadata({**(tabelle.schema.metadata or {}), b'expression': ausdruck.encode()})
+        with atomarer_zielpfad(pfad) as temp_path:
+            pq.write_table(tabelle, temp_path)
+
+    def leere_cache(self, symbol=None):
+        # Entfernt gespeicherte Treffer (eines Symbols oder alle)
+        for pfad in glob.glob(os.path.join(self.scan_dir, f"{symbol or '*'}_*.parquet")):
+            os.remove(pfad)
@@ -1,9 +1,15 @@
 # modules/ConfigWindow.py
 import tkinter as tk
-from tkinter import messagebox, ttk
+from tkinter import messagebox, ttk, scrolledtext
 import json
+import os
 
 from modules.ColorSchemeEditor import ColorSchemeEditor
+from modules.CacheLayout import CODECS, STANDARD_LAYOUT, benchmark_layouts, formatiere_benchmark
+from modules.ResourceMonitor import ResourceMonitor
+from modules.ResourceWindow import ResourceWindow
+from modules.SafeFileIO import aktualisiere_json
+from modules.SeriesMerge import MERGE_POLICIES
 
 
 class ConfigWindow:
@@ -12,13 +18,14 @@ class ConfigWindow:
 
         Diese Klasse erstellt ein separates Fenster für die Konfigurationseinstellungen der Anwendung.
         Sie ermöglicht dem Benutzer, verschiedene Parameter wie CSV-Trennzeichen, Spaltennamen,
-        Datumsformat, Fenstergröße und Farbschema anzupassen und zu speichern.
+        Datumsformat, Import-Blockgröße, Merge-Strategie, Indikatoren, Cache-Layout, Fenstergröße und Farbschema anzupassen und zu speichern.
 
         Attribute:
             master (tk.Tk): Das Hauptfenster der Anwendung.
             update_callback (function): Callback zur Aktualisierung der Hauptanwendung.
             config_path (str): Pfad zur Konfigurationsdatei.
             color_schemes_path (str): Pfad zur Farbschema-Datei.
+            monitor (ResourceMonitor): Quelle für die Anzeige von Speicher- und Cache-Nutzung.
 
         Methoden:
             create_widgets(): Erstellt die UI-Elemente des Konfigurationsfensters.
@@ -26,14 +33,23 @@ class ConfigWindow:
             load_config(): Lädt gespeicherte Konfigurationseinstellungen.
             reset_fields(): Setzt alle Eingabefelder auf Standardwerte zurück.
             update_color_preview(): Aktualisiert die Farbvorschau basierend auf der Auswahl.
+            create_cache_layout_widgets(): Erstellt die Einstellungen für das Parquet-Layout des Caches.
+            run_layout_benchmark(): Vergleicht Dateigröße und Lesezeit verschiedener Layouts.
+            open_resource_window(): Zeigt Speicher- und Cache-Nutzung der Anwendung.
         """
 
-    def __init__(self, master, update_callback, config_path, color_schemes_path):
+    def __init__(self, master, update_callback, config_path, color_schemes_path, monitor=None):
         # Initialisierung des Konfigurationsfensters
         self.config_path = config_path
+        self.monitor = monitor or ResourceMonitor()
         self.color_schemes_path = color_schemes_path
         self.window_y_entry = None
         self.window_x_entry = None
+        self.chunk_size_entry = None
+        self.indicators_entry = None
+        self.merge_policy_var = None
+        self.layout_vars = {}
+        self.benchmark_var = None
         self.color_scheme_dropdown = None
         self.date_format_entry = None
         self.columns_entry = None
@@ -43,9 +59,10 @@ class ConfigWindow:
         self.update_callback = update_callback
         self.window = tk.Toplevel(master)
         self.window.title("Konfiguration")
-        self.window.geometry("750x450")
+        self.window.geometry("750x640")
         self.color_schemes = self.load_color_schemes()
         self.create_widgets()
+        self.create_cache_layout_widgets()
         self.create_color_scheme_dropdown()
         self.center_window()
 
@@ -81,6 +98,24 @@ class ConfigWindow:
         self.window_y_entry.grid(row=3, column=2, columnspan=1, padx=5, pady=5, sticky="ew")
         self.window_y_entry.insert(0, "800")
 
+        # Blockgröße für den Streaming-Import
+        tk.Label(self.window, text="Import-Blockgröße (Zeilen):").grid(row=4, column=0, sticky="w", padx=5, pady=5)
+        self.chunk_size_entry = tk.Entry(self.window, width=20)
+        self.chunk_size_entry.grid(row=4, column=1, columnspan=1, padx=5, pady=5, sticky="ew")
+        self.chunk_size_entry.insert(0, "250000")
+
+        # Strategie für überlappende Exporte derselben Zeitreihe: "newest" (späterer Export gewinnt) oder "first"
+        merge_frame = tk.Frame(self.window)
+        merge_frame.grid(row=4, column=2, padx=5, pady=5, sticky="ew")
+        tk.Label(merge_frame, text="Bei Überlappung:").pack(side=tk.LEFT)
+        self.merge_policy_var = tk.StringVar(value="newest")
+        ttk.Combobox(merge_frame, textvariable=self.merge_policy_var, values=MERGE_POLICIES, state="readonly", width=8).pack(side=tk.LEFT, padx=5)
+
+        # Indikatoren, z.B. "sma:20, ema:50, bollinger:20:2, atr:14"
+        tk.Label(self.window, text="Indikatoren:").grid(row=6, column=0, sticky="w", padx=5, pady=5)
+        self.indicators_entry = tk.Entry(self.window, width=60)
+        self.indicators_entry.grid(row=6, column=1, columnspan=2, padx=5, pady=5, sticky="ew")
+
         # Definieren Button-Stile
         button_style = {
             "font": ("Arial", 10),
@@ -92,12 +127,100 @@ class ConfigWindow:
 
         # Buttons
         button_frame = tk.Frame(self.window)
-        button_frame.grid(row=6, column=0, columnspan=4, pady=20, sticky="ew")
+        button_frame.grid(row=20, column=0, columnspan=4, pady=20, sticky="ew")
         tk.Button(button_frame, text="Farbschema bearbeiten", command=self.open_color_scheme_editor, **button_style).pack(side=tk.LEFT, padx=25)
         tk.Button(button_frame, text="Speichern", command=self.save_config, bg='green', fg='white', **button_style).pack(side=tk.LEFT, padx=5)
         tk.Button(button_frame, text="Laden", command=self.load_config, bg='lightyellow', **button_style).pack(side=tk.LEFT, padx=5)
         tk.Button(button_frame, text="Zurücksetzen", command=self.reset_fields, bg='lightpink', **button_style).pack(side=tk.LEFT, padx=10)
         tk.Button(button_frame, text="Abbrechen", command=self.close_clicked, bg='red', fg='white', **button_style).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Ressourcen", command=self.open_resource_window, bg='lightcyan', **button_style).pack(side=tk.LEFT, padx=10)
+
+    def create_cache_layout_widgets(self):
+        # Einstellungen für Codec, Row-Group-Größe, Sortierung, Dictionary-Encoding, Statistiken und Index
+        layout = dict(STANDARD_LAYOUT)
+        try:
+            with open(self.config_path, "r") as f:
+                layout.update(json.load(f).get("cache_layout", {}))
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+
+        layout_frame = tk.LabelFrame(self.window, text="Cache-Layout (Parquet)")
+        layout_frame.grid(row=7, column=0, columnspan=3, padx=5, pady=5, sticky="ew")
+
+        self.layout_vars = {
+            "compression": tk.StringVar(value=layout["compression"] or "none"),
+            "compression_level": tk.StringVar(value="" if layout["compression_level"] is None else str(layout["compression_level"])),
+            "row_group_size": tk.StringVar(value=str(layout["row_group_size"])),
+            "sort_by_daytime": tk.BooleanVar(value=layout["sort_by_daytime"]),
+            "use_dictionary": tk.BooleanVar(value=layout["use_dictionary"]),
+            "write_statistics": tk.BooleanVar(value=layout["write_statistics"]),
+            "write_index": tk.BooleanVar(value=layout["write_index"]),
+        }
+
+        tk.Label(layout_frame, text="Codec / Level:").grid(row=0, column=0, sticky="w", padx=5, pady=2)
+        ttk.Combobox(layout_frame, textvariable=self.layout_vars["compression"], values=CODECS, state="readonly", width=10).grid(row=0, column=1, padx=5, pady=2, sticky="w")
+        tk.Entry(layout_frame, textvariable=self.layout_vars["compression_level"], width=6).grid(row=0, column=2, padx=5, pady=2, sticky="w")
+        tk.Label(layout_frame, text="Row-Group-Größe:").grid(row=0, column=3, sticky="w", padx=5, pady=2)
+        tk.Entry(layout_frame, textvariable=self.layout_vars["row_group_size"], width=10).grid(row=0, column=4, padx=5, pady=2, sticky="w")
+
+        tk.Checkbutton(layout_frame, text="Nach daytime sortieren", variable=self.layout_vars["sort_by_daytime"]).grid(row=1, column=0, columnspan=2, sticky="w", padx=5)
+        tk.Checkbutton(layout_frame, text="Dictionary-Encoding", variable=self.layout_vars["use_dictionary"]).grid(row=1, column=2, columnspan=2, sticky="w", padx=5)
+        tk.Checkbutton(layout_frame, text="Statistiken schreiben", variable=self.layout_vars["write_statistics"]).grid(row=2, column=0, columnspan=2, sticky="w", padx=5)
+        tk.Checkbutton(layout_frame, text="Pandas-Index speichern", variable=self.layout_vars["write_index"]).grid(row=2, column=2, columnspan=2, sticky="w", padx=5)
+
+        # Benchmark-Modus für eine gecachte Zeitreihe
+        data_dir = os.path.join('cache', 'data')
+        serien = sorted(f[:-len('.parquet')] for f in os.listdir(data_dir) if f.endswith('.parquet')) if os.path.exists(data_dir) else []
+        self.benchmark_var = tk.StringVar(value=serien[0] if serien else "")
+        tk.Label(layout_frame, text="Benchmark:").grid(row=3, column=0, sticky="w", padx=5, pady=2)
+        ttk.Combobox(layout_frame, textvariable=self.benchmark_var, values=serien, state="readonly", width=14).grid(row=3, column=1, columnspan=2, padx=5, pady=2, sticky="w")
+        tk.Button(layout_frame, text="Layouts vergleichen", command=self.run_layout_benchmark, cursor="hand2").grid(row=3, column=3, columnspan=2, padx=5, pady=2, sticky="w")
+
+    def get_cache_layout(self):
+        # Liest die Layout-Einstellungen aus den Eingabefeldern
+        level = self.layout_vars["compression_level"].get().strip()
+        return {
+            "compression": self.layout_vars["compression"].get(),
+            "compression_level": int(level) if level else None,
+            "row_group_size": int(self.layout_vars["row_group_size"].get() or STANDARD_LAYOUT["row_group_size"]),
+            "sort_by_daytime": self.layout_vars["sort_by_daytime"].get(),
+            "use_dictionary": self.layout_vars["use_dictionary"].get(),
+            "write_statistics": self.layout_vars["write_statistics"].get(),
+            "write_index": self.layout_vars["write_index"].get(),
+        }
+
+    def run_layout_benchmark(self):
+        # Schreibt die gewählte Zeitreihe mit mehreren Layouts und zeigt Dateigröße und Lesezeiten an
+        serie = self.benchmark_var.get()
+        if not serie:
+            messagebox.showinfo("Info", "Keine gecachte Zeitreihe für den Benchmark vorhanden.")
+            return
+        symbol, interval = serie.rsplit('_', 1)
+        self.window.config(cursor="watch")
+        self.window.update()
+        try:
+            ergebnisse = benchmark_layouts(symbol, interval)
+        except (FileNotFoundError, OSError) as e:
+            messagebox.showerror("Fehler", f"Benchmark fehlgeschlagen: {e}")
+            return
+        finally:
+            self.window.config(cursor="")
+
+        ergebnis_fenster = tk.Toplevel(self.window)
+        ergebnis_fenster.title(f"Layout-Benchmark {serie} (Lesezeiten in ms, Median)")
+        text = scrolledtext.ScrolledText(ergebnis_fenster, width=110, height=12, font=("Courier", 9))
+        text.pack(fill=tk.BOTH, expand=True)
+        text.insert(tk.END, formatiere_benchmark(ergebnisse))
+        text.config(state=tk.DISABLED)
+
+    def open_resource_window(self):
+        # Speicher- und Cache-Nutzung; die JSON-Momentaufnahme geht an "status_snapshot_path" aus config.json
+        try:
+            with open(self.config_path, "r") as f:
+                snapshot_path = json.load(f).get("status_snapshot_path", "status/resources.json")
+        except (FileNotFoundError, json.JSONDecodeError):
+            snapshot_path = "status/resources.json"
+        ResourceWindow(self.window, self.monitor, snapshot_path)
 
     def open_color_scheme_editor(self):
         color_editor = tk.Toplevel(self.window)
@@ -119,7 +242,7 @@ class ConfigWindow:
         selected_scheme = self.color_scheme_var.get()
         colors = self.color_schemes['schemes'][selected_scheme]['colors']
         color_frame = tk.Frame(self.window)
-        color_frame.grid(row=8, column=1, columnspan=3, sticky='nsew')
+        color_frame.grid(row=21, column=1, columnspan=3, sticky='nsew')
 
         for i, (interval, color) in enumerate(colors.items()):
             label = tk.Label(color_frame, text=interval, bg=color, width=10, wraplength=60, justify='center')
@@ -131,17 +254,20 @@ class ConfigWindow:
 
     def save_config(self):
         # Speichern der Konfiguration in eine JSON-Datei
-        config = {
+        # Bestehende Einträge, die hier nicht bearbeitet werden, bleiben erhalten (Read-Modify-Write unter Sperre)
+        aenderungen = {
             "delimiter": self.delimiter_entry.get(),
             "columns": self.columns_entry.get().split(","),
             "date_format": self.date_format_entry.get(),
             "color_scheme": self.color_scheme_var.get(),
             "window_y": self.window_y_entry.get(),
-            "window_x": self.window_x_entry.get()
+            "window_x": self.window_x_entry.get(),
+            "import_chunk_size": int(self.chunk_size_entry.get() or 250000),
+            "merge_policy": self.merge_policy_var.get(),
+            "indicators": [eintrag.strip() for eintrag in self.indicators_entry.get().split(",") if eintrag.strip()],
+            "cache_layout": self.get_cache_layout()
         }
-
-        with open(self.config_path, "w") as f:
-            json.dump(config, f, indent=4)
+        aktualisiere_json(self.config_path, lambda config: {**config, **aenderungen}, standard={})
 
         self.update_callback()
         messagebox.showinfo("Info", "Konfiguration gespeichert! ")
@@ -168,6 +294,19 @@ class ConfigWindow:
             self.window_y_entry.delete(0, tk.END)
             self.window_y_entry.insert(0, config["window_y"])
 
+            self.chunk_size_entry.delete(0, tk.END)
+            self.chunk_size_entry.insert(0, config.get("import_chunk_size", 250000))
+
+            self.merge_policy_var.set(config.get("merge_policy", "newest"))
+
+            self.indicators_entry.delete(0, tk.END)
+            self.indicators_entry.insert(0, ", ".join(config.get("indicators", [])))
+
+            layout = dict(STANDARD_LAYOUT)
+            layout.update(config.get("cache_layout", {}))
+            for key, var in self.layout_vars.items():
+                var.set("" if layout[key] is None else layout[key])
+
             if "color_scheme" in config:
                 self.color_scheme_var.set(config["color_scheme"])
                 self.update_color_preview()
@@ -187,6 +326,12 @@ class ConfigWindow:
         self.window_x_entry.insert(0, "1000")
         self.window_y_entry.delete(0, tk.END)
         self.window_y_entry.insert(0, "600")
+        self.chunk_size_entry.delete(0, tk.END)
+        self.chunk_size_entry.insert(0, "250000")
+        self.merge_policy_var.set("newest")
+        self.indicators_entry.delete(0, tk.END)
+        for key, var in self.layout_vars.items():
+            var.set("" if STANDARD_LAYOUT[key] is None else STANDARD_LAYOUT[key])
 
     def center_window(self):
         # Zentrieren des Konfigurationsfensters auf dem Bildschirm
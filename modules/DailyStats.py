@@ -0,0 +1,192 @@
+import glob
+import json
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from modules.SafeFileIO import atomarer_zielpfad, datei_sperre
+from modules.MetadataManager import intervall_sekunden
+from modules.ParquetCache import CACHE_DIR, lade_serien_meta, serien_fingerprint, serien_pfad
+
+# Spalten der Tagesstatistik
+STATISTIK_SPALTEN = ['day', 'open', 'high', 'low', 'close', 'bars', 'missing_bars', 'range', 'first_time', 'last_time']
+
+
+def intervall_minuten(interval):
+    # Länge eines Bars in Minuten (z.B. 'M15' -> 15, 'S30' -> 0.5)
+    sekunden = intervall_sekunden(interval)
+    return sekunden // 60 if sekunden % 60 == 0 else sekunden / 60
+
+
+def aggregiere_block(df):
+    # Tagesaggregate eines Blocks; der Block muss nicht sortiert sein
+    df = df.sort_values('daytime', kind='stable')
+    gruppen = df.groupby(df['daytime'].dt.normalize(), sort=True)
+    return pd.DataFrame({
+        'open': gruppen['OPEN'].first(),
+        'high': gruppen['HIGH'].max(),
+        'low': gruppen['LOW'].min(),
+        'close': gruppen['CLOSE'].last(),
+        'bars': gruppen.size(),
+        'first_time': gruppen['daytime'].min(),
+        'last_time': gruppen['daytime'].max(),
+    }).rename_axis('day').reset_index()
+
+
+def kombiniere_bloecke(teile, minuten):
+    # Führt die Tagesaggregate aller Blöcke zusammen (ein Tag kann über Blockgrenzen reichen)
+    gesamt = pd.concat(teile, ignore_index=True)
+    gruppen = gesamt.groupby('day', sort=True)
+    statistik = pd.DataFrame({
+        'high': gruppen['high'].max(),
+        'low': gruppen['low'].min(),
+        'bars': gruppen['bars'].sum(),
+        'first_time': gruppen['first_time'].min(),
+        'last_time': gruppen['last_time'].max(),
+    })
+    statistik['open'] = gesamt.sort_values('first_time', kind='stable').groupby('day')['open'].first()
+    statistik['close'] = gesamt.sort_values('last_time', kind='stable').groupby('day')['close'].last()
+    # Fehlende Bars: erwartete Bars zwischen erstem und letztem Bar des Tages abzüglich vorhandener
+    erwartet = ((statistik['last_time'] - statistik['first_time']) / pd.Timedelta(minutes=minuten)).astype('int64') + 1
+    statistik['missing_bars'] = (erwartet - statistik['bars']).clip(lower=0)
+    statistik['range'] = statistik['high'] - statistik['low']
+    return statistik.reset_index()[STATISTIK_SPALTEN]
+
+
+class DailyStats:
+    """
+        Vorberechnete Tagesstatistik je Zeitreihe (Open, High, Low, Close, Anzahl Bars,
+        fehlende Bars und Tagesspanne) als kleine Parquet-Tabelle unter cache/stats/.
+
+        Die Statistik wird beim Import blockweise aus der Cache-Datei berechnet und enthält
+        nur eine Zeile pro Handelstag. Übersicht, Kalender-Heatmap, Achsenbereiche und die
+        Datumsauswahl werden daraus erstellt, ohne die Rohdaten zu laden. Der Fingerabdruck
+        der Zeitreihe wird in den Schema-Metadaten der Tabelle gespeichert.
+
+        Methoden:
+            aktualisiere(symbol, interval): Berechnet die Statistik neu, wenn sich die Zeitreihe geändert hat.
+            lade(symbol, interval): Liefert die Tagesstatistik als DataFrame (None, wenn keine vorhanden ist).
+            achsenbereich(symbol, interval, von, bis): Tief und Hoch eines Datumsbereichs.
+            uebersicht(): Kennzahlen aller Zeitreihen im Cache.
+        """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        # Initialisierung mit dem Cache-Verzeichnis
+        self.cache_dir = cache_dir
+        self.data_dir = os.path.join(cache_dir, 'data')
+        self.meta_dir = os.path.join(cache_dir, 'meta')
+        self.stats_dir = os.path.join(cache_dir, 'stats')
+        if not os.path.exists(self.stats_dir):
+            os.makedirs(self.stats_dir)
+
+    def pfad(self, symbol, interval):
+        # Pfad der Tagesstatistik einer Zeitreihe
+        return os.path.join(self.stats_dir, f"{symbol}_{interval}.parquet")
+
+    def gespeicherter_fingerprint(self, symbol, interval):
+        # Fingerabdruck, mit dem die Statistik berechnet wurde (nur das Schema wird gelesen)
+        pfad = self.pfad(symbol, interval)
+        if not os.path.exists(pfad):
+            return None
+        metadata = pq.read_schema(pfad).metadata or {}
+        return metadata.get(b'fingerprint', b'').decode() or None
+
+    def aktualisiere(self, symbol, interval, batch_size=262144):
+        # Berechnet die Tagesstatistik blockweise aus der Cache-Datei, sofern sie veraltet ist
+        meta = lade_serien_meta(symbol, interval, self.meta_dir)
+        if meta is None:
+            raise FileNotFoundError(f"Keine Metadaten für {symbol}_{interval} vorhanden")
+        fingerprint = serien_fingerprint(meta)
+        if self.gespeicherter_fingerprint(symbol, interval) == fingerprint:
+            return self.lade(symbol, interval)
+
+        with datei_sperre(self.pfad(symbol, interval)):
+            if self.gespeicherter_fingerprint(symbol, interval) == fingerprint:
+                return self.lade(symbol, interval)
+            parquet_file = pq.ParquetFile(serien_pfad(symbol, interval, self.data_dir))
+            teile = [aggregiere_block(batch.to_pandas())
+                     for batch in parquet_file.iter_batches(batch_size=batch_size,
+                                                            columns=['daytime', 'OPEN', 'HIGH', 'LOW', 'CLOSE'])]
+            statistik = kombiniere_bloecke(teile, intervall_minuten(interval))
+            tabelle = pa.Table.from_pandas(statistik, preserve_index=False)
+            tabelle = tabelle.replace_schema_metadata({**(tabelle.schema.metadata or {}),
+                                                       b'fingerprint': fingerprint.encode()})
+            with atomarer_zielpfad(self.pfad(symbol, interval)) as temp_path:
+                pq.write_table(tabelle, temp_path)
+        print(f"Tagesstatistik für {symbol}_{interval} erstellt ({len(statistik)} Handelstage)")
+        return statistik
+
+    def lade(self, symbol, interval):
+        # Tagesstatistik einer Zeitreihe, None wenn (noch) keine vorhanden ist
+        pfad = self.pfad(symbol, interval)
+        if not os.path.exists(pfad):
+            return None
+        return pd.read_parquet(pfad)
+
+    def achsenbereich(self, symbol, interval, von, bis):
+        # Tief und Hoch der Zeitreihe im Datumsbereich [von, bis], None ohne Statistik oder Daten
+        statistik = self.lade(symbol, interval)
+        if statistik is None:
+            return None
+        bereich = statistik[(statistik['day'] >= pd.Timestamp(von)) & (statistik['day'] <= pd.Timestamp(bis))]
+        if bereich.empty:
+            return None
+        return float(bereich['low'].min()), float(bereich['high'].max())
+
+    def uebersicht(self):
+        # Eine Zeile je Zeitreihe im Cache; verwendet nur Metadaten und Tagesstatistiken
+        zeilen = []
+        for meta_datei in sorted(glob.glob(os.path.join(self.meta_dir, '*.json'))):
+            with open(meta_datei, 'r') as f:
+                meta = json.load(f)
+            if 'symbol' not in meta or 'timeframe' not in meta:
+                continue
+            zeile = {'symbol': meta['symbol'], 'interval': meta['timeframe'], 'rows': meta['stats']['rows'],
+                     'start': meta['start_datetime'][:10], 'end': meta['end_datetime'][:10]}
+            # Datenqualität: Summe über die geprüften Quelldateien (Duplikate, nicht lesbare Werte, inkonsistente Bars)
+            geprueft = [quelle['quality'] for quelle in meta.get('sources', []) if quelle.get('quality')]
+            if geprueft:
+                zeile.update({schluessel: sum(qualitaet[schluessel] for qualitaet in geprueft)
+                              for schluessel in ('duplicates', 'coerced', 'inconsistent')})
+            statistik = self.lade(meta['symbol'], meta['timeframe'])
+            if statistik is not None and not statistik.empty:
+                fehlend = int(statistik['missing_bars'].sum())
+                zeile.update({
+                    'days': len(statistik),
+                    'missing_bars': fehlend,
+                    'coverage': round(100.0 * statistik['bars'].sum() / (statistik['bars'].sum() + fehlend), 2),
+                    'avg_range': round(float(statistik['range'].mean()), 2),
+                    'low': float(statistik['low'].min()),
+                    'high': float(statistik['high'].max()),
+                })
+            zeilen.append(zeile)
+        return pd.DataFrame(zeilen)
+
+
+def kalender_heatmap(statistik, titel, wert='coverage'):
+    # Kalender-Heatmap (Wochen x Wochentage) aus einer Tagesstatistik.
+    # wert: 'coverage' (Anteil vorhandener Bars in %) oder 'range' (Tagesspanne als Volatilitätsmaß)
+    import plotly.graph_objects as go
+
+    tage = pd.DataFrame({'day': pd.date_range(statistik['day'].min(), statistik['day'].max(), freq='D')})
+    daten = tage.merge(statistik, on='day', how='left')
+    if wert == 'coverage':
+        werte = 100.0 * daten['bars'] / (daten['bars'] + daten['missing_bars'])
+        skala, beschriftung = 'RdYlGn', 'Abdeckung %'
+    else:
+        werte = daten['range']
+        skala, beschriftung = 'YlOrRd', 'Tagesspanne'
+
+    wochen = daten['day'] - pd.to_timedelta(daten['day'].dt.weekday, unit='D')
+    spalten = np.sort(wochen.unique())
+    matrix = np.full((7, len(spalten)), np.nan)
+    matrix[daten['day'].dt.weekday.to_numpy(), np.searchsorted(spalten, wochen.to_numpy())] = werte.to_numpy()
+    hover = np.full((7, len(spalten)), '', dtype=object)
+    hover[daten['day'].dt.weekday.to_numpy(), np.searchsorted(spalten, wochen.to_numpy())] = daten['day'].dt.strftime('%Y-%m-%d')
+
+    fig = go.Figure(go.Heatmap(z=matrix, x=pd.to_datetime(spalten), y=['Mo', 'Di', 'Mi', 'Do', 'Fr', 'Sa', 'So'],
+                               colorscale=skala, colorbar=dict(title=beschriftung), customdata=hover, hoverongaps=False,
+                               hovertemplate='%{customdata}: %{z:.2f}<extra></extra>'))
+    fig.update_layout(title=titel, xaxis_title='Woche', yaxis=dict(autorange='reversed'), template='plotly_white')
+    return fig
@@ -3,7 +3,77 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import os
-import json
+import shutil
+import time
+from contextlib import ExitStack
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from modules.ParquetCache import daten_fingerprint, import_sperre, row_group_offsets, serien_sperre
+from modules.SafeFileIO import ersetze_datei, lade_json_sicher, schreibe_json_atomar
+from modules.DayIndex import DayIndex
+from modules.SummaryPyramid import SummaryPyramid
+from modules.DailyStats import DailyStats
+from modules.CacheLayout import RowGroupWriter, lade_layout, sortiere_parquet
+from modules.SeriesMerge import SortedMerge, ist_sortiert
+from modules.TickAggregator import TICK_SPALTEN, TickBarBuilder
+from modules.MetadataManager import interval_sort_key
+from modules.DataQuality import QualitaetsPruefung
+
+# Spalten, die beim Import numerisch konvertiert werden
+NUMERISCHE_SPALTEN = ['OPEN', 'HIGH', 'LOW', 'CLOSE', 'TICKVOL', 'VOL', 'SPREAD']
+
+
+class ExportDatei:
+    """
+        Schreibzustand einer temporären Cache-Datei während eines Imports.
+
+        Blöcke werden als Row-Groups angehängt; nebenbei werden der Tagesindex und die Kennzahlen
+        für den Fingerabdruck (erster und letzter Zeitpunkt, Summe der Schlusskurse) fortgeschrieben.
+        Das Schema des ersten Blocks gilt für die gesamte Datei.
+
+        Methoden:
+            schreibe(df): Hängt einen konvertierten Block an.
+            schliesse(): Schließt die Datei.
+            ergebnis(): Liefert (Zeilenanzahl, Spalten, Tagesindex, Kennzahlen).
+        """
+
+    def __init__(self, path, layout):
+        # Initialisierung mit Zielpfad und Cache-Layout
+        self.path = path
+        self.layout = layout
+        self.writer = None
+        self.rows = 0
+        self.columns = []
+        self.tagesindex = DayIndex()
+        self.erster_zeitpunkt = None
+        self.letzter_zeitpunkt = None
+        self.close_summe = 0.0
+
+    def schreibe(self, df):
+        # Hängt einen Block an und aktualisiert Tagesindex und Kennzahlen
+        if df is None or df.empty:
+            return
+        table = pa.Table.from_pandas(df, preserve_index=self.layout['write_index'])
+        if self.writer is None:
+            self.writer = RowGroupWriter(self.path, table.schema, self.layout)
+            self.columns = list(df.columns)
+        self.writer.write_table(table)
+        self.tagesindex.erweitere(df['daytime'], self.rows)
+        self.rows += len(df)
+        if self.erster_zeitpunkt is None:
+            self.erster_zeitpunkt = df['daytime'].iloc[0]
+        self.letzter_zeitpunkt = df['daytime'].iloc[-1]
+        self.close_summe += float(df['CLOSE'].sum())
+
+    def schliesse(self):
+        # Schließt den Writer (mehrfacher Aufruf ist unschädlich)
+        if self.writer is not None:
+            self.writer.close()
+
+    def ergebnis(self):
+        # (Zeilenanzahl, Spalten, Tagesindex, (erster Zeitpunkt, letzter Zeitpunkt, Summe CLOSE))
+        return self.rows, self.columns, self.tagesindex, (self.erster_zeitpunkt, self.letzter_zeitpunkt, self.close_summe)
 
 
 class DataImporter:
@@ -17,6 +87,10 @@ class DataImporter:
         - Import von CSV-Dateien mit spezifischem Namensformat
         - Verarbeitung und Konvertierung von Zeitreihendaten
         - Caching von importierten Daten für schnelleren Zugriff
+        - Blockweiser (Streaming-)Import großer Dateien mit begrenztem Speicherbedarf
+        - Import von Tick-Exporten mit Zusammenfassung zu M1- (und Sekunden-)Bars während des Lesens
+        - Zusammenführen überlappender Exporte derselben Zeitreihe (sortiert, dedupliziert)
+        - Prüfung der Datenqualität beim Import (Lücken, Duplikate, nicht lesbare Werte, inkonsistente Bars)
         - Verwaltung von Metadaten für importierte Datensätze
 
         Die Klasse nutzt Pandas für die Datenverarbeitung und unterstützt verschiedene
@@ -29,6 +103,11 @@ class DataImporter:
         self.cache_dir = 'cache'
         self.data_dir = os.path.join(self.cache_dir, 'data')
         self.meta_dir = os.path.join(self.cache_dir, 'meta')
+        self.chunk_size = int(config.get('import_chunk_size', 250000))
+        self.layout = lade_layout(config)
+        self.letzter_merge = None
+        self.letzter_tick_import = None
+        self.letzte_qualitaet = None
         self.check_cache_directories()
 
     def check_cache_directories(self):
@@ -38,49 +117,355 @@ class DataImporter:
                 os.makedirs(directory)
 
     def import_csv(self, file_path):
+        # Importiert eine CSV-Datei in den Cache, ohne die Zeitreihe anschließend vollständig zu laden
+        # (Bereiche liest der TimeSeriesStore). Ist die Zeitreihe bereits im Cache, bleibt sie unverändert.
+        # Rückgabe wie import_csv_streaming: (Zeilenanzahl, Symbol, Intervall, Startzeitpunkt, Endzeitpunkt)
         try:
-            # Extrahiert Informationen aus dem Dateinamen
-            file_name = file_path.split('/')[-1]
-            symbol, interval, start_date, end_date = self.parse_file_name(file_name)
+            file_name = os.path.basename(file_path)
+            symbol, interval, _, _ = self.parse_file_name(file_name)
             cache_file = os.path.join(self.data_dir, f"{symbol}_{interval}.parquet")
             meta_file = os.path.join(self.meta_dir, f"{symbol}_{interval}.json")
 
             if os.path.exists(cache_file) and os.path.exists(meta_file):
-                # Lädt Daten aus dem Cache, wenn vorhanden
-                df = pd.read_parquet(cache_file)
-                print(f"Daten aus Cache geladen: {file_name}")
-            else:
-                # Importiert CSV-Daten und verarbeitet sie
-                df = pd.read_csv(file_path,
-                                 delimiter=self.config['delimiter'].encode().decode('unicode_escape'),
-                                 names=self.config['columns'],
-                                 skiprows=1)
-
-                # Konvertiert Datum und Zeit
-                df['daytime'] = pd.to_datetime(df['DATE'].astype(str) + ' ' + df['TIME'].astype(str))
-                df['DATE'] = pd.to_datetime(df['DATE'], format='%Y.%m.%d')
-
-                # Konvertiert numerische Spalten
-                for spalte in ['OPEN', 'HIGH', 'LOW', 'CLOSE']:
-                    df[spalte] = pd.to_numeric(df[spalte], errors='coerce')
-
-                # Bestimmt die Richtung (long oder short)
-                df['direction'] = np.where(df['CLOSE'] >= df['OPEN'], 'green', 'red')
-
-                # Speichert Daten im Cache
-                df.to_parquet(cache_file)
-                self.update_metadata(meta_file, symbol, interval, start_date, end_date, df)
-                print(f"Datei erfolgreich eingelesen und gecached: {file_path} ")
+                # Kennzahlen aus den Metadaten, die Daten selbst werden nicht gelesen
+                meta = lade_json_sicher(meta_file)
+                print(f"Daten bereits im Cache: {file_name}")
+                return (meta['stats']['rows'], symbol, interval,
+                        datetime.fromisoformat(meta['start_datetime']), datetime.fromisoformat(meta['end_datetime']))
+        except Exception as e:
+            print(f"Fehler beim Importieren der CSV-Datei: {e}")
+            return None, None, None, None, None
+
+        # Importiert CSV-Daten blockweise
+        return self.import_csv_streaming(file_path)
+
+    def import_csv_streaming(self, file_path, chunk_size=None, progress_callback=None):
+        # Speicherschonender Import: Die CSV wird blockweise gelesen, konvertiert und
+        # in Row-Groups (Größe, Codec usw. laut "cache_layout") in die Parquet-Datei geschrieben.
+        # Der Speicherbedarf hängt nur von Block- und Row-Group-Größe ab, nicht von der Dateigröße.
+        # Ist die Zeitreihe bereits aus einem anderen Export im Cache, werden beide Exporte zusammengeführt.
+        # Der Qualitätsbericht des Exports steht in den Metadaten ("quality") und in 'letzte_qualitaet'.
+        # Rückgabe: (Zeilenanzahl, Symbol, Intervall, Startzeitpunkt, Endzeitpunkt der Zeitreihe)
+        self.letzter_merge = None
+        self.letzte_qualitaet = None
+        try:
+            file_name = os.path.basename(file_path)
+            symbol, interval, start_date, end_date = self.parse_file_name(file_name)
+            cache_file = os.path.join(self.data_dir, f"{symbol}_{interval}.parquet")
+            meta_file = os.path.join(self.meta_dir, f"{symbol}_{interval}.json")
+
+            # Parallele Importe derselben Zeitreihe warten aufeinander; Leser werden nicht blockiert
+            with import_sperre(symbol, interval, self.meta_dir):
+                meta = lade_json_sicher(meta_file) if os.path.exists(cache_file) else None
+                if meta is not None and file_name in [quelle['file'] for quelle in meta.get('sources', [])]:
+                    print(f"Daten bereits im Cache vorhanden: {file_name}")
+                    return (meta['stats']['rows'], symbol, interval,
+                            datetime.fromisoformat(meta['start_datetime']), datetime.fromisoformat(meta['end_datetime']))
 
-            # Bereitet das Ergebnis-DataFrame vor
-            result_df = df[['DATE', 'TIME', 'OPEN', 'HIGH', 'LOW', 'CLOSE', 'direction', 'daytime']]
-            result_df.columns = ['date', 'time', 'open', 'high', 'low', 'close', 'direction', 'daytime']
+                # Geschrieben wird in temporäre Dateien, die erst nach vollständigem Import die Cache-Datei ersetzen
+                temp_file = f"{cache_file}.{os.getpid()}.tmp"
+                pruefung = QualitaetsPruefung(interval)
+                try:
+                    export = self.schreibe_export(file_path, temp_file, chunk_size, progress_callback, pruefung)
+                    if pruefung.rueckspruenge:
+                        # Unsortierter Export: Lücken über alle Zeitstempel neu zählen (nur die Spalte 'daytime')
+                        pruefung.zaehle_luecken(pq.read_table(temp_file, columns=['daytime'])['daytime'].to_numpy())
+                    ergebnis = self.uebernehme_export(temp_file, file_name, symbol, interval, start_date, end_date,
+                                                      meta, *export, qualitaet=pruefung)
+                finally:
+                    if os.path.exists(temp_file):
+                        os.remove(temp_file)
 
-            return result_df, symbol, interval, start_date, end_date
+                SummaryPyramid(self.cache_dir).aktualisiere(symbol, interval)
+                DailyStats(self.cache_dir).aktualisiere(symbol, interval)
+                print(f"Datei erfolgreich eingelesen und gecached: {file_path} ")
+                return (ergebnis[0], symbol, interval) + tuple(ergebnis[1:])
         except Exception as e:
             print(f"Fehler beim Importieren der CSV-Datei: {e}")
             return None, None, None, None, None
 
+    def schreibe_export(self, file_path, temp_file, chunk_size=None, progress_callback=None, pruefung=None):
+        # Liest die CSV blockweise und schreibt sie in 'temp_file'; jeder Block durchläuft die Qualitätsprüfung 'pruefung'.
+        # Rückgabe: (Zeilenanzahl, Spalten, Tagesindex, (erster Zeitpunkt, letzter Zeitpunkt, Summe CLOSE))
+        chunk_size = int(chunk_size or self.chunk_size)
+        file_size = max(os.path.getsize(file_path), 1)
+        delimiter = self.config['delimiter'].encode().decode('unicode_escape')
+        export = ExportDatei(temp_file, self.layout)
+
+        try:
+            with open(file_path, 'rb') as handle:
+                reader = pd.read_csv(handle,
+                                     delimiter=delimiter,
+                                     names=self.config['columns'],
+                                     skiprows=1,
+                                     chunksize=chunk_size)
+                for chunk_nr, chunk in enumerate(reader, start=1):
+                    export.schreibe(self.convert_chunk(chunk, pruefung))
+
+                    # Fortschritt pro Block melden
+                    fortschritt = min(handle.tell() / file_size, 1.0)
+                    print(f"Block {chunk_nr}: {export.rows} Zeilen verarbeitet ({fortschritt:.0%})")
+                    if progress_callback is not None:
+                        progress_callback(chunk_nr, export.rows, fortschritt)
+        finally:
+            export.schliesse()
+
+        if export.writer is None:
+            raise ValueError("Die CSV-Datei enthält keine Daten")
+        return export.ergebnis()
+
+    def import_ticks_streaming(self, file_path, intervals=None, chunk_size=None, progress_callback=None):
+        # Import eines Tick-Exports: Die Ticks werden blockweise gelesen, direkt zu Bars der Intervalle
+        # (Standard "tick_intervals", z.B. ["M1", "S10"]) zusammengefasst und wie ein Bar-Export in den
+        # Cache übernommen bzw. mit vorhandenen Bars zusammengeführt. Der Speicherbedarf hängt nur von
+        # der Blockgröße ab. Durchsatz und verworfene Ticks stehen anschließend in 'letzter_tick_import'.
+        # Rückgabe: Liste von (Zeilenanzahl, Symbol, Intervall, Startzeitpunkt, Endzeitpunkt) je Intervall
+        self.letzter_merge = None
+        self.letzter_tick_import = None
+        try:
+            file_name = os.path.basename(file_path)
+            symbol, start_date, end_date = self.parse_tick_file_name(file_name)
+            intervals = sorted(set(intervals or self.config.get('tick_intervals', ['M1'])), key=interval_sort_key)
+
+            with ExitStack() as sperren:
+                # Import-Sperren aller Zielintervalle (in fester Reihenfolge, damit sich Importe nicht blockieren)
+                for interval in intervals:
+                    sperren.enter_context(import_sperre(symbol, interval, self.meta_dir))
+                ergebnisse = {}
+                metas = {}
+                for interval in intervals:
+                    cache_file = os.path.join(self.data_dir, f"{symbol}_{interval}.parquet")
+                    meta_file = os.path.join(self.meta_dir, f"{symbol}_{interval}.json")
+                    meta = lade_json_sicher(meta_file) if os.path.exists(cache_file) else None
+                    if meta is not None and file_name in [quelle['file'] for quelle in meta.get('sources', [])]:
+                        print(f"Daten bereits im Cache vorhanden: {file_name} ({interval})")
+                        ergebnisse[interval] = (meta['stats']['rows'], datetime.fromisoformat(meta['start_datetime']),
+                                                datetime.fromisoformat(meta['end_datetime']))
+                    else:
+                        metas[interval] = meta
+
+                temp_files = {interval: os.path.join(self.data_dir, f"{symbol}_{interval}.parquet.{os.getpid()}.tmp")
+                              for interval in metas}
+                try:
+                    if temp_files:
+                        exporte = self.schreibe_ticks(file_path, temp_files, chunk_size, progress_callback)
+                        for interval, export in exporte.items():
+                            if export.rows == 0:
+                                print(f"Keine Bars für {symbol}_{interval} erzeugt")
+                                continue
+                            ergebnisse[interval] = self.uebernehme_export(temp_files[interval], file_name, symbol,
+                                                                          interval, start_date, end_date,
+                                                                          metas[interval], *export.ergebnis())
+                finally:
+                    for temp_file in temp_files.values():
+                        if os.path.exists(temp_file):
+                            os.remove(temp_file)
+
+            for interval in metas:
+                if interval in ergebnisse:
+                    SummaryPyramid(self.cache_dir).aktualisiere(symbol, interval)
+                    DailyStats(self.cache_dir).aktualisiere(symbol, interval)
+            print(f"Tick-Datei erfolgreich eingelesen und gecached: {file_path} ")
+            return [(ergebnisse[interval][0], symbol, interval) + tuple(ergebnisse[interval][1:])
+                    for interval in intervals if interval in ergebnisse]
+        except Exception as e:
+            print(f"Fehler beim Importieren der Tick-Datei: {e}")
+            return []
+
+    def schreibe_ticks(self, file_path, temp_files, chunk_size=None, progress_callback=None):
+        # Liest den Tick-Export blockweise, fasst ihn zu Bars zusammen und schreibt je Intervall eine temporäre Datei.
+        # Rückgabe: Dictionary Intervall -> ExportDatei
+        chunk_size = int(chunk_size or self.config.get('tick_chunk_size', self.chunk_size))
+        file_size = max(os.path.getsize(file_path), 1)
+        delimiter = self.config['delimiter'].encode().decode('unicode_escape')
+        builder = TickBarBuilder(list(temp_files), preis=self.config.get('tick_price', 'bid'),
+                                 date_format=self.config.get('tick_date_format', '%Y.%m.%d %H:%M:%S.%f'))
+        exporte = {interval: ExportDatei(temp_file, self.layout) for interval, temp_file in temp_files.items()}
+        start = time.perf_counter()
+
+        try:
+            with open(file_path, 'rb') as handle:
+                reader = pd.read_csv(handle,
+                                     delimiter=delimiter,
+                                     names=self.config.get('tick_columns', TICK_SPALTEN),
+                                     skiprows=1,
+                                     dtype={'DATE': str, 'TIME': str},
+                                     chunksize=chunk_size)
+                for chunk_nr, chunk in enumerate(reader, start=1):
+                    for interval, bars in builder.verarbeite_block(chunk).items():
+                        exporte[interval].schreibe(bars)
+
+                    # Fortschritt und Durchsatz pro Block melden
+                    fortschritt = min(handle.tell() / file_size, 1.0)
+                    dauer = max(time.perf_counter() - start, 1e-9)
+                    print(f"Block {chunk_nr}: {builder.ticks} Ticks verarbeitet ({fortschritt:.0%}, "
+                          f"{builder.ticks / dauer:,.0f} Ticks/s)")
+                    if progress_callback is not None:
+                        progress_callback(chunk_nr, builder.ticks, fortschritt)
+            for interval, bars in builder.abschliessen().items():
+                exporte[interval].schreibe(bars)
+        finally:
+            for export in exporte.values():
+                export.schliesse()
+
+        if builder.ticks == 0:
+            raise ValueError("Die Tick-Datei enthält keine Daten")
+        dauer = max(time.perf_counter() - start, 1e-9)
+        self.letzter_tick_import = {"file": os.path.basename(file_path), "ticks": builder.ticks,
+                                    "seconds": round(dauer, 2), "ticks_per_second": round(builder.ticks / dauer),
+                                    "discarded": builder.verworfen(),
+                                    "bars": {interval: export.rows for interval, export in exporte.items()}}
+        print(f"Tick-Import: {builder.ticks} Ticks in {dauer:.1f}s ({builder.ticks / dauer:,.0f} Ticks/s), "
+              f"{builder.verworfen()} verworfen, Bars: {self.letzter_tick_import['bars']}")
+        return exporte
+
+    def uebernehme_export(self, temp_file, file_name, symbol, interval, start_date, end_date, meta, rows, columns,
+                          tagesindex, kennzahlen, qualitaet=None):
+        # Übernimmt eine vollständig geschriebene temporäre Datei in den Cache: neue Zeitreihe oder Merge
+        # mit der vorhandenen. Muss unter der Import-Sperre der Zeitreihe aufgerufen werden.
+        # Der Qualitätsbericht (QualitaetsPruefung) ersetzt "quality" in den Metadaten; ohne Bericht bleibt der bisherige.
+        # Rückgabe: (Zeilenanzahl, erster Zeitpunkt, letzter Zeitpunkt)
+        cache_file = os.path.join(self.data_dir, f"{symbol}_{interval}.parquet")
+        meta_file = os.path.join(self.meta_dir, f"{symbol}_{interval}.json")
+        quelle = {"file": file_name, "start": start_date.strftime("%Y-%m-%dT%H:%M:%S"),
+                  "end": end_date.strftime("%Y-%m-%dT%H:%M:%S"), "rows": rows}
+        zusatz = {}
+        if qualitaet is not None:
+            quelle["quality"] = qualitaet.kurzfassung()
+            self.letzte_qualitaet = {"file": file_name, **qualitaet.bericht()}
+            zusatz["quality"] = self.letzte_qualitaet
+            print(f"Datenqualität {symbol}_{interval}: {quelle['quality']} (Prüfung {qualitaet.sekunden:.2f}s)")
+        elif meta is not None and meta.get("quality"):
+            zusatz["quality"] = meta["quality"]
+        if meta is None:
+            return self.fertigstelle_cache(temp_file, cache_file, meta_file, file_name, symbol, interval, rows, columns,
+                                           tagesindex, kennzahlen, [quelle], **zusatz)
+        merge_file = f"{cache_file}.{os.getpid()}.merge.tmp"
+        try:
+            return self.merge_export(temp_file, merge_file, cache_file, meta_file, meta, file_name, symbol, interval,
+                                     tagesindex, quelle, **zusatz)
+        finally:
+            if os.path.exists(merge_file):
+                os.remove(merge_file)
+
+    def fertigstelle_cache(self, temp_file, cache_file, meta_file, file_name, symbol, interval, rows, columns,
+                           tagesindex, kennzahlen, quellen, **zusatz):
+        # Sortiert bei Bedarf, vervollständigt den Tagesindex und tauscht Cache-Datei und Metadaten aus.
+        # Rückgabe: (Zeilenanzahl, erster Zeitpunkt, letzter Zeitpunkt)
+        erster_zeitpunkt, letzter_zeitpunkt, close_summe = kennzahlen
+        if not tagesindex.sortiert and self.layout['sort_by_daytime']:
+            # Unsortierter Export: Datei nach 'daytime' sortieren und den Tagesindex neu aufbauen
+            print(f"Hinweis: {file_name} ist nicht nach Zeit sortiert, die Cache-Datei wird sortiert")
+            daytime = sortiere_parquet(temp_file, self.layout)
+            tagesindex = DayIndex()
+            tagesindex.erweitere(daytime, 0)
+            erster_zeitpunkt, letzter_zeitpunkt = daytime[0], daytime[-1]
+
+        # Tagesindex: Handelstag -> (erste Zeile, letzte Zeile, Row-Group)
+        tagesindex.setze_row_groups(row_group_offsets(temp_file))
+        if not tagesindex.sortiert:
+            print(f"Hinweis: {file_name} ist nicht nach Zeit sortiert, es wird kein Tagesindex erstellt")
+            # Abdeckung aus Minimum und Maximum statt aus erster und letzter Zeile
+            extrema = pc.min_max(pq.read_table(temp_file, columns=['daytime'])['daytime']).as_py()
+            erster_zeitpunkt, letzter_zeitpunkt = extrema['min'], extrema['max']
+
+        # start_datetime/end_datetime geben die tatsächliche Abdeckung wieder, nicht den Zeitraum aus dem Dateinamen
+        erster_zeitpunkt, letzter_zeitpunkt = pd.Timestamp(erster_zeitpunkt), pd.Timestamp(letzter_zeitpunkt)
+        fingerprint = daten_fingerprint(rows, erster_zeitpunkt, letzter_zeitpunkt, close_summe)
+        # Daten und Metadaten werden gemeinsam unter exklusiver Sperre ausgetauscht
+        with serien_sperre(symbol, interval, exklusiv=True, meta_dir=self.meta_dir):
+            ersetze_datei(temp_file, cache_file)
+            self.update_metadata(meta_file, symbol, interval, erster_zeitpunkt, letzter_zeitpunkt, rows, columns,
+                                 fingerprint, day_index=tagesindex.to_dict(), sources=quellen, **zusatz)
+        return rows, erster_zeitpunkt.to_pydatetime(), letzter_zeitpunkt.to_pydatetime()
+
+    def merge_export(self, temp_file, merge_file, cache_file, meta_file, meta, file_name, symbol, interval,
+                     tagesindex, quelle, **zusatz):
+        # Führt einen weiteren Export mit der vorhandenen Zeitreihe zusammen (linearer Merge zweier sortierter
+        # Dateien, doppelte Zeitstempel nach "merge_policy"). Rückgabe wie fertigstelle_cache.
+        if not tagesindex.sortiert:
+            sortiere_parquet(temp_file, self.layout)
+        alt_file = cache_file
+        if not meta.get('day_index') and not ist_sortiert(cache_file):
+            # Älterer, unsortierter Cache: sortierte Kopie als Merge-Quelle verwenden
+            alt_file = f"{cache_file}.{os.getpid()}.alt.tmp"
+            shutil.copyfile(cache_file, alt_file)
+            sortiere_parquet(alt_file, self.layout)
+
+        # "newest": der Export mit dem späteren Enddatum gewinnt, "first": die vorhandenen Daten gewinnen
+        policy = self.config.get('merge_policy', 'newest')
+        bisheriges_ende = max([q['end'] for q in meta.get('sources', [])] or [meta['end_datetime']])
+        neu_gewinnt = policy == 'newest' and quelle['end'] >= bisheriges_ende
+
+        try:
+            merge = SortedMerge(alt_file, temp_file, neu_gewinnt=neu_gewinnt).schreibe(merge_file, self.layout)
+        finally:
+            if alt_file != cache_file and os.path.exists(alt_file):
+                os.remove(alt_file)
+
+        self.letzter_merge = {"file": file_name, "policy": policy, "rows_new": quelle['rows'],
+                              "overlap": merge.ueberlappung, "conflicts": merge.konflikte}
+        print(f"Merge {symbol}_{interval} mit {file_name}: {merge.ueberlappung} überlappende Zeitstempel, "
+              f"{merge.konflikte} Konflikte (Strategie '{policy}'), {merge.rows} Zeilen gesamt")
+        quellen = meta.get('sources', []) + [quelle]
+        # Werden bereits vorhandene Zeilen verändert, steigt die Revision; Pyramide und Indikatoren
+        # werden dann vollständig neu berechnet statt nur fortgesetzt
+        revision = meta.get('revision', 0)
+        if alt_file != cache_file or (merge.erste_aenderung is not None and merge.erste_aenderung < meta['stats']['rows']):
+            revision += 1
+        return self.fertigstelle_cache(merge_file, cache_file, meta_file, file_name, symbol, interval, merge.rows,
+                                       meta['stats']['column'], merge.tagesindex,
+                                       (merge.erster_zeitpunkt, merge.letzter_zeitpunkt, merge.close_summe),
+                                       quellen, revision=revision, last_merge=self.letzter_merge, **zusatz)
+
+    def convert_chunk(self, df, pruefung=None):
+        # Konvertiert einen Block; mit 'pruefung' (QualitaetsPruefung) werden nicht lesbare Werte und der Block erfasst
+        # Konvertiert Datum und Zeit
+        datum_zeit = df['DATE'].astype(str) + ' ' + df['TIME'].astype(str)
+        try:
+            df['daytime'] = pd.to_datetime(datum_zeit, format=self.config.get('date_format'))
+        except (ValueError, TypeError):
+            df['daytime'] = pd.to_datetime(datum_zeit)
+        df['DATE'] = pd.to_datetime(df['DATE'], format='%Y.%m.%d')
+        df['TIME'] = df['TIME'].astype(str)
+
+        # Konvertiert numerische Spalten (einheitlich float64, damit alle Blöcke dasselbe Schema haben)
+        for spalte in NUMERISCHE_SPALTEN:
+            if spalte in df.columns:
+                # Nur Textspalten können nicht lesbare Werte enthalten (sonst hat read_csv bereits numerisch gelesen)
+                vorhanden = (df[spalte].notna().to_numpy()
+                             if pruefung is not None and not pd.api.types.is_numeric_dtype(df[spalte]) else None)
+                df[spalte] = pd.to_numeric(df[spalte], errors='coerce').astype('float64')
+                if vorhanden is not None:
+                    pruefung.zaehle_umwandlung(spalte, vorhanden & df[spalte].isna().to_numpy(), df['daytime'])
+
+        # Bestimmt die Richtung (long oder short)
+        df['direction'] = np.where(df['CLOSE'] >= df['OPEN'], 'green', 'red')
+        if pruefung is not None:
+            pruefung.pruefe_block(df)
+        return df
+
+    def ist_tick_export(self, file_name):
+        # Tick-Exporte haben kein Intervall im Dateinamen (z.B. DE40_202410010000_202410312359.csv)
+        try:
+            self.parse_file_name(file_name)
+            return False
+        except ValueError:
+            pass
+        try:
+            self.parse_tick_file_name(file_name)
+            return True
+        except ValueError:
+            return False
+
+    def parse_tick_file_name(self, file_name):
+        # Extrahiert Symbol und Zeitraum aus dem Namen eines Tick-Exports (optional mit "_TICKS")
+        match = re.match(r'(\w+?)(?:_TICKS?)?_(\d{12})_(\d{12})\.csv', file_name)
+        if not match:
+            raise ValueError("Ungültiges Datei-Namen-Format")
+        symbol, start_date, end_date = match.groups()
+        return symbol, datetime.strptime(start_date, '%Y%m%d%H%M'), datetime.strptime(end_date, '%Y%m%d%H%M')
+
     def parse_file_name(self, file_name):
         # Extrahiert Informationen aus dem Dateinamen
         match = re.match(r'(\w+)_(M\d+)_(\d{12})_(\d{12})\.csv', file_name)
@@ -93,7 +478,7 @@ class DataImporter:
         else:
             raise ValueError("Ungültiges Datei-Namen-Format")
 
-    def update_metadata(self, meta_file, symbol, interval, start_date, end_date, df):
+    def update_metadata(self, meta_file, symbol, interval, start_date, end_date, rows, columns, fingerprint=None, **zusatz):
         # Aktualisiert die Metadaten für den importierten Datensatz
         metadata = {
             "filename": f"{symbol}_{interval}.parquet",
@@ -102,10 +487,12 @@ class DataImporter:
             "start_datetime": start_date.strftime("%Y-%m-%dT%H:%M:%S"),
             "end_datetime": end_date.strftime("%Y-%m-%dT%H:%M:%S"),
             "last_accessed": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+            "fingerprint": fingerprint,
             "stats": {
-                "rows": len(df),
-                "column": list(df.columns)
+                "rows": rows,
+                "column": list(columns)
             }
         }
-        with open(meta_file, 'w') as f:
-            json.dump(metadata, f, indent=4)
+        # Zusätzliche Einträge (z.B. Tagesindex) werden direkt übernommen
+        metadata.update(zusatz)
+        schreibe_json_atomar(meta_file, metadata)
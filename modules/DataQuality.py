@@ -0,0 +1,211 @@
+import time
+import numpy as np
+import pandas as pd
+from modules.MetadataManager import intervall_sekunden
+
+# Länge eines Tages in Nanosekunden (Lücken werden nur innerhalb eines Handelstags gezählt)
+TAG_NS = 86400 * 10 ** 9
+
+# Anzahl gespeicherter Fundstellen je Kategorie
+MAX_FUNDSTELLEN = 20
+
+
+def als_text(zeitpunkte_ns):
+    # Zeitstempel in ns als ISO-Texte (für die Metadaten)
+    return [pd.Timestamp(int(wert)).strftime("%Y-%m-%dT%H:%M:%S") for wert in zeitpunkte_ns]
+
+
+class QualitaetsPruefung:
+    """
+        Vektorisierte Prüfung der Datenqualität während des Imports, Block für Block.
+
+        Gezählt und mit Fundstellen erfasst werden:
+        - Lücken: fehlende Bars gegenüber dem Intervall-Raster innerhalb eines Handelstags
+          (wie in der Tagesstatistik; Nacht und Wochenende zählen nicht), die größten werden gespeichert
+        - doppelte Zeitstempel und Rücksprünge (nicht sortierte Zeilen)
+        - leere Werte je Spalte und davon die durch errors='coerce' entstandenen NaNs (nicht lesbare Werte)
+        - inkonsistente Bars (HIGH < LOW, OPEN oder CLOSE außerhalb von LOW..HIGH)
+        Lücken werden auf den sortierten Zeitstempeln gezählt, Duplikate und Rücksprünge in der
+        Reihenfolge der Datei. Blockgrenzen werden über den letzten bzw. größten Zeitstempel der
+        vorherigen Blöcke berücksichtigt. Landet ein verspäteter Bar erst in einem späteren Block,
+        ist die blockweise Lückenzählung zu hoch; bei Rücksprüngen zählt der Import die Lücken deshalb
+        nach dem Schreiben über alle Zeitstempel neu (zaehle_luecken). Jede Prüfung ist ein Vergleich über ganze Spalten (NumPy),
+        die Kosten sind gegenüber dem Lesen der CSV gering; die benötigte Zeit wird im Bericht ausgewiesen.
+
+        Methoden:
+            zaehle_umwandlung(spalte, maske, daytime): Erfasst NaNs aus der Umwandlung einer Spalte.
+            pruefe_block(df): Prüft einen konvertierten Block.
+            zaehle_luecken(daytime): Zählt die Lücken über alle Zeitstempel neu (unsortierte Exporte).
+            bericht(): Zusammenfassung mit Fundstellen (für die Metadaten der Zeitreihe).
+            kurzfassung(): Nur die Zähler (für den Eintrag der Quelldatei).
+        """
+
+    def __init__(self, interval, max_fundstellen=MAX_FUNDSTELLEN):
+        # Initialisierung mit dem Intervall der Zeitreihe (bestimmt das erwartete Raster)
+        self.schritt = intervall_sekunden(interval) * 10 ** 9
+        self.max_fundstellen = max_fundstellen
+        self.zeilen = 0
+        self.letzter = None
+        self.hoechster = None
+        self.luecken = 0
+        self.fehlende_bars = 0
+        self.groesste_luecken = np.empty((0, 3), dtype='int64')
+        self.duplikate = 0
+        self.rueckspruenge = 0
+        self.leer = {}
+        self.umgewandelt = {}
+        self.inkonsistent = 0
+        self.inkonsistent_art = {'high_below_low': 0, 'open_outside': 0, 'close_outside': 0}
+        self.fundstellen = {'duplicates': [], 'out_of_order': [], 'coerced': [], 'inconsistent': []}
+        self.sekunden = 0.0
+
+    def merke(self, kategorie, zeitpunkte_ns):
+        # Ergänzt die Fundstellen einer Kategorie bis zur Obergrenze
+        liste = self.fundstellen[kategorie]
+        frei = self.max_fundstellen - len(liste)
+        if frei > 0 and len(zeitpunkte_ns):
+            liste.extend(als_text(zeitpunkte_ns[:frei]))
+
+    def zaehle_umwandlung(self, spalte, maske, daytime):
+        # maske: Werte, die vorhanden waren und durch die Umwandlung zu NaN wurden
+        beginn = time.perf_counter()
+        anzahl = int(np.count_nonzero(maske))
+        if anzahl:
+            self.umgewandelt[spalte] = self.umgewandelt.get(spalte, 0) + anzahl
+            self.merke('coerced', daytime.to_numpy(dtype='datetime64[ns]')[maske].view('int64'))
+        self.sekunden += time.perf_counter() - beginn
+
+    def pruefe_block(self, df):
+        # Prüft einen konvertierten Block (Spalte 'daytime' und die Kursspalten)
+        beginn = time.perf_counter()
+        if df is None or df.empty:
+            return
+        zeit = df['daytime'].to_numpy(dtype='datetime64[ns]').view('int64')
+        if self.letzter is None:
+            vorher, nachher = zeit[:-1], zeit[1:]
+        else:
+            vorher, nachher = np.concatenate(([self.letzter], zeit[:-1])), zeit
+        abstand = nachher - vorher
+
+        # Doppelte Zeitstempel und Rücksprünge (in der Reihenfolge der Datei)
+        doppelt = abstand == 0
+        rueckwaerts = abstand < 0
+        self.duplikate += int(np.count_nonzero(doppelt))
+        self.rueckspruenge += int(np.count_nonzero(rueckwaerts))
+        self.merke('duplicates', nachher[doppelt])
+        self.merke('out_of_order', nachher[rueckwaerts])
+
+        # Lücken auf den sortierten, eindeutigen Zeitstempeln (vertauschte oder doppelte Bars sind keine Lücke),
+        # über Blockgrenzen hinweg ab dem bisher größten Zeitstempel. Ein verspäteter Bar, der erst in einem
+        # späteren Block steht, wird hier nicht mehr berücksichtigt; bei Rücksprüngen zählt zaehle_luecken neu
+        sortiert = zeit if not (doppelt.any() or rueckwaerts.any()) else np.unique(zeit)
+        if self.hoechster is not None:
+            sortiert = np.concatenate(([self.hoechster], sortiert[sortiert > self.hoechster]))
+        self.erfasse_luecken(sortiert)
+
+        # Leere Werte je Kursspalte (beim Import float64), einschließlich der durch die Umwandlung entstandenen
+        for spalte in df.columns:
+            if df[spalte].dtype == 'float64':
+                anzahl = int(np.count_nonzero(np.isnan(df[spalte].to_numpy())))
+                if anzahl:
+                    self.leer[spalte] = self.leer.get(spalte, 0) + anzahl
+
+        # Inkonsistente Bars (Vergleiche mit NaN sind falsch und zählen nicht)
+        if all(spalte in df.columns for spalte in ('OPEN', 'HIGH', 'LOW', 'CLOSE')):
+            hoch, tief = df['HIGH'].to_numpy(), df['LOW'].to_numpy()
+            eroeffnung, schluss = df['OPEN'].to_numpy(), df['CLOSE'].to_numpy()
+            hoch_unter_tief = hoch < tief
+            eroeffnung_ausserhalb = (eroeffnung > hoch) | (eroeffnung < tief)
+            schluss_ausserhalb = (schluss > hoch) | (schluss < tief)
+            fehler = hoch_unter_tief | eroeffnung_ausserhalb | schluss_ausserhalb
+            if fehler.any():
+                self.inkonsistent += int(np.count_nonzero(fehler))
+                self.inkonsistent_art['high_below_low'] += int(np.count_nonzero(hoch_unter_tief))
+                self.inkonsistent_art['open_outside'] += int(np.count_nonzero(eroeffnung_ausserhalb))
+                self.inkonsistent_art['close_outside'] += int(np.count_nonzero(schluss_ausserhalb))
+                self.merke('inconsistent', zeit[fehler])
+
+        self.zeilen += len(zeit)
+        self.letzter = zeit[-1]
+        self.sekunden += time.perf_counter() - beginn
+
+    def erfasse_luecken(self, sortiert):
+        # Zählt die Lücken zwischen aufsteigend sortierten, eindeutigen Zeitstempeln: mindestens ein ganzer
+        # Bar fehlt und beide Bars liegen am selben Tag
+        vorher, nachher = sortiert[:-1], sortiert[1:]
+        abstand = nachher - vorher
+        luecke = np.flatnonzero(abstand >= 2 * self.schritt)
+        luecke = luecke[vorher[luecke] // TAG_NS == nachher[luecke] // TAG_NS]
+        if len(luecke):
+            fehlend = (abstand[luecke] - 1) // self.schritt
+            self.luecken += len(fehlend)
+            self.fehlende_bars += int(fehlend.sum())
+            kandidaten = np.concatenate([self.groesste_luecken,
+                                         np.column_stack([vorher[luecke], nachher[luecke], fehlend])])
+            if len(kandidaten) > self.max_fundstellen:
+                kandidaten = kandidaten[np.argsort(-kandidaten[:, 2], kind='stable')[:self.max_fundstellen]]
+            self.groesste_luecken = kandidaten
+        if len(sortiert):
+            self.hoechster = sortiert[-1]
+
+    def zaehle_luecken(self, daytime):
+        # Zählt die Lücken über alle Zeitstempel der Zeitreihe neu (ersetzt die blockweise Zählung).
+        # Nötig bei Rücksprüngen über Blockgrenzen hinweg; 'daytime' wird dafür sortiert
+        beginn = time.perf_counter()
+        self.luecken = 0
+        self.fehlende_bars = 0
+        self.groesste_luecken = np.empty((0, 3), dtype='int64')
+        self.erfasse_luecken(np.unique(np.asarray(daytime, dtype='datetime64[ns]').view('int64')))
+        self.sekunden += time.perf_counter() - beginn
+
+    def kurzfassung(self):
+        # Zähler ohne Fundstellen
+        return {'rows': self.zeilen, 'gaps': self.luecken, 'missing_bars': self.fehlende_bars,
+                'duplicates': self.duplikate, 'out_of_order': self.rueckspruenge,
+                'nan': sum(self.leer.values()), 'coerced': sum(self.umgewandelt.values()),
+                'inconsistent': self.inkonsistent}
+
+    def bericht(self):
+        # Zähler, Aufschlüsselung und Fundstellen (größte Lücken zuerst)
+        self.groesste_luecken = self.groesste_luecken[np.argsort(-self.groesste_luecken[:, 2], kind='stable')]
+        luecken = [{'start': start, 'end': ende, 'missing_bars': int(anzahl)}
+                   for (start, ende), anzahl in zip(zip(als_text(self.groesste_luecken[:, 0]),
+                                                        als_text(self.groesste_luecken[:, 1])),
+                                                    self.groesste_luecken[:, 2])]
+        return {**self.kurzfassung(), 'nan_columns': dict(self.leer), 'coerced_columns': dict(self.umgewandelt),
+                'inconsistent_types': dict(self.inkonsistent_art), 'largest_gaps': luecken,
+                'locations': {kategorie: list(liste) for kategorie, liste in self.fundstellen.items()},
+                'check_seconds': round(self.sekunden, 3)}
+
+
+def hat_auffaelligkeiten(bericht):
+    # True bei Duplikaten, Rücksprüngen, nicht lesbaren Werten oder inkonsistenten Bars (Lücken allein nicht)
+    return any(bericht.get(schluessel) for schluessel in ('duplicates', 'out_of_order', 'coerced', 'inconsistent'))
+
+
+def formatiere_bericht(bericht, titel=""):
+    # Bericht als Text für die Anzeige
+    zeilen = [titel] if titel else []
+    zeilen.append(f"Geprüfte Zeilen:          {bericht['rows']:,}" + (f" (Quelle: {bericht['file']})" if bericht.get('file') else ""))
+    zeilen.append(f"Lücken im Handelstag:     {bericht['gaps']:,} ({bericht['missing_bars']:,} fehlende Bars)")
+    zeilen.append(f"Doppelte Zeitstempel:     {bericht['duplicates']:,}")
+    zeilen.append(f"Rücksprünge (unsortiert): {bericht['out_of_order']:,}")
+    zeilen.append(f"Leere Werte:              {bericht['nan']:,}  {bericht.get('nan_columns') or ''}")
+    zeilen.append(f"Davon nicht lesbar:       {bericht['coerced']:,}  {bericht.get('coerced_columns') or ''}")
+    arten = bericht.get('inconsistent_types', {})
+    zeilen.append(f"Inkonsistente Bars:       {bericht['inconsistent']:,}  (HIGH < LOW: {arten.get('high_below_low', 0)}, "
+                  f"OPEN außerhalb: {arten.get('open_outside', 0)}, CLOSE außerhalb: {arten.get('close_outside', 0)})")
+    if bericht.get('check_seconds') is not None:
+        zeilen.append(f"Prüfdauer:                {bericht['check_seconds']:.3f}s")
+    if bericht.get('largest_gaps'):
+        zeilen.append("")
+        zeilen.append("Größte Lücken:")
+        zeilen.extend(f"  {luecke['start']} - {luecke['end']}: {luecke['missing_bars']} Bars" for luecke in bericht['largest_gaps'])
+    namen = {'duplicates': "Doppelte Zeitstempel", 'out_of_order': "Rücksprünge", 'coerced': "Nicht lesbare Werte",
+             'inconsistent': "Inkonsistente Bars"}
+    for kategorie, fundstellen in bericht.get('locations', {}).items():
+        if fundstellen:
+            zeilen.append("")
+            zeilen.append(f"{namen.get(kategorie, kategorie)} (erste {len(fundstellen)}):")
+            zeilen.extend(f"  {zeitpunkt}" for zeitpunkt in fundstellen)
+    return "\n".join(zeilen)
@@ -0,0 +1,146 @@
+import bisect
+import os
+import numpy as np
+import pandas as pd
+from modules.ParquetCache import CACHE_DIR, lade_serien_meta, lese_zeilenbereich, meta_pfad, row_group_offsets, serien_pfad
+from modules.SafeFileIO import aktualisiere_json
+
+
+class DayIndex:
+    """
+        Kompakter Tagesindex einer Zeitreihe: Handelstag -> (erste Zeile, letzte Zeile, Row-Group).
+
+        Der Index wird beim Import blockweise aufgebaut und in den Metadaten der Zeitreihe
+        gespeichert. Ein Datumsbereich wird damit ohne Scan der Daten in einen zusammenhängenden
+        Zeilenbereich übersetzt, der direkt aus den betroffenen Row-Groups gelesen werden kann.
+        Voraussetzung ist eine nach 'daytime' sortierte Zeitreihe; ist das nicht der Fall,
+        wird der Index als ungültig markiert und nicht gespeichert.
+
+        Attribute:
+            tage (dict): Handelstag ('YYYY-MM-DD') -> [erste Zeile, letzte Zeile, Row-Group der ersten Zeile].
+            sortiert (bool): False, wenn die Daten beim Aufbau nicht aufsteigend sortiert waren.
+
+        Methoden:
+            erweitere(daytime, zeilen_offset): Ergänzt den Index um einen importierten Block.
+            setze_row_groups(offsets): Ordnet jedem Tag die Row-Group seiner ersten Zeile zu.
+            zeilenbereich(datum_von, datum_bis): Liefert (erste, letzte) Zeile für einen Datumsbereich.
+            zeilenbereich_zeit(parquet_path, von, bis): Wie zeilenbereich, aber auf Zeitpunkte genau.
+            handelstage(): Liefert alle Handelstage.
+            luecken(): Liefert Werktage ohne Daten zwischen erstem und letztem Handelstag.
+        """
+
+    def __init__(self, tage=None):
+        # Initialisierung mit optional bereits vorhandenen Einträgen
+        self.tage = dict(tage or {})
+        self.sortiert = True
+        self.letzter_zeitpunkt = None
+        self._sortierte_tage = None
+
+    @classmethod
+    def from_meta(cls, meta):
+        # Erstellt den Index aus den Metadaten einer Zeitreihe, None wenn keiner gespeichert ist
+        if not meta or not meta.get('day_index'):
+            return None
+        return cls(meta['day_index'])
+
+    @classmethod
+    def lade(cls, symbol, interval):
+        # Lädt den Index einer Zeitreihe aus ihren Metadaten
+        return cls.from_meta(lade_serien_meta(symbol, interval))
+
+    def erweitere(self, daytime, zeilen_offset):
+        # Ergänzt den Index um einen Block; Tagesgrenzen werden vektorisiert bestimmt
+        if len(daytime) == 0:
+            return
+        werte = daytime.values if hasattr(daytime, 'values') else np.asarray(daytime)
+        if (self.letzter_zeitpunkt is not None and werte[0] < self.letzter_zeitpunkt) or np.any(werte[1:] < werte[:-1]):
+            self.sortiert = False
+        self.letzter_zeitpunkt = werte[-1]
+
+        tage = werte.astype('datetime64[D]')
+        grenzen = np.flatnonzero(tage[1:] != tage[:-1]) + 1
+        anfaenge = np.r_[0, grenzen]
+        enden = np.r_[grenzen, len(tage)] - 1
+        for anfang, ende in zip(anfaenge, enden):
+            tag = str(tage[anfang])
+            if tag in self.tage:
+                # Tag setzt sich aus dem vorherigen Block fort
+                self.tage[tag][1] = int(zeilen_offset + ende)
+            else:
+                self.tage[tag] = [int(zeilen_offset + anfang), int(zeilen_offset + ende), None]
+        self._sortierte_tage = None
+
+    def setze_row_groups(self, offsets):
+        # Ordnet jedem Tag die Row-Group seiner ersten Zeile zu (offsets: Startzeilen der Row-Groups)
+        for eintrag in self.tage.values():
+            eintrag[2] = bisect.bisect_right(offsets, eintrag[0]) - 1
+
+    def to_dict(self):
+        # Serialisierbare Form für die Metadaten, None bei unsortierten Daten
+        return self.tage if self.sortiert else None
+
+    def handelstage(self):
+        # Alle Handelstage in aufsteigender Reihenfolge
+        if self._sortierte_tage is None:
+            self._sortierte_tage = sorted(self.tage.keys())
+        return self._sortierte_tage
+
+    def zeilenbereich(self, datum_von, datum_bis):
+        # Übersetzt einen Datumsbereich (inklusive) in (erste Zeile, letzte Zeile), None ohne Daten
+        tage = self.handelstage()
+        von = pd.Timestamp(datum_von).strftime('%Y-%m-%d')
+        bis = pd.Timestamp(datum_bis).strftime('%Y-%m-%d')
+        links = bisect.bisect_left(tage, von)
+        rechts = bisect.bisect_right(tage, bis) - 1
+        if links > rechts:
+            return None
+        return self.tage[tage[links]][0], self.tage[tage[rechts]][1]
+
+    def zeilenbereich_zeit(self, parquet_path, von, bis):
+        # Zeilenbereich für Zeitpunkte [von, bis]; nur die Zeilen der beiden Randtage werden gelesen
+        von = pd.Timestamp(von)
+        bis = pd.Timestamp(bis)
+        if self.zeilenbereich(von, bis) is None:
+            return None
+        tage = self.handelstage()
+        erster_tag = self.tage[tage[bisect.bisect_left(tage, von.strftime('%Y-%m-%d'))]]
+        letzter_tag = self.tage[tage[bisect.bisect_right(tage, bis.strftime('%Y-%m-%d')) - 1]]
+
+        zeiten = lese_zeilenbereich(parquet_path, erster_tag[0], erster_tag[1], columns=['daytime'])['daytime'].values
+        erste = erster_tag[0] + int(np.searchsorted(zeiten, np.datetime64(von), side='left'))
+        zeiten = lese_zeilenbereich(parquet_path, letzter_tag[0], letzter_tag[1], columns=['daytime'])['daytime'].values
+        letzte = letzter_tag[0] + int(np.searchsorted(zeiten, np.datetime64(bis), side='right')) - 1
+        if erste > letzte:
+            return None
+        return erste, letzte
+
+    def zeilen_pro_tag(self):
+        # Anzahl Zeilen je Handelstag
+        return {tag: eintrag[1] - eintrag[0] + 1 for tag, eintrag in self.tage.items()}
+
+    def luecken(self):
+        # Werktage (Mo-Fr) ohne Daten zwischen dem ersten und letzten Handelstag
+        tage = self.handelstage()
+        if not tage:
+            return []
+        werktage = pd.bdate_range(tage[0], tage[-1]).strftime('%Y-%m-%d')
+        vorhanden = set(tage)
+        return [tag for tag in werktage if tag not in vorhanden]
+
+
+def baue_tagesindex(symbol, interval, cache_dir=CACHE_DIR):
+    # Baut den Index für eine bereits gecachte Zeitreihe nachträglich auf und speichert ihn in den Metadaten
+    meta_dir = os.path.join(cache_dir, 'meta')
+    meta = lade_serien_meta(symbol, interval, meta_dir)
+    if meta is None:
+        return None
+    parquet_path = serien_pfad(symbol, interval, os.path.join(cache_dir, 'data'))
+    index = DayIndex()
+    index.erweitere(pd.read_parquet(parquet_path, columns=['daytime'])['daytime'], 0)
+    if not index.sortiert:
+        print(f"Tagesindex für {symbol}_{interval} nicht möglich: Daten sind nicht nach Zeit sortiert")
+        return None
+    index.setze_row_groups(row_group_offsets(parquet_path))
+    aktualisiere_json(meta_pfad(symbol, interval, meta_dir), lambda aktuell: {**aktuell, 'day_index': index.to_dict()}, standard=meta)
+    print(f"Tagesindex für {symbol}_{interval} erstellt ({len(index.tage)} Handelstage)")
+    return index
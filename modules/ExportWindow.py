@@ -0,0 +1,159 @@
+import os
+import queue
+import threading
+import tkinter as tk
+from tkinter import filedialog, messagebox, ttk
+from modules.BulkExport import EXPORT_FORMATE
+
+# Spalten, die zur Auswahl angeboten werden (daytime ist immer enthalten)
+EXPORT_SPALTEN = ['DATE', 'TIME', 'OPEN', 'HIGH', 'LOW', 'CLOSE', 'TICKVOL', 'VOL', 'SPREAD', 'direction']
+
+
+class ExportWindow:
+    """
+        Fenster für den Export von Ausschnitten des Caches nach Parquet, CSV oder Arrow.
+
+        Symbol, Intervalle, Zeitraum (Voreinstellung: aktueller Datumsbereich), Spalten und Format
+        werden ausgewählt; der Export läuft in einem Hintergrund-Thread über den BulkExport, das
+        Fenster zeigt den Fortschritt in Zeilen und am Ende den Durchsatz in Zeilen pro Sekunde.
+
+        Attribute:
+            master (tk.Tk): Das Hauptfenster der Anwendung.
+            export (BulkExport): Der Exporter für den Cache.
+            serien (dict): Intervalle je Symbol.
+
+        Methoden:
+            create_widgets(): Erstellt Auswahl, Parameter und Buttons.
+            starte_export(): Startet den Export im Hintergrund.
+            pruefe_fortschritt(): Übernimmt Fortschritt und Ergebnis des Hintergrund-Threads.
+        """
+
+    def __init__(self, master, export, serien, symbol, date_range, ziel_dir, format='parquet'):
+        # Initialisierung des Exportfensters
+        self.master = master
+        self.export = export
+        self.serien = serien
+        self.symbol_var = tk.StringVar(value=symbol if symbol in serien else next(iter(serien), ""))
+        self.start_var = tk.StringVar(value=date_range.get('start') or "")
+        self.end_var = tk.StringVar(value=date_range.get('end') or "")
+        self.format_var = tk.StringVar(value=format)
+        self.ziel_var = tk.StringVar(value=ziel_dir)
+        self.spalten_vars = {}
+        self.interval_liste = None
+        self.status_label = None
+        self.export_button = None
+        self.meldungen = queue.Queue()
+        self.window = tk.Toplevel(master)
+        self.window.title("Export")
+        self.window.geometry("560x460")
+        self.create_widgets()
+
+    def create_widgets(self):
+        # Symbol, Intervalle (Mehrfachauswahl), Zeitraum, Spalten, Format, Zielverzeichnis und Buttons
+        auswahl = tk.Frame(self.window)
+        auswahl.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        ttk.Label(auswahl, text="Symbol:").grid(row=0, column=0, sticky="w")
+        symbol_auswahl = ttk.Combobox(auswahl, textvariable=self.symbol_var, values=sorted(self.serien), width=10, state="readonly")
+        symbol_auswahl.grid(row=0, column=1, sticky="w", padx=5)
+        symbol_auswahl.bind("<<ComboboxSelected>>", lambda _: self.zeige_intervalle())
+        ttk.Label(auswahl, text="Intervalle:").grid(row=1, column=0, sticky="nw", pady=5)
+        self.interval_liste = tk.Listbox(auswahl, selectmode=tk.EXTENDED, exportselection=False, height=6, width=12)
+        self.interval_liste.grid(row=1, column=1, sticky="w", padx=5, pady=5)
+        self.zeige_intervalle()
+
+        ttk.Label(auswahl, text="Start:").grid(row=2, column=0, sticky="w")
+        ttk.Entry(auswahl, textvariable=self.start_var, width=20).grid(row=2, column=1, sticky="w", padx=5)
+        ttk.Label(auswahl, text="Ende:").grid(row=3, column=0, sticky="w")
+        ttk.Entry(auswahl, textvariable=self.end_var, width=20).grid(row=3, column=1, sticky="w", padx=5)
+        ttk.Label(auswahl, text="(leer = gesamte Historie, mit Uhrzeit zeitgenau)").grid(row=3, column=2, sticky="w")
+
+        ttk.Label(auswahl, text="Spalten:").grid(row=4, column=0, sticky="nw", pady=5)
+        spalten_frame = tk.Frame(auswahl)
+        spalten_frame.grid(row=4, column=1, columnspan=2, sticky="w", padx=5, pady=5)
+        for i, spalte in enumerate(EXPORT_SPALTEN):
+            self.spalten_vars[spalte] = tk.BooleanVar(value=spalte in ('OPEN', 'HIGH', 'LOW', 'CLOSE', 'TICKVOL'))
+            tk.Checkbutton(spalten_frame, text=spalte, variable=self.spalten_vars[spalte]).grid(row=i // 5, column=i % 5, sticky="w")
+
+        ttk.Label(auswahl, text="Format:").grid(row=5, column=0, sticky="w")
+        ttk.Combobox(auswahl, textvariable=self.format_var, values=sorted(EXPORT_FORMATE), width=10,
+                     state="readonly").grid(row=5, column=1, sticky="w", padx=5)
+        ttk.Label(auswahl, text="Ziel:").grid(row=6, column=0, sticky="w", pady=5)
+        ttk.Entry(auswahl, textvariable=self.ziel_var, width=40).grid(row=6, column=1, columnspan=2, sticky="w", padx=5, pady=5)
+
+        self.status_label = tk.Label(self.window, text="", font=("Arial", 9), anchor="w", justify=tk.LEFT)
+        self.status_label.pack(fill=tk.X, padx=10)
+
+        button_style = {"font": ("Arial", 10), "relief": tk.RAISED, "borderwidth": 2, "cursor": "hand2", "width": 14}
+        button_frame = tk.Frame(self.window)
+        button_frame.pack(fill=tk.X, padx=10, pady=5)
+        tk.Button(button_frame, text="Ziel wählen", command=self.waehle_ziel, bg="lightyellow", **button_style).pack(side=tk.LEFT, padx=5)
+        self.export_button = tk.Button(button_frame, text="Exportieren", command=self.starte_export, bg="lightgreen", **button_style)
+        self.export_button.pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Schließen", command=self.window.destroy, bg="red", fg="white", **button_style).pack(side=tk.LEFT, padx=5)
+
+    def zeige_intervalle(self):
+        # Intervalle des gewählten Symbols (alle vorausgewählt)
+        self.interval_liste.delete(0, tk.END)
+        for interval in self.serien.get(self.symbol_var.get(), []):
+            self.interval_liste.insert(tk.END, interval)
+        self.interval_liste.selection_set(0, tk.END)
+
+    def waehle_ziel(self):
+        # Zielverzeichnis auswählen
+        verzeichnis = filedialog.askdirectory(parent=self.window, initialdir=os.path.abspath(self.ziel_var.get()))
+        if verzeichnis:
+            self.ziel_var.set(verzeichnis)
+
+    def starte_export(self):
+        # Startet den Export im Hintergrund; das Fenster bleibt bedienbar
+        intervals = [self.interval_liste.get(i) for i in self.interval_liste.curselection()]
+        if not intervals:
+            messagebox.showinfo("Info", "Bitte wählen Sie mindestens ein Intervall aus.", parent=self.window)
+            return
+        spalten = [spalte for spalte, var in self.spalten_vars.items() if var.get()]
+        auftrag = (self.symbol_var.get(), intervals, self.start_var.get().strip() or None, self.end_var.get().strip() or None,
+                   spalten or None, self.format_var.get(), self.ziel_var.get())
+        self.export_button.config(state=tk.DISABLED)
+        self.status_label.config(text="Export läuft ...")
+        threading.Thread(target=self.exportiere, args=auftrag, daemon=True).start()
+        self.window.after(200, self.pruefe_fortschritt)
+
+    def exportiere(self, symbol, intervals, start, end, spalten, format, ziel_dir):
+        # Hintergrund-Thread: Meldungen werden über die Queue an das Fenster übergeben
+        fortschritt = {}
+
+        def melde(interval, zeilen):
+            fortschritt[interval] = zeilen
+            self.meldungen.put(('fortschritt', sum(fortschritt.values())))
+
+        try:
+            self.meldungen.put(('fertig', self.export.exportiere(symbol, intervals, start, end, spalten, format, ziel_dir, melde)))
+        except (OSError, ValueError) as e:
+            self.meldungen.put(('fehler', str(e)))
+
+    def pruefe_fortschritt(self):
+        # Übernimmt die Meldungen des Hintergrund-Threads (im Tkinter-Thread)
+        if not self.window.winfo_exists():
+            return
+        meldung = None
+        while not self.meldungen.empty():
+            meldung = self.meldungen.get_nowait()
+            if meldung[0] != 'fortschritt':
+                break
+        if meldung is None or meldung[0] == 'fortschritt':
+            if meldung is not None:
+                self.status_label.config(text=f"Export läuft ... {meldung[1]:,} Zeilen")
+            self.window.after(200, self.pruefe_fortschritt)
+            return
+
+        self.export_button.config(state=tk.NORMAL)
+        if meldung[0] == 'fehler':
+            self.status_label.config(text="")
+            messagebox.showerror("Fehler", meldung[1], parent=self.window)
+            return
+        ergebnisse, gesamt = meldung[1]
+        zeilen = [f"{ergebnis['interval']}: {ergebnis['zeilen']:,} Zeilen -> {os.path.basename(ergebnis['pfad'])}"
+                  if ergebnis['pfad'] else f"{ergebnis['interval']}: keine Daten im Bereich" for ergebnis in ergebnisse]
+        zeilen.append(f"Gesamt: {gesamt['zeilen']:,} Zeilen, {gesamt['bytes'] / 1024 ** 2:.1f} MB in {gesamt['sekunden']:.2f}s "
+                      f"({gesamt['zeilen_pro_sekunde']:,.0f} Zeilen/s)")
+        self.status_label.config(text="\n".join(zeilen))
@@ -0,0 +1,224 @@
+import glob
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from modules.SafeFileIO import atomarer_zielpfad, datei_sperre, schreibe_json_atomar
+from modules.ParquetCache import (CACHE_DIR, ist_verlaengerung, lade_serien_meta, lese_zeilenbereich,
+                                  serien_fingerprint, serien_pfad)
+
+
+def _berechne_sma(daten, params, seed):
+    # Einfacher gleitender Durchschnitt über die Schlusskurse
+    period = params['period']
+    return pd.DataFrame({'sma': daten['CLOSE'].rolling(period, min_periods=period).mean()})
+
+
+def _berechne_ema(daten, params, seed):
+    # Exponentieller gleitender Durchschnitt; mit seed wird ab dem letzten bekannten Wert fortgesetzt
+    period = params['period']
+    if seed is None:
+        return pd.DataFrame({'ema': daten['CLOSE'].ewm(span=period, adjust=False, min_periods=period).mean()})
+    werte = daten['CLOSE'].astype('float64').copy()
+    werte.iloc[0] = seed['ema']
+    return pd.DataFrame({'ema': werte.ewm(span=period, adjust=False).mean()})
+
+
+def _berechne_atr(daten, params, seed):
+    # Average True Range nach Wilder; mit seed wird ab dem letzten bekannten Wert fortgesetzt
+    period = params['period']
+    vorheriger_close = daten['CLOSE'].shift(1)
+    true_range = np.maximum(daten['HIGH'] - daten['LOW'],
+                            np.maximum((daten['HIGH'] - vorheriger_close).abs(), (daten['LOW'] - vorheriger_close).abs()))
+    true_range = true_range.fillna(daten['HIGH'] - daten['LOW'])
+    if seed is None:
+        return pd.DataFrame({'atr': true_range.ewm(alpha=1 / period, adjust=False, min_periods=period).mean()})
+    true_range.iloc[0] = seed['atr']
+    return pd.DataFrame({'atr': true_range.ewm(alpha=1 / period, adjust=False).mean()})
+
+
+def _berechne_bollinger(daten, params, seed):
+    # Bollinger-Bänder: gleitender Durchschnitt +/- k Standardabweichungen
+    period = params['period']
+    rolling = daten['CLOSE'].rolling(period, min_periods=period)
+    mitte = rolling.mean()
+    abweichung = rolling.std(ddof=0) * params['std']
+    return pd.DataFrame({'bb_mid': mitte, 'bb_upper': mitte + abweichung, 'bb_lower': mitte - abweichung})
+
+
+# Verfügbare Indikatoren: Berechnungsfunktion, Parameter (mit Standardwerten), benötigte Spalten
+# und Vorlauf (Anzahl vorheriger Zeilen, die für eine inkrementelle Fortsetzung nötig sind)
+INDIKATOREN = {
+    'sma': {'funktion': _berechne_sma, 'params': {'period': 20}, 'spalten': ['CLOSE'],
+            'vorlauf': lambda p: p['period'] - 1},
+    'ema': {'funktion': _berechne_ema, 'params': {'period': 20}, 'spalten': ['CLOSE'],
+            'vorlauf': lambda p: 1},
+    'atr': {'funktion': _berechne_atr, 'params': {'period': 14}, 'spalten': ['HIGH', 'LOW', 'CLOSE'],
+            'vorlauf': lambda p: 1},
+    'bollinger': {'funktion': _berechne_bollinger, 'params': {'period': 20, 'std': 2.0}, 'spalten': ['CLOSE'],
+                  'vorlauf': lambda p: p['period'] - 1},
+}
+
+
+def parse_indikator_spezifikation(spezifikation):
+    # Wandelt z.B. "bollinger:20:2" in ('bollinger', {'period': 20, 'std': 2.0}) um
+    teile = [teil.strip() for teil in spezifikation.split(':')]
+    name = teile[0].lower()
+    if name not in INDIKATOREN:
+        raise ValueError(f"Unbekannter Indikator: {name}")
+    params = dict(INDIKATOREN[name]['params'])
+    for key, wert in zip(params.keys(), teile[1:]):
+        params[key] = type(params[key])(float(wert)) if isinstance(params[key], int) else float(wert)
+    return name, params
+
+
+class IndicatorEngine:
+    """
+        Berechnet technische Indikatoren (SMA, EMA, ATR, Bollinger-Bänder) vektorisiert über die gecachten Zeitreihen.
+
+        Die Ergebnisse werden neben dem Parquet-Cache unter cache/indicators/ abgelegt, getrennt nach
+        Zeitreihe, Indikator und Parametern. Zu jedem Ergebnis wird ein Zustand mit dem Fingerabdruck
+        der Ausgangsdaten gespeichert. Wurden an die Zeitreihe nur neue Bars angehängt, wird der
+        Indikator ab dem letzten bekannten Wert fortgesetzt und als weiterer Teil abgelegt,
+        statt komplett neu berechnet zu werden.
+
+        Attribute:
+            indicator_dir (str): Verzeichnis für die gespeicherten Indikator-Ergebnisse.
+            max_teile (int): Anzahl der Teil-Dateien, ab der ein Ergebnis zusammengeführt wird.
+
+        Methoden:
+            berechne(symbol, interval, spezifikation): Liefert den Indikator für die gesamte Zeitreihe.
+            berechne_bereich(symbol, interval, spezifikation, datum_von, datum_bis): Liefert den Indikator für einen Datumsbereich.
+        """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_teile=32):
+        # Initialisierung der Verzeichnisse
+        self.cache_dir = cache_dir
+        self.data_dir = os.path.join(cache_dir, 'data')
+        self.meta_dir = os.path.join(cache_dir, 'meta')
+        self.indicator_dir = os.path.join(cache_dir, 'indicators')
+        self.max_teile = max_teile
+        if not os.path.exists(self.indicator_dir):
+            os.makedirs(self.indicator_dir)
+
+    def berechne(self, symbol, interval, spezifikation):
+        # Liefert den Indikator (daytime + Ergebnisspalten) für die gesamte Zeitreihe
+        name, params = parse_indikator_spezifikation(spezifikation)
+        meta = lade_serien_meta(symbol, interval, self.meta_dir)
+        if meta is None:
+            raise FileNotFoundError(f"Keine Metadaten für {symbol}_{interval} gefunden")
+
+        ergebnis_dir, zustand_datei = self.ergebnis_pfade(symbol, interval, name, params)
+        fingerprint = serien_fingerprint(meta)
+
+        # Die Sperre verhindert, dass zwei Prozesse denselben Indikator gleichzeitig fortschreiben
+        with datei_sperre(zustand_datei):
+            zustand = self.lade_zustand(zustand_datei)
+            if zustand is None or zustand['fingerprint'] != fingerprint:
+                if zustand is not None and self.ist_fortsetzbar(symbol, interval, zustand, meta):
+                    self.erweitere(symbol, interval, name, params, zustand, meta, ergebnis_dir, zustand_datei)
+                else:
+                    self.berechne_komplett(symbol, interval, name, params, meta, ergebnis_dir, zustand_datei)
+
+            tabelle = pq.read_table(ergebnis_dir)
+        return tabelle.to_pandas().sort_values('daytime', kind='stable').reset_index(drop=True)
+
+    def berechne_bereich(self, symbol, interval, spezifikation, datum_von, datum_bis):
+        # Liefert den Indikator für einen Datumsbereich (Tagesgrenzen inklusive)
+        df = self.berechne(symbol, interval, spezifikation)
+        von = pd.Timestamp(datum_von).normalize()
+        bis = pd.Timestamp(datum_bis).normalize() + pd.Timedelta(days=1)
+        return df[(df['daytime'] >= von) & (df['daytime'] < bis)]
+
+    def ergebnis_pfade(self, symbol, interval, name, params):
+        # Schlüssel aus Zeitreihe, Indikator und Parametern
+        param_hash = hashlib.md5(json.dumps(params, sort_keys=True).encode()).hexdigest()[:8]
+        schluessel = f"{symbol}_{interval}_{name}_{param_hash}"
+        return os.path.join(self.indicator_dir, schluessel), os.path.join(self.indicator_dir, f"{schluessel}.json")
+
+    def lade_zustand(self, zustand_datei):
+        # Lädt den gespeicherten Berechnungszustand, None wenn keiner vorhanden ist
+        if not os.path.exists(zustand_datei):
+            return None
+        with open(zustand_datei, 'r') as f:
+            return json.load(f)
+
+    def ist_fortsetzbar(self, symbol, interval, zustand, meta):
+        # Prüft, ob die Zeitreihe nur um neue Bars verlängert wurde und alle Startwerte bekannt sind
+        if any(wert is None for wert in zustand['last_values'].values()):
+            return False
+        if zustand.get('revision', 0) != meta.get('revision', 0):
+            # Bereits berechnete Zeilen wurden verändert (z.B. durch einen Merge)
+            return False
+        return ist_verlaengerung(serien_pfad(symbol, interval, self.data_dir), zustand['rows'],
+                                 zustand['last_daytime'], zustand['last_close'], meta['stats']['rows'])
+
+    def berechne_komplett(self, symbol, interval, name, params, meta, ergebnis_dir, zustand_datei):
+        # Vollständige Berechnung über die gesamte Zeitreihe
+        indikator = INDIKATOREN[name]
+        daten = pd.read_parquet(serien_pfad(symbol, interval, self.data_dir), columns=['daytime'] + indikator['spalten'])
+        ergebnis = indikator['funktion'](daten, params, None)
+        ergebnis.insert(0, 'daytime', daten['daytime'].values)
+
+        self.schreibe_teil(ergebnis_dir, ergebnis, 0)
+        self.entferne_teile_ab(ergebnis_dir, 1)
+        self.speichere_zustand(zustand_datei, name, params, meta, daten, ergebnis, teile=1)
+        print(f"Indikator {name} {params} für {symbol}_{interval} berechnet ({len(ergebnis)} Zeilen)")
+
+    def erweitere(self, symbol, interval, name, params, zustand, meta, ergebnis_dir, zustand_datei):
+        # Inkrementelle Fortsetzung: nur die neuen Bars (plus Vorlauf) werden gelesen und berechnet
+        indikator = INDIKATOREN[name]
+        bisher = zustand['rows']
+        vorlauf = min(max(indikator['vorlauf'](params), 1), bisher)
+        daten = lese_zeilenbereich(serien_pfad(symbol, interval, self.data_dir), bisher - vorlauf,
+                                   columns=['daytime'] + indikator['spalten'])
+        ergebnis = indikator['funktion'](daten.reset_index(drop=True), params, zustand['last_values'])
+        ergebnis.insert(0, 'daytime', daten['daytime'].values)
+        ergebnis = ergebnis.iloc[vorlauf:]
+
+        teile = zustand.get('teile', 1)
+        self.schreibe_teil(ergebnis_dir, ergebnis, teile)
+        teile += 1
+        if teile > self.max_teile:
+            # Viele kleine Teile verlangsamen das Lesen: zu einer Datei zusammenführen
+            gesamt = pq.read_table(ergebnis_dir).to_pandas().sort_values('daytime', kind='stable')
+            self.schreibe_teil(ergebnis_dir, gesamt, 0)
+            self.entferne_teile_ab(ergebnis_dir, 1)
+            teile = 1
+
+        self.speichere_zustand(zustand_datei, name, params, meta, daten, ergebnis, teile)
+        print(f"Indikator {name} {params} für {symbol}_{interval} um {len(ergebnis)} Zeilen erweitert")
+
+    def schreibe_teil(self, ergebnis_dir, ergebnis, nummer):
+        # Schreibt einen Teil des Ergebnisses als eigene Parquet-Datei
+        if not os.path.exists(ergebnis_dir):
+            os.makedirs(ergebnis_dir)
+        tabelle = pa.Table.from_pandas(ergebnis.reset_index(drop=True), preserve_index=False)
+        with atomarer_zielpfad(os.path.join(ergebnis_dir, f"part-{nummer:05d}.parquet")) as temp_path:
+            pq.write_table(tabelle, temp_path)
+
+    def entferne_teile_ab(self, ergebnis_dir, nummer):
+        # Entfernt alle Teil-Dateien ab der angegebenen Nummer (Teil 0 wurde vorher atomar ersetzt)
+        for datei in glob.glob(os.path.join(ergebnis_dir, 'part-*.parquet')):
+            if int(os.path.basename(datei)[5:10]) >= nummer:
+                os.remove(datei)
+
+    def speichere_zustand(self, zustand_datei, name, params, meta, daten, ergebnis, teile):
+        # Speichert Fingerabdruck und letzte Werte für spätere inkrementelle Fortsetzungen
+        letzte_werte = {spalte: (None if pd.isna(wert) else float(wert))
+                        for spalte, wert in ergebnis.drop(columns=['daytime']).iloc[-1].items()}
+        zustand = {
+            "indicator": name,
+            "params": params,
+            "fingerprint": serien_fingerprint(meta),
+            "rows": meta['stats']['rows'],
+            "revision": meta.get('revision', 0),
+            "last_daytime": pd.Timestamp(daten['daytime'].iloc[-1]).isoformat(),
+            "last_close": float(daten['CLOSE'].iloc[-1]),
+            "last_values": letzte_werte,
+            "teile": teile
+        }
+        schreibe_json_atomar(zustand_datei, zustand)
@@ -1,5 +1,6 @@
 import json
 from datetime import datetime
+from modules.SafeFileIO import aktualisiere_json
 
 
 class MetadataManager:
@@ -19,7 +20,9 @@ class MetadataManager:
          update_metadata(symbol, interval, start_date, end_date, file_path): Aktualisiert die Metadaten mit neuen Informationen.
 
      Die Klasse verwaltet Informationen über verfügbare Intervalle, Symbole, Datumsbereiche
-     und Dateipfade für verschiedene Zeitreihen-Kombinationen.
+     und Dateipfade für verschiedene Zeitreihen-Kombinationen. Beim Speichern wird der aktuelle
+     Dateiinhalt unter einer Sperre mit den eigenen Änderungen zusammengeführt, damit mehrere
+     Prozesse denselben Katalog verwenden können.
      """
 
     def __init__(self, metadata_path):
@@ -33,9 +36,9 @@ class MetadataManager:
             return json.load(f)
 
     def save_metadata(self):
-        # Speichern der aktuellen Metadaten in die Datei
-        with open(self.metadata_path, 'w') as f:
-            json.dump(self.metadata, f, indent=4)
+        # Speichern der aktuellen Metadaten: Zusammenführen mit dem Dateistand (Read-Modify-Write unter Sperre)
+        self.metadata = aktualisiere_json(self.metadata_path, lambda aktuell: merge_metadata(aktuell, self.metadata),
+                                          standard={})
 
     def update_metadata(self, symbol, interval, start_date, end_date, file_path):
         # Aktualisieren der Metadaten mit neuen Informationen
@@ -65,7 +68,33 @@ class MetadataManager:
         self.save_metadata()
 
 
+def merge_metadata(datei, eigene):
+    # Führt den Dateistand (ggf. von einem anderen Prozess geschrieben) mit den eigenen Metadaten zusammen
+    if not datei:
+        return eigene
+    ergebnis = dict(datei)
+    ergebnis['available_intervals'] = sorted(set(datei.get('available_intervals', [])) | set(eigene.get('available_intervals', [])),
+                                             key=interval_sort_key)
+    ergebnis['symbols'] = sorted(set(datei.get('symbols', [])) | set(eigene.get('symbols', [])))
+    starts = [d for d in (datei.get('date_range', {}).get('start'), eigene.get('date_range', {}).get('start')) if d]
+    enden = [d for d in (datei.get('date_range', {}).get('end'), eigene.get('date_range', {}).get('end')) if d]
+    ergebnis['date_range'] = {"start": min(starts) if starts else None, "end": max(enden) if enden else None}
+    ergebnis['files'] = {**datei.get('files', {}), **eigene.get('files', {})}
+    return ergebnis
+
+
 def interval_sort_key(interval):
     # Hilfsfunktion zum Sortieren der Intervalle
-    # Extrahiert die Zahl aus dem Intervall-String (z.B. 'M5' -> 5) für die Sortierung
-    return int(interval[1:])
+    # Sortiert nach der Bar-Länge in Sekunden (z.B. 'S30' -> 30, 'M5' -> 300)
+    return intervall_sekunden(interval)
+
+
+def intervall_sekunden(interval):
+    # Länge eines Bars in Sekunden für Minuten- ('M5') und Sekundenintervalle ('S10', z.B. aus Tick-Importen)
+    return int(interval[1:]) * (1 if interval[0] == 'S' else 60)
+
+
+def intervall_name(sekunden):
+    # Bezeichnung einer Bar-Länge, z.B. 960 -> 'M16', 40 -> 'S40'
+    sekunden = int(round(sekunden))
+    return f"M{sekunden // 60}" if sekunden % 60 == 0 else f"S{sekunden}"
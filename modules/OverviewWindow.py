@@ -0,0 +1,131 @@
+import os
+import tkinter as tk
+import webbrowser
+import pandas as pd
+from tkinter import messagebox, scrolledtext, ttk
+from modules.DailyStats import DailyStats, kalender_heatmap
+from modules.DataQuality import formatiere_bericht
+from modules.ParquetCache import lade_serien_meta
+
+
+class OverviewWindow:
+    """
+        Übersichtsfenster über alle Zeitreihen im Cache.
+
+        Die Tabelle zeigt je Symbol und Intervall Zeilenanzahl, Zeitraum, Handelstage, fehlende Bars,
+        Abdeckung, mittlere Tagesspanne, Tief und Hoch sowie die Datenqualität der importierten Dateien. Für die
+        ausgewählte Zeitreihe kann eine Kalender-Heatmap der Abdeckung oder der Volatilität (Tagesspanne)
+        erstellt oder der Qualitätsbericht mit Fundstellen angezeigt werden.
+        Alle Werte stammen aus den Metadaten und den Tagesstatistiken; die Rohdaten werden nicht geladen.
+
+        Attribute:
+            master (tk.Tk): Das Hauptfenster der Anwendung.
+            plot_dir (str): Verzeichnis, in dem die Heatmaps gespeichert werden.
+
+        Methoden:
+            create_widgets(): Erstellt Tabelle und Buttons.
+            fuelle_tabelle(): Lädt die Übersicht und füllt die Tabelle.
+            zeige_heatmap(wert): Erstellt die Heatmap ('coverage' oder 'range') und öffnet sie im Browser.
+            zeige_qualitaet(): Zeigt den Qualitätsbericht der ausgewählten Zeitreihe.
+        """
+
+    SPALTEN = [("symbol", "Symbol", 70), ("interval", "Intervall", 60), ("rows", "Zeilen", 80),
+               ("start", "Start", 85), ("end", "Ende", 85), ("days", "Tage", 55),
+               ("missing_bars", "Fehlende Bars", 90), ("coverage", "Abdeckung %", 85),
+               ("avg_range", "Ø Spanne", 70), ("low", "Tief", 75), ("high", "Hoch", 75),
+               ("duplicates", "Duplikate", 70), ("coerced", "Nicht lesbar", 80), ("inconsistent", "Inkonsistent", 80)]
+
+    def __init__(self, master, plot_dir):
+        # Initialisierung des Übersichtsfensters
+        self.master = master
+        self.plot_dir = os.path.join(plot_dir, 'overview')
+        self.statistik = DailyStats()
+        self.tabelle = None
+        self.window = tk.Toplevel(master)
+        self.window.title("Übersicht")
+        self.window.geometry("1140x380")
+        self.create_widgets()
+        self.fuelle_tabelle()
+
+    def create_widgets(self):
+        # Tabelle mit allen Zeitreihen und Buttons für die Heatmaps
+        rahmen = tk.Frame(self.window)
+        rahmen.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.tabelle = ttk.Treeview(rahmen, columns=[spalte for spalte, _, _ in self.SPALTEN], show="headings", height=12)
+        for spalte, titel, breite in self.SPALTEN:
+            self.tabelle.heading(spalte, text=titel)
+            self.tabelle.column(spalte, width=breite, anchor="e" if spalte not in ("symbol", "interval") else "w")
+        scrollbar = ttk.Scrollbar(rahmen, orient=tk.VERTICAL, command=self.tabelle.yview)
+        self.tabelle.configure(yscrollcommand=scrollbar.set)
+        self.tabelle.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        button_style = {"font": ("Arial", 10), "relief": tk.RAISED, "borderwidth": 2, "cursor": "hand2", "width": 20}
+        button_frame = tk.Frame(self.window)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+        tk.Button(button_frame, text="Heatmap Abdeckung", command=lambda: self.zeige_heatmap('coverage'), bg="lightgreen", **button_style).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Heatmap Volatilität", command=lambda: self.zeige_heatmap('range'), bg="lightyellow", **button_style).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Datenqualität", command=self.zeige_qualitaet, bg="lightcyan", **button_style).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Schließen", command=self.window.destroy, bg="red", fg="white", **button_style).pack(side=tk.RIGHT, padx=5)
+
+    def fuelle_tabelle(self):
+        # Übersicht aus Metadaten und Tagesstatistiken; fehlende Statistiken werden einmalig nachberechnet
+        uebersicht = self.statistik.uebersicht()
+        fehlend = uebersicht[uebersicht['days'].isna()] if 'days' in uebersicht.columns else uebersicht
+        for _, zeile in fehlend.iterrows():
+            self.statistik.aktualisiere(zeile['symbol'], zeile['interval'])
+        if len(fehlend):
+            uebersicht = self.statistik.uebersicht()
+
+        for eintrag in self.tabelle.get_children():
+            self.tabelle.delete(eintrag)
+        for _, zeile in uebersicht.iterrows():
+            self.tabelle.insert("", tk.END, values=["" if pd.isna(wert) else wert
+                                                    for wert in (zeile.get(spalte, "") for spalte, _, _ in self.SPALTEN)])
+
+    def zeige_heatmap(self, wert):
+        # Kalender-Heatmap der ausgewählten Zeitreihe im Browser anzeigen
+        auswahl = self.tabelle.selection()
+        if not auswahl:
+            messagebox.showinfo("Info", "Bitte wählen Sie eine Zeitreihe in der Tabelle aus.")
+            return
+        symbol, interval = self.tabelle.item(auswahl[0], 'values')[:2]
+        statistik = self.statistik.lade(symbol, interval)
+        if statistik is None or statistik.empty:
+            messagebox.showinfo("Info", f"Keine Tagesstatistik für {symbol} {interval} vorhanden.")
+            return
+
+        bezeichnung = "Abdeckung" if wert == 'coverage' else "Volatilität"
+        fig = kalender_heatmap(statistik, f"{bezeichnung}: {symbol} {interval}", wert)
+        if not os.path.exists(self.plot_dir):
+            os.makedirs(self.plot_dir)
+        pfad = os.path.join(self.plot_dir, f"{symbol}_{interval}_{wert}.html")
+        fig.write_html(pfad)
+        webbrowser.open(pfad)
+
+    def zeige_qualitaet(self):
+        # Qualitätsbericht des letzten Imports der ausgewählten Zeitreihe (aus den Metadaten)
+        auswahl = self.tabelle.selection()
+        if not auswahl:
+            messagebox.showinfo("Info", "Bitte wählen Sie eine Zeitreihe in der Tabelle aus.")
+            return
+        symbol, interval = self.tabelle.item(auswahl[0], 'values')[:2]
+        meta = lade_serien_meta(symbol, interval, self.statistik.meta_dir) or {}
+        bericht = meta.get('quality')
+        if not bericht:
+            messagebox.showinfo("Info", f"Für {symbol} {interval} liegt kein Qualitätsbericht vor (Import vor der Prüfung).")
+            return
+
+        fenster = tk.Toplevel(self.window)
+        fenster.title(f"Datenqualität {symbol} {interval}")
+        text = scrolledtext.ScrolledText(fenster, width=90, height=30, font=("Courier", 9))
+        text.pack(fill=tk.BOTH, expand=True)
+        text.insert(tk.END, formatiere_bericht(bericht, "Letzter Import:"))
+        quellen = [quelle for quelle in meta.get('sources', []) if quelle.get('quality')]
+        if len(quellen) > 1:
+            text.insert(tk.END, "\n\nAlle geprüften Quelldateien:\n")
+            for quelle in quellen:
+                q = quelle['quality']
+                text.insert(tk.END, f"  {quelle['file']}: {q['rows']:,} Zeilen, {q['gaps']} Lücken ({q['missing_bars']} Bars), "
+                                    f"{q['duplicates']} Duplikate, {q['coerced']} nicht lesbar, {q['inconsistent']} inkonsistent\n")
+        text.config(state=tk.DISABLED)
@@ -0,0 +1,98 @@
+import hashlib
+import json
+import os
+import pyarrow.parquet as pq
+from modules.SafeFileIO import datei_sperre
+
+# Standardpfade des Caches (relativ zum Arbeitsverzeichnis der Anwendung)
+CACHE_DIR = 'cache'
+DATA_DIR = os.path.join(CACHE_DIR, 'data')
+META_DIR = os.path.join(CACHE_DIR, 'meta')
+
+
+def serien_pfad(symbol, interval, data_dir=DATA_DIR):
+    # Pfad zur Parquet-Datei einer Zeitreihe
+    return os.path.join(data_dir, f"{symbol}_{interval}.parquet")
+
+
+def meta_pfad(symbol, interval, meta_dir=META_DIR):
+    # Pfad zur Metadaten-Datei einer Zeitreihe
+    return os.path.join(meta_dir, f"{symbol}_{interval}.json")
+
+
+def serien_sperre(symbol, interval, exklusiv=False, meta_dir=META_DIR):
+    # Sperre für Daten und Metadaten einer Zeitreihe: Leser gemeinsam, der Import exklusiv beim Austausch
+    return datei_sperre(meta_pfad(symbol, interval, meta_dir), exklusiv=exklusiv)
+
+
+def import_sperre(symbol, interval, meta_dir=META_DIR):
+    # Exklusive Sperre für den gesamten Import einer Zeitreihe (parallele Importe derselben Zeitreihe warten)
+    return datei_sperre(os.path.join(meta_dir, f"{symbol}_{interval}.import"), exklusiv=True, timeout=3600)
+
+
+def lade_serien_meta(symbol, interval, meta_dir=META_DIR):
+    # Lädt die Metadaten einer Zeitreihe, None wenn sie nicht existieren
+    pfad = meta_pfad(symbol, interval, meta_dir)
+    if not os.path.exists(pfad):
+        return None
+    with open(pfad, 'r') as f:
+        return json.load(f)
+
+
+def daten_fingerprint(rows, erster_zeitpunkt, letzter_zeitpunkt, close_summe):
+    # Kompakter Fingerabdruck einer Zeitreihe; ändert sich bei jeder inhaltlichen Änderung
+    basis = f"{rows}|{erster_zeitpunkt}|{letzter_zeitpunkt}|{close_summe:.6f}"
+    return hashlib.md5(basis.encode()).hexdigest()[:16]
+
+
+def serien_fingerprint(meta):
+    # Fingerabdruck aus den Metadaten; ältere Metadaten ohne Fingerabdruck erhalten einen Ersatzwert
+    if meta.get('fingerprint'):
+        return meta['fingerprint']
+    basis = f"{meta['stats']['rows']}|{meta['start_datetime']}|{meta['end_datetime']}"
+    return hashlib.md5(basis.encode()).hexdigest()[:16]
+
+
+def row_group_offsets(parquet_path):
+    # Startzeilen aller Row-Groups plus Gesamtzeilenzahl (nur Datei-Footer wird gelesen)
+    metadata = pq.ParquetFile(parquet_path).metadata
+    offsets = [0]
+    for i in range(metadata.num_row_groups):
+        offsets.append(offsets[-1] + metadata.row_group(i).num_rows)
+    return offsets
+
+
+def lese_zeilenbereich(parquet_path, erste_zeile=0, letzte_zeile=None, columns=None):
+    # Liest die Zeilen [erste_zeile, letzte_zeile] (inklusive), dabei werden nur die
+    # betroffenen Row-Groups dekodiert. Ohne letzte_zeile wird bis zum Ende gelesen.
+    return lese_zeilenbereich_tabelle(parquet_path, erste_zeile, letzte_zeile, columns).to_pandas()
+
+
+def lese_zeilenbereich_tabelle(parquet_path, erste_zeile=0, letzte_zeile=None, columns=None):
+    # Wie lese_zeilenbereich, liefert aber eine Arrow-Tabelle (ohne Umwandlung nach pandas)
+    parquet_file = pq.ParquetFile(parquet_path)
+    offsets = [0]
+    for i in range(parquet_file.metadata.num_row_groups):
+        offsets.append(offsets[-1] + parquet_file.metadata.row_group(i).num_rows)
+    if letzte_zeile is None or letzte_zeile >= offsets[-1]:
+        letzte_zeile = offsets[-1] - 1
+    if erste_zeile > letzte_zeile:
+        return parquet_file.schema_arrow.empty_table().select(columns or parquet_file.schema_arrow.names)
+
+    gruppen = [i for i in range(len(offsets) - 1) if offsets[i + 1] > erste_zeile and offsets[i] <= letzte_zeile]
+    tabelle = parquet_file.read_row_groups(gruppen, columns=columns)
+    start = erste_zeile - offsets[gruppen[0]]
+    return tabelle.slice(start, letzte_zeile - erste_zeile + 1)
+
+
+def ist_verlaengerung(parquet_path, rows_alt, letzter_zeitpunkt, letzter_close, rows_neu):
+    # Prüft, ob eine Zeitreihe seit einem früheren Stand nur um neue Zeilen verlängert wurde:
+    # die damals letzte Zeile muss unverändert an derselben Position stehen.
+    # Änderungen früherer Zeilen durch einen Merge erkennt erst der Vergleich der 'revision' aus den Metadaten.
+    if rows_alt <= 0 or rows_alt >= rows_neu:
+        return False
+    zeile = lese_zeilenbereich(parquet_path, rows_alt - 1, rows_alt - 1, columns=['daytime', 'CLOSE'])
+    if len(zeile) != 1:
+        return False
+    return (zeile['daytime'].iloc[0].isoformat() == letzter_zeitpunkt
+            and float(zeile['CLOSE'].iloc[0]) == letzter_close)
@@ -1,7 +1,62 @@
+import base64
 import hashlib
+import json
+import math
 import os
 import cufflinks as cf
+import numpy as np
+import pandas as pd
 import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+from plotly.subplots import make_subplots
+
+# Darstellung der Ereignisarten (Symbol, Farbe); andere Arten wie 'note'
+ANNOTATION_STIL = {
+    'buy': ('triangle-up', 'green'),
+    'sell': ('triangle-down', 'red'),
+    'news': ('diamond', 'royalblue'),
+    'note': ('circle', 'dimgray'),
+}
+
+# Seite des Dashboards: plotly.js einmal eingebettet, jede Datenspalte einmal als Base64 (Float64) in DATEN;
+# die Spuren verweisen mit dem Schlüssel auf ihre Spalten und werden erst im Browser zusammengesetzt.
+# Das Fadenkreuz ist eine senkrechte Linie je X-Achse an der Position des Mauszeigers
+DASHBOARD_HTML = """<!DOCTYPE html>
+<html>
+<head><meta charset="utf-8"><title>{titel}</title>
+<script type="text/javascript">{plotlyjs}</script>
+</head>
+<body style="margin:0">
+<div id="dashboard" style="width:100%;height:{hoehe}px"></div>
+<script type="text/javascript">
+const DATEN = {daten};
+const SPUREN = {spuren};
+const LAYOUT = {layout};
+const FADENKREUZ = {fadenkreuz};
+const spalten = {{}};
+function spalte(schluessel) {{
+    if (!(schluessel in spalten)) {{
+        const bytes = Uint8Array.from(atob(DATEN[schluessel]), c => c.charCodeAt(0));
+        spalten[schluessel] = new Float64Array(bytes.buffer);
+    }}
+    return spalten[schluessel];
+}}
+const spuren = SPUREN.map(spur => Object.assign({{}}, spur, {{x: spalte(spur.x), y: spalte(spur.y)}}));
+const ziel = document.getElementById('dashboard');
+Plotly.newPlot(ziel, spuren, LAYOUT, {{responsive: true, displaylogo: false}}).then(() => {{
+    if (!FADENKREUZ.length) return;
+    ziel.on('plotly_hover', ereignis => {{
+        const x = ereignis.points[0].x;
+        Plotly.relayout(ziel, {{shapes: FADENKREUZ.map(achse => ({{type: 'line', xref: achse, yref: 'paper', x0: x, x1: x,
+            y0: 0, y1: 1, line: {{color: 'rgba(90,90,90,0.6)', width: 1, dash: 'dot'}}}}))}});
+    }});
+    ziel.on('plotly_unhover', () => Plotly.relayout(ziel, {{shapes: []}}));
+}});
+</script>
+</body>
+</html>
+"""
 
 
 class PlotChartLine:
@@ -16,8 +71,22 @@ class PlotChartLine:
             plot_dir (str): Das Verzeichnis, in dem die generierten Plots gespeichert werden.
 
         Methoden:
-            create_chart(markt_symbol, chart_data_list, date_range, template="plotly_white"):
+            create_chart(markt_symbol, chart_data_list, date_range, template="plotly_white", indicator_data_list=None, y_range=None, trace_namen=None, marker_data_list=None, profil_daten=None, annotation_daten=None):
                 Erstellt ein Liniendiagramm basierend auf den gegebenen Daten und Parametern.
+                Indikatoren (z.B. SMA, Bollinger-Bänder) werden als zusätzliche Linien gezeichnet.
+                y_range legt den Y-Achsenbereich fest (z.B. aus den Tagesstatistiken),
+                trace_namen ersetzt Legendennamen je Intervall (z.B. "M1 (≈M16)" bei verdichteten Daten),
+                marker_data_list enthält (DataFrame mit daytime/CLOSE, Bezeichnung) für Markierungen,
+                profil_daten (Dictionary mit profil, kennzahlen, statistik, frequenz, interval) zeichnet rechts
+                das Volumenprofil und darunter Tick-Volumen und Spread je Sitzung als Seitenpanels,
+                annotation_daten (einzelne Ereignisse, Cluster) aus dem AnnotationStore zeichnet Trades,
+                Nachrichten und Notizen als Markierungen (Ereignisse mit Dauer als Flächen).
+
+            create_dashboard(panels, spalten, titel, date_range, template="plotly_white", gemeinsame_zeitachse=True):
+                Erstellt ein Dashboard aus mehreren Charts im Raster (Zeilen x Spalten) in einer HTML-Datei.
+                panels ist eine Liste von (Titel, chart_data_list); mit gemeinsamer Zeitachse sind die X-Achsen
+                verknüpft (Zoom und Verschieben wirken auf alle Charts) und ein Fadenkreuz läuft durch alle Charts.
+                Daten, die in mehreren Charts vorkommen, werden nur einmal gespeichert.
 
             generate_plot_filename(titel, date_range):
                 Generiert einen eindeutigen Dateinamen für den Plot basierend auf Titel und Datumsbereich.
@@ -29,16 +98,40 @@ class PlotChartLine:
         cf.set_config_file(offline=True, world_readable=True)
         self.plot_dir = plot_dir
 
-    def create_chart(self, markt_symbol, chart_data_list, date_range, template="plotly_white"):
-        # Erstellung eines neuen Plotly-Diagramms
-        fig = go.Figure()
+    def create_chart(self, markt_symbol, chart_data_list, date_range, template="plotly_white", indicator_data_list=None,
+                     y_range=None, trace_namen=None, marker_data_list=None, profil_daten=None, annotation_daten=None):
+        # Erstellung eines neuen Plotly-Diagramms (mit Volumenprofil als Raster aus Chart und Seitenpanels)
+        fig = self.erstelle_figur(profil_daten)
         titel = markt_symbol + '_'
 
         # Hinzufügen jeder Zeitreihe zum Diagramm
         for df, interval, color in chart_data_list:
-            fig.add_trace(go.Scatter(x=df['daytime'], y=df['CLOSE'], mode='lines', name=interval, line=dict(color=color)))
+            if 'HIGH' in df.columns and 'LOW' in df.columns:
+                # Verdichtete Daten: Hoch/Tief je Bucket als Band hinter der Schlusskurs-Linie
+                self.add_envelope_traces(fig, df, interval, color)
+            name = (trace_namen or {}).get(interval, interval)
+            fig.add_trace(go.Scatter(x=df['daytime'], y=df['CLOSE'], mode='lines', name=name, line=dict(color=color),
+                                     legendgroup=interval))
             titel += interval+'_'
 
+        # Hinzufügen der Indikatoren als zusätzliche Linien
+        for df, interval, color, bezeichnung in indicator_data_list or []:
+            self.add_indicator_traces(fig, df, interval, color, bezeichnung)
+
+        # Hinzufügen von Markierungen (z.B. Treffer des Bedingungs-Scanners)
+        for df, bezeichnung in marker_data_list or []:
+            fig.add_trace(go.Scatter(x=df['daytime'], y=df['CLOSE'], mode='markers', name=bezeichnung,
+                                     marker=dict(symbol='triangle-up', size=9, color='black', line=dict(width=1, color='white'))))
+
+        # Ereignisse (Trades, Nachrichten, Notizen); ohne Preis am oberen Rand des Kursbereichs
+        if annotation_daten is not None:
+            oben = y_range[1] if y_range is not None else max(float(df['CLOSE'].max()) for df, _, _ in chart_data_list)
+            self.add_annotation_traces(fig, annotation_daten[0], annotation_daten[1], oben)
+
+        # Volumenprofil und Sitzungsstatistik in den Seitenpanels
+        if profil_daten:
+            self.add_profile_traces(fig, profil_daten)
+
         # Generieren des Dateinamens für den Plot
         save_path = self.generate_plot_filename(titel, date_range)
         titel += date_range['start'] + '_' + date_range['end']
@@ -52,6 +145,8 @@ class PlotChartLine:
             hovermode='x unified',
             template=template
         )
+        if y_range is not None:
+            fig.update_layout(yaxis=dict(range=list(y_range)))
 
         # Speichern des Diagramms als HTML-Datei
         if not fig.write_html(save_path[0]):
@@ -61,6 +156,158 @@ class PlotChartLine:
 
         return fig, titel, save_path[1]
 
+    def create_dashboard(self, panels, spalten, titel, date_range, template="plotly_white", gemeinsame_zeitachse=True):
+        # Raster aus len(panels) Charts mit 'spalten' Spalten in einem Durchlauf. Gleiche Spalten (Zeitstempel, CLOSE,
+        # HIGH/LOW) werden nur einmal abgelegt, erkannt am Inhalt: z.B. die gemeinsame Zeitachse mehrerer Symbole
+        # im selben Datumsbereich oder dieselbe Abfrage in mehreren Charts. Größe und Aufbauzeit der Datei wachsen
+        # damit mit den unterschiedlichen Daten, nicht mit der Anzahl der Charts
+        spalten = max(1, min(int(spalten), len(panels)))
+        zeilen = math.ceil(len(panels) / spalten)
+        layout = make_subplots(rows=zeilen, cols=spalten, shared_xaxes='all' if gemeinsame_zeitachse else False,
+                               subplot_titles=[panel_titel for panel_titel, _ in panels],
+                               horizontal_spacing=0.04, vertical_spacing=0.25 / zeilen)
+        hoehe = max(450, 320 * zeilen)
+        layout.update_layout(title=f"Dashboard: {titel} {date_range['start']} - {date_range['end']}", template=template,
+                             height=hoehe, hovermode='x', showlegend=True, legend_title='Intervalle')
+        layout.update_xaxes(type='date', showspikes=True, spikemode='across', spikesnap='cursor', spikethickness=1)
+        layout.update_yaxes(showspikes=True, spikemode='across', spikesnap='cursor', spikethickness=1)
+
+        daten, schluessel_je_inhalt, schluessel_je_spalte, spuren, legende = {}, {}, {}, [], set()
+
+        def referenz(df, spalte):
+            # Schlüssel der Spalte in DATEN; Spalten mit gleichem Inhalt (Prüfsumme der kodierten Werte) teilen
+            # sich einen Eintrag. Dasselbe DataFrame wird dabei nur einmal kodiert
+            if (id(df), spalte) not in schluessel_je_spalte:
+                if spalte == 'daytime':
+                    werte = df['daytime'].to_numpy(dtype='datetime64[ms]').astype('int64').astype('<f8')
+                else:
+                    werte = df[spalte].to_numpy(dtype='<f8', na_value=np.nan)
+                roh = np.ascontiguousarray(werte).tobytes()
+                inhalt = (len(roh), hashlib.blake2b(roh, digest_size=16).digest())
+                if inhalt not in schluessel_je_inhalt:
+                    schluessel_je_inhalt[inhalt] = f"d{len(daten)}"
+                    daten[f"d{len(daten)}"] = base64.b64encode(roh).decode('ascii')
+                schluessel_je_spalte[(id(df), spalte)] = schluessel_je_inhalt[inhalt]
+            return schluessel_je_spalte[(id(df), spalte)]
+
+        for nummer, (_, chart_data_list) in enumerate(panels):
+            achse = '' if nummer == 0 else str(nummer + 1)
+            for df, interval, color in chart_data_list:
+                if df is None or df.empty:
+                    continue
+                zeit = referenz(df, 'daytime')
+                gemeinsam = {'type': 'scatter', 'mode': 'lines', 'xaxis': f"x{achse}", 'yaxis': f"y{achse}",
+                             'legendgroup': interval}
+                if 'HIGH' in df.columns and 'LOW' in df.columns:
+                    fuellfarbe = self.hex_to_rgba(color, 0.2)
+                    spuren.append({**gemeinsam, 'x': zeit, 'y': referenz(df, 'HIGH'), 'showlegend': False,
+                                   'hoverinfo': 'skip', 'line': {'width': 0, 'color': fuellfarbe}})
+                    spuren.append({**gemeinsam, 'x': zeit, 'y': referenz(df, 'LOW'), 'showlegend': False,
+                                   'hoverinfo': 'skip', 'line': {'width': 0, 'color': fuellfarbe}, 'fill': 'tonexty',
+                                   'fillcolor': fuellfarbe})
+                spuren.append({**gemeinsam, 'x': zeit, 'y': referenz(df, 'CLOSE'), 'name': interval,
+                               'line': {'color': color}, 'showlegend': interval not in legende})
+                legende.add(interval)
+
+        # Fadenkreuz über alle Charts nur bei gemeinsamer Zeitachse (sonst zeigt jeder Chart seine eigene Linie)
+        fadenkreuz = [f"x{'' if nummer == 0 else nummer + 1}" for nummer in range(len(panels))] if gemeinsame_zeitachse else []
+        html = DASHBOARD_HTML.format(titel=titel, plotlyjs=get_plotlyjs(), hoehe=hoehe, daten=json.dumps(daten),
+                                     spuren=json.dumps(spuren), layout=pio.to_json(layout.layout),
+                                     fadenkreuz=json.dumps(fadenkreuz))
+
+        save_path = self.generate_plot_filename('dashboard_' + titel, date_range)
+        try:
+            with open(save_path[0], 'w', encoding='utf-8') as f:
+                f.write(html)
+        except OSError as e:
+            print(f"Fehler beim Speichern der Datei: {save_path[0]} ({e})")
+        else:
+            print(f"Dashboard: {save_path[0]} gespeichert ({len(panels)} Charts, {len(daten)} Datenspalten)")
+        return save_path
+
+    @staticmethod
+    def erstelle_figur(profil_daten):
+        # Einfaches Diagramm oder Raster: Chart | Volumenprofil (gemeinsame Preisachse), darunter die Sitzungsstatistik
+        if not profil_daten:
+            return go.Figure()
+        fig = make_subplots(rows=2, cols=2, shared_xaxes=True, shared_yaxes=True, column_widths=[0.82, 0.18],
+                            row_heights=[0.75, 0.25], horizontal_spacing=0.01, vertical_spacing=0.04,
+                            specs=[[{}, {}], [{'secondary_y': True}, None]])
+        fig.update_layout(height=850, bargap=0)
+        return fig
+
+    def add_profile_traces(self, fig, profil_daten):
+        # Volumenprofil (Value Area hervorgehoben, Point of Control als Linie) und Tick-Volumen/Spread je Sitzung
+        profil, kennzahlen = profil_daten['profil'], profil_daten['kennzahlen']
+        if profil is not None:
+            im_value_area = (profil['preis'] >= kennzahlen['va_tief']) & (profil['preis'] <= kennzahlen['va_hoch'])
+            fig.add_trace(go.Bar(x=profil['volumen'], y=profil['preis'], orientation='h', showlegend=False,
+                                 name=f"Volumenprofil {profil_daten['interval']}",
+                                 marker=dict(color=np.where(im_value_area, 'rgba(70,130,180,0.8)', 'rgba(170,170,170,0.6)')),
+                                 hovertemplate=f"%{{y}}: %{{x:,.0f}} {kennzahlen['gewicht']}<extra></extra>"), row=1, col=2)
+            fig.add_hline(y=kennzahlen['poc'], line=dict(color='firebrick', dash='dot', width=1), row=1, col='all',
+                          annotation_text='POC', annotation_position='top left')
+            fig.update_xaxes(title_text=f"{kennzahlen['gewicht']} je {kennzahlen['stufe']:g}", row=1, col=2)
+
+        statistik = profil_daten.get('statistik')
+        if statistik is not None and not statistik.empty:
+            breite = pd.Timedelta(1, unit=profil_daten['frequenz']).total_seconds() * 1000
+            fig.add_trace(go.Bar(x=statistik['daytime'], y=statistik['ticks'], width=breite * 0.9, offset=0,
+                                 name='Ticks je Sitzung', marker=dict(color='lightsteelblue'), showlegend=False),
+                          row=2, col=1, secondary_y=False)
+            fig.add_trace(go.Scatter(x=statistik['daytime'] + pd.Timedelta(1, unit=profil_daten['frequenz']) / 2,
+                                     y=statistik['spread_mittel'], mode='lines+markers', name='Ø Spread',
+                                     line=dict(color='darkorange', width=1), showlegend=False),
+                          row=2, col=1, secondary_y=True)
+            fig.update_yaxes(title_text='Ticks', row=2, col=1, secondary_y=False)
+            fig.update_yaxes(title_text='Ø Spread', row=2, col=1, secondary_y=True)
+
+    def add_annotation_traces(self, fig, ereignisse, cluster, oben):
+        # Eine Spur je Ereignisart; zusammengefasste Ereignisse (Cluster) als Kreis mit Anzahl
+        for art, gruppe in ereignisse.groupby('art', sort=True):
+            symbol, farbe = ANNOTATION_STIL.get(art, ANNOTATION_STIL['note'])
+            fig.add_trace(go.Scatter(x=gruppe['start'], y=gruppe['preis'].fillna(oben), mode='markers', name=art,
+                                     marker=dict(symbol=symbol, size=10, color=farbe, line=dict(width=1, color='white')),
+                                     text=gruppe['text'], hovertemplate='%{text}<extra>' + art + '</extra>',
+                                     legendgroup='ereignisse'))
+        # Ereignisse mit Dauer als Fläche über die Höhe des Charts
+        for _, ereignis in ereignisse[ereignisse['ende'] > ereignisse['start']].iterrows():
+            farbe = ANNOTATION_STIL.get(ereignis['art'], ANNOTATION_STIL['note'])[1]
+            fig.add_shape(type='rect', x0=ereignis['start'], x1=ereignis['ende'], y0=0, y1=1, xref='x', yref='y domain',
+                          fillcolor=farbe, opacity=0.08, line=dict(width=0), layer='below')
+        if not cluster.empty:
+            fig.add_trace(go.Scatter(x=cluster['daytime'], y=cluster['preis'].fillna(oben), mode='markers+text',
+                                     name='weitere Ereignisse', text=cluster['anzahl'].astype(str), textposition='middle center',
+                                     marker=dict(size=np.clip(8 + 3 * np.sqrt(cluster['anzahl']), 10, 40), color='rgba(255,165,0,0.5)',
+                                                 line=dict(width=1, color='darkorange')),
+                                     customdata=cluster['art'], legendgroup='ereignisse',
+                                     hovertemplate='+%{text} %{customdata}<extra></extra>'))
+
+    def add_envelope_traces(self, fig, df, interval, color):
+        # Band zwischen Hoch und Tief, damit Ausschläge innerhalb eines Buckets sichtbar bleiben
+        fuellfarbe = self.hex_to_rgba(color, 0.2)
+        fig.add_trace(go.Scatter(x=df['daytime'], y=df['HIGH'], mode='lines', line=dict(width=0, color=fuellfarbe),
+                                 showlegend=False, hoverinfo='skip', legendgroup=interval))
+        fig.add_trace(go.Scatter(x=df['daytime'], y=df['LOW'], mode='lines', line=dict(width=0, color=fuellfarbe),
+                                 fill='tonexty', fillcolor=fuellfarbe, showlegend=False, hoverinfo='skip', legendgroup=interval))
+
+    @staticmethod
+    def hex_to_rgba(color, alpha):
+        # Wandelt '#RRGGBB' in 'rgba(r,g,b,alpha)' um; andere Farbangaben bleiben unverändert
+        if not isinstance(color, str) or not color.startswith('#') or len(color) != 7:
+            return color
+        r, g, b = (int(color[i:i + 2], 16) for i in (1, 3, 5))
+        return f"rgba({r},{g},{b},{alpha})"
+
+    def add_indicator_traces(self, fig, df, interval, color, bezeichnung):
+        # Jede Ergebnisspalte des Indikators wird als gestrichelte Linie in der Farbe der Zeitreihe gezeichnet
+        for spalte in df.columns:
+            if spalte == 'daytime':
+                continue
+            linienart = 'dot' if spalte in ('bb_upper', 'bb_lower') else 'dash'
+            fig.add_trace(go.Scatter(x=df['daytime'], y=df[spalte], mode='lines', name=f"{interval} {bezeichnung} {spalte}",
+                                     line=dict(color=color, dash=linienart, width=1)))
+
     def generate_plot_filename(self, titel, date_range):
         # Generieren eines eindeutigen Dateinamens basierend auf Titel und Datumsbereich
         hash_string = f"{titel}{date_range['start']}{date_range['end']}"
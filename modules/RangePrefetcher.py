@@ -0,0 +1,159 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+def datenframe_groesse(wert):
+    # Speicherbedarf eines Cache-Eintrags (DataFrame, Arrow-Tabelle oder Tupel davon) in Bytes
+    if isinstance(wert, tuple):
+        return sum(datenframe_groesse(teil) for teil in wert)
+    if hasattr(wert, 'memory_usage'):
+        return int(wert.memory_usage(index=True).sum())
+    if hasattr(wert, 'nbytes'):
+        return int(wert.nbytes)
+    return 0
+
+
+class BereichsCache:
+    """
+        Threadsicherer In-Memory-Cache (LRU) für aufbereitete Chart-Bereiche.
+
+        Schlüssel sind beliebige Tupel (z.B. Symbol, Intervall, Start, Ende, Budget); die Größe
+        wird in Megabyte begrenzt, bei Überschreitung werden die am längsten nicht genutzten
+        Einträge verworfen. Treffer und Fehlversuche von hole() werden für die Trefferquote gezählt.
+
+        Methoden:
+            hole(schluessel): Liefert einen Eintrag (oder None) und markiert ihn als zuletzt genutzt.
+            lege_ab(schluessel, wert): Speichert einen Eintrag.
+            enthaelt(schluessel): Prüft, ob ein Eintrag vorhanden ist.
+            leeren(): Entfernt alle Einträge (z.B. nach einem Import).
+            statistik(): Einträge, Größe, Treffer und Trefferquote.
+            groessen(): Schlüssel und Größe aller Einträge.
+        """
+
+    def __init__(self, max_mb=256):
+        # Initialisierung mit der maximalen Größe in Megabyte
+        self.max_bytes = int(max_mb * 1024 ** 2)
+        self.eintraege = OrderedDict()
+        self.bytes = 0
+        self.treffer = 0
+        self.fehlversuche = 0
+        self.lock = threading.Lock()
+
+    def hole(self, schluessel):
+        # Eintrag lesen und als zuletzt genutzt markieren
+        with self.lock:
+            if schluessel not in self.eintraege:
+                self.fehlversuche += 1
+                return None
+            self.treffer += 1
+            self.eintraege.move_to_end(schluessel)
+            return self.eintraege[schluessel][0]
+
+    def enthaelt(self, schluessel):
+        # Prüft, ob ein Eintrag vorhanden ist (ohne die LRU-Reihenfolge zu ändern)
+        with self.lock:
+            return schluessel in self.eintraege
+
+    def lege_ab(self, schluessel, wert):
+        # Eintrag speichern; älteste Einträge werden verdrängt, bis die Maximalgröße eingehalten ist
+        groesse = datenframe_groesse(wert)
+        with self.lock:
+            if schluessel in self.eintraege:
+                self.bytes -= self.eintraege.pop(schluessel)[1]
+            if groesse > self.max_bytes:
+                return
+            self.eintraege[schluessel] = (wert, groesse)
+            self.bytes += groesse
+            while self.bytes > self.max_bytes:
+                _, (_, verdraengt) = self.eintraege.popitem(last=False)
+                self.bytes -= verdraengt
+
+    def leeren(self):
+        # Alle Einträge entfernen
+        with self.lock:
+            self.eintraege.clear()
+            self.bytes = 0
+
+    def statistik(self):
+        # Füllstand und Trefferquote (Treffer / Zugriffe über hole(); None ohne Zugriffe)
+        with self.lock:
+            zugriffe = self.treffer + self.fehlversuche
+            return {'eintraege': len(self.eintraege), 'bytes': self.bytes, 'max_bytes': self.max_bytes,
+                    'treffer': self.treffer, 'fehlversuche': self.fehlversuche,
+                    'trefferquote': round(self.treffer / zugriffe, 4) if zugriffe else None}
+
+    def groessen(self):
+        # Schlüssel und Größe in Bytes aller Einträge (Momentaufnahme)
+        with self.lock:
+            return [(schluessel, groesse) for schluessel, (_, groesse) in self.eintraege.items()]
+
+
+class RangePrefetcher:
+    """
+        Spekulatives Vorladen benachbarter Datumsbereiche in einem Hintergrund-Thread.
+
+        Nach dem Plotten eines Bereichs werden die Nachbarbereiche (vorheriger/nächster Tag) für die
+        aktiven Intervalle geladen und im BereichsCache abgelegt, sodass ein Schritt vor oder zurück
+        nahezu sofort angezeigt werden kann. Zwischen zwei Aufträgen pausiert der Thread ('pause'),
+        damit Vordergrund-Zugriffe nicht ausgebremst werden. Eine neue Planung ersetzt die noch offenen
+        Aufträge; abbrechen() verwirft zusätzlich das Ergebnis eines gerade laufenden Auftrags.
+
+        Methoden:
+            plane(auftraege): Ersetzt die offenen Aufträge durch eine neue Liste von Cache-Schlüsseln.
+            abbrechen(): Verwirft alle offenen Aufträge.
+            stop(): Beendet den Hintergrund-Thread.
+        """
+
+    def __init__(self, lade_funktion, cache, pause=0.05):
+        # lade_funktion(schluessel) liefert den Wert für einen Cache-Schlüssel
+        self.lade_funktion = lade_funktion
+        self.cache = cache
+        self.pause = pause
+        self.auftraege = []
+        self.generation = 0
+        self.bedingung = threading.Condition()
+        self.laeuft = True
+        self.thread = threading.Thread(target=self.arbeite, daemon=True)
+        self.thread.start()
+
+    def plane(self, auftraege):
+        # Neue Aufträge (in Prioritätsreihenfolge); bereits gecachte Schlüssel werden übersprungen
+        with self.bedingung:
+            self.auftraege = [schluessel for schluessel in auftraege if not self.cache.enthaelt(schluessel)]
+            self.bedingung.notify()
+
+    def abbrechen(self):
+        # Offene Aufträge verwerfen; ein gerade laufender Auftrag wird nicht mehr im Cache abgelegt
+        with self.bedingung:
+            self.generation += 1
+            self.auftraege = []
+
+    def stop(self):
+        # Beendet den Hintergrund-Thread
+        with self.bedingung:
+            self.laeuft = False
+            self.auftraege = []
+            self.bedingung.notify()
+
+    def arbeite(self):
+        # Arbeitsschleife des Hintergrund-Threads
+        while True:
+            with self.bedingung:
+                while self.laeuft and not self.auftraege:
+                    self.bedingung.wait()
+                if not self.laeuft:
+                    return
+                schluessel = self.auftraege.pop(0)
+                generation = self.generation
+            if self.cache.enthaelt(schluessel):
+                continue
+            try:
+                wert = self.lade_funktion(schluessel)
+            except Exception as e:
+                print(f"Vorladen von {schluessel} fehlgeschlagen: {e}")
+                continue
+            with self.bedingung:
+                if generation == self.generation:
+                    self.cache.lege_ab(schluessel, wert)
+            time.sleep(self.pause)
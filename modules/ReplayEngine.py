@@ -0,0 +1,313 @@
+import heapq
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from modules.DayIndex import DayIndex
+from modules.MetadataManager import interval_sort_key, intervall_sekunden
+from modules.ParquetCache import CACHE_DIR, lade_serien_meta, lese_zeilenbereich_tabelle, serien_pfad, serien_sperre
+from modules.TimeSeriesStore import zeitraum
+
+# Spalten, die beim Replay gestreamt werden
+REPLAY_SPALTEN = ['daytime', 'OPEN', 'HIGH', 'LOW', 'CLOSE']
+
+# Erlaubte Wiedergabegeschwindigkeiten (Vielfache der Echtzeit)
+MIN_GESCHWINDIGKEIT = 1
+MAX_GESCHWINDIGKEIT = 1000
+
+
+def intervall_bloecke(symbol, interval, start, end, cache_dir=CACHE_DIR, block=5000):
+    # Generator über die Bars eines Intervalls in [start, end] als Arrow-Tabellen zu höchstens 'block' Zeilen.
+    # Mit Tagesindex wird blockweise über Zeilenbereiche gelesen; ohne Index (unsortierte Zeitreihe) wird der
+    # Bereich gefiltert gelesen und nach Zeit sortiert. Der Index wird hier nicht erstellt (das Lesen schreibt nichts)
+    meta_dir = os.path.join(cache_dir, 'meta')
+    pfad = serien_pfad(symbol, interval, os.path.join(cache_dir, 'data'))
+    if not os.path.exists(pfad):
+        return
+    index = DayIndex.from_meta(lade_serien_meta(symbol, interval, meta_dir))
+    if index is None:
+        von, bis, _ = zeitraum(start, end)
+        with serien_sperre(symbol, interval, meta_dir=meta_dir):
+            tabelle = pq.read_table(pfad, columns=REPLAY_SPALTEN, filters=[('daytime', '>=', von), ('daytime', '<=', bis)])
+        tabelle = tabelle.sort_by('daytime')
+        for erste in range(0, tabelle.num_rows, block):
+            yield tabelle.slice(erste, block)
+        return
+    bereich = index.zeilenbereich(start, end)
+    if bereich is None:
+        return
+    for erste in range(bereich[0], bereich[1] + 1, block):
+        with serien_sperre(symbol, interval, meta_dir=meta_dir):
+            yield lese_zeilenbereich_tabelle(pfad, erste, min(erste + block - 1, bereich[1]), columns=REPLAY_SPALTEN)
+
+
+def intervall_zeilen(symbol, interval, start, end, cache_dir=CACHE_DIR, block=5000):
+    # Generator über die Bars eines Intervalls in [start, end] (Tagesangaben, inklusive) in Zeitreihenfolge.
+    # Liefert (Schlusszeitpunkt in ns, Intervall, daytime, OPEN, HIGH, LOW, CLOSE); gelesen wird blockweise.
+    breite = intervall_sekunden(interval) * 10 ** 9
+    for tabelle in intervall_bloecke(symbol, interval, start, end, cache_dir, block):
+        df = tabelle.to_pandas()
+        beginn = df['daytime'].to_numpy().astype('datetime64[ns]').view('int64')
+        yield from zip((beginn + breite).tolist(), [interval] * len(df), beginn.tolist(),
+                       *(df[spalte].to_numpy(dtype='float64').tolist() for spalte in REPLAY_SPALTEN[1:]))
+
+
+def replay_zeilen(symbol, intervals, start, end, cache_dir=CACHE_DIR):
+    # Bars mehrerer Intervalle, zusammengeführt nach Schlusszeitpunkt: ein Bar erscheint, sobald er abgeschlossen ist
+    intervals = sorted(intervals, key=interval_sort_key)
+    return heapq.merge(*(intervall_zeilen(symbol, interval, start, end, cache_dir) for interval in intervals),
+                       key=lambda zeile: (zeile[0], interval_sort_key(zeile[1])))
+
+
+def leerer_frame():
+    # Frame ohne Bars
+    return {'zeit': None, 'bars': {}, 'zusammengefasst': 0}
+
+
+def verschmelze(frame, neu):
+    # Hängt die Bars eines neueren Frames an (Zusammenfassen, wenn ein Empfänger nicht mitkommt)
+    for interval, bars in neu['bars'].items():
+        ziel = frame['bars'].setdefault(interval, {spalte: [] for spalte in bars})
+        for spalte, werte in bars.items():
+            ziel[spalte].extend(werte)
+    frame['zeit'] = neu['zeit']
+    frame['zusammengefasst'] += neu['zusammengefasst']
+    frame.update({schluessel: wert for schluessel, wert in neu.items() if schluessel not in ('zeit', 'bars', 'zusammengefasst')})
+    return frame
+
+
+class ReplayAbonnement:
+    """
+        Empfänger der Frames eines Replays (z.B. eine SSE-Verbindung).
+
+        Es wird höchstens ein Frame vorgehalten: Holt der Empfänger einen Frame nicht rechtzeitig ab,
+        werden neue Bars an den ausstehenden Frame angehängt. Ein langsamer Browser erhält damit
+        seltener, aber vollständige Aktualisierungen, und der Replay-Takt bleibt unbeeinflusst.
+
+        Methoden:
+            lege_ab(frame): Übergibt einen Frame (wird mit einem ausstehenden Frame zusammengefasst).
+            hole(timeout): Liefert den ausstehenden Frame oder None nach Ablauf des Timeouts.
+        """
+
+    def __init__(self):
+        # Initialisierung ohne ausstehenden Frame
+        self.bedingung = threading.Condition()
+        self.ausstehend = None
+
+    def lege_ab(self, frame):
+        # Frame übergeben oder an den ausstehenden Frame anhängen
+        with self.bedingung:
+            if self.ausstehend is None:
+                self.ausstehend = verschmelze(leerer_frame(), frame)
+            else:
+                verschmelze(self.ausstehend, frame)
+            self.bedingung.notify()
+
+    def hole(self, timeout=1.0):
+        # Ausstehenden Frame abholen (wartet höchstens 'timeout' Sekunden)
+        with self.bedingung:
+            self.bedingung.wait_for(lambda: self.ausstehend is not None, timeout)
+            frame, self.ausstehend = self.ausstehend, None
+            return frame
+
+
+class ReplayEngine:
+    """
+        Wiedergabe eines Zeitraums Bar für Bar mit 1- bis 1000-facher Geschwindigkeit.
+
+        Die Bars aller gewählten Intervalle kommen aus einem Generator (replay_zeilen), der den
+        Parquet-Cache blockweise in Zeitreihenfolge liest. Ein Hintergrund-Thread arbeitet mit fester
+        Bildrate ('fps'): je Takt werden alle Bars, deren Schlusszeitpunkt die Replay-Uhr erreicht hat,
+        zu einem Frame zusammengefasst und an alle Abonnenten verteilt. Die Replay-Uhr wird aus der
+        monotonen Systemuhr berechnet (Anker + vergangene Zeit x Geschwindigkeit); verspätete Takte
+        werden übersprungen statt nachgeholt, der Takt bleibt damit auch bei hoher Geschwindigkeit
+        stabil. Datenlücken (z.B. die Nacht) werden übersprungen, wenn sie länger als 'max_luecke'
+        Sekunden Wiedergabezeit dauern würden und mehr als zwei Bars des feinsten Intervalls umfassen.
+
+        Methoden:
+            start(): Startet die Wiedergabe.
+            pause(), fortsetzen(): Hält die Wiedergabe an bzw. setzt sie fort.
+            setze_geschwindigkeit(faktor): Ändert die Geschwindigkeit während der Wiedergabe.
+            stop(): Beendet die Wiedergabe.
+            abonniere(), kuendige(abonnement): Verwaltung der Empfänger.
+            status(): Zustand als Dictionary.
+        """
+
+    def __init__(self, symbol, intervals, start, end, geschwindigkeit=60, fps=20, cache_dir=CACHE_DIR, max_luecke=1.0):
+        # Initialisierung mit Zeitraum (Tagesangaben), Geschwindigkeit und Bildrate
+        self.symbol = symbol
+        self.intervals = sorted(intervals, key=interval_sort_key)
+        self.start_datum = start
+        self.end_datum = end
+        self.fps = max(1, int(fps))
+        self.cache_dir = cache_dir
+        self.max_luecke = max_luecke
+        # Als Lücke gilt frühestens der doppelte Abstand der Bars des feinsten Intervalls
+        self.min_luecke = 2 * intervall_sekunden(self.intervals[0]) * 10 ** 9
+        self.geschwindigkeit = self.pruefe_geschwindigkeit(geschwindigkeit)
+        self.bedingung = threading.Condition()
+        self.abonnements = []
+        self.verlauf = leerer_frame()
+        self.pausiert = False
+        self.laeuft = False
+        self.beendet = False
+        self.anker_replay = None
+        self.anker_wand = None
+        self.uhr = None
+        self.bars = 0
+        self.fehler = None
+        self.thread = None
+
+    @staticmethod
+    def pruefe_geschwindigkeit(faktor):
+        # Geschwindigkeit als Vielfaches der Echtzeit (1 bis 1000)
+        faktor = float(faktor)
+        if not MIN_GESCHWINDIGKEIT <= faktor <= MAX_GESCHWINDIGKEIT:
+            raise ValueError(f"Die Geschwindigkeit muss zwischen {MIN_GESCHWINDIGKEIT} und {MAX_GESCHWINDIGKEIT} liegen")
+        return faktor
+
+    def start(self):
+        # Startet den Wiedergabe-Thread
+        if self.thread is None:
+            self.laeuft = True
+            self.thread = threading.Thread(target=self.arbeite, daemon=True)
+            self.thread.start()
+            print(f"Replay {self.symbol} {self.intervals} {self.start_datum} - {self.end_datum} mit {self.geschwindigkeit:g}x")
+        return self
+
+    def stop(self):
+        # Beendet die Wiedergabe
+        with self.bedingung:
+            self.laeuft = False
+            self.bedingung.notify_all()
+
+    def pause(self):
+        # Hält die Replay-Uhr an
+        with self.bedingung:
+            if not self.pausiert and self.anker_wand is not None:
+                self.anker_replay = self.replay_uhr(time.monotonic())
+            self.pausiert = True
+            self.bedingung.notify_all()
+
+    def fortsetzen(self):
+        # Setzt die Wiedergabe an der angehaltenen Stelle fort
+        with self.bedingung:
+            if not self.pausiert:
+                return
+            self.pausiert = False
+            self.anker_wand = time.monotonic()
+            self.bedingung.notify_all()
+
+    def setze_geschwindigkeit(self, faktor):
+        # Neue Geschwindigkeit ab der aktuellen Replay-Zeit (neuer Anker, kein Sprung)
+        faktor = self.pruefe_geschwindigkeit(faktor)
+        with self.bedingung:
+            if not self.pausiert and self.anker_wand is not None:
+                jetzt = time.monotonic()
+                self.anker_replay, self.anker_wand = self.replay_uhr(jetzt), jetzt
+            self.geschwindigkeit = faktor
+            self.bedingung.notify_all()
+
+    def replay_uhr(self, jetzt):
+        # Replay-Zeit in ns zum (monotonen) Zeitpunkt 'jetzt'
+        if self.pausiert:
+            return self.anker_replay
+        return self.anker_replay + int((jetzt - self.anker_wand) * self.geschwindigkeit * 10 ** 9)
+
+    def abonniere(self):
+        # Neuer Empfänger; erhält zuerst alle bisher wiedergegebenen Bars als einen Frame
+        abonnement = ReplayAbonnement()
+        with self.bedingung:
+            self.abonnements.append(abonnement)
+            if self.verlauf['zusammengefasst']:
+                abonnement.lege_ab(self.verlauf)
+        return abonnement
+
+    def kuendige(self, abonnement):
+        # Entfernt einen Empfänger
+        with self.bedingung:
+            if abonnement in self.abonnements:
+                self.abonnements.remove(abonnement)
+
+    def status(self):
+        # Zustand der Wiedergabe (für die Steuerung im Browser)
+        return {'symbol': self.symbol, 'intervals': self.intervals, 'start': self.start_datum, 'end': self.end_datum,
+                'speed': self.geschwindigkeit, 'fps': self.fps, 'paused': self.pausiert, 'finished': self.beendet,
+                'bars': self.bars, 'error': self.fehler, 'zeit': None if self.uhr is None else str(pd.Timestamp(self.uhr))}
+
+    def verteile(self, frame):
+        # Frame an alle Empfänger übergeben (und für später hinzukommende Empfänger sammeln)
+        with self.bedingung:
+            verschmelze(self.verlauf, frame)
+            abonnements = list(self.abonnements)
+        for abonnement in abonnements:
+            abonnement.lege_ab(frame)
+
+    def arbeite(self):
+        # Wiedergabe-Thread; ein Fehler beim Lesen beendet das Replay mit einer Meldung an die Empfänger
+        try:
+            self.spiele_ab()
+        except (OSError, ValueError) as e:
+            self.fehler = str(e)
+            print(f"Replay {self.symbol} abgebrochen: {e}")
+        self.beendet = True
+        self.verteile({'zeit': self.uhr, 'bars': {}, 'zusammengefasst': 0, 'ende': True, 'fehler': self.fehler})
+        print(f"Replay {self.symbol} beendet ({self.bars} Bars)")
+
+    def spiele_ab(self):
+        # Wiedergabe-Schleife mit fester Bildrate
+        quelle = replay_zeilen(self.symbol, self.intervals, self.start_datum, self.end_datum, self.cache_dir)
+        naechster = next(quelle, None)
+        takt = 1.0 / self.fps
+        with self.bedingung:
+            if naechster is not None:
+                self.anker_replay = naechster[0] - 1
+            self.anker_wand = time.monotonic()
+        naechster_takt = time.monotonic()
+
+        while naechster is not None:
+            with self.bedingung:
+                while self.laeuft and self.pausiert:
+                    self.bedingung.wait()
+                if not self.laeuft:
+                    break
+                jetzt = time.monotonic()
+                uhr = self.replay_uhr(jetzt)
+                # Lange Datenlücken überspringen: die Uhr springt auf den nächsten Bar
+                if naechster[0] - uhr > max(self.max_luecke * self.geschwindigkeit * 10 ** 9, self.min_luecke):
+                    self.anker_replay, self.anker_wand = naechster[0] - 1, jetzt
+                    uhr = naechster[0] - 1
+
+            frame = {'zeit': None, 'bars': {}, 'zusammengefasst': 1}
+            while naechster is not None and naechster[0] <= uhr:
+                bars = frame['bars'].setdefault(naechster[1], {'x': [], 'open': [], 'high': [], 'low': [], 'close': []})
+                bars['x'].append(naechster[2])
+                for spalte, wert in zip(('open', 'high', 'low', 'close'), naechster[3:]):
+                    bars[spalte].append(wert)
+                self.bars += 1
+                naechster = next(quelle, None)
+            self.uhr = uhr
+            if frame['bars']:
+                frame['zeit'] = uhr
+                self.verteile(frame)
+
+            # Nächster Takt; liegt er bereits in der Vergangenheit, wird nicht nachgeholt
+            naechster_takt += takt
+            if naechster_takt < time.monotonic():
+                naechster_takt = time.monotonic() + takt
+            with self.bedingung:
+                self.bedingung.wait(max(0.0, naechster_takt - time.monotonic()))
+
+
+def frame_als_json(frame):
+    # JSON-taugliche Form eines Frames (Zeitstempel als Text, NaN als null)
+    bars = {}
+    for interval, werte in frame['bars'].items():
+        bars[interval] = {spalte: [None if wert != wert else wert for wert in liste] for spalte, liste in werte.items()
+                          if spalte != 'x'}
+        bars[interval]['x'] = pd.to_datetime(np.asarray(werte['x'], dtype='int64')).strftime('%Y-%m-%d %H:%M:%S').tolist()
+    return {'zeit': None if frame['zeit'] is None else str(pd.Timestamp(frame['zeit'])), 'bars': bars,
+            'zusammengefasst': frame['zusammengefasst'], 'ende': bool(frame.get('ende', False)),
+            'fehler': frame.get('fehler')}
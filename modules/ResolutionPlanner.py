@@ -0,0 +1,122 @@
+import os
+from modules.DayIndex import DayIndex
+from modules.ParquetCache import CACHE_DIR, lade_serien_meta, lese_zeilenbereich_tabelle, serien_pfad, serien_sperre
+from modules.SummaryPyramid import STUFEN_SPALTEN, SummaryPyramid
+from modules.DailyStats import intervall_minuten
+from modules.MetadataManager import intervall_name
+
+# Standardspalten einer Abfrage, unabhängig von der gewählten Auflösung (Rohdaten oder Pyramidenstufe)
+ABFRAGE_SPALTEN = ['daytime', 'HIGH', 'LOW', 'CLOSE']
+
+
+class ResolutionPlanner:
+    """
+        Wählt für jede angeforderte Zeitreihe die feinste Auflösung, die in das Punktebudget passt.
+
+        Grundlage sind die Zeilenanzahlen je Zeitreihe und Tag aus den Tagesindizes der Metadaten;
+        Daten werden für die Planung nicht gelesen. Kandidaten für ein Intervall sind die Rohdaten,
+        die Stufen seiner Zusammenfassungspyramide (4, 16, 64, ... Bars je Bucket) sowie gröbere
+        gespeicherte Intervalle desselben Symbols samt deren Stufen. Gewählt wird der Kandidat mit
+        der kleinsten effektiven Bar-Länge, dessen Punktanzahl das Budget nicht überschreitet;
+        bei gleicher Bar-Länge haben echte (gespeicherte) Intervalle Vorrang.
+
+        Ein Plan ist ein Dictionary mit den Einträgen:
+            interval (str): Angefordertes Intervall (Trace).
+            quelle (str): Intervall, aus dem gelesen wird.
+            faktor (int): Pyramidenstufe der Quelle (1 = Rohdaten).
+            minuten (int): Effektive Bar-Länge in Minuten.
+            punkte (int): Erwartete Anzahl Punkte.
+            erste, letzte (int): Zeilenbereich der Quelle.
+            bezeichnung (str): Beschreibung der geplotteten Auflösung, z.B. "M1 → ≈M16 (M1 ×16)".
+
+        Methoden:
+            plane(intervals, datum_von, datum_bis, roh_erzwingen): Erstellt die Pläne für mehrere Intervalle.
+            lade(plan, columns, als_arrow): Liest die Daten eines Plans.
+        """
+
+    def __init__(self, symbol, budget, verfuegbare_intervalle, cache_dir=CACHE_DIR, pyramide=None):
+        # Initialisierung mit Symbol, Punktebudget und den gespeicherten Intervallen des Symbols
+        self.symbol = symbol
+        self.budget = max(int(budget), 1)
+        self.verfuegbare_intervalle = sorted(verfuegbare_intervalle, key=intervall_minuten)
+        self.meta_dir = os.path.join(cache_dir, 'meta')
+        self.data_dir = os.path.join(cache_dir, 'data')
+        self.pyramide = pyramide or SummaryPyramid(cache_dir)
+        self._serien = {}
+
+    def serie(self, interval):
+        # Metadaten und Tagesindex eines Intervalls (einmal je Planer geladen), None ohne Index
+        if interval not in self._serien:
+            meta = lade_serien_meta(self.symbol, interval, self.meta_dir)
+            index = DayIndex.from_meta(meta)
+            self._serien[interval] = (meta, index) if index is not None else None
+        return self._serien[interval]
+
+    def kandidaten(self, interval, datum_von, datum_bis):
+        # Alle Auflösungen, mit denen das Intervall im Datumsbereich dargestellt werden kann
+        kandidaten = []
+        for quelle in self.verfuegbare_intervalle:
+            if intervall_minuten(quelle) < intervall_minuten(interval):
+                continue
+            serie = self.serie(quelle)
+            if serie is None:
+                continue
+            meta, index = serie
+            bereich = index.zeilenbereich(datum_von, datum_bis)
+            if bereich is None:
+                continue
+            zeilen = bereich[1] - bereich[0] + 1
+            for faktor in [1] + self.pyramide.stufen_fuer(meta['stats']['rows']):
+                kandidaten.append({
+                    "interval": interval, "quelle": quelle, "faktor": faktor,
+                    "minuten": intervall_minuten(quelle) * faktor,
+                    "punkte": -(-zeilen // faktor),
+                    "erste": bereich[0], "letzte": bereich[1],
+                })
+        return kandidaten
+
+    def plane_intervall(self, interval, datum_von, datum_bis, roh_erzwingen=False):
+        # Plan für ein Intervall, None wenn im Datumsbereich keine Daten (oder kein Tagesindex) vorhanden sind
+        kandidaten = self.kandidaten(interval, datum_von, datum_bis)
+        eigene = [k for k in kandidaten if k['quelle'] == interval]
+        if roh_erzwingen or not eigene:
+            plan = next((k for k in eigene if k['faktor'] == 1), None)
+        else:
+            passend = [k for k in kandidaten if k['punkte'] <= self.budget]
+            if passend:
+                # Feinste Auflösung im Budget; gespeicherte Intervalle (Faktor 1) vor Pyramidenstufen
+                plan = min(passend, key=lambda k: (k['minuten'], k['faktor'], intervall_minuten(k['quelle'])))
+            else:
+                plan = min(kandidaten, key=lambda k: (k['punkte'], k['minuten']))
+        if plan is not None:
+            plan['bezeichnung'] = self.bezeichnung(plan)
+        return plan
+
+    def plane(self, intervals, datum_von, datum_bis, roh_erzwingen=False):
+        # Pläne für alle Intervalle (Reihenfolge bleibt erhalten); Intervalle ohne Plan ergeben None
+        return [self.plane_intervall(interval, datum_von, datum_bis, roh_erzwingen) for interval in intervals]
+
+    @staticmethod
+    def bezeichnung(plan):
+        # Lesbare Beschreibung der geplotteten Auflösung
+        if plan['faktor'] == 1 and plan['quelle'] == plan['interval']:
+            return f"{plan['interval']} (Rohdaten, {plan['punkte']} Punkte)"
+        if plan['faktor'] == 1:
+            return f"{plan['interval']} → {plan['quelle']} ({plan['punkte']} Punkte)"
+        return (f"{plan['interval']} → ≈{intervall_name(plan['minuten'] * 60)} ({plan['quelle']} ×{plan['faktor']}, "
+                f"{plan['punkte']} Punkte)")
+
+    def lade(self, plan, columns=None, als_arrow=False):
+        # Liest die Daten eines Plans; bei Pyramidenstufen mit Hoch/Tief je Bucket, bei Rohdaten Hoch/Tief der Bars.
+        # columns: gewünschte Spalten (Standard: ABFRAGE_SPALTEN; bei Pyramidenstufen nur die dort vorhandenen),
+        # als_arrow: Arrow-Tabelle statt DataFrame
+        with serien_sperre(self.symbol, plan['quelle'], meta_dir=self.meta_dir):
+            if plan['faktor'] > 1:
+                self.pyramide.aktualisiere(self.symbol, plan['quelle'])
+                spalten = [spalte for spalte in (columns or ABFRAGE_SPALTEN) if spalte in STUFEN_SPALTEN]
+                tabelle = self.pyramide.lese_stufe(self.symbol, plan['quelle'], plan['faktor'], plan['erste'] // plan['faktor'],
+                                                   plan['letzte'] // plan['faktor'], columns=spalten)
+            else:
+                tabelle = lese_zeilenbereich_tabelle(serien_pfad(self.symbol, plan['quelle'], self.data_dir),
+                                                     plan['erste'], plan['letzte'], columns=columns or ABFRAGE_SPALTEN)
+        return tabelle if als_arrow else tabelle.to_pandas()
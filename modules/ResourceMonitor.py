@@ -0,0 +1,241 @@
+import argparse
+import ctypes
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from modules.MetadataManager import interval_sort_key
+from modules.ParquetCache import CACHE_DIR
+from modules.SafeFileIO import atomarer_zielpfad
+
+# Unterverzeichnisse des Caches, deren Größe je Zeitreihe ausgewiesen wird (Dateimuster relativ zum Verzeichnis)
+CACHE_BEREICHE = {
+    'daten': ('data', ['{serie}.parquet']),
+    'meta': ('meta', ['{serie}.json']),
+    'pyramide': ('pyramid', ['{serie}.json', '{serie}_L*.parquet']),
+    'statistik': ('stats', ['{serie}.parquet']),
+}
+
+
+def prozess_rss():
+    # Resident Set Size des laufenden Prozesses in Bytes (None, wenn sie nicht bestimmt werden kann).
+    # psutil wird verwendet, falls installiert; sonst /proc (Linux) bzw. die Windows-API
+    try:
+        import psutil
+        return int(psutil.Process().memory_info().rss)
+    except ImportError:
+        pass
+    if os.path.exists('/proc/self/statm'):
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    if sys.platform == 'win32':
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [('cb', ctypes.c_ulong), ('PageFaultCount', ctypes.c_ulong),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+        zaehler = ProcessMemoryCounters()
+        zaehler.cb = ctypes.sizeof(zaehler)
+        prozess = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(prozess, ctypes.byref(zaehler), zaehler.cb):
+            return int(zaehler.WorkingSetSize)
+    return None
+
+
+def verzeichnis_groesse(pfad):
+    # Größe aller Dateien unterhalb eines Verzeichnisses in Bytes und Anzahl der Dateien
+    groesse, anzahl = 0, 0
+    for wurzel, _, dateien in os.walk(pfad):
+        for datei in dateien:
+            try:
+                groesse += os.path.getsize(os.path.join(wurzel, datei))
+                anzahl += 1
+            except OSError:
+                continue
+    return groesse, anzahl
+
+
+def dateien_groesse(verzeichnis, muster):
+    # Summe der Dateigrößen zu mehreren glob-Mustern in einem Verzeichnis
+    groesse = 0
+    for eintrag in muster:
+        for pfad in glob.glob(os.path.join(glob.escape(verzeichnis), eintrag)):
+            try:
+                groesse += os.path.getsize(pfad)
+            except OSError:
+                continue
+    return groesse
+
+
+def mb(anzahl_bytes):
+    # Bytes als Megabyte-Text für die Anzeige
+    return "-" if anzahl_bytes is None else f"{anzahl_bytes / 1024 ** 2:,.1f} MB"
+
+
+class Messungen:
+    """
+        Laufzeitmessung benannter Operationen (Abfragen, Importe, Charts) mit einer Liste der
+        zuletzt aufgetretenen langsamen Operationen.
+
+        Je Operation werden Anzahl, Gesamt- und Höchstdauer gezählt; Operationen ab 'schwelle_ms'
+        landen zusätzlich (mit Zeitpunkt und Details, z.B. Symbol und Intervall) in einer Liste fester
+        Länge. Die Messung ist threadsicher und kostet je Aufruf nur zwei Zeitstempel.
+
+        Methoden:
+            messe(name, details): Kontextmanager, der die Dauer des Blocks erfasst.
+            erfasse(name, dauer, details): Erfasst eine bereits gemessene Dauer in Sekunden.
+            statistik(): Zähler je Operation und langsame Operationen (neueste zuerst).
+        """
+
+    def __init__(self, schwelle_ms=250, max_langsame=50):
+        # Initialisierung mit Schwelle für langsame Operationen und Länge der Liste
+        self.schwelle_ms = schwelle_ms
+        self.zaehler = {}
+        self.langsame = deque(maxlen=max_langsame)
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def messe(self, name, details=""):
+        # Erfasst die Dauer des Blocks (auch wenn er mit einer Ausnahme endet)
+        beginn = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.erfasse(name, time.perf_counter() - beginn, details)
+
+    def erfasse(self, name, dauer, details=""):
+        # Dauer in Sekunden einer Operation zuordnen
+        dauer_ms = dauer * 1000
+        with self.lock:
+            anzahl, gesamt, maximum = self.zaehler.get(name, (0, 0.0, 0.0))
+            self.zaehler[name] = (anzahl + 1, gesamt + dauer_ms, max(maximum, dauer_ms))
+            if dauer_ms >= self.schwelle_ms:
+                self.langsame.append({'zeitpunkt': datetime.now().isoformat(timespec='seconds'), 'operation': name,
+                                      'details': details, 'dauer_ms': round(dauer_ms, 1)})
+
+    def statistik(self):
+        # Zähler je Operation und langsame Operationen (neueste zuerst)
+        with self.lock:
+            operationen = {name: {'anzahl': anzahl, 'gesamt_ms': round(gesamt, 1), 'mittel_ms': round(gesamt / anzahl, 1),
+                                  'max_ms': round(maximum, 1)}
+                           for name, (anzahl, gesamt, maximum) in sorted(self.zaehler.items())}
+            return operationen, list(reversed(self.langsame))
+
+
+# Gemeinsame Messung der Anwendung (Schwelle überschreibbar über "slow_operation_ms" in config.json)
+MESSUNGEN = Messungen()
+
+
+class ResourceMonitor:
+    """
+        Momentaufnahme von Speicher- und Cache-Nutzung der Anwendung.
+
+        Erfasst die Resident Set Size des Prozesses, Größe, Füllstand und Trefferquote der
+        In-Memory-Caches (BereichsCache), den davon belegten Speicher je Zeitreihe, die Größe der
+        Dateien je Zeitreihe im Parquet-Cache (Daten, Metadaten, Pyramide, Tagesstatistik), die
+        Größe der Cache-Unterverzeichnisse und des Plot-Verzeichnisses sowie die Laufzeitmessungen
+        (MESSUNGEN). Die Momentaufnahme ist ein JSON-fähiges Dictionary, z.B. für ein Monitoring.
+
+        Methoden:
+            snapshot(): Momentaufnahme als Dictionary.
+            speichere(path): Schreibt die Momentaufnahme als JSON-Datei (atomar).
+            festplatte_je_serie(): Dateigrößen je Zeitreihe im Cache.
+            speicher_je_serie(): Speicher der Cache-Einträge je Zeitreihe.
+        """
+
+    def __init__(self, cache_dir=CACHE_DIR, plot_dir='plots', caches=None, messungen=MESSUNGEN):
+        # Initialisierung mit Cache- und Plot-Verzeichnis sowie den In-Memory-Caches (Name -> BereichsCache)
+        self.cache_dir = cache_dir
+        self.plot_dir = plot_dir
+        self.caches = caches or {}
+        self.messungen = messungen
+
+    def serien(self):
+        # Zeitreihen im Cache (aus den Dateinamen der Metadaten)
+        serien = []
+        for pfad in glob.glob(os.path.join(glob.escape(os.path.join(self.cache_dir, 'meta')), '*.json')):
+            name = os.path.splitext(os.path.basename(pfad))[0]
+            if '_' in name:
+                serien.append(tuple(name.rsplit('_', 1)))
+        return sorted(serien, key=lambda serie: (serie[0], interval_sort_key(serie[1])))
+
+    def festplatte_je_serie(self):
+        # Dateigrößen je Zeitreihe und Bereich in Bytes, absteigend nach Gesamtgröße
+        ergebnis = []
+        for symbol, interval in self.serien():
+            eintrag = {'symbol': symbol, 'interval': interval}
+            for bereich, (verzeichnis, muster) in CACHE_BEREICHE.items():
+                eintrag[f'{bereich}_bytes'] = dateien_groesse(os.path.join(self.cache_dir, verzeichnis),
+                                                              [m.format(serie=f"{symbol}_{interval}") for m in muster])
+            eintrag['gesamt_bytes'] = sum(eintrag[f'{bereich}_bytes'] for bereich in CACHE_BEREICHE)
+            ergebnis.append(eintrag)
+        return sorted(ergebnis, key=lambda eintrag: eintrag['gesamt_bytes'], reverse=True)
+
+    def speicher_je_serie(self, serien=None):
+        # Speicher der Cache-Einträge je Zeitreihe. Ein Eintrag gehört zu der Zeitreihe, deren Symbol und
+        # Intervall als aufeinanderfolgende Elemente im Schlüssel stehen; andere (z.B. Symbolvergleiche) zu '*'
+        bekannte = set(serien if serien is not None else self.serien())
+        summen = {}
+        for name, cache in self.caches.items():
+            for schluessel, groesse in cache.groessen():
+                serie = ('*', name)
+                if isinstance(schluessel, tuple):
+                    serie = next((paar for paar in zip(schluessel, schluessel[1:]) if paar in bekannte), serie)
+                anzahl, summe = summen.get(serie, (0, 0))
+                summen[serie] = (anzahl + 1, summe + groesse)
+        ergebnis = [{'symbol': symbol, 'interval': interval, 'eintraege': anzahl, 'bytes': summe}
+                    for (symbol, interval), (anzahl, summe) in summen.items()]
+        return sorted(ergebnis, key=lambda eintrag: eintrag['bytes'], reverse=True)
+
+    def snapshot(self):
+        # Momentaufnahme als JSON-fähiges Dictionary
+        verzeichnisse = {}
+        for verzeichnis in sorted(os.listdir(self.cache_dir)) if os.path.isdir(self.cache_dir) else []:
+            pfad = os.path.join(self.cache_dir, verzeichnis)
+            if os.path.isdir(pfad):
+                groesse, anzahl = verzeichnis_groesse(pfad)
+                verzeichnisse[f"{os.path.basename(os.path.normpath(self.cache_dir))}/{verzeichnis}"] = {'bytes': groesse, 'dateien': anzahl}
+        groesse, anzahl = verzeichnis_groesse(self.plot_dir)
+        verzeichnisse[os.path.basename(os.path.normpath(self.plot_dir))] = {'bytes': groesse, 'dateien': anzahl}
+
+        operationen, langsame = self.messungen.statistik()
+        serien = self.serien()
+        return {
+            'zeitpunkt': datetime.now().isoformat(timespec='seconds'),
+            'prozess': {'pid': os.getpid(), 'rss_bytes': prozess_rss()},
+            'caches': {name: cache.statistik() for name, cache in self.caches.items()},
+            'speicher_je_serie': self.speicher_je_serie(serien),
+            'festplatte_je_serie': self.festplatte_je_serie(),
+            'verzeichnisse': verzeichnisse,
+            'operationen': operationen,
+            'langsame_operationen': langsame,
+        }
+
+    def speichere(self, path):
+        # Schreibt die Momentaufnahme als JSON-Datei; Rückgabe: die Momentaufnahme
+        daten = self.snapshot()
+        with atomarer_zielpfad(path) as temp_path:
+            with open(temp_path, 'w') as f:
+                json.dump(daten, f, indent=2)
+        return daten
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Speicher- und Cache-Nutzung als JSON (Festplatte; Prozesswerte dieses Aufrufs)")
+    parser.add_argument('--cache', default=CACHE_DIR, help="Cache-Verzeichnis")
+    parser.add_argument('--plots', default='plots', help="Plot-Verzeichnis")
+    parser.add_argument('--output', help="Zieldatei (ohne Angabe: Ausgabe auf der Konsole)")
+    args = parser.parse_args()
+
+    cli_monitor = ResourceMonitor(args.cache, args.plots)
+    if args.output:
+        cli_monitor.speichere(args.output)
+        print(f"Momentaufnahme gespeichert: {args.output}")
+    else:
+        print(json.dumps(cli_monitor.snapshot(), indent=2))
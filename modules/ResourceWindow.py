@@ -0,0 +1,126 @@
+import os
+import tkinter as tk
+from tkinter import messagebox, ttk
+from modules.ResourceMonitor import mb
+
+# Intervall der automatischen Aktualisierung in Millisekunden
+AKTUALISIERUNG_MS = 5000
+
+
+class ResourceWindow:
+    """
+        Fenster mit Speicher- und Cache-Nutzung der Anwendung (aus dem ResourceMonitor).
+
+        Oben stehen Prozessspeicher (RSS), belegter Speicher der In-Memory-Caches und die Größe
+        von Cache- und Plot-Verzeichnis. Die Tabellen zeigen je Zeitreihe den Speicher im RAM und die
+        Dateigrößen im Cache (größte zuerst), Füllstand und Trefferquote je Cache sowie die zuletzt
+        aufgetretenen langsamen Operationen. Das Fenster aktualisiert sich alle fünf Sekunden; die
+        Momentaufnahme kann als JSON-Datei für ein Monitoring gespeichert werden.
+
+        Attribute:
+            master (tk.Toplevel): Das übergeordnete Fenster.
+            monitor (ResourceMonitor): Quelle der Momentaufnahmen.
+            snapshot_path (str): Zieldatei für die JSON-Momentaufnahme.
+
+        Methoden:
+            create_widgets(): Erstellt Übersicht, Tabellen und Buttons.
+            aktualisiere(): Liest eine neue Momentaufnahme und füllt die Tabellen.
+            speichere_snapshot(): Schreibt die Momentaufnahme als JSON-Datei.
+        """
+
+    def __init__(self, master, monitor, snapshot_path):
+        # Initialisierung des Ressourcenfensters
+        self.master = master
+        self.monitor = monitor
+        self.snapshot_path = snapshot_path
+        self.uebersicht_label = None
+        self.serien_tabelle = None
+        self.cache_tabelle = None
+        self.langsam_tabelle = None
+        self.naechste_aktualisierung = None
+        self.window = tk.Toplevel(master)
+        self.window.title("Speicher und Cache")
+        self.window.geometry("820x640")
+        self.create_widgets()
+        self.aktualisiere()
+
+    def create_widgets(self):
+        # Übersicht, Tabellen je Zeitreihe, je Cache und langsame Operationen, Buttons
+        self.uebersicht_label = tk.Label(self.window, text="", font=("Arial", 10), anchor="w", justify=tk.LEFT)
+        self.uebersicht_label.pack(fill=tk.X, padx=10, pady=5)
+
+        self.serien_tabelle = self.erstelle_tabelle("Zeitreihen (RAM und Festplatte)",
+                                                    [("serie", "Zeitreihe", 110), ("ram", "RAM", 90), ("eintraege", "Einträge", 60),
+                                                     ("daten", "Daten", 90), ("meta", "Meta", 70), ("pyramide", "Pyramide", 90),
+                                                     ("statistik", "Statistik", 80), ("gesamt", "Festplatte", 90)], 9)
+        self.cache_tabelle = self.erstelle_tabelle("In-Memory-Caches",
+                                                   [("cache", "Cache", 110), ("eintraege", "Einträge", 70), ("belegt", "Belegt", 90),
+                                                    ("max", "Maximal", 90), ("treffer", "Treffer", 70),
+                                                    ("fehlversuche", "Fehlversuche", 90), ("quote", "Trefferquote", 90)], 3)
+        self.langsam_tabelle = self.erstelle_tabelle("Langsame Operationen (neueste zuerst)",
+                                                     [("zeitpunkt", "Zeitpunkt", 140), ("operation", "Operation", 80),
+                                                      ("dauer", "Dauer", 80), ("details", "Details", 400)], 6)
+
+        button_style = {"font": ("Arial", 10), "relief": tk.RAISED, "borderwidth": 2, "cursor": "hand2", "width": 14}
+        button_frame = tk.Frame(self.window)
+        button_frame.pack(fill=tk.X, padx=10, pady=5)
+        tk.Button(button_frame, text="Aktualisieren", command=self.aktualisiere, bg="lightgreen", **button_style).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="JSON speichern", command=self.speichere_snapshot, bg="lightyellow", **button_style).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Schließen", command=self.window.destroy, bg="red", fg="white", **button_style).pack(side=tk.LEFT, padx=5)
+
+    def erstelle_tabelle(self, titel, spalten, hoehe):
+        # Treeview mit Überschriften in einem beschrifteten Rahmen
+        rahmen = tk.LabelFrame(self.window, text=titel)
+        rahmen.pack(fill=tk.BOTH, expand=True, padx=10, pady=3)
+        tabelle = ttk.Treeview(rahmen, columns=[name for name, _, _ in spalten], show="headings", height=hoehe)
+        for name, text, breite in spalten:
+            tabelle.heading(name, text=text)
+            tabelle.column(name, width=breite, anchor="w" if name in ("serie", "cache", "details", "operation") else "e")
+        tabelle.pack(fill=tk.BOTH, expand=True)
+        return tabelle
+
+    def aktualisiere(self):
+        # Neue Momentaufnahme lesen und anzeigen; plant die nächste Aktualisierung
+        if not self.window.winfo_exists():
+            return
+        daten = self.monitor.snapshot()
+        belegt = sum(cache['bytes'] for cache in daten['caches'].values())
+        verzeichnisse = "   ".join(f"{name}: {mb(eintrag['bytes'])}" for name, eintrag in daten['verzeichnisse'].items())
+        self.uebersicht_label.config(text=f"Prozess (RSS): {mb(daten['prozess']['rss_bytes'])}   In-Memory-Caches: {mb(belegt)}\n"
+                                          f"{verzeichnisse}")
+
+        ram = {(eintrag['symbol'], eintrag['interval']): eintrag for eintrag in daten['speicher_je_serie']}
+        self.serien_tabelle.delete(*self.serien_tabelle.get_children())
+        for eintrag in daten['festplatte_je_serie']:
+            im_speicher = ram.pop((eintrag['symbol'], eintrag['interval']), {'bytes': 0, 'eintraege': 0})
+            self.serien_tabelle.insert("", tk.END, values=(f"{eintrag['symbol']} {eintrag['interval']}", mb(im_speicher['bytes']),
+                                                           im_speicher['eintraege'], mb(eintrag['daten_bytes']),
+                                                           mb(eintrag['meta_bytes']), mb(eintrag['pyramide_bytes']),
+                                                           mb(eintrag['statistik_bytes']), mb(eintrag['gesamt_bytes'])))
+        for (symbol, interval), eintrag in ram.items():
+            # Einträge ohne Zeitreihe im Cache (z.B. Symbolvergleiche)
+            self.serien_tabelle.insert("", tk.END, values=(f"{symbol} {interval}", mb(eintrag['bytes']), eintrag['eintraege'],
+                                                           "", "", "", "", ""))
+
+        self.cache_tabelle.delete(*self.cache_tabelle.get_children())
+        for name, cache in daten['caches'].items():
+            quote = "-" if cache['trefferquote'] is None else f"{cache['trefferquote'] * 100:.1f} %"
+            self.cache_tabelle.insert("", tk.END, values=(name, cache['eintraege'], mb(cache['bytes']), mb(cache['max_bytes']),
+                                                          cache['treffer'], cache['fehlversuche'], quote))
+
+        self.langsam_tabelle.delete(*self.langsam_tabelle.get_children())
+        for operation in daten['langsame_operationen']:
+            self.langsam_tabelle.insert("", tk.END, values=(operation['zeitpunkt'], operation['operation'],
+                                                            f"{operation['dauer_ms']:,.0f} ms", operation['details']))
+        if self.naechste_aktualisierung is not None:
+            self.window.after_cancel(self.naechste_aktualisierung)
+        self.naechste_aktualisierung = self.window.after(AKTUALISIERUNG_MS, self.aktualisiere)
+
+    def speichere_snapshot(self):
+        # Momentaufnahme als JSON-Datei speichern
+        try:
+            self.monitor.speichere(self.snapshot_path)
+        except OSError as e:
+            messagebox.showerror("Fehler", f"Momentaufnahme konnte nicht gespeichert werden: {e}", parent=self.window)
+            return
+        messagebox.showinfo("Gespeichert", f"Momentaufnahme gespeichert:\n{os.path.abspath(self.snapshot_path)}", parent=self.window)
@@ -0,0 +1,107 @@
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+@contextmanager
+def datei_sperre(path, exklusiv=True, timeout=60.0):
+    # Beratende (advisory) Sperre über eine Lock-Datei neben 'path'.
+    # Mehrere gemeinsame (lesende) Sperren sind gleichzeitig möglich, eine exklusive schließt alle anderen aus.
+    # Unter Windows gibt es nur exklusive Sperren; sie werden dort jeweils nur kurz gehalten.
+    lock_path = f"{path}.lock"
+    verzeichnis = os.path.dirname(lock_path)
+    if verzeichnis and not os.path.exists(verzeichnis):
+        os.makedirs(verzeichnis, exist_ok=True)
+    handle = open(lock_path, 'a+')
+    ende = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                if os.name == 'nt':
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+                else:
+                    fcntl.flock(handle.fileno(), (fcntl.LOCK_EX if exklusiv else fcntl.LOCK_SH) | fcntl.LOCK_NB)
+                break
+            except OSError:
+                if time.monotonic() > ende:
+                    raise TimeoutError(f"Sperre für {path} konnte nicht innerhalb von {timeout}s erlangt werden")
+                time.sleep(0.05)
+        yield
+    finally:
+        try:
+            if os.name == 'nt':
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+        except OSError:
+            pass
+        handle.close()
+
+
+@contextmanager
+def atomarer_zielpfad(path):
+    # Liefert einen temporären Pfad im Zielverzeichnis; nach erfolgreichem Schreiben wird er
+    # atomar auf 'path' umbenannt. Leser sehen so immer entweder die alte oder die neue Datei.
+    verzeichnis = os.path.dirname(path) or '.'
+    if not os.path.exists(verzeichnis):
+        os.makedirs(verzeichnis, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=verzeichnis)
+    os.close(fd)
+    try:
+        yield temp_path
+        ersetze_datei(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def ersetze_datei(quelle, ziel, versuche=20):
+    # os.replace mit Wiederholung: unter Windows schlägt das Ersetzen fehl, solange ein Leser die Datei offen hat
+    for versuch in range(versuche):
+        try:
+            os.replace(quelle, ziel)
+            return
+        except PermissionError:
+            if versuch == versuche - 1:
+                raise
+            time.sleep(0.05)
+
+
+def schreibe_json_atomar(path, daten, **dump_optionen):
+    # Schreibt JSON über eine temporäre Datei und atomares Umbenennen
+    dump_optionen.setdefault('indent', 4)
+    encoding = 'utf-8' if not dump_optionen.get('ensure_ascii', True) else None
+    with atomarer_zielpfad(path) as temp_path:
+        with open(temp_path, 'w', encoding=encoding) as f:
+            json.dump(daten, f, **dump_optionen)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def lade_json_sicher(path, standard=None, encoding=None):
+    # Lädt JSON; fehlende Datei liefert den Standardwert
+    if not os.path.exists(path):
+        return standard
+    with open(path, 'r', encoding=encoding) as f:
+        return json.load(f)
+
+
+def aktualisiere_json(path, aenderung, standard=None, **dump_optionen):
+    # Read-Modify-Write unter exklusiver Sperre: der aktuelle Dateiinhalt wird geladen, mit
+    # 'aenderung' zusammengeführt und atomar zurückgeschrieben. Rückgabe: der geschriebene Inhalt.
+    encoding = 'utf-8' if not dump_optionen.get('ensure_ascii', True) else None
+    with datei_sperre(path):
+        aktuell = lade_json_sicher(path, standard, encoding=encoding)
+        neu = aenderung(aktuell)
+        schreibe_json_atomar(path, neu, **dump_optionen)
+        return neu
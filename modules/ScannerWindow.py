@@ -0,0 +1,98 @@
+import tkinter as tk
+from tkinter import messagebox, ttk
+from modules.ConditionScanner import BEISPIEL_AUSDRUCK, ConditionScanner
+
+
+class ScannerWindow:
+    """
+        Fenster für den Bedingungs-Scanner über mehrere Intervalle.
+
+        Der eingegebene Ausdruck (z.B. "M5_green & M15_green & M30_green & (M1_HIGH > M1_HIGH_prev)")
+        wird über die gesamte Historie des Symbols ausgewertet; die Tabelle zeigt die Treffer.
+        Über „Im Chart markieren“ werden die Treffer im nächsten Chart als Markierungen gezeichnet.
+
+        Attribute:
+            master (tk.Tk): Das Hauptfenster der Anwendung.
+            symbol (str): Symbol, dessen Zeitreihen durchsucht werden.
+            markieren_callback (function): Erhält (Treffer, Ausdruck) bzw. (None, None) zum Entfernen.
+
+        Methoden:
+            create_widgets(): Erstellt Eingabe, Tabelle und Buttons.
+            suche(): Führt den Scan aus und füllt die Tabelle.
+            markiere(): Übergibt die Treffer an den Chart.
+        """
+
+    MAX_ZEILEN = 1000
+
+    def __init__(self, master, symbol, store, markieren_callback, ausdruck=None):
+        # Initialisierung des Scanner-Fensters
+        self.master = master
+        self.symbol = symbol
+        self.markieren_callback = markieren_callback
+        self.scanner = ConditionScanner(store, store.cache_dir)
+        self.treffer = None
+        self.ausdruck_var = tk.StringVar(value=ausdruck or BEISPIEL_AUSDRUCK)
+        self.status_label = None
+        self.tabelle = None
+        self.window = tk.Toplevel(master)
+        self.window.title(f"Scanner: {symbol}")
+        self.window.geometry("640x420")
+        self.create_widgets()
+
+    def create_widgets(self):
+        # Eingabe des Ausdrucks, Treffertabelle und Buttons
+        eingabe = tk.Frame(self.window)
+        eingabe.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Label(eingabe, text="Bedingung:").pack(side=tk.LEFT)
+        feld = ttk.Entry(eingabe, textvariable=self.ausdruck_var)
+        feld.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        feld.bind('<Return>', lambda _: self.suche())
+        ttk.Label(self.window, text="Spalten: <Intervall>_<Spalte>, z.B. M5_green, M15_red, M1_HIGH, M1_HIGH_prev; "
+                                    "Verknüpfung mit &, |, ~ und Vergleichen", font=("Arial", 8)).pack(fill=tk.X, padx=10)
+
+        rahmen = tk.Frame(self.window)
+        rahmen.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.tabelle = ttk.Treeview(rahmen, columns=("daytime", "close"), show="headings", height=12)
+        self.tabelle.heading("daytime", text="Zeitpunkt")
+        self.tabelle.heading("close", text="Schlusskurs")
+        self.tabelle.column("daytime", width=200)
+        self.tabelle.column("close", width=120, anchor="e")
+        scrollbar = ttk.Scrollbar(rahmen, orient=tk.VERTICAL, command=self.tabelle.yview)
+        self.tabelle.configure(yscrollcommand=scrollbar.set)
+        self.tabelle.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.status_label = tk.Label(self.window, text="", font=("Arial", 9), anchor="w")
+        self.status_label.pack(fill=tk.X, padx=10)
+
+        button_style = {"font": ("Arial", 10), "relief": tk.RAISED, "borderwidth": 2, "cursor": "hand2", "width": 18}
+        button_frame = tk.Frame(self.window)
+        button_frame.pack(fill=tk.X, padx=10, pady=10)
+        tk.Button(button_frame, text="Suchen", command=self.suche, bg="lightgreen", **button_style).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Im Chart markieren", command=self.markiere, bg="lightyellow", **button_style).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Markierung entfernen", command=lambda: self.markieren_callback(None, None),
+                  bg="lightgray", **button_style).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="Schließen", command=self.window.destroy, bg="red", fg="white", **button_style).pack(side=tk.RIGHT, padx=5)
+
+    def suche(self):
+        # Führt den Scan aus und zeigt die ersten Treffer an
+        ausdruck = self.ausdruck_var.get().strip()
+        try:
+            self.treffer = self.scanner.scan(self.symbol, ausdruck)
+        except (ValueError, KeyError, NameError, TypeError, SyntaxError, FileNotFoundError) as e:
+            messagebox.showerror("Fehler", f"Der Ausdruck konnte nicht ausgewertet werden:\n{e}", parent=self.window)
+            return
+
+        for eintrag in self.tabelle.get_children():
+            self.tabelle.delete(eintrag)
+        for zeile in self.treffer.head(self.MAX_ZEILEN).itertuples(index=False):
+            self.tabelle.insert("", tk.END, values=(f"{zeile.daytime:%Y-%m-%d %H:%M:%S}", zeile.CLOSE))
+        hinweis = f" (angezeigt: die ersten {self.MAX_ZEILEN})" if len(self.treffer) > self.MAX_ZEILEN else ""
+        self.status_label.config(text=f"{len(self.treffer)} Treffer in {self.scanner.letzte_dauer:.2f}s"
+                                      + (" aus dem Cache" if self.scanner.aus_cache else "") + hinweis)
+
+    def markiere(self):
+        # Übergibt die Treffer an den Chart
+        if self.treffer is None:
+            messagebox.showinfo("Info", "Bitte zuerst suchen.", parent=self.window)
+            return
+        self.markieren_callback(self.treffer, self.ausdruck_var.get().strip())
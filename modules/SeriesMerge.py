@@ -0,0 +1,170 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from modules.CacheLayout import RowGroupWriter
+from modules.DayIndex import DayIndex
+
+# Konfliktstrategien für überlappende Exporte (Eintrag "merge_policy" in config.json):
+#   newest: bei gleichem Zeitstempel gewinnt der Export mit dem späteren Enddatum
+#   first:  bei gleichem Zeitstempel gewinnen die bereits im Cache vorhandenen Daten
+MERGE_POLICIES = ["newest", "first"]
+
+# Spalten, deren Abweichung bei gleichem Zeitstempel als Konflikt gezählt wird
+KONFLIKT_SPALTEN = ['OPEN', 'HIGH', 'LOW', 'CLOSE']
+
+
+def ist_sortiert(parquet_path, batch_size=262144):
+    # Prüft blockweise, ob eine Parquet-Datei aufsteigend nach 'daytime' sortiert ist
+    letzter = None
+    for batch in pq.ParquetFile(parquet_path).iter_batches(batch_size=batch_size, columns=['daytime']):
+        werte = batch.column(0).to_numpy()
+        if len(werte) == 0:
+            continue
+        if (letzter is not None and werte[0] < letzter) or np.any(werte[1:] < werte[:-1]):
+            return False
+        letzter = werte[-1]
+    return True
+
+
+class SortedMerge:
+    """
+        Linearer Merge zweier nach 'daytime' sortierter Parquet-Dateien zu einer sortierten,
+        deduplizierten Zeitreihe.
+
+        Beide Dateien werden blockweise gelesen; je Schritt werden nur die Zeilen bis zum kleineren
+        der beiden Block-Enden zusammengeführt. Da beide Teile bereits sortiert sind, ist die stabile
+        Sortierung dieser zwei Läufe ein linearer Merge (kein Sortieren der gesamten Historie).
+        Bei gleichem Zeitstempel entscheidet 'neu_gewinnt', welche Zeile erhalten bleibt.
+
+        Attribute:
+            ueberlappung (int): Anzahl doppelter Zeitstempel (verworfene Zeilen).
+            konflikte (int): Davon die Zeitstempel mit abweichenden OHLC-Werten.
+            erste_aenderung (int): Erste Zeile des Ergebnisses, die nicht unverändert aus dem Cache stammt
+                (None, wenn der alte Cache ein unveränderter Anfang des Ergebnisses ist).
+            rows (int): Zeilenanzahl der zusammengeführten Zeitreihe.
+            tagesindex (DayIndex): Tagesindex der zusammengeführten Datei.
+            erster_zeitpunkt, letzter_zeitpunkt: Tatsächliche Abdeckung der Zeitreihe.
+            close_summe (float): Summe der Schlusskurse (für den Fingerabdruck).
+
+        Methoden:
+            schreibe(ziel_path, layout): Führt den Merge durch und schreibt die Zieldatei.
+        """
+
+    def __init__(self, alt_path, neu_path, neu_gewinnt=True, batch_size=262144):
+        # Initialisierung mit den beiden Quelldateien (alt = bisheriger Cache, neu = importierter Export)
+        self.alt_path = alt_path
+        self.neu_path = neu_path
+        self.neu_gewinnt = neu_gewinnt
+        self.batch_size = batch_size
+        self.ueberlappung = 0
+        self.konflikte = 0
+        self.rows = 0
+        self.tagesindex = DayIndex()
+        self.erster_zeitpunkt = None
+        self.letzter_zeitpunkt = None
+        self.close_summe = 0.0
+        self.letzter_schluessel = None
+        self.erste_aenderung = None
+
+    def schreibe(self, ziel_path, layout):
+        # Führt den Merge blockweise durch und schreibt das Ergebnis mit dem Layout des Caches
+        schema = pq.ParquetFile(self.alt_path).schema_arrow
+        if set(pq.ParquetFile(self.neu_path).schema_arrow.names) != set(schema.names):
+            raise ValueError("Die Spalten der Exporte stimmen nicht überein")
+
+        quellen = [pq.ParquetFile(path).iter_batches(batch_size=self.batch_size) for path in (self.alt_path, self.neu_path)]
+        puffer = [None, None]
+        erschoepft = [False, False]
+        writer = RowGroupWriter(ziel_path, schema, layout)
+        try:
+            while True:
+                # Leere Puffer aus ihrer Quelle nachladen
+                for i in (0, 1):
+                    while not erschoepft[i] and (puffer[i] is None or puffer[i].num_rows == 0):
+                        batch = next(quellen[i], None)
+                        if batch is None:
+                            erschoepft[i] = True
+                        else:
+                            puffer[i] = pa.Table.from_batches([batch]).select(schema.names).cast(schema)
+                aktiv = [i for i in (0, 1) if puffer[i] is not None and puffer[i].num_rows]
+                if not aktiv:
+                    break
+
+                # Grenze: kleinstes Block-Ende der noch nicht erschöpften Quellen; alle Zeilen bis dahin sind vollständig
+                enden = [self.zeitstempel(puffer[i])[-1] for i in aktiv if not erschoepft[i]]
+                grenze = min(enden) if enden else None
+                teile = []
+                for i in aktiv:
+                    anzahl = puffer[i].num_rows if grenze is None else int(
+                        np.searchsorted(self.zeitstempel(puffer[i]), grenze, side='right'))
+                    teile.append(puffer[i].slice(0, anzahl))
+                    puffer[i] = puffer[i].slice(anzahl)
+                self.schreibe_teil(writer, teile, aktiv)
+        finally:
+            writer.close()
+        return self
+
+    def schreibe_teil(self, writer, teile, herkunft):
+        # Führt die sortierten Teile (alt vor neu) zusammen, entfernt doppelte Zeitstempel und schreibt das Ergebnis.
+        # herkunft: je Teil 0 (bisheriger Cache) oder 1 (neuer Export)
+        gesamt = pa.concat_tables(teile)
+        if gesamt.num_rows == 0:
+            return
+        quelle = np.concatenate([np.full(teil.num_rows, h, dtype=np.int8) for teil, h in zip(teile, herkunft)])
+        schluessel = self.zeitstempel(gesamt)
+        # Stabile Sortierung zweier sortierter Läufe = linearer Merge; alte Zeilen stehen bei Gleichheit vorn
+        reihenfolge = np.argsort(schluessel, kind='stable')
+        sortiert = schluessel[reihenfolge]
+        gleich = sortiert[1:] == sortiert[:-1]
+        if self.neu_gewinnt:
+            behalten = np.r_[~gleich, True]
+        else:
+            behalten = np.r_[True, ~gleich]
+
+        # Zeilen des neuen Exports verändern den Cache, außer sie ersetzen eine identische Zeile
+        veraendert = quelle[reihenfolge] == 1
+        doppelt = np.flatnonzero(gleich)
+        if len(doppelt):
+            abweichend = self.abweichungen(gesamt, reihenfolge[doppelt], reihenfolge[doppelt + 1])
+            self.ueberlappung += len(doppelt)
+            self.konflikte += int(abweichend.sum())
+            veraendert[doppelt + 1] &= abweichend
+        veraendert = veraendert[behalten]
+
+        auswahl = reihenfolge[behalten]
+        # Zeitstempel, der bereits im vorherigen Schritt geschrieben wurde (Duplikat innerhalb einer Datei)
+        if self.letzter_schluessel is not None and schluessel[auswahl[0]] == self.letzter_schluessel:
+            auswahl = auswahl[1:]
+            veraendert = veraendert[1:]
+            self.ueberlappung += 1
+        if len(auswahl) == 0:
+            return
+        if self.erste_aenderung is None and veraendert.any():
+            self.erste_aenderung = self.rows + int(np.argmax(veraendert))
+
+        ergebnis = gesamt.take(pa.array(auswahl))
+        writer.write_table(ergebnis)
+        daytime = ergebnis['daytime'].to_numpy()
+        self.tagesindex.erweitere(daytime, self.rows)
+        self.rows += ergebnis.num_rows
+        if self.erster_zeitpunkt is None:
+            self.erster_zeitpunkt = daytime[0]
+        self.letzter_zeitpunkt = daytime[-1]
+        self.letzter_schluessel = schluessel[auswahl[-1]]
+        self.close_summe += float(np.nansum(ergebnis['CLOSE'].to_numpy(zero_copy_only=False)))
+
+    def abweichungen(self, tabelle, links, rechts):
+        # Markiert Zeilenpaare mit gleichem Zeitstempel, aber abweichenden Kurswerten (NaN gilt als gleich)
+        abweichend = np.zeros(len(links), dtype=bool)
+        for spalte in KONFLIKT_SPALTEN:
+            if spalte not in tabelle.column_names:
+                continue
+            werte = tabelle[spalte].to_numpy(zero_copy_only=False)
+            a, b = werte[links], werte[rechts]
+            abweichend |= (a != b) & ~(np.isnan(a) & np.isnan(b))
+        return abweichend
+
+    @staticmethod
+    def zeitstempel(tabelle):
+        # 'daytime' als int64 (Nanosekunden) für Vergleiche und Sortierung
+        return tabelle['daytime'].to_numpy().astype('datetime64[ns]').view('int64')
@@ -0,0 +1,242 @@
+import argparse
+import atexit
+import multiprocessing as mp
+import os
+import pickle
+import sys
+import threading
+import time
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+import pandas as pd
+
+# Spalten, die für Chart und Berechnungen übergeben werden
+STANDARD_SPALTEN = ['daytime', 'OPEN', 'HIGH', 'LOW', 'CLOSE']
+
+# Ausrichtung der Spalten im Block (Cache-Line)
+AUSRICHTUNG = 64
+
+# Vom Prozess angelegte und noch nicht freigegebene Blöcke (Name -> SharedMemory), werden beim Beenden freigegeben
+AKTIVE_BLOECKE = {}
+BLOCK_LOCK = threading.Lock()
+
+
+def oeffne_block(name):
+    # Öffnet einen vorhandenen Block, ohne ihn beim Prozessende zu löschen (das bleibt Aufgabe des Besitzers).
+    # Bis Python 3.12 meldet SharedMemory jeden geöffneten Block beim resource_tracker an, der ihn sonst
+    # beim Ende des Verbraucher-Prozesses entfernen würde; die Anmeldung wird nach dem Öffnen zurückgenommen.
+    # Kindprozesse von multiprocessing teilen den resource_tracker des Elternprozesses, dort ist der Block
+    # bereits vom Besitzer angemeldet und die Abmeldung bleibt dem Besitzer (freigeben) überlassen
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    block = shared_memory.SharedMemory(name=name)
+    with BLOCK_LOCK:
+        eigener = name in AKTIVE_BLOECKE
+    if os.name == 'posix' and not eigener and mp.parent_process() is None:
+        resource_tracker.unregister(block._name, 'shared_memory')
+    return block
+
+
+def spalten_arrays(daten, spalten):
+    # Spalten eines DataFrames (oder Dictionaries von Arrays) als zusammenhängende NumPy-Arrays mit festem Typ
+    arrays = {}
+    for spalte in spalten:
+        werte = np.ascontiguousarray(daten[spalte].to_numpy() if hasattr(daten[spalte], 'to_numpy') else daten[spalte])
+        if werte.dtype == object or werte.dtype.kind in 'OSUT':
+            raise ValueError(f"Spalte '{spalte}' hat keinen festen numerischen Typ ({werte.dtype})")
+        arrays[spalte] = werte
+    return arrays
+
+
+def freigeben_alle():
+    # Gibt alle noch aktiven Blöcke dieses Prozesses frei (beim Beenden)
+    with BLOCK_LOCK:
+        bloecke = list(AKTIVE_BLOECKE.values())
+        AKTIVE_BLOECKE.clear()
+    for block in bloecke:
+        try:
+            block.close()
+            block.unlink()
+        except (FileNotFoundError, BufferError):
+            pass
+
+
+atexit.register(freigeben_alle)
+
+
+class GeteilteSpalten:
+    """
+        Spalten (daytime, OHLC, ...) einer Zeitreihe in einem Shared-Memory-Block, Seite des Besitzers.
+
+        Alle Spalten liegen ausgerichtet hintereinander in einem Block; die Beschreibung (Name des
+        Blocks, Zeilenanzahl, je Spalte Typ und Offset) ist ein kleines Dictionary, das statt der Daten
+        an andere Prozesse übergeben wird (Queue, Pipe, Argument eines Pools). Verbraucher öffnen den
+        Block mit SpaltenAnsicht und lesen die Spalten ohne Kopie.
+
+        Lebensdauer: Der Besitzer legt den Block an und gibt ihn mit freigeben() (oder am Ende eines
+        with-Blocks) frei; Verbraucher schließen nur ihre eigene Ansicht. Unter Linux bleiben bereits
+        geöffnete Ansichten nach der Freigabe gültig, unter Windows besteht der Block, solange eine
+        Ansicht geöffnet ist. Nicht freigegebene Blöcke werden beim Beenden des Prozesses entfernt.
+
+        Methoden:
+            beschreibung: Descriptor für Verbraucher (picklebar, wenige hundert Bytes).
+            arrays(): Die Spalten als NumPy-Arrays im Block (z.B. zum Befüllen durch den Besitzer).
+            freigeben(): Gibt den Block frei.
+        """
+
+    def __init__(self, daten, spalten=None):
+        # Legt den Block an und kopiert die Spalten einmalig hinein
+        spalten = list(spalten or [spalte for spalte in STANDARD_SPALTEN if spalte in daten])
+        arrays = spalten_arrays(daten, spalten)
+        zeilen = len(next(iter(arrays.values()))) if arrays else 0
+        layout, offset = [], 0
+        for spalte, werte in arrays.items():
+            if len(werte) != zeilen:
+                raise ValueError(f"Spalte '{spalte}' hat {len(werte)} statt {zeilen} Zeilen")
+            layout.append((spalte, werte.dtype.str, offset))
+            offset += -(-werte.nbytes // AUSRICHTUNG) * AUSRICHTUNG
+
+        self.block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        with BLOCK_LOCK:
+            AKTIVE_BLOECKE[self.block.name] = self.block
+        self.beschreibung = {'name': self.block.name, 'zeilen': zeilen, 'spalten': layout}
+        for spalte, ziel in self.arrays().items():
+            ziel[:] = arrays[spalte]
+
+    def arrays(self):
+        # Spalten als NumPy-Arrays direkt im Block
+        return ansichten(self.block.buf, self.beschreibung)
+
+    def freigeben(self):
+        # Gibt den Block frei (mehrfacher Aufruf ist unschädlich)
+        with BLOCK_LOCK:
+            block = AKTIVE_BLOECKE.pop(self.beschreibung['name'], None)
+        if block is not None:
+            block.close()
+            block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.freigeben()
+
+
+class SpaltenAnsicht:
+    """
+        Zugriff eines Verbrauchers auf einen Block von GeteilteSpalten, ohne die Daten zu kopieren.
+
+        Die Spalten sind NumPy-Arrays auf dem gemeinsamen Speicher (nur lesend); als_dataframe()
+        erzeugt ein DataFrame auf denselben Arrays. Vor schliesse() müssen alle abgeleiteten Arrays
+        und DataFrames freigegeben sein, sonst bleibt der Block bis zu ihrer Freigabe geöffnet.
+
+        Methoden:
+            spalten: Dictionary Spaltenname -> NumPy-Array.
+            als_dataframe(): DataFrame auf den geteilten Arrays.
+            schliesse(): Schließt die Ansicht (der Block selbst bleibt bestehen).
+        """
+
+    def __init__(self, beschreibung):
+        # Öffnet den Block aus der Beschreibung des Besitzers
+        self.beschreibung = beschreibung
+        self.block = oeffne_block(beschreibung['name'])
+        self.spalten = ansichten(self.block.buf, beschreibung)
+        for werte in self.spalten.values():
+            werte.flags.writeable = False
+
+    def als_dataframe(self):
+        # DataFrame ohne Kopie (jede Spalte verweist auf den gemeinsamen Speicher)
+        return pd.DataFrame(self.spalten, copy=False)
+
+    def schliesse(self):
+        # Schließt die Ansicht; noch referenzierte Arrays halten den Block offen, bis sie freigegeben sind
+        self.spalten = {}
+        try:
+            self.block.close()
+        except BufferError:
+            print(f"Hinweis: Ansicht auf {self.beschreibung['name']} wird noch verwendet und bleibt geöffnet")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.schliesse()
+
+
+def ansichten(puffer, beschreibung):
+    # NumPy-Arrays auf einem Puffer gemäß Beschreibung (ohne Kopie)
+    return {spalte: np.ndarray((beschreibung['zeilen'],), dtype=np.dtype(typ), buffer=puffer, offset=offset)
+            for spalte, typ, offset in beschreibung['spalten']}
+
+
+def benchmark_arbeiter(eingang, ausgang):
+    # Verbraucher-Prozess des Benchmarks: empfängt DataFrames oder Beschreibungen und liefert eine Kennzahl zurück
+    while True:
+        art, nutzlast = eingang.get()
+        if art == 'ende':
+            return
+        if art == 'pickle':
+            df = nutzlast
+            ausgang.put(float(df['CLOSE'].sum()) + len(df))
+            del df
+        else:
+            with SpaltenAnsicht(nutzlast) as ansicht:
+                df = ansicht.als_dataframe()
+                ergebnis = float(df['CLOSE'].sum()) + len(df)
+                del df
+            ausgang.put(ergebnis)
+
+
+def benchmark_transport(zeilen=1_000_000, wiederholungen=3):
+    # Vergleicht die Übergabe eines DataFrames (daytime + OHLC) an einen anderen Prozess per Pickle (Queue)
+    # mit der Übergabe über Shared Memory (Kopie in den Block + Beschreibung per Queue + Ansicht ohne Kopie).
+    # Gemessen wird die Zeit bis zur Antwort des Verbrauchers (Median); der Prozessstart zählt nicht mit
+    rng = np.random.default_rng(0)
+    schluss = 18000 + np.cumsum(rng.normal(0, 2, zeilen))
+    df = pd.DataFrame({'daytime': pd.date_range('2015-01-01', periods=zeilen, freq='min'), 'OPEN': schluss,
+                       'HIGH': schluss + 1.5, 'LOW': schluss - 1.5, 'CLOSE': schluss})
+    kontext = mp.get_context('spawn')
+    eingang, ausgang = kontext.Queue(), kontext.Queue()
+    prozess = kontext.Process(target=benchmark_arbeiter, args=(eingang, ausgang), daemon=True)
+    prozess.start()
+    try:
+        eingang.put(('pickle', df.head(10)))
+        ausgang.get()
+
+        messungen = {'pickle': [], 'shared_memory': []}
+        for _ in range(wiederholungen):
+            beginn = time.perf_counter()
+            eingang.put(('pickle', df))
+            ausgang.get()
+            messungen['pickle'].append(time.perf_counter() - beginn)
+
+            beginn = time.perf_counter()
+            with GeteilteSpalten(df) as geteilt:
+                eingang.put(('shared_memory', geteilt.beschreibung))
+                ausgang.get()
+                beschreibung_bytes = len(pickle.dumps(geteilt.beschreibung))
+            messungen['shared_memory'].append(time.perf_counter() - beginn)
+    finally:
+        eingang.put(('ende', None))
+        prozess.join(10)
+
+    mb = df.memory_usage(index=False).sum() / 1024 ** 2
+    ergebnis = {'zeilen': zeilen, 'mb': round(float(mb), 1), 'pickle_bytes': len(pickle.dumps(df)),
+                'beschreibung_bytes': beschreibung_bytes}
+    for art, werte in messungen.items():
+        ergebnis[f'{art}_ms'] = round(float(np.median(werte)) * 1000, 1)
+    ergebnis['faktor'] = round(ergebnis['pickle_ms'] / max(ergebnis['shared_memory_ms'], 1e-6), 1)
+    return ergebnis
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark: Übergabe von Zeitreihen zwischen Prozessen (Pickle gegen Shared Memory)")
+    parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 4_000_000], help="Zeilenanzahlen")
+    parser.add_argument('--repeat', type=int, default=3, help="Wiederholungen je Messung (Median)")
+    args = parser.parse_args()
+
+    print(f"{'Zeilen':>10} {'MB':>8} {'Pickle ms':>10} {'Shared ms':>10} {'Faktor':>7} {'Descriptor':>11}")
+    for cli_zeilen in args.rows:
+        cli_ergebnis = benchmark_transport(cli_zeilen, args.repeat)
+        print(f"{cli_ergebnis['zeilen']:>10,} {cli_ergebnis['mb']:>8} {cli_ergebnis['pickle_ms']:>10} "
+              f"{cli_ergebnis['shared_memory_ms']:>10} {cli_ergebnis['faktor']:>6}x {cli_ergebnis['beschreibung_bytes']:>9} B")
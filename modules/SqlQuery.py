@@ -0,0 +1,241 @@
+import argparse
+import os
+import threading
+import time
+from contextlib import ExitStack
+import pandas as pd
+import pyarrow as pa
+from modules.MetadataManager import interval_sort_key
+from modules.ParquetCache import CACHE_DIR, serien_pfad, serien_sperre
+from modules.TimeSeriesStore import TimeSeriesStore
+
+# Name der Sicht über alle Zeitreihen (Spalten symbol und interval plus die Spalten der Dateien)
+ALLE_SERIEN = 'bars'
+
+# Höchstzahl der Ergebniszeilen, die in die Anzeige geholt werden (größere Ergebnisse: exportiere)
+MAX_ZEILEN = 100_000
+
+# Beispielabfrage für Konsole und Fenster
+BEISPIEL = ("SELECT hour(daytime) AS stunde, avg(HIGH - LOW) AS range, count(*) AS bars\n"
+            "FROM bars\nWHERE symbol = 'DE40' AND interval = 'M5' AND daytime >= '2024-01-01' AND daytime < '2025-01-01'\n"
+            "GROUP BY stunde ORDER BY stunde")
+
+
+def lade_duckdb():
+    # DuckDB ist eine optionale Abhängigkeit (pip install duckdb)
+    try:
+        import duckdb
+    except ImportError:
+        raise RuntimeError("Für SQL-Abfragen wird DuckDB benötigt (pip install duckdb)")
+    return duckdb
+
+
+def bezeichner(name):
+    # Name als SQL-Bezeichner in Anführungszeichen (z.B. "DE40_M1")
+    return '"' + name.replace('"', '""') + '"'
+
+
+def text_literal(wert):
+    # Wert als SQL-Textliteral
+    return "'" + str(wert).replace("'", "''") + "'"
+
+
+class SqlQuery:
+    """
+        SQL-Abfragen über den Parquet-Cache mit DuckDB (eingebettet, spaltenorientiert).
+
+        Jede Zeitreihe ist eine Sicht "<Symbol>_<Intervall>" (z.B. "DE40_M1") auf ihre Parquet-Datei;
+        die Sicht 'bars' vereint alle Zeitreihen mit den Partitionsspalten symbol und interval.
+        DuckDB liest nur die benötigten Spalten (Projection Pushdown) und überspringt Row-Groups
+        anhand ihrer Statistiken (Predicate Pushdown, z.B. auf daytime); Bedingungen auf symbol und
+        interval entfernen die übrigen Dateien schon beim Planen. Abfragen laufen out-of-core: der
+        Speicher ist auf 'memory_limit' begrenzt, große Zwischenergebnisse werden in 'temp_dir'
+        ausgelagert. Die Sichten werden vor jeder Abfrage an die Zeitreihen im Cache angepasst;
+        während einer Abfrage halten die beteiligten Zeitreihen eine lesende Sperre (ein Import
+        tauscht die Datei erst danach aus).
+
+        Beispiel:
+            sql = SqlQuery()
+            df = sql.abfrage("SELECT symbol, interval, count(*) FROM bars GROUP BY ALL")
+
+        Methoden:
+            tabellen(): Sichten mit Symbol, Intervall und Spalten.
+            abfrage(sql, max_zeilen): Ergebnis als DataFrame (höchstens max_zeilen Zeilen).
+            erklaere(sql): Ausführungsplan (zeigt Pushdown und übersprungene Dateien).
+            exportiere(sql, ziel): Schreibt das vollständige Ergebnis als Parquet- oder CSV-Datei.
+        """
+
+    def __init__(self, cache_dir=CACHE_DIR, memory_limit='2GB', threads=None, temp_dir=None):
+        # Initialisierung mit Cache-Verzeichnis und Grenzen für DuckDB; die Verbindung entsteht bei der ersten Abfrage
+        self.cache_dir = cache_dir
+        self.store = TimeSeriesStore(cache_dir)
+        self.memory_limit = memory_limit
+        self.threads = threads
+        self.temp_dir = temp_dir or os.path.join(cache_dir, 'sql_tmp')
+        self.verbindung = None
+        self.serien = None
+        self.letzte_dauer = None
+        self.gekuerzt = False
+        self.lock = threading.Lock()
+
+    def verbinde(self):
+        # DuckDB-Verbindung (im Speicher) mit Speichergrenze und Auslagerungsverzeichnis
+        if self.verbindung is None:
+            duckdb = lade_duckdb()
+            os.makedirs(self.temp_dir, exist_ok=True)
+            konfiguration = {'memory_limit': self.memory_limit, 'temp_directory': self.temp_dir}
+            if self.threads:
+                konfiguration['threads'] = int(self.threads)
+            self.verbindung = duckdb.connect(':memory:', config=konfiguration)
+        return self.verbindung
+
+    def aktualisiere_sichten(self):
+        # Legt die Sichten für die aktuell vorhandenen Zeitreihen an (nur wenn sich die Zeitreihen geändert haben)
+        verbindung = self.verbinde()
+        serien = [(symbol, interval) for symbol, interval in self.store.serien()
+                  if os.path.exists(serien_pfad(symbol, interval, self.store.data_dir))]
+        if serien == self.serien:
+            return
+        for symbol, interval in self.serien or []:
+            verbindung.execute(f"DROP VIEW IF EXISTS {bezeichner(f'{symbol}_{interval}')}")
+        teile = []
+        for symbol, interval in serien:
+            pfad = text_literal(os.path.abspath(serien_pfad(symbol, interval, self.store.data_dir)))
+            verbindung.execute(f"CREATE OR REPLACE VIEW {bezeichner(f'{symbol}_{interval}')} AS SELECT * FROM read_parquet({pfad})")
+            teile.append(f"SELECT {text_literal(symbol)} AS symbol, {text_literal(interval)} AS interval, * FROM read_parquet({pfad})")
+        if teile:
+            verbindung.execute(f"CREATE OR REPLACE VIEW {ALLE_SERIEN} AS " + "\nUNION ALL BY NAME\n".join(teile))
+        else:
+            verbindung.execute(f"DROP VIEW IF EXISTS {ALLE_SERIEN}")
+        self.serien = serien
+
+    def tabellen(self):
+        # Sichten je Zeitreihe: Liste von (Name, Symbol, Intervall, Spalten mit Typ)
+        with self.lock:
+            self.aktualisiere_sichten()
+            ergebnis = []
+            for symbol, interval in self.serien:
+                name = f"{symbol}_{interval}"
+                spalten = self.verbindung.execute(f"DESCRIBE {bezeichner(name)}").fetchall()
+                ergebnis.append((name, symbol, interval, [(spalte[0], spalte[1]) for spalte in spalten]))
+            return ergebnis
+
+    def sperren(self, sql, stack):
+        # Lesende Sperren der Zeitreihen, auf die sich die Abfrage bezieht ('bars': alle)
+        try:
+            namen = self.verbindung.get_table_names(sql)
+        except lade_duckdb().Error:
+            namen = {ALLE_SERIEN}
+        for symbol, interval in self.serien:
+            if ALLE_SERIEN in namen or f"{symbol}_{interval}" in namen:
+                stack.enter_context(serien_sperre(symbol, interval, meta_dir=self.store.meta_dir))
+
+    def fuehre_aus(self, sql, funktion):
+        # Führt funktion(verbindung) unter den Sperren aus (eine Abfrage zur Zeit je Verbindung);
+        # Fehler von DuckDB werden als ValueError gemeldet
+        duckdb = lade_duckdb()
+        with self.lock:
+            beginn = time.perf_counter()
+            try:
+                self.aktualisiere_sichten()
+                with ExitStack() as stack:
+                    self.sperren(sql, stack)
+                    return funktion(self.verbindung)
+            except duckdb.Error as e:
+                raise ValueError(str(e)) from e
+            finally:
+                self.letzte_dauer = time.perf_counter() - beginn
+
+    def abfrage(self, sql, max_zeilen=MAX_ZEILEN):
+        # Ergebnis als DataFrame; bei mehr als max_zeilen Zeilen werden nur die ersten geholt (gekuerzt = True)
+        def ausfuehren(verbindung):
+            ergebnis = verbindung.execute(sql)
+            if ergebnis.description is None:
+                return pd.DataFrame()
+            # Blockweise holen (to_arrow_reader ab DuckDB 1.4, vorher fetch_record_batch)
+            tabelle = (ergebnis.to_arrow_reader if hasattr(ergebnis, 'to_arrow_reader') else ergebnis.fetch_record_batch)(65536)
+            teile, zeilen = [], 0
+            for block in tabelle:
+                teile.append(block)
+                zeilen += block.num_rows
+                if max_zeilen is not None and zeilen > max_zeilen:
+                    break
+            daten = pa.Table.from_batches(teile, schema=tabelle.schema)
+            self.gekuerzt = max_zeilen is not None and daten.num_rows > max_zeilen
+            return daten.slice(0, max_zeilen).to_pandas() if self.gekuerzt else daten.to_pandas()
+
+        return self.fuehre_aus(sql, ausfuehren)
+
+    def erklaere(self, sql):
+        # Ausführungsplan der Abfrage als Text
+        return self.fuehre_aus(sql, lambda verbindung: "\n".join(zeile[1] for zeile in verbindung.execute(f"EXPLAIN {sql}").fetchall()))
+
+    def exportiere(self, sql, ziel):
+        # Vollständiges Ergebnis als Datei (Endung .csv: CSV, sonst Parquet), ohne es in den Speicher zu laden.
+        # Rückgabe: Anzahl der geschriebenen Zeilen
+        format = 'csv' if ziel.lower().endswith('.csv') else 'parquet'
+        verzeichnis = os.path.dirname(os.path.abspath(ziel))
+        os.makedirs(verzeichnis, exist_ok=True)
+        return self.fuehre_aus(sql, lambda verbindung: verbindung.execute(
+            f"COPY ({sql}) TO {text_literal(os.path.abspath(ziel))} (FORMAT {format})").fetchone()[0])
+
+
+def als_chart_daten(df, farben=None):
+    # Ergebnis einer Abfrage als chart_data_list für PlotChartLine.create_chart: die erste Spalte ist die X-Achse
+    # (z.B. daytime oder Stunde), jede weitere numerische Spalte eine Linie
+    if df is None or df.empty or len(df.columns) < 2:
+        raise ValueError("Zum Plotten werden mindestens zwei Spalten benötigt (X-Achse und Werte)")
+    farben = farben or ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b', '#e377c2', '#7f7f7f']
+    x = df[df.columns[0]]
+    werte = [spalte for spalte in df.columns[1:] if pd.api.types.is_numeric_dtype(df[spalte])]
+    if not werte:
+        raise ValueError("Das Ergebnis enthält keine numerische Spalte zum Plotten")
+    return [(pd.DataFrame({'daytime': x, 'CLOSE': df[spalte]}), str(spalte), farben[i % len(farben)])
+            for i, spalte in enumerate(werte)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQL-Abfragen über den Parquet-Cache (DuckDB)")
+    parser.add_argument('sql', nargs='?', help="Abfrage (ohne Angabe: interaktive Konsole)")
+    parser.add_argument('--cache', default=CACHE_DIR, help="Cache-Verzeichnis")
+    parser.add_argument('--memory', default='2GB', help="Speichergrenze von DuckDB (z.B. 2GB)")
+    parser.add_argument('--output', help="Ergebnis vollständig als Datei schreiben (.parquet oder .csv)")
+    parser.add_argument('--explain', action='store_true', help="Nur den Ausführungsplan ausgeben")
+    parser.add_argument('--tables', action='store_true', help="Verfügbare Tabellen auflisten")
+    args = parser.parse_args()
+
+    cli_sql = SqlQuery(args.cache, args.memory)
+    if args.tables:
+        for cli_name, _, _, cli_spalten in sorted(cli_sql.tabellen(), key=lambda t: (t[1], interval_sort_key(t[2]))):
+            print(f"{cli_name}: {', '.join(f'{spalte} {typ}' for spalte, typ in cli_spalten)}")
+        print(f"{ALLE_SERIEN}: symbol, interval und die Spalten aller Zeitreihen")
+
+    cli_abfragen = [args.sql] if args.sql else []
+    if not args.sql and not args.tables:
+        print(f"SQL-Konsole (Tabellen: {ALLE_SERIEN} und <Symbol>_<Intervall>, Ende mit leerer Zeile). Beispiel:\n{BEISPIEL}\n")
+    pd.set_option('display.width', 200)
+    pd.set_option('display.max_columns', 20)
+    while True:
+        if cli_abfragen:
+            cli_text = cli_abfragen.pop()
+        elif args.sql or args.tables:
+            break
+        else:
+            try:
+                cli_text = input("sql> ").strip()
+            except EOFError:
+                break
+            if not cli_text:
+                break
+        try:
+            if args.explain:
+                print(cli_sql.erklaere(cli_text))
+            elif args.output:
+                print(f"{cli_sql.exportiere(cli_text, args.output):,} Zeilen nach {args.output} geschrieben "
+                      f"({cli_sql.letzte_dauer:.2f}s)")
+            else:
+                cli_df = cli_sql.abfrage(cli_text)
+                print(cli_df.to_string(max_rows=60))
+                print(f"{len(cli_df):,} Zeilen{' (gekürzt)' if cli_sql.gekuerzt else ''} in {cli_sql.letzte_dauer:.2f}s")
+        except (ValueError, RuntimeError) as e:
+            print(f"Fehler: {e}")
@@ -0,0 +1,206 @@
+import os
+import queue
+import threading
+import tkinter as tk
+import webbrowser
+from tkinter import filedialog, messagebox, ttk
+from modules.PlotChartLine import PlotChartLine
+from modules.SqlQuery import ALLE_SERIEN, BEISPIEL, als_chart_daten
+
+# Angezeigte Zeilen des Ergebnisses (das Plotten und der Export verwenden mehr)
+ANZEIGE_ZEILEN = 1000
+
+
+class SqlWindow:
+    """
+        SQL-Konsole über den Parquet-Cache (SqlQuery mit DuckDB).
+
+        Links stehen die Tabellen ('bars' und je Zeitreihe "<Symbol>_<Intervall>") mit ihren Spalten,
+        ein Doppelklick fügt den Namen in die Abfrage ein. Abfragen laufen in einem Hintergrund-
+        Thread; das Ergebnis erscheint als Tabelle und kann als Chart (erste Spalte = X-Achse, jede
+        numerische Spalte eine Linie) geöffnet oder vollständig als Parquet-/CSV-Datei geschrieben
+        werden. "Plan" zeigt den Ausführungsplan mit den gelesenen Spalten und Filtern.
+
+        Attribute:
+            master (tk.Tk): Das Hauptfenster der Anwendung.
+            sql (SqlQuery): Die Abfrageschicht über dem Cache.
+            plot_dir (str): Verzeichnis, in dem die Charts gespeichert werden.
+
+        Methoden:
+            create_widgets(): Erstellt Tabellenliste, Editor, Ergebnis und Buttons.
+            starte(art): Führt die Abfrage ('abfrage', 'plan' oder 'export') im Hintergrund aus.
+            pruefe_ergebnis(): Übernimmt das Ergebnis des Hintergrund-Threads.
+            plotte(): Öffnet das Ergebnis als Chart.
+        """
+
+    def __init__(self, master, sql, plot_dir, export_dir):
+        # Initialisierung der SQL-Konsole
+        self.master = master
+        self.sql = sql
+        self.plot_dir = os.path.join(plot_dir, 'sql')
+        self.export_dir = export_dir
+        self.tabellen_baum = None
+        self.editor = None
+        self.ergebnis_tabelle = None
+        self.status_label = None
+        self.buttons = []
+        self.ergebnis = None
+        self.meldungen = queue.Queue()
+        self.window = tk.Toplevel(master)
+        self.window.title("SQL-Konsole")
+        self.window.geometry("1000x680")
+        self.create_widgets()
+        self.zeige_tabellen()
+
+    def create_widgets(self):
+        # Tabellen links, rechts Editor, Buttons und Ergebnis
+        haupt = tk.PanedWindow(self.window, orient=tk.HORIZONTAL)
+        haupt.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.tabellen_baum = ttk.Treeview(haupt, show="tree")
+        self.tabellen_baum.bind("<Double-1>", self.fuege_namen_ein)
+        haupt.add(self.tabellen_baum, width=220)
+
+        rechts = tk.Frame(haupt)
+        haupt.add(rechts)
+        self.editor = tk.Text(rechts, height=9, font=("Courier", 10), undo=True)
+        self.editor.insert("1.0", BEISPIEL)
+        self.editor.bind("<Control-Return>", lambda _: self.starte('abfrage') or "break")
+        self.editor.pack(fill=tk.X)
+
+        button_style = {"font": ("Arial", 10), "relief": tk.RAISED, "borderwidth": 2, "cursor": "hand2", "width": 12}
+        button_frame = tk.Frame(rechts)
+        button_frame.pack(fill=tk.X, pady=5)
+        for text, befehl, farbe in (("Ausführen", lambda: self.starte('abfrage'), "lightgreen"),
+                                    ("Plan", lambda: self.starte('plan'), "lightyellow"),
+                                    ("Plotten", self.plotte, "lightpink"),
+                                    ("Exportieren", lambda: self.starte('export'), "thistle")):
+            button = tk.Button(button_frame, text=text, command=befehl, bg=farbe, **button_style)
+            button.pack(side=tk.LEFT, padx=5)
+            self.buttons.append(button)
+        tk.Button(button_frame, text="Schließen", command=self.window.destroy, bg="red", fg="white", **button_style).pack(side=tk.LEFT, padx=5)
+
+        self.status_label = tk.Label(rechts, text="Strg+Enter führt die Abfrage aus", font=("Arial", 9), anchor="w", justify=tk.LEFT)
+        self.status_label.pack(fill=tk.X)
+        rahmen = tk.Frame(rechts)
+        rahmen.pack(fill=tk.BOTH, expand=True)
+        self.ergebnis_tabelle = ttk.Treeview(rahmen, show="headings")
+        senkrecht = ttk.Scrollbar(rahmen, orient=tk.VERTICAL, command=self.ergebnis_tabelle.yview)
+        waagerecht = ttk.Scrollbar(rahmen, orient=tk.HORIZONTAL, command=self.ergebnis_tabelle.xview)
+        self.ergebnis_tabelle.configure(yscrollcommand=senkrecht.set, xscrollcommand=waagerecht.set)
+        senkrecht.pack(side=tk.RIGHT, fill=tk.Y)
+        waagerecht.pack(side=tk.BOTTOM, fill=tk.X)
+        self.ergebnis_tabelle.pack(fill=tk.BOTH, expand=True)
+
+    def zeige_tabellen(self):
+        # Tabellen und Spalten im Baum; ohne DuckDB ein Hinweis
+        try:
+            tabellen = self.sql.tabellen()
+        except (RuntimeError, ValueError) as e:
+            messagebox.showerror("Fehler", str(e), parent=self.window)
+            return
+        alle = self.tabellen_baum.insert("", tk.END, text=ALLE_SERIEN, values=(ALLE_SERIEN,), open=True)
+        for spalte in ("symbol", "interval"):
+            self.tabellen_baum.insert(alle, tk.END, text=spalte, values=(spalte,))
+        for name, _, _, spalten in tabellen:
+            knoten = self.tabellen_baum.insert("", tk.END, text=name, values=(f'"{name}"',))
+            for spalte, typ in spalten:
+                self.tabellen_baum.insert(knoten, tk.END, text=f"{spalte}  {typ}", values=(spalte,))
+
+    def fuege_namen_ein(self, _):
+        # Name der Tabelle bzw. Spalte an der Schreibmarke einfügen
+        auswahl = self.tabellen_baum.focus()
+        if auswahl:
+            self.editor.insert(tk.INSERT, self.tabellen_baum.item(auswahl, "values")[0])
+
+    def starte(self, art):
+        # Führt die Abfrage im Hintergrund aus; das Fenster bleibt bedienbar
+        text = self.editor.get("1.0", tk.END).strip()
+        if not text:
+            return
+        ziel = None
+        if art == 'export':
+            ziel = filedialog.asksaveasfilename(parent=self.window, initialdir=os.path.abspath(self.export_dir),
+                                                defaultextension=".parquet",
+                                                filetypes=[("Parquet", "*.parquet"), ("CSV", "*.csv")])
+            if not ziel:
+                return
+        for button in self.buttons:
+            button.config(state=tk.DISABLED)
+        self.status_label.config(text="Abfrage läuft ...")
+        threading.Thread(target=self.fuehre_aus, args=(art, text, ziel), daemon=True).start()
+        self.window.after(200, self.pruefe_ergebnis)
+
+    def fuehre_aus(self, art, text, ziel):
+        # Hintergrund-Thread: das Ergebnis wird über die Queue an das Fenster übergeben
+        try:
+            if art == 'plan':
+                self.meldungen.put((art, self.sql.erklaere(text)))
+            elif art == 'export':
+                self.meldungen.put((art, (self.sql.exportiere(text, ziel), ziel)))
+            else:
+                self.meldungen.put((art, self.sql.abfrage(text)))
+        except (OSError, ValueError, RuntimeError) as e:
+            self.meldungen.put(('fehler', str(e)))
+
+    def pruefe_ergebnis(self):
+        # Übernimmt das Ergebnis des Hintergrund-Threads (im Tkinter-Thread)
+        if not self.window.winfo_exists():
+            return
+        if self.meldungen.empty():
+            self.window.after(200, self.pruefe_ergebnis)
+            return
+        art, inhalt = self.meldungen.get_nowait()
+        for button in self.buttons:
+            button.config(state=tk.NORMAL)
+        dauer = f"{self.sql.letzte_dauer or 0:.2f}s"
+        if art == 'fehler':
+            self.status_label.config(text="")
+            messagebox.showerror("Fehler", inhalt, parent=self.window)
+        elif art == 'plan':
+            self.status_label.config(text=f"Ausführungsplan ({dauer})")
+            fenster = tk.Toplevel(self.window)
+            fenster.title("Ausführungsplan")
+            plan = tk.Text(fenster, font=("Courier", 9), wrap=tk.NONE, width=110, height=45)
+            plan.insert("1.0", inhalt)
+            plan.config(state=tk.DISABLED)
+            plan.pack(fill=tk.BOTH, expand=True)
+        elif art == 'export':
+            zeilen, ziel = inhalt
+            self.status_label.config(text=f"{zeilen:,} Zeilen nach {ziel} geschrieben ({dauer})")
+        else:
+            self.ergebnis = inhalt
+            self.zeige_ergebnis(dauer)
+
+    def zeige_ergebnis(self, dauer):
+        # Ergebnis in der Tabelle (die ersten ANZEIGE_ZEILEN Zeilen)
+        df = self.ergebnis
+        self.ergebnis_tabelle.delete(*self.ergebnis_tabelle.get_children())
+        spalten = [str(spalte) for spalte in df.columns]
+        self.ergebnis_tabelle.configure(columns=spalten)
+        for spalte in spalten:
+            self.ergebnis_tabelle.heading(spalte, text=spalte)
+            self.ergebnis_tabelle.column(spalte, width=140, anchor="e")
+        for zeile in df.head(ANZEIGE_ZEILEN).itertuples(index=False):
+            self.ergebnis_tabelle.insert("", tk.END, values=[str(wert) for wert in zeile])
+        hinweis = " (gekürzt, vollständig über Exportieren)" if self.sql.gekuerzt else ""
+        self.status_label.config(text=f"{len(df):,} Zeilen{hinweis} in {dauer}"
+                                      + (f", angezeigt: {ANZEIGE_ZEILEN:,}" if len(df) > ANZEIGE_ZEILEN else ""))
+
+    def plotte(self):
+        # Ergebnis als Chart über PlotChartLine (erste Spalte = X-Achse)
+        if self.ergebnis is None:
+            messagebox.showinfo("Info", "Bitte führen Sie zuerst eine Abfrage aus.", parent=self.window)
+            return
+        try:
+            chart_daten = als_chart_daten(self.ergebnis)
+        except ValueError as e:
+            messagebox.showerror("Fehler", str(e), parent=self.window)
+            return
+        x = chart_daten[0][0]['daytime']
+        bereich = {'start': str(x.min()), 'end': str(x.max())}
+        fig, _, hash_value = PlotChartLine(self.plot_dir).create_chart('SQL', chart_daten, bereich)
+        # Achsen nach den Spalten des Ergebnisses benennen (überschreibt die gerade gespeicherte Datei)
+        fig.update_layout(xaxis_title=str(self.ergebnis.columns[0]), yaxis_title='Wert', legend_title='Spalten')
+        pfad = os.path.join(self.plot_dir, f"{hash_value}.html")
+        fig.write_html(pfad)
+        webbrowser.open(pfad)
@@ -0,0 +1,316 @@
+import glob
+import json
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from modules.SafeFileIO import atomarer_zielpfad, datei_sperre, schreibe_json_atomar
+from modules.ParquetCache import (CACHE_DIR, ist_verlaengerung, lade_serien_meta, lese_zeilenbereich,
+                                  lese_zeilenbereich_tabelle, serien_fingerprint, serien_pfad)
+
+# Spalten einer Pyramidenstufe
+STUFEN_SPALTEN = ['daytime', 'OPEN', 'HIGH', 'LOW', 'CLOSE', 'last_time', 'bars']
+
+
+def aggregiere_buckets(daten, faktor):
+    # Fasst jeweils 'faktor' aufeinanderfolgende Zeilen zu einem Bucket zusammen (vektorisiert per reduceat).
+    # Der letzte Bucket kann unvollständig sein.
+    anzahl = len(daten)
+    if anzahl == 0:
+        return pd.DataFrame({spalte: [] for spalte in STUFEN_SPALTEN})
+    anfaenge = np.arange(0, anzahl, faktor)
+    enden = np.minimum(anfaenge + faktor, anzahl) - 1
+    return pd.DataFrame({
+        'daytime': daten['daytime'].values[anfaenge],
+        'OPEN': daten['OPEN'].values[anfaenge],
+        'HIGH': np.maximum.reduceat(daten['HIGH'].values, anfaenge),
+        'LOW': np.minimum.reduceat(daten['LOW'].values, anfaenge),
+        'CLOSE': daten['CLOSE'].values[enden],
+        'last_time': daten['daytime'].values[enden],
+        'bars': (enden - anfaenge + 1).astype('int64'),
+    })
+
+
+class SummaryPyramid:
+    """
+        Mehrstufige Zusammenfassung einer Zeitreihe für Zoomstufen mit konstantem Aufwand.
+
+        Jede Stufe fasst 4, 16, 64, ... aufeinanderfolgende Bars zu einem Bucket zusammen
+        (Eröffnung, Hoch, Tief, Schluss, erster und letzter Zeitpunkt). Die Stufen liegen als
+        Parquet-Dateien unter cache/pyramid/ neben dem Cache. Für eine Chart-Anfrage wird die
+        gröbste Stufe gewählt, die das Punktebudget noch ausfüllt; damit kostet ein Bereich von
+        einer Stunde ungefähr so viel wie einer von zehn Jahren.
+
+        Eine Stufe besteht aus Segmenten (Dateien mit aufeinanderfolgenden vollständigen Buckets)
+        und einem Rest-Segment mit dem letzten, unvollständigen Bucket; die Segmentliste steht im
+        Zustand der Pyramide. Werden nur neue Bars angehängt, werden lediglich der letzte Bucket und
+        die neuen Buckets berechnet und als neues Segment geschrieben, vorhandene Dateien bleiben
+        unverändert. Damit die Anzahl der Dateien klein bleibt, werden die jüngsten Segmente wie bei
+        einem Binärzähler zusammengelegt, sobald das vorletzte nicht größer als das letzte ist.
+
+        Attribute:
+            pyramid_dir (str): Verzeichnis der Pyramidenstufen.
+            faktor (int): Verdichtungsfaktor zwischen zwei Stufen.
+            min_buckets (int): Mindestanzahl an Buckets, damit eine Stufe angelegt wird.
+
+        Methoden:
+            aktualisiere(symbol, interval): Baut die Pyramide auf oder setzt sie inkrementell fort.
+            waehle_stufe(zeilen, budget, stufen): Wählt den Faktor für einen Zeilenbereich.
+            lese_stufe(symbol, interval, faktor, erster_bucket, letzter_bucket, columns): Buckets einer Stufe (Arrow).
+            lese_bereich(symbol, interval, erste_zeile, letzte_zeile, faktor, columns): Liest Buckets einer Stufe.
+            lade_fuer_budget(symbol, interval, erste_zeile, letzte_zeile, budget): Liest einen Zeilenbereich in passender Auflösung.
+        """
+
+    def __init__(self, cache_dir=CACHE_DIR, faktor=4, min_buckets=100, block_zeilen=262144):
+        # Initialisierung der Verzeichnisse und Parameter
+        self.data_dir = os.path.join(cache_dir, 'data')
+        self.meta_dir = os.path.join(cache_dir, 'meta')
+        self.pyramid_dir = os.path.join(cache_dir, 'pyramid')
+        self.faktor = faktor
+        self.min_buckets = min_buckets
+        self.block_zeilen = block_zeilen
+        if not os.path.exists(self.pyramid_dir):
+            os.makedirs(self.pyramid_dir)
+
+    def segment_pfad(self, symbol, interval, faktor, segment):
+        # Pfad zu einem Segment [erster Bucket, Anzahl Buckets, Bars im Rest-Segment oder 0] einer Stufe
+        erster, anzahl, rest = segment
+        name = f"{symbol}_{interval}_L{faktor}_{erster}_" + (f"rest{rest}" if rest else str(anzahl))
+        return os.path.join(self.pyramid_dir, f"{name}.parquet")
+
+    def zustand_pfad(self, symbol, interval):
+        # Pfad zur Zustandsdatei der Pyramide
+        return os.path.join(self.pyramid_dir, f"{symbol}_{interval}.json")
+
+    def stufen_fuer(self, rows):
+        # Faktoren 4, 16, 64, ... solange die Stufe noch genügend Buckets enthält
+        stufen = []
+        faktor = self.faktor
+        while rows // faktor >= self.min_buckets:
+            stufen.append(faktor)
+            faktor *= self.faktor
+        return stufen
+
+    def lade_zustand(self, symbol, interval):
+        # Lädt den Zustand der Pyramide, None wenn keine existiert
+        pfad = self.zustand_pfad(symbol, interval)
+        if not os.path.exists(pfad):
+            return None
+        with open(pfad, 'r') as f:
+            return json.load(f)
+
+    @staticmethod
+    def passt(zustand, meta):
+        # Zustand gehört zum Stand der Zeitreihe (Zustände ohne Segmentliste stammen aus älteren Versionen)
+        return zustand is not None and 'segments' in zustand and zustand['fingerprint'] == serien_fingerprint(meta)
+
+    def ist_aktuell(self, symbol, interval, meta=None):
+        # Prüft, ob die Pyramide zum aktuellen Stand der Zeitreihe passt
+        meta = meta or lade_serien_meta(symbol, interval, self.meta_dir)
+        return meta is not None and self.passt(self.lade_zustand(symbol, interval), meta)
+
+    def aktualisiere(self, symbol, interval):
+        # Baut die Pyramide auf oder setzt sie fort; liefert die Liste der Stufen-Faktoren
+        meta = lade_serien_meta(symbol, interval, self.meta_dir)
+        if meta is None:
+            raise FileNotFoundError(f"Keine Metadaten für {symbol}_{interval} gefunden")
+        zustand = self.lade_zustand(symbol, interval)
+        if self.passt(zustand, meta):
+            return zustand['levels']
+
+        # Nur ein Prozess baut die Pyramide einer Zeitreihe gleichzeitig auf; Leser warten (lese_stufe)
+        with datei_sperre(self.zustand_pfad(symbol, interval)):
+            zustand = self.lade_zustand(symbol, interval)
+            if self.passt(zustand, meta):
+                return zustand['levels']
+            return self.aktualisiere_gesperrt(symbol, interval, meta, zustand)
+
+    def aktualisiere_gesperrt(self, symbol, interval, meta, zustand):
+        # Aufbau bzw. Fortsetzung der Pyramide (unter der Sperre aus aktualisiere)
+        rows = meta['stats']['rows']
+        stufen = self.stufen_fuer(rows)
+        parquet_path = serien_pfad(symbol, interval, self.data_dir)
+        if (zustand is not None and 'segments' in zustand and zustand['levels'] == stufen and stufen
+                and zustand.get('revision', 0) == meta.get('revision', 0)
+                and ist_verlaengerung(parquet_path, zustand['rows'], zustand['last_daytime'], zustand['last_close'], rows)):
+            segmente = self.erweitere(symbol, interval, zustand, stufen)
+        else:
+            segmente = self.baue_komplett(symbol, interval, stufen)
+
+        letzte_zeile = lese_zeilenbereich(parquet_path, rows - 1, rows - 1, columns=['daytime', 'CLOSE'])
+        zustand = {
+            "fingerprint": serien_fingerprint(meta),
+            "rows": rows,
+            "revision": meta.get('revision', 0),
+            "levels": stufen,
+            "segments": segmente,
+            "last_daytime": letzte_zeile['daytime'].iloc[0].isoformat(),
+            "last_close": float(letzte_zeile['CLOSE'].iloc[0])
+        }
+        schreibe_json_atomar(self.zustand_pfad(symbol, interval), zustand)
+        self.raeume_auf(symbol, interval, segmente)
+        return stufen
+
+    def raeume_auf(self, symbol, interval, segmente):
+        # Entfernt Stufendateien, die nicht mehr zum Zustand gehören (zusammengelegte Segmente, alte Reste)
+        verwendet = {os.path.normpath(self.segment_pfad(symbol, interval, int(faktor), segment))
+                     for faktor, liste in segmente.items() for segment in liste}
+        for pfad in glob.glob(os.path.join(glob.escape(self.pyramid_dir), f"{glob.escape(f'{symbol}_{interval}')}_L*.parquet")):
+            if os.path.normpath(pfad) not in verwendet:
+                try:
+                    os.remove(pfad)
+                except OSError:
+                    pass
+
+    def baue_komplett(self, symbol, interval, stufen):
+        # Vollständiger Aufbau: die Zeitreihe wird in Blöcken (Vielfache des größten Faktors) gelesen,
+        # damit der Speicherbedarf unabhängig von der Länge der Zeitreihe bleibt.
+        # Je Stufe entstehen ein Segment mit allen vollständigen Buckets und ggf. das Rest-Segment
+        if not stufen:
+            return {}
+        groesster = stufen[-1]
+        block = max(groesster, (self.block_zeilen // groesster) * groesster)
+        writer = {faktor: None for faktor in stufen}
+        temp_pfade = {faktor: os.path.join(self.pyramid_dir, f"{symbol}_{interval}_L{faktor}.{os.getpid()}.tmp") for faktor in stufen}
+        buckets = {faktor: 0 for faktor in stufen}
+        reste = {}
+        rest = None
+        parquet_file = pq.ParquetFile(serien_pfad(symbol, interval, self.data_dir))
+
+        try:
+            for batch in parquet_file.iter_batches(batch_size=block, columns=['daytime', 'OPEN', 'HIGH', 'LOW', 'CLOSE']):
+                daten = batch.to_pandas()
+                if rest is not None:
+                    daten = pd.concat([rest, daten], ignore_index=True)
+                vollstaendig = (len(daten) // groesster) * groesster
+                rest = daten.iloc[vollstaendig:]
+                if vollstaendig:
+                    self.schreibe_buckets(writer, temp_pfade, daten.iloc[:vollstaendig], buckets)
+            # Der letzte Block (weniger Bars als der größte Faktor): vollständige Buckets je Stufe, der Rest separat
+            for faktor in stufen if rest is not None else []:
+                vollstaendig = (len(rest) // faktor) * faktor
+                if vollstaendig:
+                    einzeln = {faktor: writer[faktor]}
+                    self.schreibe_buckets(einzeln, temp_pfade, rest.iloc[:vollstaendig], buckets)
+                    writer[faktor] = einzeln[faktor]
+                if len(rest) > vollstaendig:
+                    reste[faktor] = aggregiere_buckets(rest.iloc[vollstaendig:], faktor)
+        finally:
+            for faktor_writer in writer.values():
+                if faktor_writer is not None:
+                    faktor_writer.close()
+
+        segmente = {}
+        for faktor in stufen:
+            liste = [[0, buckets[faktor], 0]]
+            with atomarer_zielpfad(self.segment_pfad(symbol, interval, faktor, liste[0])) as temp_path:
+                os.replace(temp_pfade[faktor], temp_path)
+            if faktor in reste:
+                liste.append(self.schreibe_rest(symbol, interval, faktor, buckets[faktor], reste[faktor]))
+            segmente[str(faktor)] = liste
+        print(f"Zusammenfassungspyramide für {symbol}_{interval} erstellt: Stufen {stufen}")
+        return segmente
+
+    def schreibe_buckets(self, writer, pfade, daten, buckets):
+        # Aggregiert einen Block für die Stufen in 'writer' und hängt die Buckets an deren Dateien an
+        for faktor in writer:
+            tabelle = pa.Table.from_pandas(aggregiere_buckets(daten, faktor), preserve_index=False)
+            if writer[faktor] is None:
+                writer[faktor] = pq.ParquetWriter(pfade[faktor], tabelle.schema)
+            writer[faktor].write_table(tabelle.cast(writer[faktor].schema), row_group_size=65536)
+            buckets[faktor] += tabelle.num_rows
+
+    def schreibe_segment(self, symbol, interval, faktor, segment, buckets):
+        # Schreibt die Buckets eines Segments (atomar)
+        with atomarer_zielpfad(self.segment_pfad(symbol, interval, faktor, segment)) as temp_path:
+            pq.write_table(pa.Table.from_pandas(buckets, preserve_index=False), temp_path, row_group_size=65536)
+        return segment
+
+    def schreibe_rest(self, symbol, interval, faktor, erster_bucket, buckets):
+        # Rest-Segment mit dem unvollständigen letzten Bucket
+        return self.schreibe_segment(symbol, interval, faktor, [erster_bucket, 1, int(buckets['bars'].iloc[0])], buckets)
+
+    def erweitere(self, symbol, interval, zustand, stufen):
+        # Inkrementelle Fortsetzung: je Stufe werden der letzte unvollständige Bucket und die neuen Buckets
+        # berechnet; die vollständigen als neues Segment, der neue Rest als Rest-Segment. Gelesen werden nur
+        # die Rohdaten ab dem letzten vollständigen Bucket der gröbsten Stufe
+        rows_alt = zustand['rows']
+        start = (rows_alt // stufen[-1]) * stufen[-1]
+        neue_daten = lese_zeilenbereich(serien_pfad(symbol, interval, self.data_dir), start,
+                                        columns=['daytime', 'OPEN', 'HIGH', 'LOW', 'CLOSE'])
+        segmente = {}
+        for faktor in stufen:
+            erster_bucket = rows_alt // faktor
+            daten = neue_daten.iloc[erster_bucket * faktor - start:]
+            vollstaendig = (len(daten) // faktor) * faktor
+            liste = [segment for segment in zustand['segments'][str(faktor)] if not segment[2]]
+            if vollstaendig:
+                segment = [erster_bucket, vollstaendig // faktor, 0]
+                liste.append(self.schreibe_segment(symbol, interval, faktor, segment,
+                                                   aggregiere_buckets(daten.iloc[:vollstaendig], faktor)))
+                liste = self.lege_zusammen(symbol, interval, faktor, liste)
+            if len(daten) > vollstaendig:
+                liste.append(self.schreibe_rest(symbol, interval, faktor, erster_bucket + vollstaendig // faktor,
+                                                aggregiere_buckets(daten.iloc[vollstaendig:], faktor)))
+            segmente[str(faktor)] = liste
+        print(f"Zusammenfassungspyramide für {symbol}_{interval} fortgesetzt ({len(neue_daten)} Zeilen neu berechnet)")
+        return segmente
+
+    def lege_zusammen(self, symbol, interval, faktor, liste):
+        # Legt die beiden jüngsten Segmente zusammen, solange das vorletzte nicht größer als das letzte ist
+        # (jeder Bucket wird so nur logarithmisch oft umgeschrieben); die alten Dateien entfernt raeume_auf
+        while len(liste) > 1 and liste[-2][1] <= liste[-1][1]:
+            vorletztes, letztes = liste[-2], liste[-1]
+            tabelle = pa.concat_tables([pq.read_table(self.segment_pfad(symbol, interval, faktor, vorletztes)),
+                                        pq.read_table(self.segment_pfad(symbol, interval, faktor, letztes))])
+            segment = [vorletztes[0], vorletztes[1] + letztes[1], 0]
+            with atomarer_zielpfad(self.segment_pfad(symbol, interval, faktor, segment)) as temp_path:
+                pq.write_table(tabelle, temp_path, row_group_size=65536)
+            liste = liste[:-2] + [segment]
+        return liste
+
+    def waehle_stufe(self, zeilen, budget, stufen):
+        # Gröbste Stufe, deren Bucketanzahl das Punktebudget noch ausfüllt; 1 bedeutet Rohdaten
+        gewaehlt = 1
+        for faktor in stufen:
+            if zeilen // faktor >= budget:
+                gewaehlt = faktor
+        return gewaehlt
+
+    def lese_stufe(self, symbol, interval, faktor, erster_bucket, letzter_bucket, columns=None):
+        # Buckets [erster_bucket, letzter_bucket] einer Stufe als Arrow-Tabelle über alle betroffenen Segmente.
+        # Die gemeinsame Sperre verhindert, dass eine Fortsetzung Segmente während des Lesens austauscht
+        with datei_sperre(self.zustand_pfad(symbol, interval), exklusiv=False):
+            zustand = self.lade_zustand(symbol, interval)
+            if zustand is None or 'segments' not in zustand or str(faktor) not in zustand['segments']:
+                raise FileNotFoundError(f"Pyramidenstufe {faktor} für {symbol}_{interval} nicht vorhanden")
+            teile = []
+            for segment in zustand['segments'][str(faktor)]:
+                erster, anzahl = segment[0], segment[1]
+                von, bis = max(erster_bucket, erster), min(letzter_bucket, erster + anzahl - 1)
+                if von <= bis:
+                    teile.append(lese_zeilenbereich_tabelle(self.segment_pfad(symbol, interval, faktor, segment),
+                                                            von - erster, bis - erster, columns=columns))
+        if not teile:
+            return pa.schema([(spalte, typ) for spalte, typ in zip(STUFEN_SPALTEN, [pa.timestamp('ns'), pa.float64(), pa.float64(), pa.float64(),
+                                                                                    pa.float64(), pa.timestamp('ns'), pa.int64()])
+                              if columns is None or spalte in columns]).empty_table()
+        return pa.concat_tables(teile)
+
+    def lese_bereich(self, symbol, interval, erste_zeile, letzte_zeile, faktor, columns=None):
+        # Liest die Buckets einer Stufe, die den Zeilenbereich der Rohdaten abdecken
+        return self.lese_stufe(symbol, interval, faktor, erste_zeile // faktor, letzte_zeile // faktor,
+                               columns=columns).to_pandas()
+
+    def lade_fuer_budget(self, symbol, interval, erste_zeile, letzte_zeile, budget):
+        # Liest einen Zeilenbereich in der gröbsten Auflösung, die das Punktebudget noch ausfüllt.
+        # Rückgabe: (DataFrame, Faktor); bei Faktor 1 enthält das DataFrame Rohdaten (daytime, CLOSE).
+        faktor = self.waehle_stufe(letzte_zeile - erste_zeile + 1, budget, self.aktualisiere(symbol, interval))
+        if faktor > 1:
+            df = self.lese_bereich(symbol, interval, erste_zeile, letzte_zeile, faktor,
+                                   columns=['daytime', 'HIGH', 'LOW', 'CLOSE'])
+        else:
+            df = lese_zeilenbereich(serien_pfad(symbol, interval, self.data_dir), erste_zeile, letzte_zeile,
+                                    columns=['daytime', 'CLOSE'])
+        return df, faktor
@@ -0,0 +1,188 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import reduce
+import numpy as np
+import pandas as pd
+from modules.RangePrefetcher import BereichsCache
+from modules.TimeSeriesStore import TimeSeriesStore
+
+# Kennzahlen des Vergleichsmodus
+KENNZAHLEN = ['matrix', 'korrelation', 'spread', 'performance']
+
+
+def rollierende_summe(werte, fenster):
+    # Summen über gleitende Fenster je Spalte (über kumulierte Summen, O(n) unabhängig vom Fenster);
+    # die ersten fenster-1 Zeilen sind NaN
+    kumuliert = np.concatenate([np.zeros((1,) + werte.shape[1:]), np.cumsum(werte, axis=0)])
+    ergebnis = np.full(werte.shape, np.nan)
+    if fenster <= len(werte):
+        ergebnis[fenster - 1:] = kumuliert[fenster:] - kumuliert[:-fenster]
+    return ergebnis
+
+
+class SymbolComparison:
+    """
+        Vergleich mehrerer Symbole auf einem gemeinsamen Intervall.
+
+        Die Schlusskurse aller Symbole werden auf die gemeinsamen Zeitpunkte ausgerichtet (Schnittmenge
+        der Zeitachsen) und als Matrix (Zeitpunkte x Symbole) gehalten. Alle Kennzahlen werden darauf
+        vektorisiert berechnet, gleitende Fenster über kumulierte Summen (Aufwand unabhängig von der
+        Fenstergröße):
+            - Korrelationsmatrix der Log-Renditen (gesamter Bereich oder die letzten 'fenster' Bars)
+            - rollierende Korrelation jedes Symbols mit dem ersten (Referenz-)Symbol
+            - Spread der normierten Log-Kurse gegenüber der Referenz mit rollierendem Z-Score
+            - normierte Performance (Start = 100)
+        Ausgerichtete Daten und Ergebnisse liegen je Parametersatz in einem In-Memory-Cache (LRU);
+        der Schlüssel enthält den Datenstand der Zeitreihen, ein Import macht ihn ungültig.
+
+        Methoden:
+            ausgerichtet(symbole, interval, start, end): Gemeinsame Zeitachse und Kursmatrix.
+            korrelationsmatrix(...), rollierende_korrelation(...), spread(...), performance(...): Kennzahlen.
+            berechne(kennzahl, ...): Kennzahl über den Ergebnis-Cache.
+        """
+
+    def __init__(self, store=None, cache_mb=128):
+        # Initialisierung mit dem gemeinsamen Lesepfad und der Größe des Ergebnis-Caches
+        self.store = store or TimeSeriesStore()
+        self.cache = BereichsCache(cache_mb)
+        self.letzte_dauer = None
+        self.aus_cache = False
+
+    def berechne(self, kennzahl, symbole, interval, start=None, end=None, fenster=None):
+        # Kennzahl ('matrix', 'korrelation', 'spread', 'performance') über den Ergebnis-Cache
+        if kennzahl not in KENNZAHLEN:
+            raise ValueError(f"Unbekannte Kennzahl '{kennzahl}' (erlaubt: {', '.join(KENNZAHLEN)})")
+        beginn = time.perf_counter()
+        schluessel = (kennzahl, fenster) + self.schluessel(symbole, interval, start, end)
+        ergebnis = self.cache.hole(schluessel)
+        self.aus_cache = ergebnis is not None
+        if ergebnis is None:
+            funktion = {'matrix': self.korrelationsmatrix, 'korrelation': self.rollierende_korrelation,
+                        'spread': self.spread, 'performance': self.performance}[kennzahl]
+            ergebnis = funktion(symbole, interval, start, end, fenster)
+            self.cache.lege_ab(schluessel, ergebnis)
+        self.letzte_dauer = time.perf_counter() - beginn
+        return ergebnis
+
+    def schluessel(self, symbole, interval, start, end):
+        # Parametersatz mit dem Datenstand aller beteiligten Zeitreihen
+        return (tuple(symbole), interval, start, end, tuple(self.store.stand(symbol, interval) for symbol in symbole))
+
+    def ausgerichtet(self, symbole, interval, start=None, end=None):
+        # (Zeitpunkte, Kursmatrix Zeitpunkte x Symbole) auf den gemeinsamen Zeitpunkten aller Symbole
+        if len(symbole) < 2:
+            raise ValueError("Für den Vergleich werden mindestens zwei Symbole benötigt")
+        schluessel = ('ausgerichtet',) + self.schluessel(symbole, interval, start, end)
+        ergebnis = self.cache.hole(schluessel)
+        if ergebnis is not None:
+            return ergebnis
+
+        with ThreadPoolExecutor(max_workers=min(len(symbole), self.store.load_workers)) as executor:
+            daten = list(executor.map(lambda symbol: self.store.query(symbol, interval, start, end,
+                                                                      columns=['daytime', 'CLOSE'], resolution='raw'),
+                                      symbole))
+        fehlend = [symbol for symbol, df in zip(symbole, daten) if df is None]
+        if fehlend:
+            raise FileNotFoundError(f"Keine {interval}-Daten im gewählten Bereich für: {', '.join(fehlend)}")
+
+        zeiten = [df['daytime'].to_numpy() for df in daten]
+        gemeinsam = reduce(np.intersect1d, zeiten)
+        if len(gemeinsam) < 2:
+            raise ValueError(f"Die Symbole haben im gewählten Bereich keine gemeinsamen {interval}-Zeitpunkte")
+        kurse = np.column_stack([df['CLOSE'].to_numpy(dtype='float64')[np.searchsorted(zeit, gemeinsam)]
+                                 for df, zeit in zip(daten, zeiten)])
+        ergebnis = (gemeinsam, kurse)
+        self.cache.lege_ab(schluessel, ergebnis)
+        return ergebnis
+
+    def renditen(self, symbole, interval, start, end):
+        # Log-Renditen auf der gemeinsamen Zeitachse (Zeitpunkt = Ende der Rendite)
+        zeiten, kurse = self.ausgerichtet(symbole, interval, start, end)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return zeiten[1:], np.diff(np.log(kurse), axis=0)
+
+    def korrelationsmatrix(self, symbole, interval, start=None, end=None, fenster=None):
+        # Korrelationsmatrix der Log-Renditen (die letzten 'fenster' Renditen oder der gesamte Bereich)
+        _, renditen = self.renditen(symbole, interval, start, end)
+        if fenster:
+            renditen = renditen[-int(fenster):]
+        zentriert = renditen - renditen.mean(axis=0)
+        streuung = np.sqrt((zentriert ** 2).sum(axis=0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            matrix = (zentriert.T @ zentriert) / np.outer(streuung, streuung)
+        return pd.DataFrame(np.clip(matrix, -1.0, 1.0), index=list(symbole), columns=list(symbole))
+
+    def rollierende_korrelation(self, symbole, interval, start=None, end=None, fenster=None):
+        # Rollierende Korrelation der Log-Renditen jedes Symbols mit dem ersten Symbol (Spalten = weitere Symbole)
+        fenster = self.pruefe_fenster(fenster)
+        zeiten, renditen = self.renditen(symbole, interval, start, end)
+        x = renditen[:, :1] - renditen[:, :1].mean()
+        y = renditen[:, 1:] - renditen[:, 1:].mean(axis=0)
+        sx, sy = rollierende_summe(x, fenster), rollierende_summe(y, fenster)
+        sxx, syy, sxy = rollierende_summe(x * x, fenster), rollierende_summe(y * y, fenster), rollierende_summe(x * y, fenster)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            korrelation = (fenster * sxy - sx * sy) / np.sqrt((fenster * sxx - sx ** 2) * (fenster * syy - sy ** 2))
+        return self.als_frame(zeiten, np.clip(korrelation, -1.0, 1.0), symbole[1:])
+
+    def spread(self, symbole, interval, start=None, end=None, fenster=None):
+        # Spread der normierten Log-Kurse gegenüber dem ersten Symbol und dessen rollierender Z-Score
+        fenster = self.pruefe_fenster(fenster)
+        zeiten, kurse = self.ausgerichtet(symbole, interval, start, end)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_kurse = np.log(kurse / kurse[0])
+        spread = log_kurse[:, 1:] - log_kurse[:, :1]
+        zentriert = spread - np.nanmean(spread, axis=0)
+        summe, quadrate = rollierende_summe(zentriert, fenster), rollierende_summe(zentriert ** 2, fenster)
+        mittel = summe / fenster
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z_score = (zentriert - mittel) / np.sqrt(np.maximum(quadrate / fenster - mittel ** 2, 0.0))
+        namen = [f"{symbol}-{symbole[0]}" for symbol in symbole[1:]]
+        return pd.concat([self.als_frame(zeiten, spread, namen),
+                          self.als_frame(zeiten, z_score, [f"{name} z" for name in namen]).drop(columns='daytime')], axis=1)
+
+    def performance(self, symbole, interval, start=None, end=None, fenster=None):
+        # Normierte Performance (erster gemeinsamer Zeitpunkt = 100)
+        zeiten, kurse = self.ausgerichtet(symbole, interval, start, end)
+        return self.als_frame(zeiten, 100.0 * kurse / kurse[0], symbole)
+
+    @staticmethod
+    def pruefe_fenster(fenster):
+        # Fenstergröße in Bars (mindestens 2)
+        if fenster is None or int(fenster) < 2:
+            raise ValueError("Die Fenstergröße muss mindestens 2 Bars betragen")
+        return int(fenster)
+
+    @staticmethod
+    def als_frame(zeiten, werte, namen):
+        # DataFrame mit der Zeitachse und einer Spalte je Name
+        df = pd.DataFrame(werte, columns=list(namen))
+        df.insert(0, 'daytime', zeiten)
+        return df
+
+
+def korrelations_heatmap(matrix, titel):
+    # Heatmap einer Korrelationsmatrix (Werte in den Zellen)
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Heatmap(z=matrix.to_numpy(), x=list(matrix.columns), y=list(matrix.index), zmin=-1, zmax=1,
+                               colorscale='RdBu', reversescale=True, colorbar=dict(title='Korrelation'),
+                               text=np.round(matrix.to_numpy(), 2), texttemplate='%{text}',
+                               hovertemplate='%{y} / %{x}: %{z:.3f}<extra></extra>'))
+    fig.update_layout(title=titel, yaxis=dict(autorange='reversed'), template='plotly_white')
+    return fig
+
+
+def vergleichs_chart(df, titel, y_titel):
+    # Linien je Spalte über der Zeitachse (Spalten mit Suffix ' z' auf einer zweiten y-Achse)
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    for spalte in df.columns.drop('daytime'):
+        zweite_achse = spalte.endswith(' z')
+        fig.add_trace(go.Scattergl(x=df['daytime'], y=df[spalte], mode='lines', name=spalte,
+                                   yaxis='y2' if zweite_achse else 'y', line=dict(dash='dot' if zweite_achse else 'solid')))
+    layout = dict(title=titel, yaxis=dict(title=y_titel), template='plotly_white', hovermode='x unified')
+    if any(spalte.endswith(' z') for spalte in df.columns):
+        layout['yaxis2'] = dict(title='Z-Score', overlaying='y', side='right')
+    fig.update_layout(**layout)
+    return fig
@@ -0,0 +1,175 @@
+import numpy as np
+import pandas as pd
+from modules.MetadataManager import intervall_sekunden
+
+# Spalten eines MetaTrader-Tick-Exports (Eintrag "tick_columns" in config.json)
+TICK_SPALTEN = ['DATE', 'TIME', 'BID', 'ASK', 'LAST', 'VOLUME', 'FLAGS']
+
+# Kurs, aus dem die Bars gebildet werden (Eintrag "tick_price" in config.json)
+TICK_PREISE = ['bid', 'mid', 'last']
+
+# Spalten der erzeugten Bars (wie beim Import von Bar-Exporten)
+BAR_SPALTEN = ['DATE', 'TIME', 'OPEN', 'HIGH', 'LOW', 'CLOSE', 'TICKVOL', 'VOL', 'SPREAD', 'daytime', 'direction']
+
+
+class BarAggregator:
+    """
+        Fasst einen nach Zeit sortierten Tick-Strom blockweise zu OHLC-Bars eines Intervalls zusammen.
+
+        Je Block werden nur die abgeschlossenen Bars geliefert; die Ticks des letzten (noch offenen)
+        Bars werden zurückgehalten und dem nächsten Block vorangestellt. Der Speicherbedarf ist damit
+        auf einen Block plus die Ticks eines Bars begrenzt. Ticks, die älter als der offene Bar sind,
+        würden bereits geschriebene Bars verändern; sie werden verworfen und gezählt.
+
+        Attribute:
+            interval (str): Intervall der Bars, z.B. 'M1' oder 'S10'.
+            verworfen (int): Anzahl verspäteter Ticks.
+
+        Methoden:
+            verarbeite(zeit, preis, spread, volumen): Liefert die abgeschlossenen Bars eines Blocks.
+            abschliessen(): Liefert den letzten Bar.
+        """
+
+    def __init__(self, interval):
+        # Initialisierung mit dem Zielintervall (Bar-Breite in Nanosekunden)
+        self.interval = interval
+        self.breite = intervall_sekunden(interval) * 10 ** 9
+        self.rest = None
+        self.verworfen = 0
+
+    def verarbeite(self, zeit, preis, spread, volumen):
+        # zeit: int64-Nanosekunden (aufsteigend); Rückgabe: DataFrame der abgeschlossenen Bars oder None
+        if self.rest is not None:
+            bar_start = (self.rest[0][0] // self.breite) * self.breite
+            aktuell = zeit >= bar_start
+            self.verworfen += int(len(zeit) - aktuell.sum())
+            zeit, preis, spread, volumen = (np.concatenate([alt, neu[aktuell]])
+                                            for alt, neu in zip(self.rest, (zeit, preis, spread, volumen)))
+        if len(zeit) == 0:
+            return None
+        bucket = zeit // self.breite
+        offen = int(np.searchsorted(bucket, bucket[-1], side='left'))
+        self.rest = (zeit[offen:], preis[offen:], spread[offen:], volumen[offen:])
+        return self.bars(zeit[:offen], preis[:offen], spread[:offen], volumen[:offen])
+
+    def abschliessen(self):
+        # Letzter (offener) Bar am Ende des Tick-Stroms
+        if self.rest is None:
+            return None
+        bars = self.bars(*self.rest)
+        self.rest = None
+        return bars
+
+    def bars(self, zeit, preis, spread, volumen):
+        # OHLC, Tick-Anzahl, Volumen und mittlerer Spread je Bar (vektorisiert per reduceat)
+        if len(zeit) == 0:
+            return None
+        bucket = zeit // self.breite
+        anfaenge = np.r_[0, np.flatnonzero(bucket[1:] != bucket[:-1]) + 1]
+        enden = np.r_[anfaenge[1:], len(zeit)] - 1
+        ticks = (enden - anfaenge + 1).astype('float64')
+        return pd.DataFrame({
+            'daytime': (bucket[anfaenge] * self.breite).astype('datetime64[ns]'),
+            'OPEN': preis[anfaenge],
+            'HIGH': np.maximum.reduceat(preis, anfaenge),
+            'LOW': np.minimum.reduceat(preis, anfaenge),
+            'CLOSE': preis[enden],
+            'TICKVOL': ticks,
+            'VOL': np.add.reduceat(volumen, anfaenge),
+            'SPREAD': np.add.reduceat(spread, anfaenge) / ticks,
+        })
+
+
+class TickBarBuilder:
+    """
+        Wandelt die Blöcke eines Tick-Exports in Bars mehrerer Intervalle um (z.B. M1 und S10).
+
+        MetaTrader schreibt in Tick-Exporten nur die geänderten Kurse; fehlende Bid/Ask-Werte werden
+        deshalb mit dem letzten bekannten Wert aufgefüllt, auch über Blockgrenzen hinweg. Der Kurs
+        der Bars ist Bid (wie in den MetaTrader-Charts), Mid oder Last; der Spread (Ask - Bid) wird
+        in Preiseinheiten je Bar gemittelt.
+
+        Attribute:
+            ticks (int): Anzahl verarbeiteter Ticks.
+            aggregatoren (dict): Intervall -> BarAggregator.
+
+        Methoden:
+            verarbeite_block(df): Liefert je Intervall die abgeschlossenen Bars eines Blocks.
+            abschliessen(): Liefert je Intervall den letzten Bar.
+            verworfen(): Anzahl verworfener (verspäteter oder kursloser) Ticks.
+        """
+
+    def __init__(self, intervals, preis='bid', date_format=None):
+        # Initialisierung mit den Zielintervallen, der Kursart und dem Zeitformat der Exporte
+        if preis not in TICK_PREISE:
+            raise ValueError(f"Unbekannte Kursart '{preis}' (erlaubt: {', '.join(TICK_PREISE)})")
+        self.preis = preis
+        self.date_format = date_format
+        self.aggregatoren = {interval: BarAggregator(interval) for interval in intervals}
+        self.letzte_kurse = {'BID': np.nan, 'ASK': np.nan, 'LAST': np.nan}
+        self.ticks = 0
+        self.ohne_kurs = 0
+
+    def verarbeite_block(self, df):
+        # Ein Block des Tick-Exports -> {Intervall: DataFrame der abgeschlossenen Bars oder None}
+        zeit, preis, spread, volumen = self.bereite_vor(df)
+        return {interval: als_bars(aggregator.verarbeite(zeit, preis, spread, volumen))
+                for interval, aggregator in self.aggregatoren.items()}
+
+    def abschliessen(self):
+        # Letzte Bars aller Intervalle
+        return {interval: als_bars(aggregator.abschliessen()) for interval, aggregator in self.aggregatoren.items()}
+
+    def verworfen(self):
+        # Ticks ohne Kurs und verspätete Ticks (größter Wert über alle Intervalle)
+        return self.ohne_kurs + max([aggregator.verworfen for aggregator in self.aggregatoren.values()] or [0])
+
+    def bereite_vor(self, df):
+        # Zeitstempel, Kurs, Spread und Volumen eines Blocks als NumPy-Arrays (nach Zeit sortiert)
+        datum_zeit = df['DATE'].astype(str) + ' ' + df['TIME'].astype(str)
+        try:
+            zeit = pd.to_datetime(datum_zeit, format=self.date_format)
+        except (ValueError, TypeError):
+            zeit = pd.to_datetime(datum_zeit)
+        self.ticks += len(df)
+
+        # Fehlende Kurse mit dem letzten bekannten Wert auffüllen (auch aus dem vorherigen Block)
+        kurse = {}
+        for spalte in self.letzte_kurse:
+            werte = pd.to_numeric(df[spalte], errors='coerce') if spalte in df.columns else pd.Series(np.nan, index=df.index)
+            werte = werte.astype('float64')
+            if len(werte) and np.isnan(werte.iloc[0]):
+                werte.iloc[0] = self.letzte_kurse[spalte]
+            werte = werte.ffill()
+            if len(werte):
+                self.letzte_kurse[spalte] = werte.iloc[-1]
+            kurse[spalte] = werte.to_numpy()
+
+        if self.preis == 'bid':
+            preis = kurse['BID']
+        elif self.preis == 'mid':
+            preis = (kurse['BID'] + kurse['ASK']) / 2
+        else:
+            preis = kurse['LAST']
+        spread = kurse['ASK'] - kurse['BID']
+        volumen = (pd.to_numeric(df['VOLUME'], errors='coerce').fillna(0.0).to_numpy(dtype='float64')
+                   if 'VOLUME' in df.columns else np.zeros(len(df)))
+
+        gueltig = ~np.isnan(preis) & ~zeit.isna().to_numpy()
+        self.ohne_kurs += int(len(df) - gueltig.sum())
+        zeit = zeit.to_numpy()[gueltig].astype('datetime64[ns]').view('int64')
+        preis, spread, volumen = preis[gueltig], np.nan_to_num(spread[gueltig]), volumen[gueltig]
+        if np.any(zeit[1:] < zeit[:-1]):
+            reihenfolge = np.argsort(zeit, kind='stable')
+            zeit, preis, spread, volumen = zeit[reihenfolge], preis[reihenfolge], spread[reihenfolge], volumen[reihenfolge]
+        return zeit, preis, spread, volumen
+
+
+def als_bars(bars):
+    # Ergänzt die Bars um Datum, Uhrzeit und Richtung im Format des Bar-Imports
+    if bars is None or bars.empty:
+        return None
+    bars['DATE'] = bars['daytime'].dt.normalize()
+    bars['TIME'] = bars['daytime'].dt.strftime('%H:%M:%S')
+    bars['direction'] = np.where(bars['CLOSE'] >= bars['OPEN'], 'green', 'red')
+    return bars[BAR_SPALTEN]
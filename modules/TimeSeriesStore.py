@@ -0,0 +1,363 @@
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from modules.CacheLayout import formatiere_benchmark
+from modules.DayIndex import DayIndex, baue_tagesindex
+from modules.MetadataManager import interval_sort_key
+from modules.ParquetCache import CACHE_DIR, lade_serien_meta, meta_pfad, serien_pfad
+from modules.RangePrefetcher import BereichsCache
+from modules.ResolutionPlanner import ABFRAGE_SPALTEN, ResolutionPlanner
+from modules.ResourceMonitor import MESSUNGEN
+from modules.SafeFileIO import lade_json_sicher
+from modules.SharedColumns import STANDARD_SPALTEN, GeteilteSpalten
+from modules.SummaryPyramid import SummaryPyramid
+
+# Grenzen für offene Bereiche (start oder end nicht angegeben)
+ANFANG = pd.Timestamp('1900-01-01')
+ENDE = pd.Timestamp('2261-12-31 23:59:59')
+
+# Auflösungen für query(): 'auto' (Planer), 'raw' (Rohdaten) oder ein Pyramidenfaktor (z.B. 16)
+AUFLOESUNGEN = ['auto', 'raw']
+
+
+def ist_tagesangabe(wert):
+    # True für Datumsangaben ohne Uhrzeit ('2024-01-02', date); None zählt als offener Tagesbereich
+    if wert is None:
+        return True
+    if isinstance(wert, str):
+        return len(wert.strip()) <= 10
+    return isinstance(wert, date) and not isinstance(wert, datetime)
+
+
+def zeitraum(start, end):
+    # Übersetzt start/end in (von, bis, zeitgenau). Tagesangaben gelten für ganze Tage (end inklusive),
+    # Zeitpunkte (Strings mit Uhrzeit, datetime, Timestamp) werden auf die Zeile genau ausgewertet.
+    von = ANFANG if start is None else pd.Timestamp(start)
+    if end is None:
+        bis = ENDE
+    elif ist_tagesangabe(end):
+        bis = pd.Timestamp(end).normalize() + pd.Timedelta(days=1) - pd.Timedelta(1, unit='ns')
+    else:
+        bis = pd.Timestamp(end)
+    return von, bis, not (ist_tagesangabe(start) and ist_tagesangabe(end))
+
+
+class TimeSeriesStore:
+    """
+        Bibliotheks-Schnittstelle (ohne Tkinter) für den Zugriff auf den Parquet-Cache.
+
+        GUI, Kommandozeile und Notebooks verwenden denselben Lesepfad: Tagesindex statt Scan,
+        Auflösung über den ResolutionPlanner (Rohdaten, Pyramidenstufen, gröbere Intervalle),
+        parallele Ladevorgänge je Intervall und ein In-Memory-Cache (LRU) der Ergebnisse.
+        Der Cache-Schlüssel enthält den Änderungszeitpunkt der Metadaten, ein Import (auch aus
+        einem anderen Prozess) macht die Einträge der Zeitreihe damit automatisch ungültig.
+        Zeitreihen ohne Tagesindex (unsortierte Daten) werden mit Arrow-Filtern gelesen; dabei
+        werden Row-Groups außerhalb des Bereichs anhand ihrer Statistiken übersprungen. Abfragen
+        schreiben nichts: der Index entsteht beim Import, für ältere Caches über tagesindex().
+
+        Beispiel:
+            store = TimeSeriesStore()
+            daten = store.query('DE40', ['M1', 'M15'], '2024-03-01', '2024-03-05')
+            m1 = daten['M1']
+
+        Methoden:
+            serien(): Alle Zeitreihen im Cache als Liste von (Symbol, Intervall).
+            symbole(): Alle Symbole im Cache.
+            intervalle(symbol): Gespeicherte Intervalle eines Symbols.
+            katalog(): Inhalt von config/metadata.json (bzw. aus dem Cache abgeleitet).
+            query(symbol, intervals, start, end, columns, resolution, als_arrow): Daten mehrerer Intervalle.
+            lade_mehrere(symbol, intervals, ...): Wie query, liefert zusätzlich die Pläne.
+            teile(symbol, interval, ...): Ein Intervall als Shared-Memory-Block für andere Prozesse.
+            lade(symbol, interval, ...): Ein Intervall mit Cache; Rückgabe (Daten, Plan).
+            schluessel(...), lade_schluessel(schluessel): Cache-Schlüssel, z.B. für das Vorladen.
+            stand(symbol, interval): Datenstand einer Zeitreihe (Änderungszeitpunkt der Metadaten).
+            tagesindex(): Erstellt fehlende Tagesindizes (Migration älterer Caches).
+        """
+
+    def __init__(self, cache_dir=CACHE_DIR, katalog_path='config/metadata.json', budget=2000, cache_mb=256,
+                 load_workers=8):
+        # Initialisierung mit Cache-Verzeichnis, Standard-Punktebudget und Größe des In-Memory-Caches
+        self.cache_dir = cache_dir
+        self.data_dir = os.path.join(cache_dir, 'data')
+        self.meta_dir = os.path.join(cache_dir, 'meta')
+        self.katalog_path = katalog_path
+        self.budget = int(budget)
+        self.load_workers = max(1, int(load_workers))
+        self.pyramide = SummaryPyramid(cache_dir)
+        self.cache = BereichsCache(cache_mb)
+
+    def serien(self):
+        # Alle Zeitreihen im Cache (aus den Dateinamen der Metadaten)
+        serien = []
+        for pfad in glob.glob(os.path.join(self.meta_dir, '*.json')):
+            name = os.path.splitext(os.path.basename(pfad))[0]
+            if '_' in name:
+                symbol, interval = name.rsplit('_', 1)
+                if interval[:1] in ('M', 'S') and interval[1:].isdigit():
+                    serien.append((symbol, interval))
+        return sorted(serien, key=lambda serie: (serie[0], interval_sort_key(serie[1])))
+
+    def symbole(self):
+        # Alle Symbole im Cache
+        return sorted({symbol for symbol, _ in self.serien()})
+
+    def intervalle(self, symbol):
+        # Gespeicherte Intervalle eines Symbols (aufsteigend)
+        return [interval for serie_symbol, interval in self.serien() if serie_symbol == symbol]
+
+    def katalog(self):
+        # Katalog der Anwendung; fehlt er, wird er aus den Zeitreihen im Cache abgeleitet
+        serien = self.serien()
+        return lade_json_sicher(self.katalog_path, standard={
+            "available_intervals": sorted({interval for _, interval in serien}, key=interval_sort_key),
+            "symbols": sorted({symbol for symbol, _ in serien}),
+            "files": {f"{symbol}_{interval}": serien_pfad(symbol, interval, self.data_dir) for symbol, interval in serien},
+        })
+
+    def query(self, symbol, intervals, start=None, end=None, columns=None, resolution='auto', budget=None,
+              als_arrow=False):
+        # Daten mehrerer Intervalle im Bereich [start, end] als Dictionary Intervall -> DataFrame (oder Arrow-Tabelle).
+        # intervals: Liste oder einzelnes Intervall (dann wird direkt das DataFrame geliefert).
+        # resolution: 'auto' (feinste Auflösung im Punktebudget), 'raw' (Rohdaten) oder ein Pyramidenfaktor.
+        # Ohne columns enthält das Ergebnis immer ABFRAGE_SPALTEN (daytime, HIGH, LOW, CLOSE), gleich welche Auflösung.
+        # Intervalle ohne Daten im Bereich fehlen im Ergebnis.
+        einzeln = isinstance(intervals, str)
+        ergebnisse = self.lade_mehrere(symbol, [intervals] if einzeln else intervals, start, end, columns,
+                                       resolution, budget, als_arrow)
+        daten = {interval: df for interval, (df, _) in ergebnisse.items() if df is not None}
+        return daten.get(intervals) if einzeln else daten
+
+    def teile(self, symbol, interval, start=None, end=None, columns=None, resolution='auto', budget=None):
+        # Ein Intervall als GeteilteSpalten (Standard: daytime und OHLC) für Verbraucher in anderen Prozessen.
+        # Übergeben wird nur geteilt.beschreibung; der Aufrufer gibt den Block mit freigeben() bzw. with frei.
+        # Rückgabe None, wenn im Bereich keine Daten liegen
+        df = self.query(symbol, interval, start, end, columns or STANDARD_SPALTEN, resolution, budget)
+        if df is None or df.empty:
+            return None
+        return GeteilteSpalten(df, columns or [spalte for spalte in STANDARD_SPALTEN if spalte in df.columns])
+
+    def lade_mehrere(self, symbol, intervals, start=None, end=None, columns=None, resolution='auto', budget=None,
+                     als_arrow=False):
+        # Lädt mehrere Intervalle parallel (das Dekodieren von Parquet gibt die GIL frei).
+        # Rückgabe: Dictionary Intervall -> (Daten, Plan) in aufsteigender Reihenfolge der Intervalle
+        intervals = sorted(intervals, key=interval_sort_key)
+        if not intervals:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(len(intervals), self.load_workers)) as executor:
+            ergebnisse = list(executor.map(
+                lambda interval: self.lade(symbol, interval, start, end, columns, resolution, budget, als_arrow),
+                intervals))
+        return dict(zip(intervals, ergebnisse))
+
+    def schluessel(self, symbol, interval, start=None, end=None, columns=None, resolution='auto', budget=None,
+                   als_arrow=False):
+        # Cache-Schlüssel einer Anfrage; enthält den Stand der Metadaten, damit Importe ihn ungültig machen
+        return (symbol, interval, start, end, tuple(columns) if columns else None, resolution,
+                int(budget or self.budget), bool(als_arrow), self.stand(symbol, interval))
+
+    def stand(self, symbol, interval):
+        # Änderungszeitpunkt der Metadaten einer Zeitreihe (None, wenn sie nicht existiert)
+        try:
+            return os.stat(meta_pfad(symbol, interval, self.meta_dir)).st_mtime_ns
+        except OSError:
+            return None
+
+    def lade_schluessel(self, schluessel):
+        # Lädt eine Anfrage anhand ihres Cache-Schlüssels ohne den Cache (z.B. für das Vorladen)
+        symbol, interval, start, end, columns, resolution, budget, als_arrow, _ = schluessel
+        with MESSUNGEN.messe('laden', f"{symbol}_{interval} {start or ''} - {end or ''} ({resolution})"):
+            return self.lade_ungecacht(symbol, interval, start, end, list(columns) if columns else None, resolution,
+                                       budget, als_arrow)
+
+    def lade(self, symbol, interval, start=None, end=None, columns=None, resolution='auto', budget=None,
+             als_arrow=False):
+        # Ein Intervall über den In-Memory-Cache. Rückgabe: (Daten oder None ohne Daten, Plan oder None ohne Tagesindex)
+        schluessel = self.schluessel(symbol, interval, start, end, columns, resolution, budget, als_arrow)
+        ergebnis = self.cache.hole(schluessel)
+        if ergebnis is None:
+            ergebnis = self.lade_schluessel(schluessel)
+            self.cache.lege_ab(schluessel, ergebnis)
+        return ergebnis
+
+    def lade_ungecacht(self, symbol, interval, start, end, columns, resolution, budget, als_arrow):
+        # Liest ein Intervall in der geplanten Auflösung direkt aus dem Parquet-Cache
+        pfad = serien_pfad(symbol, interval, self.data_dir)
+        if not os.path.exists(pfad):
+            return None, None
+        von, bis, zeitgenau = zeitraum(start, end)
+
+        # Der Tagesindex übersetzt den Bereich ohne Scan in einen Zeilenbereich. Ohne Index wird gefiltert gelesen;
+        # eine Abfrage schreibt nichts, der Index entsteht beim Import (ältere Zeitreihen: tagesindex())
+        if DayIndex.from_meta(lade_serien_meta(symbol, interval, self.meta_dir)) is None:
+            return self.filtere(pfad, von, bis, columns, als_arrow), None
+
+        planer = ResolutionPlanner(symbol, budget or self.budget, self.intervalle(symbol), self.cache_dir, self.pyramide)
+        plan = self.plane(planer, interval, von, bis, resolution)
+        if plan is not None and zeitgenau:
+            plan = self.auf_zeitpunkte(planer, plan, von, bis)
+        if plan is None:
+            return None, None
+        return planer.lade(plan, columns=columns, als_arrow=als_arrow), plan
+
+    def plane(self, planer, interval, von, bis, resolution):
+        # Plan für die gewünschte Auflösung ('auto', 'raw' oder Pyramidenfaktor)
+        if resolution == 'auto':
+            return planer.plane_intervall(interval, von, bis)
+        plan = planer.plane_intervall(interval, von, bis, roh_erzwingen=True)
+        if resolution == 'raw' or plan is None:
+            return plan
+        faktor = int(resolution)
+        if faktor != 1:
+            meta, _ = planer.serie(interval)
+            if faktor not in self.pyramide.stufen_fuer(meta['stats']['rows']):
+                raise ValueError(f"Pyramidenstufe {faktor} für {planer.symbol}_{interval} nicht vorhanden")
+            plan.update({'faktor': faktor, 'minuten': plan['minuten'] * faktor,
+                         'punkte': -(-(plan['letzte'] - plan['erste'] + 1) // faktor)})
+            plan['bezeichnung'] = planer.bezeichnung(plan)
+        return plan
+
+    def auf_zeitpunkte(self, planer, plan, von, bis):
+        # Grenzt einen (tageweise geplanten) Zeilenbereich auf die Zeitpunkte [von, bis] ein
+        _, index = planer.serie(plan['quelle'])
+        bereich = index.zeilenbereich_zeit(serien_pfad(planer.symbol, plan['quelle'], self.data_dir), von, bis)
+        if bereich is None:
+            return None
+        plan.update({'erste': bereich[0], 'letzte': bereich[1],
+                     'punkte': -(-(bereich[1] - bereich[0] + 1) // plan['faktor'])})
+        plan['bezeichnung'] = planer.bezeichnung(plan)
+        return plan
+
+    def filtere(self, pfad, von, bis, columns, als_arrow):
+        # Vektorisierte Bereichsfilterung ohne Tagesindex; Row-Groups außerhalb des Bereichs werden übersprungen
+        tabelle = pq.read_table(pfad, columns=columns or ABFRAGE_SPALTEN,
+                                filters=[('daytime', '>=', von), ('daytime', '<=', bis)])
+        if tabelle.num_rows == 0:
+            return None
+        return tabelle if als_arrow else tabelle.to_pandas()
+
+    def tagesindex(self):
+        # Einmaliger Migrationsschritt: erstellt den Tagesindex für Zeitreihen ohne Index (ältere Caches).
+        # Unsortierte Zeitreihen bleiben ohne Index. Rückgabe: Liste der ergänzten Zeitreihen
+        ergaenzt = []
+        for symbol, interval in self.serien():
+            if (DayIndex.from_meta(lade_serien_meta(symbol, interval, self.meta_dir)) is None
+                    and os.path.exists(serien_pfad(symbol, interval, self.data_dir))
+                    and baue_tagesindex(symbol, interval, self.cache_dir) is not None):
+                ergaenzt.append(f"{symbol}_{interval}")
+        return ergaenzt
+
+    def leeren(self):
+        # Leert den In-Memory-Cache
+        self.cache.leeren()
+
+
+def benchmark_query(store, symbol, interval, wiederholungen=5):
+    # Misst die Leselatenz typischer Chart-Fenster: vollständiges Lesen mit Filter in pandas (bisheriger Weg)
+    # gegenüber dem Store ohne Cache, mit Cache und mit Arrow-Ausgabe.
+    # Rückgabe: Liste von Dictionaries (fenster, zeilen, Millisekunden je Variante)
+    index = DayIndex.from_meta(lade_serien_meta(symbol, interval, store.meta_dir))
+    if index is None:
+        raise FileNotFoundError(f"Kein Tagesindex für {symbol}_{interval} vorhanden")
+    tage = index.handelstage()
+    mitte = len(tage) // 2
+    fenster = {
+        "1 Tag": (tage[mitte], tage[mitte]),
+        "5 Tage": (tage[max(mitte - 4, 0)], tage[mitte]),
+        "1 Monat": (tage[max(mitte - 21, 0)], tage[mitte]),
+        "Gesamt": (tage[0], tage[-1]),
+    }
+    pfad = serien_pfad(symbol, interval, store.data_dir)
+
+    def messe(funktion, vorher=None):
+        messungen = []
+        for _ in range(wiederholungen):
+            if vorher is not None:
+                vorher()
+            start = time.perf_counter()
+            funktion()
+            messungen.append(time.perf_counter() - start)
+        return round(float(np.median(messungen)) * 1000, 2)
+
+    def vollscan(von, bis):
+        df = pd.read_parquet(pfad, columns=['daytime', 'CLOSE'])
+        return df[(df['daytime'] >= pd.Timestamp(von)) & (df['daytime'] < pd.Timestamp(bis) + pd.Timedelta(days=1))]
+
+    ergebnisse = []
+    for name, (von, bis) in fenster.items():
+        df, _ = store.lade_ungecacht(symbol, interval, von, bis, None, 'raw', None, False)
+        ergebnisse.append({
+            "fenster": name,
+            "zeilen": 0 if df is None else len(df),
+            "vollscan_ms": messe(lambda: vollscan(von, bis)),
+            "roh_ms": messe(lambda: store.lade(symbol, interval, von, bis, resolution='raw'), store.leeren),
+            "auto_ms": messe(lambda: store.lade(symbol, interval, von, bis), store.leeren),
+            "arrow_ms": messe(lambda: store.lade(symbol, interval, von, bis, resolution='raw', als_arrow=True),
+                              store.leeren),
+            "cache_ms": messe(lambda: store.lade(symbol, interval, von, bis)),
+        })
+    return ergebnisse
+
+
+def speichere(daten, ziel):
+    # Speichert ein Abfrageergebnis als CSV oder Parquet (anhand der Dateiendung)
+    if isinstance(daten, pa.Table):
+        daten = daten.to_pandas()
+    if ziel.endswith('.parquet'):
+        daten.to_parquet(ziel, index=False)
+    else:
+        daten.to_csv(ziel, index=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Abfragen und Benchmarks auf dem Zeitreihen-Cache (ohne GUI)")
+    parser.add_argument('--cache', default=CACHE_DIR, help="Cache-Verzeichnis")
+    befehle = parser.add_subparsers(dest='befehl', required=True)
+    befehle.add_parser('katalog', help="Zeitreihen im Cache auflisten")
+    befehle.add_parser('tagesindex', help="Fehlende Tagesindizes erstellen (ältere Caches)")
+    abfrage = befehle.add_parser('query', help="Datumsbereich eines oder mehrerer Intervalle abfragen")
+    abfrage.add_argument('symbol')
+    abfrage.add_argument('intervals', help="Kommagetrennt, z.B. M1,M15")
+    abfrage.add_argument('--start')
+    abfrage.add_argument('--end')
+    abfrage.add_argument('--columns', help="Kommagetrennt, z.B. daytime,OPEN,HIGH,LOW,CLOSE")
+    abfrage.add_argument('--resolution', default='auto', help="auto, raw oder Pyramidenfaktor (z.B. 16)")
+    abfrage.add_argument('--budget', type=int, default=2000, help="Punktebudget für resolution=auto")
+    abfrage.add_argument('--output', help="Zieldatei (.csv oder .parquet); {interval} wird ersetzt")
+    benchmark = befehle.add_parser('benchmark', help="Leselatenz typischer Chart-Fenster messen")
+    benchmark.add_argument('serie', help="Zeitreihe im Format SYMBOL_INTERVALL, z.B. DE40_M1")
+    args = parser.parse_args()
+
+    cli_store = TimeSeriesStore(cache_dir=args.cache, budget=getattr(args, 'budget', 2000))
+    if args.befehl == 'katalog':
+        for cli_symbol, cli_interval in cli_store.serien():
+            cli_meta = lade_serien_meta(cli_symbol, cli_interval, cli_store.meta_dir)
+            print(f"{cli_symbol:>10} {cli_interval:>5} {cli_meta['stats']['rows']:>12} Zeilen  "
+                  f"{cli_meta['start_datetime']} - {cli_meta['end_datetime']}")
+    elif args.befehl == 'tagesindex':
+        cli_ergaenzt = cli_store.tagesindex()
+        print(f"Tagesindex ergänzt: {', '.join(cli_ergaenzt)}" if cli_ergaenzt else "Alle Zeitreihen haben einen Tagesindex")
+    elif args.befehl == 'query':
+        cli_aufloesung = args.resolution if args.resolution in AUFLOESUNGEN else int(args.resolution)
+        cli_ergebnisse = cli_store.lade_mehrere(args.symbol, args.intervals.split(','), args.start, args.end,
+                                                args.columns.split(',') if args.columns else None, cli_aufloesung)
+        for cli_interval, (cli_daten, cli_plan) in cli_ergebnisse.items():
+            if cli_daten is None:
+                print(f"{args.symbol}_{cli_interval}: keine Daten im Bereich")
+                continue
+            print(f"{args.symbol}_{cli_interval}: {len(cli_daten)} Zeilen"
+                  + (f", {cli_plan['bezeichnung']}" if cli_plan else ""))
+            if args.output:
+                speichere(cli_daten, args.output.replace('{interval}', cli_interval))
+            else:
+                print(cli_daten)
+    else:
+        benchmark_symbol, benchmark_interval = args.serie.rsplit('_', 1)
+        print("Lesezeiten in Millisekunden (Median)")
+        print(formatiere_benchmark(benchmark_query(cli_store, benchmark_symbol, benchmark_interval)))
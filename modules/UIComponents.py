@@ -1,14 +1,38 @@
+import bisect
 import tkinter as tk
 from datetime import datetime
 from tkinter import ttk
-from tkinter import messagebox
+from tkinter import filedialog, messagebox
 import numpy as np
 import pandas as pd
 import json
 import os
+import time
 from PIL import Image, ImageTk
 from tkcalendar import DateEntry
 from modules.PlotChartLine import PlotChartLine
+from modules.IndicatorEngine import IndicatorEngine
+from modules.DayIndex import DayIndex
+from modules.RangePrefetcher import RangePrefetcher
+from modules.TimeSeriesStore import TimeSeriesStore
+from modules.ChartServer import ChartServer
+from modules.DailyStats import DailyStats
+from modules.OverviewWindow import OverviewWindow
+from modules.ScannerWindow import ScannerWindow
+from modules.ComparisonWindow import ComparisonWindow
+from modules.BulkExport import BulkExport
+from modules.ExportWindow import ExportWindow
+from modules.SqlQuery import SqlQuery
+from modules.SqlWindow import SqlWindow
+from modules.SymbolComparison import SymbolComparison
+from modules.VolumeProfile import VolumeProfile
+from modules.AnnotationStore import AnnotationStore
+from modules.ResourceMonitor import MESSUNGEN, ResourceMonitor
+from modules.SafeFileIO import aktualisiere_json
+from modules.MetadataManager import interval_sort_key, intervall_name
+
+# Obergrenze für gleichzeitig geladene Zeitreihen (überschreibbar über "load_workers" in config.json)
+MAX_LADE_THREADS = 8
 
 # Hilfsfunktion zum Laden von JSON-Dateien
 def lade_json(datei_name):
@@ -37,7 +61,22 @@ class UIComponents:
             update_hyperlinks(): Aktualisiert die Hyperlinks basierend auf vorhandenen Plots.
             open_plot(dateiname): Öffnet einen bestimmten Plot.
             update_plot(): Aktualisiert das angezeigte Diagramm.
-            prepare_chart_data(): Vorbereitet die Daten für den Plot.
+            open_chart_server(): Öffnet die aktiven Zeitreihen im lokalen Chart-Server.
+            open_replay(): Spielt den Datumsbereich der aktiven Zeitreihen im Chart-Server ab.
+            open_overview(): Öffnet die Übersicht aller Zeitreihen (Tagesstatistiken, Kalender-Heatmaps).
+            open_scanner(): Öffnet den Bedingungs-Scanner; Treffer werden als Markierungen im Chart gezeigt.
+            wechsle_symbol(symbol): Wechselt das Symbol des Charts.
+            open_vergleich(): Öffnet den Vergleich mehrerer Symbole (Korrelation, Spread, Performance).
+            open_export(): Öffnet den Export von Ausschnitten nach Parquet, CSV oder Arrow.
+            achsenbereich(): Y-Achsenbereich aus den Tagesstatistiken.
+            prepare_chart_data(): Vorbereitet die Daten für den Plot (über den TimeSeriesStore).
+            zeige_aufloesungen(): Zeigt die tatsächlich geplottete Auflösung je Zeitreihe an.
+            plane_vorladen(): Lädt benachbarte Datumsbereiche im Hintergrund vor.
+            verschiebe_datumsbereich(schritt): Verschiebt den Datumsbereich um einen Handelstag und plottet neu.
+            prepare_indicator_data(): Berechnet die konfigurierten Indikatoren für den Plot.
+            prepare_profil_daten(): Volumenprofil und Tick-Volumen/Spread je Sitzung für die Seitenpanels.
+            prepare_annotation_daten(): Ereignisse (Trades, Nachrichten, Notizen) im Datumsbereich, ausgedünnt.
+            importiere_ereignisse(): Importiert Ereignisse aus CSV-Dateien in den AnnotationStore.
             get_date_range_text(): Gibt den Datumsbereich als Text zurück.
             open_date_picker(): Öffnet den Datumswähler.
             aktualisiere_intervalle(intervalle): Aktualisiert die Zeitreihen-Checkboxen.
@@ -75,6 +114,16 @@ class UIComponents:
         self.config_color_schemes = None
         self.zeitreihen_checkboxen = {}
         self.aktive_zeitreihen = set()
+        self.handelstage_cache = {}
+        self.chart_server = None
+        self.rohdaten_var = None
+        self.profil_var = None
+        self.ereignisse_var = None
+        self.aufloesung_label = None
+        self.aufloesungen = {}
+        self.scan_markierungen = None
+        self.symbol_var = None
+        self.symbol_auswahl = None
 
         # Laden der Konfigurationen und Metadaten
         self.config = lade_json(config_path)
@@ -82,7 +131,22 @@ class UIComponents:
         self.metadaten = lade_json(os.path.abspath('./config/metadata.json'))
         self.farbschemata = lade_json(os.path.abspath('./resources/color_schemes.json'))
         self.color_schema_old = self.config_color_schemes
-        self.markt_symbol = 'DE40'
+
+        # Gemeinsamer Lesepfad (mit In-Memory-Cache) und Hintergrund-Vorladen der Nachbarbereiche
+        self.store = TimeSeriesStore(budget=int(self.config.get('pixel_budget', 2000)),
+                                     cache_mb=float(self.config.get('prefetch_cache_mb', 256)),
+                                     load_workers=int(self.config.get('load_workers', MAX_LADE_THREADS)))
+        self.prefetcher = RangePrefetcher(self.store.lade_schluessel, self.store.cache)
+        self.markt_symbol = self.config.get('symbol') or next(iter(sorted(self.metadaten.get('symbols', []))), 'DE40')
+        self.vergleich = SymbolComparison(self.store)
+        self.volumenprofil = VolumeProfile(self.store)
+        self.annotationen = AnnotationStore(os.path.abspath('./config/annotations.parquet'))
+        self.bulk_export = BulkExport(self.store.cache_dir, int(self.config.get('load_workers', MAX_LADE_THREADS)))
+        self.sql = SqlQuery(self.store.cache_dir, self.config.get('sql_memory_limit', '2GB'))
+        MESSUNGEN.schwelle_ms = float(self.config.get('slow_operation_ms', 250))
+        self.monitor = ResourceMonitor(self.store.cache_dir, self.plot_dir,
+                                       {'Zeitreihen': self.store.cache, 'Vergleich': self.vergleich.cache,
+                                        'Volumenprofil': self.volumenprofil.cache})
 
     def erstelle_buttons(self):
         # Erstellen der Hauptbuttons und UI-Elemente
@@ -110,9 +174,38 @@ class UIComponents:
         config_btn = tk.Button(button_frame, text="Einstellungen", command=self.config_callback, bg="lightyellow", **button_style)
         config_btn.pack(side=tk.LEFT, padx=5)
 
+        # Übersicht aller Zeitreihen (aus den Tagesstatistiken)
+        overview_btn = tk.Button(button_frame, text="Übersicht", command=self.open_overview, bg="lightcyan", **button_style)
+        overview_btn.pack(side=tk.LEFT, padx=5)
+
+        # Bedingungs-Scanner über mehrere Intervalle
+        scanner_btn = tk.Button(button_frame, text="Scanner", command=self.open_scanner, bg="wheat", **button_style)
+        scanner_btn.pack(side=tk.LEFT, padx=5)
+
+        # Vergleich mehrerer Symbole (Korrelation, Spread, Performance)
+        vergleich_btn = tk.Button(button_frame, text="Vergleich", command=self.open_vergleich, bg="khaki", **button_style)
+        vergleich_btn.pack(side=tk.LEFT, padx=5)
+
+        # Export von Ausschnitten (Parquet, CSV, Arrow)
+        export_btn = tk.Button(button_frame, text="Export", command=self.open_export, bg="thistle", **button_style)
+        export_btn.pack(side=tk.LEFT, padx=5)
+
+        # SQL-Abfragen über den Cache (DuckDB, optional)
+        sql_btn = tk.Button(button_frame, text="SQL", command=self.open_sql, bg="lightsalmon", **button_style)
+        sql_btn.pack(side=tk.LEFT, padx=5)
+
+        # Auswahl des Symbols
+        self.symbol_var = tk.StringVar(value=self.markt_symbol)
+        self.symbol_auswahl = ttk.Combobox(button_frame, textvariable=self.symbol_var, values=self.store.symbole(),
+                                           width=10, state="readonly")
+        self.symbol_auswahl.bind('<<ComboboxSelected>>', lambda _: self.wechsle_symbol(self.symbol_var.get()))
+        self.symbol_auswahl.pack(side=tk.LEFT, padx=5)
+
         # Anzeige des aktuellen Datumsbereichs
+        tk.Button(button_frame, text="◀", command=lambda: self.verschiebe_datumsbereich(-1), cursor="hand2", width=2).pack(side=tk.LEFT)
         self.date_range_label = tk.Label(button_frame, text=self.get_date_range_text(), font=("Arial", 10))
         self.date_range_label.pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="▶", command=lambda: self.verschiebe_datumsbereich(1), cursor="hand2", width=2).pack(side=tk.LEFT)
 
         # Erstellung des "Sitzung beenden" Buttons
         end_session_btn = tk.Button(button_frame, text="Sitzung beenden", command=self.end_session_callback, bg="red", fg="white", **button_style)
@@ -130,6 +223,32 @@ class UIComponents:
         self.update_plot_button = tk.Button(self.timeseries_frame, text="Chart-Plotten", command=self.update_plot, bg="lightpink", **button_style)
         self.update_plot_button.pack(side=tk.LEFT, padx=5)
 
+        # Interaktiver Chart über den lokalen Chart-Server
+        chart_server_button = tk.Button(self.timeseries_frame, text="Live-Chart", command=self.open_chart_server, bg="lavender", **button_style)
+        chart_server_button.pack(side=tk.LEFT, padx=5)
+
+        # Wiedergabe des Datumsbereichs Bar für Bar
+        replay_button = tk.Button(self.timeseries_frame, text="Replay", command=self.open_replay, bg="lightsteelblue", **button_style)
+        replay_button.pack(side=tk.LEFT, padx=5)
+
+        # Überschreibt die automatische Auflösungswahl: es werden immer die Rohdaten geplottet
+        self.rohdaten_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.timeseries_frame, text="Rohdaten", variable=self.rohdaten_var, cursor='hand2').pack(side=tk.LEFT, padx=5)
+
+        # Volumenprofil und Tick-Volumen/Spread je Sitzung als Seitenpanels im Chart
+        self.profil_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.timeseries_frame, text="Volumenprofil", variable=self.profil_var, cursor='hand2').pack(side=tk.LEFT, padx=5)
+
+        # Ereignisse (Trades, Nachrichten, Notizen) im Chart und deren Import aus CSV-Dateien
+        self.ereignisse_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(self.timeseries_frame, text="Ereignisse", variable=self.ereignisse_var, cursor='hand2').pack(side=tk.LEFT, padx=5)
+        ereignis_import_button = tk.Button(self.timeseries_frame, text="Ereignis-Import", command=self.importiere_ereignisse, bg="lightgoldenrod", **button_style)
+        ereignis_import_button.pack(side=tk.LEFT, padx=5)
+
+        # Anzeige der tatsächlich geplotteten Auflösung
+        self.aufloesung_label = tk.Label(self.master, text="", font=("Arial", 9), anchor="w", justify=tk.LEFT)
+        self.aufloesung_label.pack(fill=tk.X, padx=15)
+
         # Erstellung Checkboxen für Zeitreihen
         self.erstelle_intervall_checkboxen()
 
@@ -210,46 +329,242 @@ class UIComponents:
         end_date = datetime.strptime(date_range['end'], '%Y-%m-%d')
         date_diff = (end_date - start_date).days
 
-        if date_diff > 5:
+        # Ohne Tagesindex (und damit ohne Zusammenfassungspyramide) bleibt der Bereich begrenzt
+        if date_diff > 5 and not all(DayIndex.lade(self.markt_symbol, interval) for interval, _ in active_series):
             messagebox.showinfo("Info", "Bitte wählen Sie einen Datumsbereich zwischen 1 bis 5 Tagen.\nAktuell: " + str(date_diff) + " Tage")
             return
         # Aktualisieren des Plots basierend auf ausgewählten Zeitreihen und Datumsbereich
+        beginn = time.perf_counter()
         chart_data = self.prepare_chart_data(active_series, date_range, self.markt_symbol)
         print(f"Aktualisiere Plot {self.markt_symbol} mit Zeitreihen: {active_series} und Datumsbereich: {date_range}")
 
         if len(chart_data) > 0:
             chart_creator = PlotChartLine(self.plot_dir)
-            result_fig = chart_creator.create_chart(self.markt_symbol, chart_data, date_range)
+            indicator_data = self.prepare_indicator_data(active_series, date_range, self.markt_symbol)
+            result_fig = chart_creator.create_chart(self.markt_symbol, chart_data, date_range, indicator_data_list=indicator_data,
+                                                    y_range=None if indicator_data else self.achsenbereich(active_series, date_range),
+                                                    trace_namen=self.trace_namen(),
+                                                    marker_data_list=self.scan_marker_daten(date_range),
+                                                    profil_daten=self.prepare_profil_daten(active_series, date_range),
+                                                    annotation_daten=self.prepare_annotation_daten(date_range))
+            MESSUNGEN.erfasse('chart', time.perf_counter() - beginn,
+                              f"{self.markt_symbol} {','.join(interval for interval, _ in active_series)} {date_range['start']} - {date_range['end']}")
+            self.zeige_aufloesungen()
+            self.plane_vorladen(active_series, date_range)
             print(f"Daten: {result_fig[1]} / {result_fig[2]}")
             self.update_metaplot(titel=result_fig[1], hash_value=result_fig[2], date_range=date_range)
             self.update_hyperlinks()
         else:
             messagebox.showinfo("Info", "Keine Daten für den ausgewählten Datumsbereich verfügbar.")
 
-    def prepare_chart_data(self, active_series, date_range, symbol):
-        # Vorbereiten der Daten für die Charterstellung
-        datum_von = datetime.strptime(date_range['start'], '%Y-%m-%d')
-        datum_bis = datetime.strptime(date_range['end'], '%Y-%m-%d')
-
-        chart_data_list = []
+    def prepare_profil_daten(self, active_series, date_range):
+        # Volumenprofil und Sitzungsstatistik des feinsten aktiven Intervalls (None, wenn nicht gewählt).
+        # Bis zu drei Tage wird je Stunde zusammengefasst, sonst je Handelstag
+        if self.profil_var is None or not self.profil_var.get():
+            return None
+        interval = min((interval for interval, _ in active_series), key=interval_sort_key)
+        start, end = date_range['start'], date_range['end']
+        frequenz = 'h' if (pd.Timestamp(end) - pd.Timestamp(start)).days < 3 else 'D'
+        profil, kennzahlen = self.volumenprofil.profil(self.markt_symbol, interval, start, end,
+                                                       self.config.get('profile_bucket_size') or None)
+        statistik = self.volumenprofil.sitzungsstatistik(self.markt_symbol, interval, start, end, frequenz)
+        if profil is None:
+            return None
+        print(f"Volumenprofil {self.markt_symbol} {interval}: POC {kennzahlen['poc']:g}, "
+              f"Value Area {kennzahlen['va_tief']:g} - {kennzahlen['va_hoch']:g} ({kennzahlen['gewicht']})")
+        return {'profil': profil, 'kennzahlen': kennzahlen, 'statistik': statistik, 'frequenz': frequenz, 'interval': interval}
+
+    def prepare_annotation_daten(self, date_range):
+        # Ereignisse im Datumsbereich, ausgedünnt auf höchstens 'annotation_max_per_window' je Art und Zeitfenster
+        if self.ereignisse_var is None or not self.ereignisse_var.get():
+            return None
+        von = pd.Timestamp(date_range['start'])
+        bis = pd.Timestamp(date_range['end']) + pd.Timedelta(days=1) - pd.Timedelta(1, unit='ns')
+        ereignisse = self.annotationen.im_bereich(self.markt_symbol, von, bis)
+        if ereignisse.empty:
+            return None
+        einzeln, cluster = self.annotationen.ausduennen(ereignisse, von, bis, int(self.config.get('annotation_windows', 150)),
+                                                        int(self.config.get('annotation_max_per_window', 3)))
+        print(f"Ereignisse im Bereich: {len(ereignisse)} (einzeln dargestellt: {len(einzeln)})")
+        return einzeln, cluster
+
+    def importiere_ereignisse(self):
+        # Importiert Ereignisse aus CSV-Dateien; Dateien ohne Spalte 'symbol' gelten für das aktuelle Symbol
+        file_paths = filedialog.askopenfilenames(filetypes=[("CSV files", "*.csv")])
+        if not file_paths:
+            return
+        neu = 0
+        for file_path in file_paths:
+            try:
+                neu += self.annotationen.importiere_csv(file_path, symbol=self.markt_symbol)
+            except (ValueError, OSError) as e:
+                messagebox.showerror("Fehler", f"{os.path.basename(file_path)} konnte nicht importiert werden:\n{e}")
+        messagebox.showinfo("Ereignis-Import", f"{neu} neue Ereignisse importiert ({self.annotationen.anzahl()} insgesamt).")
+
+    def achsenbereich(self, active_series, date_range):
+        # Y-Achsenbereich aus den Tagesstatistiken (Tief/Hoch im Datumsbereich), None wenn nicht für alle vorhanden
+        statistik = DailyStats()
+        bereiche = [statistik.achsenbereich(self.markt_symbol, interval, date_range['start'], date_range['end'])
+                    for interval, _ in active_series]
+        if not bereiche or any(bereich is None for bereich in bereiche):
+            return None
+        tief = min(bereich[0] for bereich in bereiche)
+        hoch = max(bereich[1] for bereich in bereiche)
+        rand = (hoch - tief) * 0.02
+        return tief - rand, hoch + rand
+
+    def open_chart_server(self):
+        # Startet bei Bedarf den lokalen Chart-Server und öffnet die aktiven Zeitreihen im Browser
+        active_series = self.hole_aktive_zeitreihen()
+        if len(active_series) == 0:
+            messagebox.showinfo("Info", "Bitte wählen Sie mindestens eine Zeitreihe aus. ")
+            return
+        if not self.starte_chart_server():
+            return
+        import webbrowser
+        webbrowser.open(self.chart_server.url(self.markt_symbol, [interval for interval, _ in active_series]))
+
+    def starte_chart_server(self):
+        # Startet den lokalen Chart-Server bei Bedarf; False, wenn der Port nicht verfügbar ist
+        if self.chart_server is None:
+            try:
+                self.chart_server = ChartServer(port=int(self.config.get('chart_server_port', 8050)),
+                                                status_funktion=self.monitor.snapshot, store=self.store).start()
+            except OSError as e:
+                messagebox.showerror("Fehler", f"Chart-Server konnte nicht gestartet werden: {e}")
+                return False
+        return True
+
+    def open_replay(self):
+        # Spielt den Datumsbereich der aktiven Zeitreihen Bar für Bar im Browser ab (über den Chart-Server)
+        active_series = self.hole_aktive_zeitreihen()
+        date_range = self.metadaten['date_range']
+        if len(active_series) == 0 or not date_range['start']:
+            messagebox.showinfo("Info", "Bitte wählen Sie mindestens eine Zeitreihe und einen Datumsbereich aus.")
+            return
+        if not self.starte_chart_server():
+            return
+        try:
+            self.chart_server.starte_replay(self.markt_symbol, [interval for interval, _ in active_series],
+                                            date_range['start'], date_range['end'],
+                                            float(self.config.get('replay_speed', 60)), int(self.config.get('replay_fps', 20)))
+        except ValueError as e:
+            messagebox.showerror("Fehler", str(e))
+            return
+        import webbrowser
+        webbrowser.open(self.chart_server.replay_url())
 
+    def prepare_chart_data(self, active_series, date_range, symbol):
+        # Vorbereiten der Daten für die Charterstellung über den gemeinsamen Lesepfad (TimeSeriesStore):
+        # der Planer wählt je Zeitreihe die feinste Auflösung im Punktebudget, die Intervalle werden parallel
+        # geladen und bereits geladene bzw. vorgeladene Bereiche kommen aus dem In-Memory-Cache
+        active_series = sorted(active_series, key=lambda eintrag: interval_sort_key(eintrag[0]))
+        ergebnisse = self.store.lade_mehrere(symbol, [interval for interval, _ in active_series],
+                                             date_range['start'], date_range['end'],
+                                             resolution=self.aufloesung_modus(), budget=self.punktebudget())
+
+        self.aufloesungen = {interval: plan for interval, (_, plan) in ergebnisse.items() if plan is not None}
+        for plan in self.aufloesungen.values():
+            print(f"{symbol}_{plan['interval']}: {plan['bezeichnung']}")
+        # Das Band aus Hoch/Tief wird nur bei verdichteten Daten gezeichnet (Rohdaten als Linie wie bisher)
+        return [(df if plan is not None and plan['faktor'] > 1 else df[['daytime', 'CLOSE']], interval, color)
+                for interval, color in active_series for df, plan in [ergebnisse[interval]] if df is not None]
+
+    def aufloesung_modus(self):
+        # 'raw', wenn die Rohdaten erzwungen werden, sonst automatische Auflösung
+        return 'raw' if self.rohdaten_var is not None and self.rohdaten_var.get() else 'auto'
+
+    def punktebudget(self):
+        # Punktebudget je Zeitreihe aus der Konfiguration
+        return int(self.config.get('pixel_budget', 2000))
+
+    def nachbarbereich(self, date_range, schritt):
+        # Um 'schritt' Handelstage verschobener Datumsbereich gleicher Länge, None am Rand der Daten
+        handelstage = self.lade_handelstage(self.markt_symbol)
+        if not handelstage:
+            return None
+        links = bisect.bisect_left(handelstage, date_range['start']) + schritt
+        rechts = bisect.bisect_right(handelstage, date_range['end']) - 1 + schritt
+        if links < 0 or rechts >= len(handelstage) or links > rechts:
+            return None
+        return {'start': handelstage[links], 'end': handelstage[rechts]}
+
+    def plane_vorladen(self, active_series, date_range):
+        # Lädt die Nachbarbereiche (nächster, vorheriger, übernächster, ... Tag) im Hintergrund vor
+        auftraege = []
+        for abstand in range(1, int(self.config.get('prefetch_steps', 2)) + 1):
+            for schritt in (abstand, -abstand):
+                bereich = self.nachbarbereich(date_range, schritt)
+                if bereich is not None:
+                    auftraege.extend(self.store.schluessel(self.markt_symbol, interval, bereich['start'], bereich['end'],
+                                                           resolution=self.aufloesung_modus(), budget=self.punktebudget())
+                                     for interval, _ in active_series)
+        self.prefetcher.plane(auftraege)
+
+    def verschiebe_datumsbereich(self, schritt):
+        # Verschiebt den Datumsbereich um einen Handelstag und plottet neu (Buttons neben dem Datumsbereich)
+        if not self.metadaten['date_range']['start'] or not self.metadaten['date_range']['end']:
+            messagebox.showinfo("Info", "Kein Datumsbereich verfügbar. Bitte importieren Sie zuerst Daten.")
+            return
+        bereich = self.nachbarbereich(self.metadaten['date_range'], schritt)
+        if bereich is None:
+            messagebox.showinfo("Info", "Keine weiteren Handelstage in dieser Richtung.")
+            return
+        self.update_date_range(datetime.strptime(bereich['start'], '%Y-%m-%d'),
+                               datetime.strptime(bereich['end'], '%Y-%m-%d'))
+        if self.hole_aktive_zeitreihen():
+            self.update_plot()
+
+    def zeige_aufloesungen(self):
+        # Zeigt an, in welcher Auflösung die Zeitreihen tatsächlich geplottet wurden
+        if self.aufloesung_label is None:
+            return
+        texte = [plan['bezeichnung'] for plan in self.aufloesungen.values()]
+        self.aufloesung_label.config(text="Auflösung: " + "; ".join(texte) if texte else "")
+
+    def trace_namen(self):
+        # Legendennamen mit Hinweis auf verdichtete oder ersetzte Auflösungen, z.B. "M1 (≈M16)"
+        namen = {}
+        for interval, plan in self.aufloesungen.items():
+            if plan['faktor'] > 1:
+                namen[interval] = f"{interval} (≈{intervall_name(plan['minuten'] * 60)})"
+            elif plan['quelle'] != interval:
+                namen[interval] = f"{interval} ({plan['quelle']})"
+        return namen
+
+    def lade_handelstage(self, symbol):
+        # Vereinigung der Handelstage aller Intervalle eines Symbols (aus den Tagesstatistiken bzw. Tagesindizes)
+        if symbol not in self.handelstage_cache:
+            tage = set()
+            statistik = DailyStats()
+            for interval in self.metadaten['available_intervals']:
+                tagesstatistik = statistik.lade(symbol, interval)
+                if tagesstatistik is not None:
+                    tage.update(tagesstatistik['day'].dt.strftime('%Y-%m-%d'))
+                    continue
+                index = DayIndex.lade(symbol, interval)
+                if index is not None:
+                    tage.update(index.handelstage())
+            self.handelstage_cache[symbol] = sorted(tage)
+        return self.handelstage_cache[symbol]
+
+    def prepare_indicator_data(self, active_series, date_range, symbol):
+        # Berechnet die in der Konfiguration hinterlegten Indikatoren (z.B. "sma:20") je aktiver Zeitreihe
+        spezifikationen = self.config.get('indicators', [])
+        if not spezifikationen:
+            return []
+
+        engine = IndicatorEngine()
+        indicator_data_list = []
         for interval, color in active_series:
-            file_name = f"{symbol}_{interval}.parquet"
-            print("Verarbeite Datei:", file_name)
-            file_path = os.path.join("./cache/data/", file_name)
-
-            if os.path.exists(file_path):
-                df = pd.read_parquet(file_path)
-                result_df = df[
-                    (df['DATE'].dt.strftime('%Y-%m-%d') >= datum_von.strftime('%Y-%m-%d')) &
-                    (df['DATE'].dt.strftime('%Y-%m-%d') <= datum_bis.strftime('%Y-%m-%d'))
-                    ]
-                df_subset = result_df[['daytime', 'CLOSE']]
-                chart_data_list.append((df_subset, interval, color))
-            else:
-                print(f"Datei: {file_path} nicht gefunden.")
-
-        return chart_data_list
+            for spezifikation in spezifikationen:
+                try:
+                    df = engine.berechne_bereich(symbol, interval, spezifikation, date_range['start'], date_range['end'])
+                    indicator_data_list.append((df, interval, color, spezifikation))
+                except (FileNotFoundError, ValueError) as e:
+                    print(f"Indikator {spezifikation} für {symbol}_{interval} nicht verfügbar: {e}")
+
+        return indicator_data_list
 
     def get_date_range_text(self):
         # Formatieren des Datumsbereich-Texts
@@ -268,7 +583,7 @@ class UIComponents:
         # Öffnen des Datumsauswahl-Fensters
         date_window = tk.Toplevel(self.master)
         date_window.title("Datumsauswahl")
-        date_window.geometry("270x120")
+        date_window.geometry("270x150")
         date_window.update_idletasks()
         width = date_window.winfo_width()
         height = date_window.winfo_height()
@@ -278,20 +593,116 @@ class UIComponents:
         start_date = datetime.strptime(self.metadaten['date_range']['start'], '%Y-%m-%d').date()
         end_date = datetime.strptime(self.metadaten['date_range']['end'], '%Y-%m-%d').date()
 
+        # Der Auswahlbereich wird auf die vorhandenen Handelstage begrenzt
+        handelstage = self.lade_handelstage(self.markt_symbol)
+        grenzen = {}
+        if handelstage:
+            grenzen = {'mindate': datetime.strptime(handelstage[0], '%Y-%m-%d').date(),
+                       'maxdate': datetime.strptime(handelstage[-1], '%Y-%m-%d').date()}
+
         ttk.Label(date_window, text="Startdatum:").grid(row=0, column=0, padx=5, pady=5)
-        start_picker = DateEntry(date_window, width=12, background='darkblue', foreground='white', date_pattern='yyyy-mm-dd')
+        start_picker = DateEntry(date_window, width=12, background='darkblue', foreground='white', date_pattern='yyyy-mm-dd', **grenzen)
         start_picker.set_date(start_date)
         start_picker.grid(row=0, column=1, columnspan=2, padx=5, pady=5)
 
         ttk.Label(date_window, text="Enddatum:").grid(row=1, column=0, padx=5, pady=5)
-        end_picker = DateEntry(date_window, width=12, background='darkblue', foreground='white', date_pattern='yyyy-mm-dd')
+        end_picker = DateEntry(date_window, width=12, background='darkblue', foreground='white', date_pattern='yyyy-mm-dd', **grenzen)
         end_picker.set_date(end_date)
         end_picker.grid(row=1, column=1, columnspan=2, padx=5, pady=5)
+        # Tage ohne Daten werden im Kalender ausgegraut
+        if handelstage:
+            for picker in (start_picker, end_picker):
+                self.markiere_tage_ohne_daten(picker, handelstage)
         # Buttons
         tk.Button(date_window, text="Bestätigen", bg="green", fg="white", cursor="hand2",
                   command=lambda: self.update_date_range(start_picker.get_date(), end_picker.get_date(), date_window)).grid(row=2, column=1, padx=10)
         tk.Button(date_window, text="Abbrechen", bg="red", fg="white", cursor="hand2", command=date_window.destroy).grid(row=2, column=2, pady=10)
 
+        # Hinweis auf Handelstage und Datenlücken
+        if handelstage:
+            bdays = pd.bdate_range(handelstage[0], handelstage[-1]).strftime('%Y-%m-%d')
+            luecken = len(set(bdays) - set(handelstage))
+            ttk.Label(date_window, text=f"Handelstage: {len(handelstage)} / Lücken: {luecken}").grid(row=3, column=0, columnspan=3, padx=5)
+
+    def markiere_tage_ohne_daten(self, picker, handelstage):
+        # Graut im Kalender eines DateEntry alle Tage ohne Daten zwischen erstem und letztem Handelstag aus
+        kalender = getattr(picker, '_calendar', None)
+        if kalender is None:
+            return
+        vorhanden = set(handelstage)
+        for tag in pd.date_range(handelstage[0], handelstage[-1], freq='D'):
+            if tag.strftime('%Y-%m-%d') not in vorhanden:
+                kalender.calevent_create(tag.date(), "Keine Daten", "keine_daten")
+        kalender.tag_config("keine_daten", background="lightgray", foreground="gray")
+
+    def open_overview(self):
+        # Öffnet die Übersicht aller Zeitreihen mit Kalender-Heatmaps
+        if not self.metadaten['available_intervals']:
+            messagebox.showinfo("Info", "Keine Zeitreihen vorhanden. Bitte importieren Sie zuerst Daten.")
+            return
+        OverviewWindow(self.master, self.plot_dir)
+
+    def open_scanner(self):
+        # Öffnet den Bedingungs-Scanner für das aktuelle Symbol
+        if not self.metadaten['available_intervals']:
+            messagebox.showinfo("Info", "Keine Zeitreihen vorhanden. Bitte importieren Sie zuerst Daten.")
+            return
+        ausdruck = self.scan_markierungen[1] if self.scan_markierungen is not None else None
+        ScannerWindow(self.master, self.markt_symbol, self.store, self.setze_scan_markierungen, ausdruck)
+
+    def setze_scan_markierungen(self, treffer, ausdruck):
+        # Übernimmt die Scanner-Treffer als Markierungen (None entfernt sie) und plottet neu
+        self.scan_markierungen = None if treffer is None else (treffer, ausdruck)
+        if self.hole_aktive_zeitreihen() and self.metadaten['date_range']['start']:
+            self.update_plot()
+
+    def scan_marker_daten(self, date_range):
+        # Scanner-Treffer im Datumsbereich als Markierungen für den Chart
+        if self.scan_markierungen is None:
+            return []
+        treffer, ausdruck = self.scan_markierungen
+        von = pd.Timestamp(date_range['start'])
+        bis = pd.Timestamp(date_range['end']) + pd.Timedelta(days=1)
+        return [(treffer[(treffer['daytime'] >= von) & (treffer['daytime'] < bis)], ausdruck)]
+
+    def wechsle_symbol(self, symbol):
+        # Wechselt das Symbol des Charts; die Auswahl wird in config.json gespeichert
+        if symbol == self.markt_symbol:
+            return
+        self.markt_symbol = symbol
+        self.prefetcher.abbrechen()
+        self.scan_markierungen = None
+        aktualisiere_json(os.path.abspath('./config/config.json'), lambda config: {**config, 'symbol': symbol}, standard={})
+        print(f"Symbol gewechselt: {symbol}")
+        if self.hole_aktive_zeitreihen() and self.metadaten['date_range']['start']:
+            self.update_plot()
+
+    def open_vergleich(self):
+        # Öffnet den Vergleich mehrerer Symbole im aktuellen Datumsbereich
+        symbole = self.store.symbole()
+        if len(symbole) < 2:
+            messagebox.showinfo("Info", "Für den Vergleich werden Zeitreihen von mindestens zwei Symbolen benötigt.")
+            return
+        intervalle = sorted({interval for _, interval in self.store.serien()}, key=interval_sort_key)
+        ComparisonWindow(self.master, self.vergleich, symbole, intervalle, dict(self.metadaten['date_range']),
+                         self.plot_dir, int(self.config.get('comparison_window', 288)))
+
+    def open_export(self):
+        # Öffnet den Export; Voreinstellung sind das aktuelle Symbol und der aktuelle Datumsbereich
+        serien = {}
+        for symbol, interval in self.store.serien():
+            serien.setdefault(symbol, []).append(interval)
+        if not serien:
+            messagebox.showinfo("Info", "Keine Zeitreihen vorhanden. Bitte importieren Sie zuerst Daten.")
+            return
+        serien = {symbol: sorted(intervalle, key=interval_sort_key) for symbol, intervalle in serien.items()}
+        ExportWindow(self.master, self.bulk_export, serien, self.markt_symbol, dict(self.metadaten['date_range']),
+                     os.path.abspath(self.config.get('export_dir', 'exports')), self.config.get('export_format', 'parquet'))
+
+    def open_sql(self):
+        # Öffnet die SQL-Konsole über den Cache
+        SqlWindow(self.master, self.sql, self.plot_dir, os.path.abspath(self.config.get('export_dir', 'exports')))
+
     def aktualisiere_intervalle(self, intervalle):
         # Aktualisiert die Intervall-Checkboxen durch Löschen und Neuerstellen.
         self.config = lade_json(os.path.abspath('./config/config.json'))
@@ -302,6 +713,14 @@ class UIComponents:
             print(f"Farbschemata neu: {self.config_color_schemes}")
 
         self.metadaten['available_intervals'] = intervalle
+        self.handelstage_cache.clear()
+        # Nach einem Import sind aufbereitete und vorgeladene Bereiche veraltet
+        self.prefetcher.abbrechen()
+        self.store.leeren()
+        self.vergleich.cache.leeren()
+        self.volumenprofil.leeren()
+        if self.symbol_auswahl is not None:
+            self.symbol_auswahl.config(values=self.store.symbole())
         # Lösche alle bestehenden Checkboxen
         for cb, _, _ in self.zeitreihen_checkboxen.values():
             cb.destroy()
@@ -335,8 +754,23 @@ class UIComponents:
 
     def update_date_range(self, start_date, end_date, window=None):
         # Aktualisieren des Datumsbereichs und Schließen des Datumsauswahl-Fensters
-        self.metadaten['date_range']['start'] = start_date.strftime('%Y-%m-%d')
-        self.metadaten['date_range']['end'] = end_date.strftime('%Y-%m-%d')
+        start = start_date.strftime('%Y-%m-%d')
+        end = end_date.strftime('%Y-%m-%d')
+
+        # Start und Ende der Datumsauswahl werden auf den nächsten bzw. letzten Handelstag im Bereich gelegt
+        handelstage = self.lade_handelstage(self.markt_symbol) if window is not None else []
+        if handelstage:
+            links = bisect.bisect_left(handelstage, start)
+            rechts = bisect.bisect_right(handelstage, end) - 1
+            if links > rechts:
+                messagebox.showinfo("Info", f"Zwischen {start} und {end} liegen keine Handelstage.")
+                return
+            if (handelstage[links], handelstage[rechts]) != (start, end):
+                print(f"Datumsbereich auf Handelstage angepasst: {handelstage[links]} - {handelstage[rechts]}")
+            start, end = handelstage[links], handelstage[rechts]
+
+        self.metadaten['date_range']['start'] = start
+        self.metadaten['date_range']['end'] = end
         self.date_range_label.config(text=self.get_date_range_text(), font=("Arial", 12, "bold"))
         print(f"Neuer Datumsbereich:{self.markt_symbol} - {self.metadaten['date_range']}")
         if window is not None:
@@ -357,19 +791,11 @@ class UIComponents:
         return [(zr, self.zeitreihen_checkboxen[zr][2]) for zr in self.aktive_zeitreihen]
 
     def update_metaplot(self, hash_value, titel, date_range):
-        # Aktualisiert die Metaplot-Daten in einer JSON-Datei
-        if os.path.exists(self.metaplot_path):
-            with open(self.metaplot_path, "r") as f:
-                metaplot_data = json.load(f)
-        else:
-            metaplot_data = {}
-
-        metaplot_data[hash_value] = {
+        # Aktualisiert die Metaplot-Daten in einer JSON-Datei (Read-Modify-Write unter Sperre)
+        eintrag = {
             "titel": titel,
             "start_date": date_range['start'],
             "end_date": date_range['end'],
             "erstellt_am": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
-
-        with open(self.metaplot_path, "w") as f:
-            json.dump(metaplot_data, f, indent=4)
+        aktualisiere_json(self.metaplot_path, lambda metaplot_data: {**metaplot_data, hash_value: eintrag}, standard={})
@@ -0,0 +1,121 @@
+import math
+import numpy as np
+import pandas as pd
+from modules.RangePrefetcher import BereichsCache
+from modules.TimeSeriesStore import TimeSeriesStore
+
+# Anteil des Volumens im Value Area (um den Point of Control)
+VALUE_AREA_ANTEIL = 0.7
+
+# Anzahl Preisstufen bei automatischer Stufengröße
+ZIEL_STUFEN = 120
+
+
+def stufengroesse(spanne, ziel=ZIEL_STUFEN):
+    # "Runde" Stufengröße (1, 2, 2.5 oder 5 x 10^n), sodass etwa 'ziel' Stufen die Spanne abdecken
+    if not spanne > 0:
+        return 1.0
+    roh = spanne / ziel
+    basis = 10 ** math.floor(math.log10(roh))
+    return next(faktor * basis for faktor in (1, 2, 2.5, 5, 10) if faktor * basis >= roh)
+
+
+def volumen_je_stufe(tief, hoch, volumen, untergrenze, stufe, anzahl):
+    # Verteilt das Volumen jedes Bars gleichmäßig auf die Preisstufen zwischen Tief und Hoch.
+    # Vektorisiert über ein Differenzen-Array: +Anteil an der ersten, -Anteil nach der letzten Stufe, dann cumsum
+    erste = np.clip(np.floor((tief - untergrenze) / stufe).astype('int64'), 0, anzahl - 1)
+    letzte = np.clip(np.floor((hoch - untergrenze) / stufe).astype('int64'), erste, anzahl - 1)
+    anteil = volumen / (letzte - erste + 1)
+    differenz = (np.bincount(erste, weights=anteil, minlength=anzahl + 1)
+                 - np.bincount(letzte + 1, weights=anteil, minlength=anzahl + 1))
+    return np.cumsum(differenz[:anzahl])
+
+
+class VolumeProfile:
+    """
+        Volumenprofil (Volume at Price) und Tick-Volumen-/Spread-Statistiken aus dem Parquet-Cache.
+
+        Das Profil verteilt das Volumen jedes Bars gleichmäßig auf die Preisstufen zwischen Tief und
+        Hoch (vektorisiert, ohne Schleife über die Bars) und bestimmt den Point of Control (Stufe mit
+        dem höchsten Volumen) sowie den Value Area (70 % des Volumens). Als Volumen dient VOL, bei
+        MetaTrader-Exporten ohne echtes Volumen (VOL = 0) das Tick-Volumen TICKVOL.
+        Die Sitzungsstatistik fasst Tick-Volumen und Spread je Handelstag oder je Stunde zusammen.
+        Ergebnisse werden je Bereich und Stufengröße im Speicher gehalten (LRU); der Schlüssel enthält
+        den Datenstand der Zeitreihe, ein Import macht ihn ungültig.
+
+        Methoden:
+            profil(symbol, interval, start, end, stufe): Profil als DataFrame (preis, volumen) und Kennzahlen.
+            sitzungsstatistik(symbol, interval, start, end, frequenz): Statistik je Sitzung ('D') oder Stunde ('h').
+        """
+
+    def __init__(self, store=None, cache_mb=64):
+        # Initialisierung mit dem gemeinsamen Lesepfad und der Größe des Ergebnis-Caches
+        self.store = store or TimeSeriesStore()
+        self.cache = BereichsCache(cache_mb)
+
+    def profil(self, symbol, interval, start=None, end=None, stufe=None):
+        # Rückgabe: (DataFrame mit preis (Stufenmitte) und volumen, Kennzahlen) oder (None, None) ohne Daten.
+        # stufe: Preisabstand der Stufen; None oder 0 wählt eine runde Stufengröße für etwa 120 Stufen
+        schluessel = ('profil', symbol, interval, start, end, stufe or None, self.store.stand(symbol, interval))
+        ergebnis = self.cache.hole(schluessel)
+        if ergebnis is None:
+            ergebnis = self.berechne_profil(symbol, interval, start, end, stufe)
+            self.cache.lege_ab(schluessel, ergebnis)
+        return ergebnis
+
+    def berechne_profil(self, symbol, interval, start, end, stufe):
+        # Profil aus den Rohdaten des Bereichs
+        df = self.store.query(symbol, interval, start, end, columns=['HIGH', 'LOW', 'TICKVOL', 'VOL'], resolution='raw')
+        if df is None:
+            return None, None
+        df = df.dropna(subset=['HIGH', 'LOW'])
+        if df.empty:
+            return None, None
+        gewicht = 'VOL' if df['VOL'].fillna(0).sum() > 0 else 'TICKVOL'
+        volumen = df[gewicht].fillna(0).to_numpy(dtype='float64')
+        tief, hoch = df['LOW'].to_numpy(dtype='float64'), df['HIGH'].to_numpy(dtype='float64')
+
+        stufe = float(stufe) if stufe else stufengroesse(hoch.max() - tief.min())
+        untergrenze = math.floor(tief.min() / stufe) * stufe
+        anzahl = int(math.floor((hoch.max() - untergrenze) / stufe)) + 1
+        werte = volumen_je_stufe(tief, hoch, volumen, untergrenze, stufe, anzahl)
+        profil = pd.DataFrame({'preis': untergrenze + (np.arange(anzahl) + 0.5) * stufe, 'volumen': werte})
+
+        # Value Area: Stufen mit dem höchsten Volumen, bis 70 % des Gesamtvolumens erreicht sind
+        reihenfolge = np.argsort(werte)[::-1]
+        gesamt = werte.sum()
+        anzahl_va = int(np.searchsorted(np.cumsum(werte[reihenfolge]), VALUE_AREA_ANTEIL * gesamt)) + 1
+        value_area = profil['preis'].to_numpy()[reihenfolge[:anzahl_va]]
+        kennzahlen = {'poc': float(profil['preis'].iloc[int(reihenfolge[0])]), 'va_tief': float(value_area.min()),
+                      'va_hoch': float(value_area.max()), 'stufe': stufe, 'gewicht': gewicht, 'bars': len(df),
+                      'volumen': float(gesamt)}
+        return profil, kennzahlen
+
+    def sitzungsstatistik(self, symbol, interval, start=None, end=None, frequenz='D'):
+        # Tick-Volumen, Volumen, Spread und Spanne je Sitzung (frequenz 'D') bzw. je Stunde ('h').
+        # Spalten: daytime (Beginn), bars, ticks, ticks_je_bar, volumen, spread_mittel, spread_max, spanne
+        schluessel = ('sitzungen', symbol, interval, start, end, frequenz, self.store.stand(symbol, interval))
+        ergebnis = self.cache.hole(schluessel)
+        if ergebnis is None:
+            ergebnis = self.berechne_sitzungen(symbol, interval, start, end, frequenz)
+            self.cache.lege_ab(schluessel, ergebnis)
+        return ergebnis
+
+    def berechne_sitzungen(self, symbol, interval, start, end, frequenz):
+        # Gruppierung über die abgerundeten Zeitstempel (vektorisiert)
+        df = self.store.query(symbol, interval, start, end, columns=['daytime', 'HIGH', 'LOW', 'TICKVOL', 'VOL', 'SPREAD'],
+                              resolution='raw')
+        if df is None:
+            return None
+        gruppen = df.groupby(df['daytime'].dt.floor(frequenz), sort=True)
+        statistik = gruppen.agg(bars=('TICKVOL', 'size'), ticks=('TICKVOL', 'sum'), volumen=('VOL', 'sum'),
+                                spread_mittel=('SPREAD', 'mean'), spread_max=('SPREAD', 'max'),
+                                hoch=('HIGH', 'max'), tief=('LOW', 'min'))
+        statistik['ticks_je_bar'] = statistik['ticks'] / statistik['bars']
+        statistik['spanne'] = statistik['hoch'] - statistik['tief']
+        statistik = statistik.drop(columns=['hoch', 'tief']).rename_axis('daytime').reset_index()
+        return statistik[['daytime', 'bars', 'ticks', 'ticks_je_bar', 'volumen', 'spread_mittel', 'spread_max', 'spanne']]
+
+    def leeren(self):
+        # Leert den Ergebnis-Cache
+        self.cache.leeren()